@@ -7,6 +7,14 @@ from .model_recognizer import ModelRecognizer, PatternBasedRecognizer
 from .program_matcher import ProgramMatcher, AdvancedProgramMatcher, MatchResult
 from .calculation_engine import CalculationEngine, AdvancedCalculationEngine, CalculationResult
 from .nc_communicator import NCCommunicator, AdvancedNCCommunicator, NCCommand, NCResponse
+from .command_queue import CommandQueue
+from .async_nc_communicator import AsyncNCCommunicator
+from .connection_manager import NCConnectionManager
+from .latency_histogram import LatencyHistogram
+from .callback_dispatcher import CallbackDispatcher
+from .read_cache import MacroReadCache
+from .status_poller import StatusPoller
+from .scan_bundle import ScanBundle, ScanBundleCache
 
 __all__ = [
     # 型号识别器
@@ -27,5 +35,16 @@ __all__ = [
     "NCCommunicator",
     "AdvancedNCCommunicator",
     "NCCommand", 
-    "NCResponse"
+    "NCResponse",
+    "CommandQueue",
+    "AsyncNCCommunicator",
+    "NCConnectionManager",
+    "LatencyHistogram",
+    "CallbackDispatcher",
+    "MacroReadCache",
+    "StatusPoller",
+    
+    # 扫描包缓存
+    "ScanBundle",
+    "ScanBundleCache"
 ]
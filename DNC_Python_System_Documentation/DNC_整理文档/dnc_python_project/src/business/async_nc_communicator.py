@@ -0,0 +1,314 @@
+"""
+异步NC通信器
+基于asyncio流的网络NC通信，一个事件循环即可驱动多台设备的连接
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from collections import deque
+from typing import Dict, Any, Optional, Deque
+
+from .nc_communicator import NCCommunicator, NCCommand, NCResponse
+from ..communication.framing import FrameReader, FrameError
+
+
+class AsyncNCCommunicator:
+    """异步NC通信器
+
+    命令可以并发发出，每个命令的响应通过命令ID与等待中的future对应：
+    tagged模式下请求和应答行都以命令ID开头，设备可以乱序应答；
+    否则设备按请求顺序应答，按发送顺序对应命令ID。
+    """
+
+    READ_CHUNK_SIZE = 65536
+
+    def __init__(self, config_manager: Any = None, host: Optional[str] = None,
+                 port: Optional[int] = None, timeout: Optional[float] = None,
+                 tagged: bool = False):
+        """
+        初始化异步NC通信器
+
+        Args:
+            config_manager: 配置管理器（未指定host/port/timeout时从com_config读取）
+            host: 设备地址
+            port: 设备端口
+            timeout: 默认命令超时时间（秒）
+            tagged: 请求和应答是否带命令ID前缀
+        """
+        self.logger = logging.getLogger(__name__)
+
+        com_config = getattr(config_manager, "com_config", None)
+        self.host = host if host is not None else getattr(com_config, "ip_address", "127.0.0.1")
+        self.port = port if port is not None else getattr(com_config, "port", 0)
+        self.timeout = timeout if timeout is not None else getattr(com_config, "timeout", 5.0)
+        self.tagged = tagged
+
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._write_lock: Optional[asyncio.Lock] = None
+
+        # 等待响应的命令：命令ID -> future；非tagged模式下按发送顺序记录命令ID
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._order: Deque[str] = deque()
+        self._id_counter = itertools.count(1)
+
+        # 统计信息
+        self._stats = {
+            "sent": 0,
+            "completed": 0,
+            "timeouts": 0,
+            "errors": 0,
+            "max_in_flight": 0
+        }
+
+    async def connect(self) -> bool:
+        """
+        连接到NC设备
+
+        Returns:
+            bool: 连接是否成功
+        """
+        if self.is_connected():
+            self.logger.warning("已经连接到NC设备")
+            return True
+
+        try:
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), self.timeout
+            )
+        except (OSError, asyncio.TimeoutError) as e:
+            self.logger.error(f"网络连接异常: {self.host}:{self.port}, {e}")
+            return False
+
+        self._write_lock = asyncio.Lock()
+        self._reader_task = asyncio.ensure_future(self._read_loop())
+        self.logger.info(f"网络连接成功: {self.host}:{self.port}")
+        return True
+
+    async def disconnect(self) -> bool:
+        """
+        断开与NC设备的连接
+
+        Returns:
+            bool: 断开是否成功
+        """
+        if self._writer is None:
+            return True
+
+        writer = self._writer
+        self._writer = None
+        try:
+            writer.close()
+            await writer.wait_closed()
+        except OSError as e:
+            self.logger.error(f"NC设备断开连接异常: {e}")
+
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            try:
+                await self._reader_task
+            except asyncio.CancelledError:
+                pass
+            self._reader_task = None
+
+        self._fail_pending("连接已断开")
+        self.logger.info("NC设备断开连接成功")
+        return True
+
+    def is_connected(self) -> bool:
+        """
+        检查是否连接到NC设备
+
+        Returns:
+            bool: 是否连接
+        """
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def send_command(self, command: NCCommand) -> NCResponse:
+        """
+        发送NC命令并等待响应
+
+        Args:
+            command: NC命令
+
+        Returns:
+            NCResponse: 命令响应（超时或连接断开时success为False）
+        """
+        if not self.is_connected():
+            return NCResponse(command.command_id, False, None, "未连接到NC设备")
+
+        future = asyncio.get_running_loop().create_future()
+        frame = NCCommunicator._build_command_data(command)
+        if self.tagged:
+            frame = f"{command.command_id} {frame}"
+
+        start_time = time.time()
+        async with self._write_lock:
+            # 登记和写入在同一把锁内完成，保证应答顺序与登记顺序一致
+            self._pending[command.command_id] = future
+            if not self.tagged:
+                self._order.append(command.command_id)
+            self._stats["sent"] += 1
+            self._stats["max_in_flight"] = max(self._stats["max_in_flight"], len(self._pending))
+            try:
+                self._writer.write(frame.encode())
+                await self._writer.drain()
+            except OSError as e:
+                self._pending.pop(command.command_id, None)
+                if not self.tagged:
+                    self._order.pop()
+                self._stats["errors"] += 1
+                return NCResponse(command.command_id, False, None, f"发送失败: {e}")
+
+        try:
+            data = await asyncio.wait_for(future, command.timeout or self.timeout)
+        except asyncio.TimeoutError:
+            # 非tagged模式下保留顺序记录，迟到的应答到达时丢弃
+            self._pending.pop(command.command_id, None)
+            self._stats["timeouts"] += 1
+            self.logger.warning(f"NC命令超时: {command.command_id}")
+            return NCResponse(command.command_id, False, None, "命令超时")
+        except ConnectionError as e:
+            self._stats["errors"] += 1
+            return NCResponse(command.command_id, False, None, str(e))
+
+        self._stats["completed"] += 1
+        return NCResponse(
+            command_id=command.command_id,
+            success=True,
+            data=data,
+            response_time=time.time() - start_time
+        )
+
+    async def read_data(self, address: str, length: int = 1, timeout: Optional[float] = None) -> NCResponse:
+        """
+        读取NC数据
+
+        Args:
+            address: 数据地址
+            length: 数据长度
+            timeout: 超时时间（秒）
+
+        Returns:
+            NCResponse: 读取响应
+        """
+        return await self.send_command(self._make_command("read", {"address": address, "length": length}, timeout))
+
+    async def write_data(self, address: str, data: Any, timeout: Optional[float] = None) -> NCResponse:
+        """
+        写入NC数据
+
+        Args:
+            address: 数据地址
+            data: 要写入的数据
+            timeout: 超时时间（秒）
+
+        Returns:
+            NCResponse: 写入响应
+        """
+        return await self.send_command(self._make_command("write", {"address": address, "data": data}, timeout))
+
+    async def execute_program(self, program_no: int, parameters: Dict[str, Any] = None,
+                              timeout: Optional[float] = None) -> NCResponse:
+        """
+        执行加工程序
+
+        Args:
+            program_no: 程序编号
+            parameters: 程序参数
+            timeout: 超时时间（秒），默认为普通命令的2倍
+
+        Returns:
+            NCResponse: 执行响应
+        """
+        command = self._make_command(
+            "execute", {"program_no": program_no, "parameters": parameters or {}},
+            timeout if timeout is not None else self.timeout * 2
+        )
+        return await self.send_command(command)
+
+    async def query_status(self, timeout: Optional[float] = None) -> NCResponse:
+        """
+        查询NC设备状态
+
+        Args:
+            timeout: 超时时间（秒）
+
+        Returns:
+            NCResponse: 状态查询响应
+        """
+        return await self.send_command(self._make_command("query", {"query_type": "status"}, timeout))
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        获取统计信息
+
+        Returns:
+            Dict[str, Any]: 发送、完成、超时数量和当前未完成的命令数
+        """
+        stats = dict(self._stats)
+        stats["in_flight"] = len(self._pending)
+        return stats
+
+    def _make_command(self, command_type: str, data: Dict[str, Any], timeout: Optional[float]) -> NCCommand:
+        """创建带唯一命令ID的NC命令"""
+        return NCCommand(
+            command_id=f"{command_type}_{next(self._id_counter)}",
+            command_type=command_type,
+            data=data,
+            parameters={},
+            timeout=timeout if timeout is not None else self.timeout
+        )
+
+    async def _read_loop(self) -> None:
+        """
+        读取应答行并完成对应命令的future
+
+        应答经FrameReader分帧（与同步通信器相同的帧长度上限）；连接关闭、
+        读取失败或帧超长时结束所有等待中的命令并关闭连接。
+        """
+        frame_reader = FrameReader()
+        try:
+            while True:
+                data = await self._reader.read(self.READ_CHUNK_SIZE)
+                if not data:
+                    self.logger.warning(f"NC设备关闭了连接: {self.host}:{self.port}")
+                    break
+                for frame in frame_reader.feed(data):
+                    self._dispatch_response(frame.decode(errors="replace").strip())
+        except (OSError, FrameError) as e:
+            self.logger.error(f"读取NC应答失败: {e}")
+        finally:
+            self._fail_pending("连接已断开")
+            if self._writer is not None:
+                self._writer.close()
+
+    def _dispatch_response(self, text: str) -> None:
+        """
+        将应答交给对应的命令
+
+        Args:
+            text: 应答行
+        """
+        if self.tagged:
+            command_id, _, text = text.partition(" ")
+        elif self._order:
+            command_id = self._order.popleft()
+        else:
+            self.logger.warning(f"收到无对应命令的应答: {text}")
+            return
+
+        future = self._pending.pop(command_id, None)
+        if future is not None and not future.done():
+            future.set_result(text)
+
+    def _fail_pending(self, message: str) -> None:
+        """以连接错误结束所有等待中的命令"""
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError(message))
+        self._pending.clear()
+        self._order.clear()
@@ -23,6 +23,23 @@ class CalculationStep:
     description: str
 
 
+@dataclass
+class CalculationPlan:
+    """预编译的计算计划（按程序筛选并解析好的load/define/calc行）"""
+    program_no: int
+    load_steps: List[Tuple[str, str, Any]]
+    define_rows: List[Tuple[str, str, str, str, str, str]]
+    calc_rows: List[Tuple[str, List[str]]]
+    
+    @property
+    def macros(self) -> List[str]:
+        """计划中涉及的宏变量名"""
+        names = [macro for macro, _, _ in self.load_steps]
+        names.extend(row[0] for row in self.define_rows)
+        names.extend(calc_name for calc_name, _ in self.calc_rows)
+        return list(dict.fromkeys(names))
+
+
 @dataclass
 class CalculationResult:
     """计算结果"""
@@ -93,6 +110,50 @@ class CalculationEngine:
         Returns:
             CalculationResult: 计算结果
         """
+        return self.execute_plan(self.compile_plan(program_no), input_data)
+    
+    def compile_plan(self, program_no: int) -> CalculationPlan:
+        """
+        预编译计算计划：筛选程序相关的加载行并解析值，拆分定义行和计算行
+        
+        Args:
+            program_no: 程序编号
+            
+        Returns:
+            CalculationPlan: 计算计划，可重复执行
+        """
+        load_steps = []
+        for row in self.load_data or []:
+            if len(row) >= 3:
+                try:
+                    # 只处理当前程序相关的加载操作
+                    if int(row[0]) == program_no:
+                        load_steps.append((row[1], row[2], self._parse_value(row[2])))
+                except (ValueError, IndexError) as e:
+                    self.logger.warning(f"加载操作解析失败: {row}, 错误: {e}")
+        
+        define_rows = [tuple(row[:6]) for row in self.define_data or [] if len(row) >= 6]
+        calc_rows = [(row[0], list(row[1:])) for row in self.calc_data or [] if len(row) >= 2]
+        
+        return CalculationPlan(
+            program_no=program_no,
+            load_steps=load_steps,
+            define_rows=define_rows,
+            calc_rows=calc_rows
+        )
+    
+    def execute_plan(self, plan: CalculationPlan, input_data: Dict[str, Any] = None) -> CalculationResult:
+        """
+        执行计算计划
+        
+        Args:
+            plan: 计算计划
+            input_data: 输入数据
+            
+        Returns:
+            CalculationResult: 计算结果
+        """
+        program_no = plan.program_no
         try:
             self.logger.info(f"开始计算参数，程序: {program_no}")
             
@@ -106,16 +167,13 @@ class CalculationEngine:
             calculation_steps = []
             
             # 执行加载操作
-            load_steps = self._execute_load_operations(program_no)
-            calculation_steps.extend(load_steps)
+            calculation_steps.extend(self._run_load_steps(plan.load_steps))
             
             # 执行定义操作
-            define_steps = self._execute_define_operations(program_no)
-            calculation_steps.extend(define_steps)
+            calculation_steps.extend(self._run_define_rows(plan.define_rows))
             
             # 执行计算操作
-            calc_steps = self._execute_calc_operations(program_no)
-            calculation_steps.extend(calc_steps)
+            calculation_steps.extend(self._run_calc_rows(plan.calc_rows))
             
             # 构建结果
             result = CalculationResult(
@@ -148,37 +206,32 @@ class CalculationEngine:
         Returns:
             List[CalculationStep]: 计算步骤列表
         """
-        steps = []
+        return self._run_load_steps(self.compile_plan(program_no).load_steps)
+    
+    def _run_load_steps(self, load_steps: List[Tuple[str, str, Any]]) -> List[CalculationStep]:
+        """
+        执行预解析的加载步骤
         
-        if not self.load_data:
-            return steps
+        Args:
+            load_steps: (宏变量, 原始值, 解析后的值) 列表
+            
+        Returns:
+            List[CalculationStep]: 计算步骤列表
+        """
+        steps = []
         
-        for row in self.load_data:
-            if len(row) >= 3:
-                try:
-                    load_no = int(row[0])
-                    macro = row[1]
-                    value = row[2]
-                    
-                    # 只处理当前程序相关的加载操作
-                    if load_no == program_no:
-                        # 解析值
-                        parsed_value = self._parse_value(value)
-                        
-                        # 设置变量
-                        self.variables[macro] = parsed_value
-                        
-                        step = CalculationStep(
-                            step_no=len(steps) + 1,
-                            operation="LOAD",
-                            operands=[macro, value],
-                            result=parsed_value,
-                            description=f"加载变量 {macro} = {value}"
-                        )
-                        steps.append(step)
-                        
-                except (ValueError, IndexError) as e:
-                    self.logger.warning(f"加载操作解析失败: {row}, 错误: {e}")
+        for macro, value, parsed_value in load_steps:
+            # 设置变量
+            self.variables[macro] = parsed_value
+            
+            step = CalculationStep(
+                step_no=len(steps) + 1,
+                operation="LOAD",
+                operands=[macro, value],
+                result=parsed_value,
+                description=f"加载变量 {macro} = {value}"
+            )
+            steps.append(step)
         
         return steps
     
@@ -192,51 +245,52 @@ class CalculationEngine:
         Returns:
             List[CalculationStep]: 计算步骤列表
         """
-        steps = []
+        return self._run_define_rows(self.compile_plan(program_no).define_rows)
+    
+    def _run_define_rows(self, define_rows: List[Tuple[str, ...]]) -> List[CalculationStep]:
+        """
+        执行定义行
         
-        if not self.define_data:
-            return steps
+        Args:
+            define_rows: (定义名, 搜索字符串, 替换前, 替换后, 值变更, 计算名) 列表
+            
+        Returns:
+            List[CalculationStep]: 计算步骤列表
+        """
+        steps = []
         
-        for row in self.define_data:
-            if len(row) >= 6:
-                try:
-                    define_name = row[0]
-                    search_str = row[1]
-                    before_str = row[2]
-                    after_str = row[3]
-                    chng_value = row[4]
-                    calc_name = row[5]
+        for define_name, search_str, before_str, after_str, chng_value, calc_name in define_rows:
+            try:
+                # 查找匹配的字符串
+                matched_value = self._find_matching_value(search_str)
+                if matched_value is not None:
+                    # 执行字符串替换
+                    processed_value = self._process_string_replacement(
+                        matched_value, before_str, after_str
+                    )
                     
-                    # 查找匹配的字符串
-                    matched_value = self._find_matching_value(search_str)
-                    if matched_value is not None:
-                        # 执行字符串替换
-                        processed_value = self._process_string_replacement(
-                            matched_value, before_str, after_str
-                        )
-                        
-                        # 执行值变更
-                        if chng_value:
-                            processed_value = self._apply_value_change(processed_value, chng_value)
-                        
-                        # 执行计算
-                        if calc_name:
-                            processed_value = self._execute_calculation(processed_value, calc_name)
-                        
-                        # 设置定义变量
-                        self.variables[define_name] = processed_value
-                        
-                        step = CalculationStep(
-                            step_no=len(steps) + 1,
-                            operation="DEFINE",
-                            operands=[define_name, search_str, before_str, after_str],
-                            result=processed_value,
-                            description=f"定义变量 {define_name} = {processed_value}"
-                        )
-                        steps.append(step)
-                        
-                except (ValueError, IndexError) as e:
-                    self.logger.warning(f"定义操作解析失败: {row}, 错误: {e}")
+                    # 执行值变更
+                    if chng_value:
+                        processed_value = self._apply_value_change(processed_value, chng_value)
+                    
+                    # 执行计算
+                    if calc_name:
+                        processed_value = self._execute_calculation(processed_value, calc_name)
+                    
+                    # 设置定义变量
+                    self.variables[define_name] = processed_value
+                    
+                    step = CalculationStep(
+                        step_no=len(steps) + 1,
+                        operation="DEFINE",
+                        operands=[define_name, search_str, before_str, after_str],
+                        result=processed_value,
+                        description=f"定义变量 {define_name} = {processed_value}"
+                    )
+                    steps.append(step)
+                    
+            except (ValueError, IndexError) as e:
+                self.logger.warning(f"定义操作解析失败: {define_name}, 错误: {e}")
         
         return steps
     
@@ -250,37 +304,42 @@ class CalculationEngine:
         Returns:
             List[CalculationStep]: 计算步骤列表
         """
-        steps = []
+        return self._run_calc_rows(self.compile_plan(program_no).calc_rows)
+    
+    def _run_calc_rows(self, calc_rows: List[Tuple[str, List[str]]]) -> List[CalculationStep]:
+        """
+        执行计算行
         
-        if not self.calc_data:
-            return steps
+        Args:
+            calc_rows: (计算名, 表达式部分) 列表
+            
+        Returns:
+            List[CalculationStep]: 计算步骤列表
+        """
+        steps = []
         
-        for row in self.calc_data:
-            if len(row) >= 2:
-                try:
-                    calc_name = row[0]
-                    expression_parts = row[1:]
+        for calc_name, expression_parts in calc_rows:
+            try:
+                # 构建表达式
+                expression = self._build_expression(expression_parts)
+                if expression:
+                    # 计算表达式
+                    result = self._evaluate_expression(expression)
                     
-                    # 构建表达式
-                    expression = self._build_expression(expression_parts)
-                    if expression:
-                        # 计算表达式
-                        result = self._evaluate_expression(expression)
-                        
-                        # 设置计算变量
-                        self.variables[calc_name] = result
-                        
-                        step = CalculationStep(
-                            step_no=len(steps) + 1,
-                            operation="CALC",
-                            operands=[calc_name] + expression_parts,
-                            result=result,
-                            description=f"计算 {calc_name} = {expression} = {result}"
-                        )
-                        steps.append(step)
-                        
-                except (ValueError, IndexError) as e:
-                    self.logger.warning(f"计算操作解析失败: {row}, 错误: {e}")
+                    # 设置计算变量
+                    self.variables[calc_name] = result
+                    
+                    step = CalculationStep(
+                        step_no=len(steps) + 1,
+                        operation="CALC",
+                        operands=[calc_name] + expression_parts,
+                        result=result,
+                        description=f"计算 {calc_name} = {expression} = {result}"
+                    )
+                    steps.append(step)
+                    
+            except (ValueError, IndexError) as e:
+                self.logger.warning(f"计算操作解析失败: {calc_name}, 错误: {e}")
         
         return steps
     
@@ -0,0 +1,220 @@
+"""
+回调分发器
+在独立线程中执行响应和状态回调，避免慢回调阻塞NC通信线程
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Dict, Any, Callable, Optional
+
+
+# 队列满时的处理策略
+OVERFLOW_DROP_OLDEST = "drop_oldest"  # 丢弃最早的待执行回调
+OVERFLOW_DROP_NEWEST = "drop_newest"  # 丢弃新提交的回调
+OVERFLOW_BLOCK = "block"  # 等待队列空出位置（最长block_timeout秒，超时后丢弃）
+
+_STOP = object()
+
+
+class CallbackDispatcher:
+    """回调分发器
+
+    回调按提交顺序在单个工作线程中执行；队列有界，队列满时按溢出策略处理。
+    执行时间超过slow_threshold的回调会记录警告和耗时。
+    """
+
+    def __init__(self, max_queue_size: int = 1000, overflow_policy: str = OVERFLOW_DROP_OLDEST,
+                 slow_threshold: float = 0.1, block_timeout: float = 1.0, name: str = "NCCallback"):
+        """
+        初始化回调分发器
+
+        Args:
+            max_queue_size: 待执行回调的最大数量
+            overflow_policy: 队列满时的处理策略
+            slow_threshold: 慢回调阈值（秒）
+            block_timeout: block策略的最长等待时间（秒）
+            name: 工作线程名称
+        """
+        if overflow_policy not in (OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST, OVERFLOW_BLOCK):
+            raise ValueError(f"不支持的溢出策略: {overflow_policy}")
+
+        self.overflow_policy = overflow_policy
+        self.slow_threshold = slow_threshold
+        self.block_timeout = block_timeout
+        self.name = name
+        self.logger = logging.getLogger(__name__)
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, max_queue_size))
+        self._thread: Optional[threading.Thread] = None
+        # 已收到停止标记但可能仍在执行剩余回调的工作线程
+        self._stopping: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        # 统计信息
+        self._stats = {
+            "submitted": 0,
+            "executed": 0,
+            "dropped": 0,
+            "failed": 0,
+            "slow_callbacks": 0,
+            "max_callback_time": 0.0,
+            "total_callback_time": 0.0,
+            "max_queue_depth": 0
+        }
+        self._slowest: Optional[Dict[str, Any]] = None
+
+    def submit(self, callback: Callable, *args: Any) -> bool:
+        """
+        提交回调
+
+        Args:
+            callback: 回调函数
+            *args: 回调参数
+
+        Returns:
+            bool: 是否已进入队列（因溢出被丢弃时为False）
+        """
+        self._ensure_started()
+        item = (callback, args, time.time())
+        with self._lock:
+            self._stats["submitted"] += 1
+
+        if self.overflow_policy == OVERFLOW_BLOCK:
+            try:
+                self._queue.put(item, timeout=self.block_timeout)
+            except queue.Full:
+                return self._dropped(callback)
+        else:
+            while True:
+                try:
+                    self._queue.put_nowait(item)
+                    break
+                except queue.Full:
+                    if self.overflow_policy == OVERFLOW_DROP_NEWEST:
+                        return self._dropped(callback)
+                    try:
+                        oldest = self._queue.get_nowait()
+                    except queue.Empty:
+                        continue
+                    self._queue.task_done()
+                    self._dropped(oldest[0])
+
+        with self._lock:
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], self._queue.qsize())
+        return True
+
+    def shutdown(self, wait: bool = True, timeout: Optional[float] = 5.0) -> None:
+        """
+        停止工作线程（已提交的回调执行完毕后退出，之后提交时等待其退出再自动重新启动）
+
+        Args:
+            wait: 是否等待工作线程结束
+            timeout: 最长等待时间（秒）
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is not None:
+                self._stopping = thread
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        if wait and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待已提交的回调全部执行完毕
+
+        Args:
+            timeout: 最长等待时间（秒）
+
+        Returns:
+            bool: 是否已全部执行
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.time() > deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        获取统计信息
+
+        Returns:
+            Dict[str, Any]: 提交、执行、丢弃数量，慢回调次数和耗时
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["slowest_callback"] = dict(self._slowest) if self._slowest else None
+        stats["queue_depth"] = self._queue.qsize()
+        executed = stats["executed"]
+        stats["average_callback_time"] = stats.pop("total_callback_time") / executed if executed else 0.0
+        return stats
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            stopping = self._stopping
+        # 等待旧的工作线程取走停止标记后再启动新线程，避免两个线程同时取回调而打乱顺序
+        # （在锁外等待：旧线程执行回调后需要获取锁记录统计）
+        if stopping is not None and stopping is not threading.current_thread():
+            stopping.join()
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                if self._stopping is stopping:
+                    self._stopping = None
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _dropped(self, callback: Callable) -> bool:
+        with self._lock:
+            self._stats["dropped"] += 1
+        self.logger.warning(f"回调队列已满，丢弃回调: {getattr(callback, '__name__', callback)}")
+        return False
+
+    def _run(self) -> None:
+        """工作线程主体"""
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    return
+                self._execute(*item)
+            finally:
+                self._queue.task_done()
+
+    def _execute(self, callback: Callable, args: tuple, submitted_at: float) -> None:
+        """执行回调并记录耗时"""
+        start_time = time.time()
+        try:
+            callback(*args)
+            failed = False
+        except Exception as e:
+            failed = True
+            self.logger.error(f"回调函数执行失败: {e}")
+        elapsed = time.time() - start_time
+
+        with self._lock:
+            self._stats["executed"] += 1
+            self._stats["failed"] += failed
+            self._stats["total_callback_time"] += elapsed
+            self._stats["max_callback_time"] = max(self._stats["max_callback_time"], elapsed)
+            if elapsed >= self.slow_threshold:
+                self._stats["slow_callbacks"] += 1
+                if self._slowest is None or elapsed > self._slowest["time"]:
+                    self._slowest = {
+                        "callback": getattr(callback, "__qualname__", repr(callback)),
+                        "time": elapsed,
+                        "queued_time": start_time - submitted_at
+                    }
+
+        if elapsed >= self.slow_threshold:
+            self.logger.warning(
+                f"慢回调: {getattr(callback, '__qualname__', callback)} 耗时 {elapsed:.3f}s, "
+                f"排队 {start_time - submitted_at:.3f}s"
+            )
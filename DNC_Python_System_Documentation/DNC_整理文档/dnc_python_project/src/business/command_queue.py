@@ -0,0 +1,279 @@
+"""
+NC命令队列
+带优先级和截止时间的阻塞队列，命令入队时立即唤醒通信线程，可合并重复的写入和查询
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, List, Optional, Tuple
+
+
+# 命令优先级（数值越小越先处理）
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 10
+PRIORITY_LOW = 20
+
+# 各命令类型的默认优先级：参数写入和程序执行优先于数据读取，状态查询最后
+DEFAULT_PRIORITIES = {
+    "write": PRIORITY_HIGH,
+    "write_bulk": PRIORITY_HIGH,
+    "execute": PRIORITY_HIGH,
+    "read": PRIORITY_NORMAL,
+    "query": PRIORITY_LOW,
+}
+
+
+class CommandQueue:
+    """NC命令优先级队列
+
+    同优先级的命令按入队顺序处理；超过截止时间的命令在出队时
+    单独返回，由调用方以超时结果完成，不再发送到设备。
+
+    开启合并时：
+    - 写入同一地址的命令在队列中只保留最后一条（占用最早那条的位置），
+      被取代的命令由put()返回，由调用方以"已合并"结果完成；
+    - 相同的读取和状态查询只发送一次，后入队的命令由take_merged()取出，共享同一个结果；
+    - 程序执行等其他命令之前入队的命令不再与之后的命令合并，写入某地址后不再合并
+      之前对该地址的读取，保证设备上的执行顺序不变。
+    """
+
+    def __init__(self, max_wait_samples: int = 1000, coalesce: bool = False):
+        """
+        初始化命令队列
+
+        Args:
+            max_wait_samples: 保留的等待时间样本数量
+            coalesce: 是否合并重复的写入和查询
+        """
+        self.coalesce = coalesce
+        self._heap: List[list] = []  # [优先级, 序号, 入队时间, 命令]
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._wake_pending = False
+
+        # 合并：合并键 -> 队列中的条目；命令ID -> 合并到该命令的相同查询
+        self._pending: Dict[tuple, list] = {}
+        self._merged: Dict[str, List[Any]] = {}
+
+        # 统计信息
+        self._enqueued = 0
+        self._dequeued = 0
+        self._expired = 0
+        self._max_depth = 0
+        self._wait_times: deque = deque(maxlen=max(1, max_wait_samples))
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._coalesced_writes = 0
+        self._merged_queries = 0
+
+    @staticmethod
+    def coalesce_key(command: Any) -> Optional[tuple]:
+        """
+        获取命令的合并键（写入按地址，读取按地址和长度，查询按查询类型）
+
+        Args:
+            command: NC命令
+
+        Returns:
+            Optional[tuple]: 合并键，不能合并的命令为None
+        """
+        data = getattr(command, "data", None)
+        if not isinstance(data, dict):
+            return None
+        command_type = getattr(command, "command_type", None)
+        if command_type == "write":
+            return "write", str(data.get("address"))
+        if command_type == "read":
+            return "read", str(data.get("address")), data.get("length", 1)
+        if command_type == "query":
+            return "query", data.get("query_type")
+        return None
+
+    @staticmethod
+    def get_priority(command: Any) -> int:
+        """
+        获取命令优先级（未指定时按命令类型取默认值）
+
+        Args:
+            command: NC命令
+
+        Returns:
+            int: 优先级
+        """
+        priority = getattr(command, "priority", None)
+        if priority is None:
+            priority = DEFAULT_PRIORITIES.get(getattr(command, "command_type", None), PRIORITY_NORMAL)
+        return priority
+
+    def put(self, command: Any) -> List[Any]:
+        """
+        命令入队并唤醒等待的线程
+
+        Args:
+            command: NC命令
+
+        Returns:
+            List[Any]: 被该命令取代的写入命令（未开启合并时为空）
+        """
+        priority = self.get_priority(command)
+        with self._condition:
+            self._enqueued += 1
+            key = None
+            if self.coalesce:
+                self._release_pending(command)
+                key = self.coalesce_key(command)
+                entry = self._pending.get(key) if key is not None else None
+                if entry is not None and entry[0] == priority:
+                    if key[0] == "write":
+                        # 最后写入的值生效，沿用原命令在队列中的位置
+                        superseded = entry[3]
+                        entry[3] = command
+                        self._coalesced_writes += 1
+                        return [superseded]
+                    self._merged.setdefault(entry[3].command_id, []).append(command)
+                    self._merged_queries += 1
+                    return []
+
+            entry = [priority, next(self._sequence), time.time(), command]
+            heapq.heappush(self._heap, entry)
+            if key is not None:
+                self._pending[key] = entry
+            self._max_depth = max(self._max_depth, len(self._heap))
+            self._condition.notify()
+            return []
+
+    def take_merged(self, command: Any) -> List[Any]:
+        """
+        取出合并到该命令的相同查询（该命令完成后以同一结果完成它们）
+
+        Args:
+            command: 已出队的命令
+
+        Returns:
+            List[Any]: 合并的命令
+        """
+        with self._condition:
+            return self._merged.pop(getattr(command, "command_id", None), [])
+
+    def get(self, timeout: Optional[float] = None) -> Tuple[Optional[Any], bool]:
+        """
+        取出优先级最高的命令
+
+        Args:
+            timeout: 最长等待时间（秒），None表示一直等待
+
+        Returns:
+            Tuple[Optional[Any], bool]: (命令, 是否已过截止时间)，超时或被唤醒时命令为None
+        """
+        with self._condition:
+            if not self._heap and not self._wake_pending:
+                self._condition.wait(timeout)
+            self._wake_pending = False
+            if not self._heap:
+                return None, False
+
+            entry = heapq.heappop(self._heap)
+            _, _, enqueued_at, command = entry
+            if self._pending:
+                # 已出队的命令不再接受合并
+                key = self.coalesce_key(command)
+                if key is not None and self._pending.get(key) is entry:
+                    del self._pending[key]
+            now = time.time()
+            self._record_wait(now - enqueued_at)
+
+            deadline = getattr(command, "deadline", None)
+            expired = deadline is not None and now > deadline
+            if expired:
+                self._expired += 1
+            else:
+                self._dequeued += 1
+            return command, expired
+
+    def wakeup(self) -> None:
+        """唤醒等待中的get()（例如停止通信线程时）"""
+        with self._condition:
+            self._wake_pending = True
+            self._condition.notify_all()
+
+    def drain(self) -> List[Any]:
+        """
+        取出全部未处理的命令
+
+        Returns:
+            List[Any]: 按处理顺序排列的命令（包括合并到它们的命令）
+        """
+        with self._condition:
+            commands = []
+            for entry in sorted(self._heap):
+                commands.append(entry[3])
+                commands.extend(self._merged.pop(entry[3].command_id, []))
+            self._heap.clear()
+            self._pending.clear()
+            self._merged.clear()
+            return commands
+
+    def __len__(self) -> int:
+        with self._condition:
+            return len(self._heap)
+
+    def _release_pending(self, command: Any) -> None:
+        """
+        新命令可能改变设备状态时，之前入队的命令不再参与合并（调用方持有锁）
+
+        Args:
+            command: 新入队的命令
+        """
+        command_type = getattr(command, "command_type", None)
+        data = getattr(command, "data", None)
+        if command_type in ("read", "query"):
+            return
+        if command_type == "write" and isinstance(data, dict):
+            addresses = {str(data.get("address"))}
+        elif command_type == "write_bulk" and isinstance(data, dict):
+            addresses = {str(address) for address in data.get("values", {})}
+            for address in addresses:
+                self._pending.pop(("write", address), None)
+        else:
+            # 程序执行等命令：之前的命令都不再合并
+            self._pending.clear()
+            return
+        for key in [key for key in self._pending if key[0] == "read" and key[1] in addresses]:
+            del self._pending[key]
+
+    def _record_wait(self, wait_time: float) -> None:
+        """记录命令在队列中的等待时间（调用方持有锁）"""
+        self._wait_times.append(wait_time)
+        self._total_wait += wait_time
+        self._max_wait = max(self._max_wait, wait_time)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        获取队列统计信息
+
+        Returns:
+            Dict[str, Any]: 队列深度、出入队数量和等待时间
+        """
+        with self._condition:
+            depth_by_priority: Dict[int, int] = {}
+            for priority, _, _, _ in self._heap:
+                depth_by_priority[priority] = depth_by_priority.get(priority, 0) + 1
+
+            samples = sorted(self._wait_times)
+            taken = self._dequeued + self._expired
+            return {
+                "depth": len(self._heap),
+                "max_depth": self._max_depth,
+                "depth_by_priority": depth_by_priority,
+                "enqueued": self._enqueued,
+                "dequeued": self._dequeued,
+                "expired": self._expired,
+                "average_wait_time": round(self._total_wait / taken, 6) if taken else 0.0,
+                "p95_wait_time": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 6) if samples else 0.0,
+                "max_wait_time": round(self._max_wait, 6),
+                "coalesced_writes": self._coalesced_writes,
+                "merged_queries": self._merged_queries
+            }
@@ -0,0 +1,405 @@
+"""
+NC连接管理器
+管理一个生产单元中的多台NC设备，按设备ID路由命令并支持并发下发
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Callable, Iterable
+
+from .nc_communicator import NCCommunicator, AdvancedNCCommunicator, NCCommand, NCResponse
+from .status_poller import StatusPoller
+
+
+class MachineConfig:
+    """单台设备的配置视图：使用自己的通信和设备配置，其余配置沿用配置管理器"""
+
+    def __init__(self, config_manager: Any, com_config: Any = None, device_config: Any = None):
+        self._config_manager = config_manager
+        self.com_config = com_config if com_config is not None else config_manager.com_config
+        self.device_config = device_config if device_config is not None else config_manager.device_config
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._config_manager, name)
+
+
+class NCConnectionManager:
+    """NC连接管理器
+
+    每台设备由独立的通信器负责（各自的命令队列和通信线程），
+    管理器按设备ID路由命令，并可以把同一组参数或程序同时下发到多台设备。
+    """
+
+    def __init__(self, config_manager: Any,
+                 communicator_factory: Callable[[Any], NCCommunicator] = AdvancedNCCommunicator,
+                 max_workers: int = 16):
+        """
+        初始化连接管理器
+
+        Args:
+            config_manager: 配置管理器
+            communicator_factory: 由设备配置创建通信器的函数
+            max_workers: 并发下发的最大线程数
+        """
+        self.config_manager = config_manager
+        self.communicator_factory = communicator_factory
+        self.max_workers = max(1, max_workers)
+        self.logger = logging.getLogger(__name__)
+
+        self._communicators: Dict[str, NCCommunicator] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._pollers: Dict[str, StatusPoller] = {}
+        self._lock = threading.RLock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    # ---- 设备管理 ----
+
+    def add_machine(self, machine_id: str, com_config: Any = None, device_config: Any = None,
+                    communicator: Optional[NCCommunicator] = None) -> NCCommunicator:
+        """
+        添加设备
+
+        Args:
+            machine_id: 设备ID
+            com_config: 该设备的通信配置（未指定时使用配置管理器中的配置）
+            device_config: 该设备的设备配置
+            communicator: 已创建的通信器（指定时忽略配置参数）
+
+        Returns:
+            NCCommunicator: 设备的通信器
+        """
+        with self._lock:
+            if machine_id in self._communicators:
+                raise ValueError(f"设备已存在: {machine_id}")
+            if communicator is None:
+                communicator = self.communicator_factory(
+                    MachineConfig(self.config_manager, com_config, device_config)
+                )
+            self._communicators[machine_id] = communicator
+            self._stats[machine_id] = self._new_stats()
+        self.logger.info(f"添加NC设备: {machine_id}")
+        return communicator
+
+    def remove_machine(self, machine_id: str) -> bool:
+        """
+        移除设备（先断开连接）
+
+        Args:
+            machine_id: 设备ID
+
+        Returns:
+            bool: 是否移除
+        """
+        with self._lock:
+            communicator = self._communicators.pop(machine_id, None)
+            self._stats.pop(machine_id, None)
+            poller = self._pollers.pop(machine_id, None)
+        if poller is not None:
+            poller.stop()
+        if communicator is None:
+            return False
+        if communicator.is_connected():
+            communicator.disconnect()
+        self.logger.info(f"移除NC设备: {machine_id}")
+        return True
+
+    def get_communicator(self, machine_id: str) -> NCCommunicator:
+        """
+        获取设备的通信器
+
+        Args:
+            machine_id: 设备ID
+
+        Returns:
+            NCCommunicator: 通信器
+
+        Raises:
+            KeyError: 设备不存在
+        """
+        with self._lock:
+            communicator = self._communicators.get(machine_id)
+        if communicator is None:
+            raise KeyError(f"设备不存在: {machine_id}")
+        return communicator
+
+    def get_machine_ids(self) -> List[str]:
+        """
+        获取全部设备ID
+
+        Returns:
+            List[str]: 设备ID列表
+        """
+        with self._lock:
+            return list(self._communicators)
+
+    def connect_all(self) -> Dict[str, bool]:
+        """
+        并发连接全部设备
+
+        Returns:
+            Dict[str, bool]: 设备ID到连接结果的映射
+        """
+        return self.dispatch(self.get_machine_ids(), lambda communicator: communicator.connect())
+
+    def disconnect_all(self) -> Dict[str, bool]:
+        """
+        断开全部设备并停止下发线程
+
+        Returns:
+            Dict[str, bool]: 设备ID到断开结果的映射
+        """
+        self.stop_status_polling()
+        results = self.dispatch(self.get_machine_ids(), lambda communicator: communicator.disconnect())
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+        return results
+
+    # ---- 状态轮询 ----
+
+    def start_status_polling(self, event_dispatcher: Any = None, **poller_options: Any) -> Dict[str, StatusPoller]:
+        """
+        为每台设备启动一个共享的状态轮询器
+
+        Args:
+            event_dispatcher: 事件分发器，状态变化时发布nc_status_changed事件
+            **poller_options: StatusPoller的其他参数（轮询间隔、宏变量地址等）
+
+        Returns:
+            Dict[str, StatusPoller]: 设备ID到状态轮询器的映射
+        """
+        with self._lock:
+            for machine_id, communicator in self._communicators.items():
+                if machine_id not in self._pollers:
+                    self._pollers[machine_id] = StatusPoller(
+                        communicator, event_dispatcher, machine_id, **poller_options
+                    )
+            pollers = dict(self._pollers)
+        for poller in pollers.values():
+            poller.start()
+        return pollers
+
+    def stop_status_polling(self) -> None:
+        """停止全部状态轮询器"""
+        with self._lock:
+            pollers, self._pollers = self._pollers, {}
+        for poller in pollers.values():
+            poller.stop()
+
+    def get_status_poller(self, machine_id: str) -> Optional[StatusPoller]:
+        """
+        获取设备的状态轮询器
+
+        Args:
+            machine_id: 设备ID
+
+        Returns:
+            Optional[StatusPoller]: 状态轮询器，未启动轮询时为None
+        """
+        with self._lock:
+            return self._pollers.get(machine_id)
+
+    # ---- 命令路由 ----
+
+    def send_command(self, machine_id: str, command: NCCommand, callback: Callable = None) -> str:
+        """
+        向指定设备异步发送命令
+
+        Args:
+            machine_id: 设备ID
+            command: NC命令
+            callback: 响应回调函数
+
+        Returns:
+            str: 命令ID
+        """
+        communicator = self.get_communicator(machine_id)
+        start_time = time.time()
+
+        def on_response(response: NCResponse):
+            self._record(machine_id, response, time.time() - start_time)
+            if callback:
+                callback(response)
+
+        return communicator.send_command(command, on_response)
+
+    def read_data(self, machine_id: str, address: str, length: int = 1) -> Optional[NCResponse]:
+        """读取指定设备的数据"""
+        return self._call(machine_id, lambda communicator: communicator.read_data(address, length))
+
+    def read_cached(self, machine_id: str, address: str, max_age: Optional[float] = None) -> Optional[NCResponse]:
+        """通过读缓存读取指定设备的数据"""
+        return self._call(machine_id, lambda communicator: communicator.read_cached(address, max_age))
+
+    def read_block(self, machine_id: str, start_address: str, count: int,
+                   max_age: Optional[float] = None) -> Optional[NCResponse]:
+        """块读取指定设备的连续宏变量"""
+        return self._call(machine_id, lambda communicator: communicator.read_block(start_address, count, max_age))
+
+    def write_data(self, machine_id: str, address: str, data: Any) -> Optional[NCResponse]:
+        """写入指定设备的数据"""
+        return self._call(machine_id, lambda communicator: communicator.write_data(address, data))
+
+    def send_parameters(self, machine_id: str, values: Dict[str, Any],
+                        force_full: bool = False) -> Optional[NCResponse]:
+        """向指定设备差量发送参数"""
+        return self._call(machine_id, lambda communicator: communicator.send_parameters(values, force_full))
+
+    def execute_program(self, machine_id: str, program_no: int,
+                        parameters: Dict[str, Any] = None) -> Optional[NCResponse]:
+        """在指定设备上执行程序"""
+        return self._call(machine_id, lambda communicator: communicator.execute_program(program_no, parameters))
+
+    def query_status(self, machine_id: str) -> Optional[NCResponse]:
+        """查询指定设备的状态"""
+        return self._call(machine_id, lambda communicator: communicator.query_status())
+
+    # ---- 并发下发 ----
+
+    def dispatch(self, machine_ids: Iterable[str],
+                 operation: Callable[[NCCommunicator], Any]) -> Dict[str, Any]:
+        """
+        在多台设备上并发执行操作
+
+        Args:
+            machine_ids: 设备ID列表
+            operation: 以通信器为参数的操作
+
+        Returns:
+            Dict[str, Any]: 设备ID到操作结果的映射（操作异常时为None）
+        """
+        machine_ids = list(machine_ids)
+        communicators = {machine_id: self.get_communicator(machine_id) for machine_id in machine_ids}
+        if len(machine_ids) == 1:
+            machine_id = machine_ids[0]
+            return {machine_id: self._run(machine_id, communicators[machine_id], operation)}
+
+        executor = self._get_executor()
+        futures = {
+            machine_id: executor.submit(self._run, machine_id, communicators[machine_id], operation)
+            for machine_id in machine_ids
+        }
+        return {machine_id: future.result() for machine_id, future in futures.items()}
+
+    def send_parameters_to(self, machine_ids: Iterable[str], values: Dict[str, Any],
+                           force_full: bool = False) -> Dict[str, Optional[NCResponse]]:
+        """
+        向多台设备同时发送同一组参数
+
+        Args:
+            machine_ids: 设备ID列表
+            values: 数据地址到参数值的映射
+            force_full: 是否全量发送
+
+        Returns:
+            Dict[str, Optional[NCResponse]]: 各设备的写入响应
+        """
+        return self.dispatch(machine_ids, lambda communicator: communicator.send_parameters(values, force_full))
+
+    def execute_program_on(self, machine_ids: Iterable[str], program_no: int,
+                           parameters: Dict[str, Any] = None) -> Dict[str, Optional[NCResponse]]:
+        """
+        在多台设备上同时执行程序
+
+        Args:
+            machine_ids: 设备ID列表
+            program_no: 程序编号
+            parameters: 程序参数
+
+        Returns:
+            Dict[str, Optional[NCResponse]]: 各设备的执行响应
+        """
+        return self.dispatch(machine_ids, lambda communicator: communicator.execute_program(program_no, parameters))
+
+    # ---- 统计 ----
+
+    def get_statistics(self, machine_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        获取吞吐量和延迟统计
+
+        Args:
+            machine_id: 设备ID，为None时返回汇总和各设备的统计
+
+        Returns:
+            Dict[str, Any]: 统计信息
+        """
+        with self._lock:
+            if machine_id is not None:
+                return self._summarize(self._stats[machine_id])
+
+            machines = {machine_id: self._summarize(stats) for machine_id, stats in self._stats.items()}
+            total = self._new_stats()
+            for stats in self._stats.values():
+                total["operations"] += stats["operations"]
+                total["failed"] += stats["failed"]
+                total["total_time"] += stats["total_time"]
+                total["max_time"] = max(total["max_time"], stats["max_time"])
+                if stats["first_time"] is not None:
+                    total["first_time"] = min(total["first_time"] or stats["first_time"], stats["first_time"])
+                total["last_time"] = max(total["last_time"], stats["last_time"])
+            return {"total": self._summarize(total), "machines": machines}
+
+    @staticmethod
+    def _new_stats() -> Dict[str, Any]:
+        return {
+            "operations": 0,
+            "failed": 0,
+            "total_time": 0.0,
+            "max_time": 0.0,
+            "first_time": None,
+            "last_time": 0.0
+        }
+
+    @staticmethod
+    def _summarize(stats: Dict[str, Any]) -> Dict[str, Any]:
+        """由累计值计算平均延迟和吞吐量"""
+        operations = stats["operations"]
+        elapsed = stats["last_time"] - stats["first_time"] if stats["first_time"] is not None else 0.0
+        return {
+            "operations": operations,
+            "failed": stats["failed"],
+            "average_time": round(stats["total_time"] / operations, 6) if operations else 0.0,
+            "max_time": round(stats["max_time"], 6),
+            "throughput": round(operations / elapsed, 2) if elapsed > 0 else 0.0
+        }
+
+    def _record(self, machine_id: str, response: Any, elapsed: float) -> None:
+        """记录一次操作的结果和耗时"""
+        now = time.time()
+        with self._lock:
+            stats = self._stats.get(machine_id)
+            if stats is None:
+                return
+            stats["operations"] += 1
+            if not getattr(response, "success", response):
+                stats["failed"] += 1
+            stats["total_time"] += elapsed
+            stats["max_time"] = max(stats["max_time"], elapsed)
+            if stats["first_time"] is None:
+                stats["first_time"] = now - elapsed
+            stats["last_time"] = now
+
+    def _call(self, machine_id: str, operation: Callable[[NCCommunicator], Any]) -> Any:
+        return self._run(machine_id, self.get_communicator(machine_id), operation)
+
+    def _run(self, machine_id: str, communicator: NCCommunicator,
+             operation: Callable[[NCCommunicator], Any]) -> Any:
+        """执行操作并记录统计"""
+        start_time = time.time()
+        try:
+            result = operation(communicator)
+        except Exception as e:
+            self.logger.error(f"设备 {machine_id} 操作失败: {e}")
+            result = None
+        self._record(machine_id, result, time.time() - start_time)
+        return result
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix="NCDispatch")
+            return self._executor
@@ -0,0 +1,116 @@
+"""
+延迟直方图
+按对数分桶统计响应时间，内存占用固定，可随时计算百分位数
+"""
+
+import math
+from typing import Dict, Any, List
+
+
+class LatencyHistogram:
+    """对数分桶的延迟直方图
+
+    每个2倍区间分为sub_buckets个桶，相对误差约为 2^(1/sub_buckets) - 1
+    （默认8个桶时约9%）。小于min_value的值计入第一个桶，超出范围的值计入最后一个桶。
+    """
+
+    def __init__(self, min_value: float = 1e-5, max_value: float = 600.0, sub_buckets: int = 8):
+        """
+        初始化延迟直方图
+
+        Args:
+            min_value: 最小分辨的延迟（秒）
+            max_value: 最大统计的延迟（秒）
+            sub_buckets: 每个2倍区间的桶数
+        """
+        self.min_value = min_value
+        self.sub_buckets = sub_buckets
+        self._bucket_count = int(math.ceil(math.log2(max_value / min_value) * sub_buckets)) + 1
+        self._counts: List[int] = [0] * self._bucket_count
+
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.min = 0.0
+
+    def record(self, value: float) -> None:
+        """
+        记录一个延迟值
+
+        Args:
+            value: 延迟（秒）
+        """
+        self._counts[self._bucket_index(value)] += 1
+        if self.count == 0 or value < self.min:
+            self.min = value
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, percent: float) -> float:
+        """
+        计算百分位数（返回所在桶的上界，不超过记录到的最大值）
+
+        Args:
+            percent: 百分比（0-100）
+
+        Returns:
+            float: 延迟（秒），没有记录时为0
+        """
+        if self.count == 0:
+            return 0.0
+        rank = max(1, int(math.ceil(self.count * percent / 100.0)))
+        seen = 0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if seen >= rank:
+                return min(self._bucket_upper(index), self.max)
+        return self.max
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """
+        合并另一个相同分桶参数的直方图
+
+        Args:
+            other: 延迟直方图
+        """
+        if (other.min_value, other.sub_buckets, other._bucket_count) != \
+                (self.min_value, self.sub_buckets, self._bucket_count):
+            raise ValueError("直方图分桶参数不一致")
+        for index, count in enumerate(other._counts):
+            self._counts[index] += count
+        if other.count:
+            self.min = other.min if self.count == 0 else min(self.min, other.min)
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        获取统计快照
+
+        Returns:
+            Dict[str, Any]: 数量、平均值、最值、p50/p95/p99和非空桶
+        """
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "buckets": [
+                [self._bucket_upper(index), count]
+                for index, count in enumerate(self._counts) if count
+            ]
+        }
+
+    def _bucket_index(self, value: float) -> int:
+        if value <= self.min_value:
+            return 0
+        index = int(math.ceil(math.log2(value / self.min_value) * self.sub_buckets))
+        return min(index, self._bucket_count - 1)
+
+    def _bucket_upper(self, index: int) -> float:
+        return self.min_value * 2 ** (index / self.sub_buckets)
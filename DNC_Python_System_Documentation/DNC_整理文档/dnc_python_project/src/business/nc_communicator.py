@@ -3,15 +3,26 @@ NC通信器
 负责与数控设备进行通信
 """
 
+import itertools
+import json
 import logging
+import re
 import time
 import threading
-from typing import Dict, Any, List, Optional, Callable
-from dataclasses import dataclass
+from collections import deque
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Callable, Tuple, Deque
+from dataclasses import dataclass, replace
 import serial
 import socket
 
 from ..core.config import ConfigManager
+from ..communication.framing import FrameReader
+from ..communication.traffic_capture import TrafficCapture
+from .command_queue import CommandQueue
+from .latency_histogram import LatencyHistogram
+from .callback_dispatcher import CallbackDispatcher
+from .read_cache import MacroReadCache
 
 
 @dataclass
@@ -31,6 +42,8 @@ class NCCommand:
     data: Any
     parameters: Dict[str, Any]
     timeout: float
+    priority: Optional[int] = None  # 数值越小越先处理，None时按命令类型取默认优先级
+    deadline: Optional[float] = None  # 截止时间（time.time()），过期的命令不再发送
 
 
 @dataclass
@@ -41,17 +54,33 @@ class NCResponse:
     data: Any
     error_message: Optional[str] = None
     response_time: Optional[float] = None
+    coalesced: bool = False  # 写入被队列中对同一地址的后续写入取代，未单独发送
 
 
 class NCCommunicator:
     """NC通信器"""
     
-    def __init__(self, config_manager: ConfigManager):
+    # 队列空闲时检查本地连接状态的间隔（秒）；设备状态由StatusPoller统一轮询
+    STATUS_CHECK_INTERVAL = 1.0
+    
+    # 批量写入时单个帧最多包含的宏变量数
+    BULK_WRITE_MAX = 100
+    
+    # 读缓存的默认有效期（秒）
+    READ_CACHE_TTL = 0.5
+    
+    # 状态查询结果在读缓存中的键
+    STATUS_CACHE_KEY = "QUERY status"
+    
+    def __init__(self, config_manager: ConfigManager, command_queue: Optional[CommandQueue] = None,
+                 callback_dispatcher: Optional[CallbackDispatcher] = None):
         """
         初始化NC通信器
         
         Args:
             config_manager: 配置管理器
+            command_queue: 命令队列，默认使用合并重复写入和查询的优先级队列
+            callback_dispatcher: 回调分发器，默认新建一个
         """
         self.config_manager = config_manager
         self.logger = logging.getLogger(__name__)
@@ -69,14 +98,30 @@ class NCCommunicator:
         # 通信对象
         self._serial_connection = None
         self._socket_connection = None
+        self._frame_reader: Optional[FrameReader] = None
+        self._frame_source: Optional[Callable] = None
+        
+        # 通信抓包（可选）
+        self._capture: Optional[TrafficCapture] = None
         
-        # 回调函数
+        # 回调函数（按命令ID登记，命令ID由_new_command_id生成，保证唯一）
         self._status_callbacks: List[Callable] = []
         self._response_callbacks: Dict[str, Callable] = {}
+        self._inline_callbacks = set()
+        self._id_counter = itertools.count(1)
+        
+        # 响应和状态回调在分发器线程中执行，不阻塞通信线程
+        self._callback_dispatcher = callback_dispatcher or CallbackDispatcher()
         
         # 命令队列
-        self._command_queue = []
-        self._command_lock = threading.Lock()
+        self._command_queue = command_queue or CommandQueue(coalesce=True)
+        
+        # 宏变量影子副本：设备已确认的最近写入值，用于差量发送
+        self._macro_shadow: Dict[str, str] = {}
+        self._shadow_lock = threading.Lock()
+        
+        # 读缓存：重复读取同一地址时复用最近的应答
+        self._read_cache = MacroReadCache(self.READ_CACHE_TTL)
         
     def connect(self) -> bool:
         """
@@ -101,6 +146,9 @@ class NCCommunicator:
                 
                 if success:
                     self._connected = True
+                    # 重新连接后设备上的值未知，影子副本失效
+                    self.invalidate_shadow()
+                    self.invalidate_cache()
                     self._start_communication_thread()
                     self.logger.info("NC设备连接成功")
                 else:
@@ -126,6 +174,7 @@ class NCCommunicator:
             
             try:
                 self._stop_communication = True
+                self._command_queue.wakeup()
                 
                 if self._communication_thread and self._communication_thread.is_alive():
                     self._communication_thread.join(timeout=5.0)
@@ -136,22 +185,34 @@ class NCCommunicator:
                 elif self.com_config.com_type == 1 and self._socket_connection:
                     self._socket_connection.close()
                     self._socket_connection = None
+                self._frame_reader = None
+                self._frame_source = None
+                if self._capture is not None:
+                    self._capture.flush()
                 
                 self._connected = False
+                self.invalidate_cache()
+                # 已完成命令的回调执行完毕后停止分发线程
+                self._callback_dispatcher.shutdown(wait=False)
                 self.logger.info("NC设备断开连接成功")
                 return True
                 
             except Exception as e:
                 self.logger.error(f"NC设备断开连接异常: {e}")
                 return False
-    
-    def send_command(self, command: NCCommand, callback: Callable = None) -> str:
+
+    def _new_command_id(self, command_type: str) -> str:
+        """生成唯一的命令ID（同一毫秒内创建的命令也不会重复）"""
+        return f"{command_type}_{next(self._id_counter)}"
+
+    def send_command(self, command: NCCommand, callback: Callable = None, inline: bool = False) -> str:
         """
         发送NC命令
         
         Args:
             command: NC命令
-            callback: 响应回调函数
+            callback: 响应回调函数（默认在回调分发器线程中执行）
+            inline: 是否在通信线程中直接执行回调（仅用于同步等待等轻量回调）
             
         Returns:
             str: 命令ID
@@ -164,10 +225,22 @@ class NCCommunicator:
             # 设置回调函数
             if callback:
                 self._response_callbacks[command.command_id] = callback
+                if inline:
+                    self._inline_callbacks.add(command.command_id)
             
-            # 添加到命令队列
-            with self._command_lock:
-                self._command_queue.append(command)
+            # 添加到命令队列（立即唤醒通信线程）
+            superseded = self._command_queue.put(command)
+            
+            # 被取代的写入不再发送，以"已合并"结果完成
+            for old_command in superseded:
+                self.logger.info(f"NC写入已合并: {old_command.command_id} -> {command.command_id}")
+                self._complete_command(old_command, NCResponse(
+                    command_id=old_command.command_id,
+                    success=True,
+                    data=None,
+                    response_time=0.0,
+                    coalesced=True
+                ))
             
             self.logger.info(f"NC命令已发送到队列: {command.command_id}")
             return command.command_id
@@ -188,7 +261,7 @@ class NCCommunicator:
             Optional[NCResponse]: 读取响应
         """
         command = NCCommand(
-            command_id=f"read_{int(time.time() * 1000)}",
+            command_id=self._new_command_id("read"),
             command_type="read",
             data={"address": address, "length": length},
             parameters={},
@@ -206,17 +279,195 @@ class NCCommunicator:
             data: 要写入的数据
             
         Returns:
-            Optional[NCResponse]: 写入响应
+            Optional[NCResponse]: 写入响应（被后续对同一地址的写入取代时coalesced为True）
         """
         command = NCCommand(
-            command_id=f"write_{int(time.time() * 1000)}",
+            command_id=self._new_command_id("write"),
             command_type="write",
             data={"address": address, "data": data},
             parameters={},
             timeout=self.com_config.timeout
         )
         
-        return self._send_command_sync(command)
+        response = self._send_command_sync(command)
+        self.invalidate_cache([address])
+        if response is not None and not response.coalesced:
+            # 只有设备确认"OK"才记录为已确认值，其他应答（如ERROR）使该地址的影子副本失效
+            written, errors = self._parse_bulk_response({address: data}, response)
+            self._update_shadow(written, {address: data}, errors)
+        else:
+            self.invalidate_shadow([address])
+        return response
+    
+    def write_bulk(self, values: Dict[str, Any]) -> Optional[NCResponse]:
+        """
+        批量写入NC数据
+        
+        多个宏变量打包在一个WRITEM帧中发送，设备对整帧应答一次；
+        超过BULK_WRITE_MAX个宏变量时分为多个帧。
+        
+        Args:
+            values: 数据地址到写入值的映射
+            
+        Returns:
+            Optional[NCResponse]: 写入响应，data为
+                {"written": 写入成功的地址列表, "errors": 地址到错误信息的映射}
+        """
+        items = list(values.items())
+        written: List[str] = []
+        errors: Dict[str, str] = {}
+        response_time = 0.0
+        
+        for start in range(0, len(items), self.BULK_WRITE_MAX):
+            chunk = dict(items[start:start + self.BULK_WRITE_MAX])
+            command = NCCommand(
+                command_id=self._new_command_id("write_bulk"),
+                command_type="write_bulk",
+                data={"values": chunk},
+                parameters={},
+                timeout=self.com_config.timeout
+            )
+            
+            response = self._send_command_sync(command)
+            self.invalidate_cache(list(chunk))
+            if response is None:
+                return None
+            
+            chunk_written, chunk_errors = self._parse_bulk_response(chunk, response)
+            written.extend(chunk_written)
+            errors.update(chunk_errors)
+            response_time += response.response_time or 0.0
+        
+        self._update_shadow(written, values, errors)
+        if errors:
+            self.logger.warning(f"批量写入部分失败: {len(errors)}/{len(items)} 个宏变量")
+        
+        return NCResponse(
+            command_id=self._new_command_id("write_bulk"),
+            success=not errors,
+            data={"written": written, "errors": errors},
+            error_message=f"{len(errors)} 个宏变量写入失败" if errors else None,
+            response_time=response_time
+        )
+    
+    def send_parameters(self, values: Dict[str, Any], force_full: bool = False) -> Optional[NCResponse]:
+        """
+        差量发送参数：只发送与影子副本中已确认值不同的宏变量
+        
+        Args:
+            values: 数据地址到参数值的映射
+            force_full: 是否忽略影子副本发送全部参数
+            
+        Returns:
+            Optional[NCResponse]: 写入响应，data在write_bulk的基础上增加
+                "skipped": 值未变化而未发送的地址列表
+        """
+        if force_full:
+            changed = dict(values)
+        else:
+            with self._shadow_lock:
+                changed = {
+                    address: value for address, value in values.items()
+                    if self._macro_shadow.get(address) != str(value)
+                }
+        skipped = [address for address in values if address not in changed]
+        
+        if changed:
+            response = self.write_bulk(changed)
+            if response is None:
+                return None
+        else:
+            response = NCResponse(
+                command_id=self._new_command_id("write_bulk"),
+                success=True,
+                data={"written": [], "errors": {}},
+                response_time=0.0
+            )
+        
+        response.data["skipped"] = skipped
+        self.logger.info(f"差量发送参数: 发送 {len(changed)} 个, 跳过 {len(skipped)} 个")
+        return response
+    
+    def invalidate_shadow(self, addresses: Optional[List[str]] = None) -> None:
+        """
+        使影子副本失效（重新连接、报警或设备上的值被外部修改时调用）
+        
+        Args:
+            addresses: 数据地址列表，为None时清空全部
+        """
+        with self._shadow_lock:
+            if addresses is None:
+                self._macro_shadow.clear()
+            else:
+                for address in addresses:
+                    self._macro_shadow.pop(address, None)
+    
+    def get_shadow(self) -> Dict[str, str]:
+        """
+        获取影子副本
+        
+        Returns:
+            Dict[str, str]: 数据地址到已确认值（字符串形式）的映射
+        """
+        with self._shadow_lock:
+            return dict(self._macro_shadow)
+    
+    def _update_shadow(self, written: List[str], values: Dict[str, Any], errors: Dict[str, str]) -> None:
+        """
+        按写入结果更新影子副本：成功的地址记录新值，失败的地址状态未知而移除
+        
+        Args:
+            written: 写入成功的地址列表
+            values: 写入的数据
+            errors: 写入失败的地址
+        """
+        with self._shadow_lock:
+            for address in written:
+                self._macro_shadow[address] = str(values[address])
+            for address in errors:
+                self._macro_shadow.pop(address, None)
+    
+    @staticmethod
+    def _parse_bulk_response(values: Dict[str, Any], response: NCResponse) -> Tuple[List[str], Dict[str, str]]:
+        """
+        解析批量写入应答
+        
+        应答为"OK"表示全部成功，否则为逐个宏变量的"地址=状态"列表，
+        状态为OK表示成功，其他内容作为错误信息；未出现在应答中的地址视为失败。
+        
+        Args:
+            values: 本帧写入的数据
+            response: 设备应答
+            
+        Returns:
+            Tuple[List[str], Dict[str, str]]: 写入成功的地址列表和错误信息
+        """
+        if not response.success:
+            message = response.error_message or "写入失败"
+            return [], {address: message for address in values}
+        
+        text = str(response.data or "").strip()
+        if text.upper() == "OK":
+            return list(values), {}
+        
+        statuses = {}
+        for token in text.split():
+            address, sep, status = token.partition("=")
+            if sep:
+                statuses[address] = status
+        if not statuses:
+            # 无法识别的应答，整帧视为失败
+            return [], {address: text or "无应答" for address in values}
+        
+        written = []
+        errors = {}
+        for address in values:
+            status = statuses.get(str(address))
+            if status is not None and status.upper() == "OK":
+                written.append(address)
+            else:
+                errors[address] = status or "无确认"
+        return written, errors
     
     def execute_program(self, program_no: int, parameters: Dict[str, Any] = None) -> Optional[NCResponse]:
         """
@@ -230,14 +481,18 @@ class NCCommunicator:
             Optional[NCResponse]: 执行响应
         """
         command = NCCommand(
-            command_id=f"execute_{int(time.time() * 1000)}",
+            command_id=self._new_command_id("execute"),
             command_type="execute",
             data={"program_no": program_no, "parameters": parameters or {}},
             parameters={},
             timeout=self.com_config.timeout * 2  # 执行程序需要更长时间
         )
         
-        return self._send_command_sync(command)
+        response = self._send_command_sync(command)
+        # 程序运行会修改宏变量和设备状态
+        self.invalidate_cache()
+        self.invalidate_shadow()
+        return response
     
     def query_status(self) -> Optional[NCResponse]:
         """
@@ -247,14 +502,165 @@ class NCCommunicator:
             Optional[NCResponse]: 状态查询响应
         """
         command = NCCommand(
-            command_id=f"status_{int(time.time() * 1000)}",
+            command_id=self._new_command_id("status"),
             command_type="query",
             data={"query_type": "status"},
             parameters={},
             timeout=self.com_config.timeout
         )
         
-        return self._send_command_sync(command)
+        response = self._send_command_sync(command)
+        if response is not None and response.success and "ALARM" in str(response.data).upper():
+            # 报警时设备上的宏变量可能已被复位
+            self.logger.warning(f"NC设备报警，影子副本失效: {response.data}")
+            self.invalidate_shadow()
+            self.invalidate_cache()
+        return response
+    
+    def read_cached(self, address: str, max_age: Optional[float] = None) -> Optional[NCResponse]:
+        """
+        通过读缓存读取NC数据
+        
+        缓存有效时直接返回最近的应答；同一地址的并发读取只发送一条命令。
+        
+        Args:
+            address: 数据地址
+            max_age: 能接受的最长缓存时间（秒），为None时按该地址的有效期判断
+            
+        Returns:
+            Optional[NCResponse]: 读取响应
+        """
+        return self._read_cache.load(address, lambda: self.read_data(address), max_age, self._is_cacheable)
+    
+    def query_status_cached(self, max_age: Optional[float] = None) -> Optional[NCResponse]:
+        """
+        通过读缓存查询NC设备状态
+        
+        Args:
+            max_age: 能接受的最长缓存时间（秒）
+            
+        Returns:
+            Optional[NCResponse]: 状态查询响应
+        """
+        return self._read_cache.load(self.STATUS_CACHE_KEY, self.query_status, max_age, self._is_cacheable)
+    
+    def read_block(self, start_address: str, count: int, max_age: Optional[float] = None) -> Optional[NCResponse]:
+        """
+        块读取：用一条READ命令读取连续的宏变量，并把各地址的值写入读缓存
+        
+        范围内的地址全部有有效缓存时不发送命令。
+        
+        Args:
+            start_address: 起始地址（如"#500"）
+            count: 宏变量数量
+            max_age: 能接受的最长缓存时间（秒）
+            
+        Returns:
+            Optional[NCResponse]: 读取响应，data为地址到值（字符串）的映射
+        """
+        addresses = self._address_range(start_address, count)
+        
+        values = {}
+        for address in addresses:
+            cached = self._read_cache.get(address, max_age)
+            if cached is None:
+                break
+            values.update(self._parse_read_values(cached.data))
+        else:
+            return NCResponse(
+                command_id=self._new_command_id("read_block"),
+                success=True,
+                data={address: values.get(address) for address in addresses},
+                response_time=0.0
+            )
+        
+        version = self._read_cache.version(addresses)
+        response = self.read_data(start_address, count)
+        if not self._is_cacheable(response):
+            return response
+        
+        values = self._parse_read_values(response.data)
+        self._read_cache.put_many({
+            address: NCResponse(
+                command_id=response.command_id,
+                success=True,
+                data=f"{address}={values[address]}",
+                response_time=response.response_time
+            )
+            for address in addresses if address in values
+        }, version)
+        
+        response.data = {address: values.get(address) for address in addresses}
+        return response
+    
+    def invalidate_cache(self, addresses: Optional[List[str]] = None) -> None:
+        """
+        使读缓存失效
+        
+        Args:
+            addresses: 数据地址列表，为None时清空全部（包括状态）
+        """
+        self._read_cache.invalidate(addresses)
+    
+    def set_cache_ttl(self, address: str, ttl: Optional[float]) -> None:
+        """
+        设置地址的缓存有效期
+        
+        Args:
+            address: 数据地址（状态查询为STATUS_CACHE_KEY）
+            ttl: 有效期（秒），0表示不缓存，None表示恢复默认有效期
+        """
+        self._read_cache.set_ttl(address, ttl)
+    
+    def get_cache_statistics(self) -> Dict[str, Any]:
+        """
+        获取读缓存统计信息
+        
+        Returns:
+            Dict[str, Any]: 命中率、合并的读取数和缓存条目数
+        """
+        return self._read_cache.get_statistics()
+    
+    @staticmethod
+    def _is_cacheable(response: Optional[NCResponse]) -> bool:
+        """只缓存设备正常应答的响应"""
+        return response is not None and response.success and not str(response.data).startswith("ERROR")
+    
+    @staticmethod
+    def _address_range(start_address: str, count: int) -> List[str]:
+        """
+        由起始地址生成连续的地址列表
+        
+        Args:
+            start_address: 起始地址，如"#500"
+            count: 地址数量
+            
+        Returns:
+            List[str]: 地址列表
+        """
+        match = re.fullmatch(r"(\D*)(\d+)", start_address)
+        if match is None or count < 1:
+            raise ValueError(f"无法生成连续地址: {start_address} x {count}")
+        prefix, number = match.group(1), int(match.group(2))
+        return [f"{prefix}{number + offset}" for offset in range(count)]
+    
+    @staticmethod
+    def _parse_read_values(text: Any) -> Dict[str, str]:
+        """
+        解析读取应答中的"地址=值"列表
+        
+        Args:
+            text: 应答数据
+            
+        Returns:
+            Dict[str, str]: 地址到值的映射
+        """
+        values = {}
+        for token in str(text or "").split():
+            address, sep, value = token.partition("=")
+            if sep:
+                values[address] = value
+        return values
     
     def add_status_callback(self, callback: Callable) -> None:
         """
@@ -357,30 +763,46 @@ class NCCommunicator:
         self._communication_thread.start()
     
     def _communication_loop(self) -> None:
-        """通信循环"""
+        """通信循环：阻塞等待命令，空闲时定期检查连接状态"""
+        last_check = 0.0
         while not self._stop_communication:
             try:
-                # 处理命令队列
-                self._process_command_queue()
+                # 处理命令队列（有命令时立即返回）
+                self._process_command_queue(self.STATUS_CHECK_INTERVAL)
                 
                 # 检查连接状态
-                self._check_connection_status()
-                
-                # 短暂休眠
-                time.sleep(0.1)
+                now = time.time()
+                if now - last_check >= self.STATUS_CHECK_INTERVAL:
+                    last_check = now
+                    self._check_connection_status()
                 
             except Exception as e:
                 self.logger.error(f"通信循环异常: {e}")
                 time.sleep(1.0)
     
-    def _process_command_queue(self) -> None:
-        """处理命令队列"""
-        with self._command_lock:
-            if not self._command_queue:
-                return
+    def _process_command_queue(self, timeout: Optional[float] = 0.0) -> bool:
+        """
+        处理命令队列中的下一个命令
+        
+        Args:
+            timeout: 队列为空时的最长等待时间（秒）
             
-            # 获取下一个命令
-            command = self._command_queue.pop(0)
+        Returns:
+            bool: 是否处理了命令
+        """
+        command, expired = self._command_queue.get(timeout)
+        if command is None:
+            return False
+        
+        if expired:
+            self.logger.warning(f"NC命令已过截止时间，未发送: {command.command_id}")
+            self._complete_command_and_merged(command, NCResponse(
+                command_id=command.command_id,
+                success=False,
+                data=None,
+                error_message="命令已过截止时间"
+            ))
+            return True
         
         try:
             # 发送命令
@@ -396,35 +818,91 @@ class NCCommunicator:
                 response_time=response_time
             )
             
-            # 调用回调函数
-            if command.command_id in self._response_callbacks:
-                try:
-                    self._response_callbacks[command.command_id](response)
-                    # 移除回调函数
-                    del self._response_callbacks[command.command_id]
-                except Exception as e:
-                    self.logger.error(f"回调函数执行失败: {e}")
-            
             self.logger.info(f"NC命令处理完成: {command.command_id}, 耗时: {response_time:.3f}s")
             
         except Exception as e:
             self.logger.error(f"处理NC命令失败: {command.command_id}, 错误: {e}")
             
             # 构建错误响应
-            error_response = NCResponse(
+            response = NCResponse(
                 command_id=command.command_id,
                 success=False,
                 data=None,
                 error_message=str(e)
             )
+        
+        self._complete_command_and_merged(command, response)
+        return True
+    
+    def _complete_command_and_merged(self, command: NCCommand, response: NCResponse) -> None:
+        """
+        完成命令以及合并到该命令的相同查询（共享同一结果）
+        
+        Args:
+            command: NC命令
+            response: NC响应
+        """
+        self._complete_command(command, response)
+        for merged in self._command_queue.take_merged(command):
+            self._complete_command(merged, replace(response, command_id=merged.command_id))
+    
+    def _complete_command(self, command: NCCommand, response: NCResponse) -> None:
+        """
+        完成命令：调用并移除响应回调函数
+        
+        Args:
+            command: NC命令
+            response: NC响应
+        """
+        # 写入命令完成后设备上的值可能已改变，先使读缓存失效再回调
+        written = self._written_addresses(command)
+        if written:
+            self.invalidate_cache(written)
+        
+        callback = self._response_callbacks.pop(command.command_id, None)
+        if command.command_id in self._inline_callbacks:
+            self._inline_callbacks.discard(command.command_id)
+            try:
+                callback(response)
+            except Exception as e:
+                self.logger.error(f"回调函数执行失败: {e}")
+        elif callback:
+            self._callback_dispatcher.submit(callback, response)
+    
+    @staticmethod
+    def _written_addresses(command: NCCommand) -> List[str]:
+        """
+        获取写入命令涉及的数据地址
+        
+        Args:
+            command: NC命令
             
-            # 调用回调函数
-            if command.command_id in self._response_callbacks:
-                try:
-                    self._response_callbacks[command.command_id](error_response)
-                    del self._response_callbacks[command.command_id]
-                except Exception as e:
-                    self.logger.error(f"错误回调函数执行失败: {e}")
+        Returns:
+            List[str]: 数据地址列表，非写入命令为空列表
+        """
+        if command.command_type == "write":
+            return [command.data["address"]]
+        if command.command_type == "write_bulk":
+            return list(command.data["values"])
+        return []
+    
+    def get_callback_statistics(self) -> Dict[str, Any]:
+        """
+        获取回调执行统计信息
+        
+        Returns:
+            Dict[str, Any]: 回调数量、丢弃数量和慢回调耗时
+        """
+        return self._callback_dispatcher.get_statistics()
+    
+    def get_queue_statistics(self) -> Dict[str, Any]:
+        """
+        获取命令队列统计信息
+        
+        Returns:
+            Dict[str, Any]: 队列深度和等待时间
+        """
+        return self._command_queue.get_statistics()
     
     def _send_raw_command(self, command: NCCommand) -> Any:
         """
@@ -460,12 +938,13 @@ class NCCommunicator:
         command_data = self._build_command_data(command)
         
         # 发送命令
-        self._serial_connection.write(command_data.encode())
-        
-        # 读取响应
-        response_data = self._serial_connection.readline().decode().strip()
+        self._serial_connection.write(self._capture_outbound(command_data.encode()))
         
-        return response_data
+        # 读取响应（串口超时时readinto返回0字节）
+        try:
+            return self._read_response(self._serial_connection.readinto)
+        except EOFError:
+            raise TimeoutError("串口读取超时")
     
     def _send_socket_command(self, command: NCCommand) -> Any:
         """
@@ -484,14 +963,81 @@ class NCCommunicator:
         command_data = self._build_command_data(command)
         
         # 发送命令
-        self._socket_connection.send(command_data.encode())
+        self._socket_connection.sendall(self._capture_outbound(command_data.encode()))
         
-        # 读取响应
-        response_data = self._socket_connection.recv(1024).decode().strip()
+        # 读取响应（对端关闭时recv_into返回0字节）
+        try:
+            return self._read_response(self._socket_connection.recv_into)
+        except EOFError:
+            raise ConnectionError("网络连接已关闭")
+    
+    def _read_response(self, recv_into: Callable) -> str:
+        """
+        通过分帧读取器读取一个应答帧
         
-        return response_data
+        应答可以分多次到达，也可以一次到达多个帧；读取失败时丢弃缓冲区中的残留数据。
+        分帧方式由com_config.frame_delimiter（默认换行）或
+        com_config.frame_length_prefix（长度前缀字节数，默认0）配置。
+        
+        Args:
+            recv_into: 连接的读取函数
+            
+        Returns:
+            str: 应答内容
+        """
+        if self._frame_reader is None or self._frame_source != recv_into:
+            self._frame_source = recv_into
+            self._frame_reader = FrameReader(
+                self._capture.wrap_recv_into(recv_into) if self._capture else recv_into,
+                delimiter=getattr(self.com_config, "frame_delimiter", "\n").encode(),
+                length_prefix=getattr(self.com_config, "frame_length_prefix", 0)
+            )
+        
+        try:
+            return self._frame_reader.read_frame().decode(errors="replace").strip()
+        except Exception:
+            self._frame_reader.reset()
+            raise
     
-    def _build_command_data(self, command: NCCommand) -> str:
+    def enable_capture(self, file_path: str, max_bytes: int = 10 * 1024 * 1024,
+                       backup_count: int = 5) -> TrafficCapture:
+        """
+        开启通信抓包：记录发送和接收的原始字节及时间戳（用于复现和回放现场问题）
+        
+        Args:
+            file_path: 抓包文件路径
+            max_bytes: 单个文件的最大字节数，超过后轮转
+            backup_count: 保留的旧文件数量
+            
+        Returns:
+            TrafficCapture: 抓包写入器
+        """
+        self.disable_capture()
+        self._capture = TrafficCapture(file_path, max_bytes, backup_count)
+        if self._frame_reader is not None:
+            self._frame_reader.recv_into = self._capture.wrap_recv_into(self._frame_source)
+        self.logger.info(f"通信抓包已开启: {file_path}")
+        return self._capture
+    
+    def disable_capture(self) -> None:
+        """关闭通信抓包"""
+        capture, self._capture = self._capture, None
+        if capture is None:
+            return
+        if self._frame_reader is not None:
+            self._frame_reader.recv_into = self._frame_source
+        capture.close()
+        self.logger.info(f"通信抓包已关闭: {capture.path}")
+    
+    def _capture_outbound(self, data: bytes) -> bytes:
+        """抓包开启时记录发送的数据"""
+        capture = self._capture
+        if capture is not None:
+            capture.record_outbound(data)
+        return data
+    
+    @staticmethod
+    def _build_command_data(command: NCCommand) -> str:
         """
         构建命令数据
         
@@ -506,6 +1052,10 @@ class NCCommunicator:
             return f"READ {command.data['address']} {command.data['length']}\n"
         elif command.command_type == "write":
             return f"WRITE {command.data['address']} {command.data['data']}\n"
+        elif command.command_type == "write_bulk":
+            values = command.data['values']
+            pairs_str = " ".join([f"{k}={v}" for k, v in values.items()])
+            return f"WRITEM {len(values)} {pairs_str}\n"
         elif command.command_type == "execute":
             params_str = " ".join([f"{k}={v}" for k, v in command.data['parameters'].items()])
             return f"EXECUTE {command.data['program_no']} {params_str}\n"
@@ -532,7 +1082,7 @@ class NCCommunicator:
             response_received.set()
         
         # 发送命令
-        command_id = self.send_command(command, callback)
+        command_id = self.send_command(command, callback, inline=True)
         if not command_id:
             return None
         
@@ -561,6 +1111,8 @@ class NCCommunicator:
             
             if connected != self._connected:
                 self._connected = connected
+                self.invalidate_shadow()
+                self.invalidate_cache()
                 status_message = "连接成功" if connected else "连接断开"
                 
                 # 通知状态变化
@@ -583,64 +1135,74 @@ class NCCommunicator:
             timestamp=time.time()
         )
         
-        for callback in self._status_callbacks:
-            try:
-                callback(status)
-            except Exception as e:
-                self.logger.error(f"状态回调函数执行失败: {e}")
+        for callback in list(self._status_callbacks):
+            self._callback_dispatcher.submit(callback, status)
 
 
 class AdvancedNCCommunicator(NCCommunicator):
     """高级NC通信器"""
     
-    def __init__(self, config_manager: ConfigManager):
+    def __init__(self, config_manager: ConfigManager, command_queue: Optional[CommandQueue] = None,
+                 callback_dispatcher: Optional[CallbackDispatcher] = None):
         """
         初始化高级NC通信器
         
         Args:
             config_manager: 配置管理器
+            command_queue: 命令队列，默认使用优先级队列
+            callback_dispatcher: 回调分发器，默认新建一个
         """
-        super().__init__(config_manager)
+        super().__init__(config_manager, command_queue, callback_dispatcher)
         
-        # 命令历史
-        self._command_history: List[Dict[str, Any]] = []
+        # 命令历史：有界队列保存记录顺序，命令ID映射用于按响应更新记录
         self._max_history_size = 1000
+        self._command_history: Deque[Dict[str, Any]] = deque(maxlen=self._max_history_size)
+        self._history_index: Dict[str, Dict[str, Any]] = {}
+        self._stats_lock = threading.Lock()
         
         # 性能统计
         self._performance_stats = {
             "total_commands": 0,
             "successful_commands": 0,
             "failed_commands": 0,
+            "coalesced_commands": 0,
             "average_response_time": 0.0,
             "last_command_time": 0.0
         }
+        
+        # 按命令类型统计的延迟直方图
+        self._latency_histograms: Dict[str, LatencyHistogram] = {}
     
-    def send_command(self, command: NCCommand, callback: Callable = None) -> str:
+    def send_command(self, command: NCCommand, callback: Callable = None, inline: bool = False) -> str:
         """
         发送NC命令（带性能统计）
         
         Args:
             command: NC命令
             callback: 响应回调函数
+            inline: 是否在通信线程中直接执行回调
             
         Returns:
             str: 命令ID
         """
-        command_id = super().send_command(command, callback)
-        
-        # 记录命令历史
-        if command_id:
-            command_record = {
-                "command_id": command_id,
-                "command_type": command.command_type,
-                "timestamp": time.time(),
-                "status": "queued"
-            }
+        # 先记录命令历史，避免命令在入队后立即完成时找不到记录
+        command_record = {
+            "command_id": command.command_id,
+            "command_type": command.command_type,
+            "timestamp": time.time(),
+            "status": "queued"
+        }
+        with self._stats_lock:
+            if len(self._command_history) == self._command_history.maxlen:
+                oldest = self._command_history[0]
+                if self._history_index.get(oldest["command_id"]) is oldest:
+                    del self._history_index[oldest["command_id"]]
             self._command_history.append(command_record)
-            
-            # 限制历史记录大小
-            if len(self._command_history) > self._max_history_size:
-                self._command_history.pop(0)
+            self._history_index[command.command_id] = command_record
+        
+        command_id = super().send_command(command, callback, inline)
+        if not command_id:
+            command_record["status"] = "rejected"
         
         return command_id
     
@@ -654,7 +1216,9 @@ class AdvancedNCCommunicator(NCCommunicator):
         Returns:
             List[Dict[str, Any]]: 命令历史
         """
-        return self._command_history[-limit:] if self._command_history else []
+        with self._stats_lock:
+            history = list(self._command_history)
+        return history[-limit:] if limit > 0 else []
     
     def get_performance_statistics(self) -> Dict[str, Any]:
         """
@@ -663,102 +1227,114 @@ class AdvancedNCCommunicator(NCCommunicator):
         Returns:
             Dict[str, Any]: 性能统计信息
         """
-        return self._performance_stats.copy()
+        with self._stats_lock:
+            return self._performance_stats.copy()
+    
+    def get_latency_snapshot(self) -> Dict[str, Any]:
+        """
+        获取延迟统计快照（用于监控面板）
+        
+        Returns:
+            Dict[str, Any]: 性能统计、队列统计和按命令类型的延迟分布
+                （count/mean/min/max/p50/p95/p99，单位为秒）
+        """
+        with self._stats_lock:
+            latency = {
+                command_type: histogram.snapshot()
+                for command_type, histogram in self._latency_histograms.items()
+            }
+            total = LatencyHistogram()
+            for histogram in self._latency_histograms.values():
+                total.merge(histogram)
+            performance = self._performance_stats.copy()
+        
+        return {
+            "timestamp": time.time(),
+            "device_name": self.device_config.device_name,
+            "performance": performance,
+            "queue": self.get_queue_statistics(),
+            "latency": latency,
+            "latency_total": total.snapshot()
+        }
+    
+    def dump_latency_snapshot(self, file_path: str) -> bool:
+        """
+        将延迟统计快照写入JSON文件（用于离线分析）
+        
+        Args:
+            file_path: 文件路径
+            
+        Returns:
+            bool: 写入是否成功
+        """
+        try:
+            path = Path(file_path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(self.get_latency_snapshot(), f, indent=2, ensure_ascii=False)
+            self.logger.info(f"延迟统计已保存: {file_path}")
+            return True
+        except (OSError, TypeError, ValueError) as e:
+            self.logger.error(f"保存延迟统计失败: {e}")
+            return False
     
     def clear_command_history(self) -> None:
         """清空命令历史"""
-        self._command_history.clear()
+        with self._stats_lock:
+            self._command_history.clear()
+            self._history_index.clear()
     
-    def _update_performance_stats(self, response: NCResponse) -> None:
+    def _update_performance_stats(self, response: NCResponse, command_type: Optional[str] = None) -> None:
         """
         更新性能统计
         
         Args:
             response: NC响应
+            command_type: 命令类型（用于延迟直方图）
         """
-        self._performance_stats["total_commands"] += 1
-        
-        if response.success:
-            self._performance_stats["successful_commands"] += 1
-        else:
-            self._performance_stats["failed_commands"] += 1
-        
-        if response.response_time:
-            # 更新平均响应时间
-            current_avg = self._performance_stats["average_response_time"]
-            total_successful = self._performance_stats["successful_commands"]
+        with self._stats_lock:
+            if response.coalesced:
+                # 被取代的写入没有发送到设备
+                self._performance_stats["coalesced_commands"] += 1
+                record = self._history_index.pop(response.command_id, None)
+                if record is not None:
+                    record["status"] = "coalesced"
+                return
+            
+            self._performance_stats["total_commands"] += 1
             
-            if total_successful > 1:
-                new_avg = (current_avg * (total_successful - 1) + response.response_time) / total_successful
+            if response.success:
+                self._performance_stats["successful_commands"] += 1
             else:
-                new_avg = response.response_time
+                self._performance_stats["failed_commands"] += 1
             
-            self._performance_stats["average_response_time"] = round(new_avg, 3)
-            self._performance_stats["last_command_time"] = response.response_time
-        
-        # 更新命令历史状态
-        for record in self._command_history:
-            if record["command_id"] == response.command_id:
+            if response.response_time:
+                # 更新平均响应时间
+                current_avg = self._performance_stats["average_response_time"]
+                total_successful = self._performance_stats["successful_commands"]
+                
+                if total_successful > 1:
+                    new_avg = (current_avg * (total_successful - 1) + response.response_time) / total_successful
+                else:
+                    new_avg = response.response_time
+                
+                self._performance_stats["average_response_time"] = round(new_avg, 3)
+                self._performance_stats["last_command_time"] = response.response_time
+                
+                if command_type:
+                    histogram = self._latency_histograms.get(command_type)
+                    if histogram is None:
+                        histogram = self._latency_histograms[command_type] = LatencyHistogram()
+                    histogram.record(response.response_time)
+            
+            # 更新命令历史状态
+            record = self._history_index.pop(response.command_id, None)
+            if record is not None:
                 record["status"] = "success" if response.success else "failed"
                 record["response_time"] = response.response_time
                 record["error_message"] = response.error_message
-                break
     
-    def _process_command_queue(self) -> None:
-        """处理命令队列（重写以包含性能统计）"""
-        with self._command_lock:
-            if not self._command_queue:
-                return
-            
-            # 获取下一个命令
-            command = self._command_queue.pop(0)
-        
-        try:
-            # 发送命令
-            start_time = time.time()
-            response_data = self._send_raw_command(command)
-            response_time = time.time() - start_time
-            
-            # 构建响应
-            response = NCResponse(
-                command_id=command.command_id,
-                success=response_data is not None,
-                data=response_data,
-                response_time=response_time
-            )
-            
-            # 更新性能统计
-            self._update_performance_stats(response)
-            
-            # 调用回调函数
-            if command.command_id in self._response_callbacks:
-                try:
-                    self._response_callbacks[command.command_id](response)
-                    # 移除回调函数
-                    del self._response_callbacks[command.command_id]
-                except Exception as e:
-                    self.logger.error(f"回调函数执行失败: {e}")
-            
-            self.logger.info(f"NC命令处理完成: {command.command_id}, 耗时: {response_time:.3f}s")
-            
-        except Exception as e:
-            self.logger.error(f"处理NC命令失败: {command.command_id}, 错误: {e}")
-            
-            # 构建错误响应
-            error_response = NCResponse(
-                command_id=command.command_id,
-                success=False,
-                data=None,
-                error_message=str(e)
-            )
-            
-            # 更新性能统计
-            self._update_performance_stats(error_response)
-            
-            # 调用回调函数
-            if command.command_id in self._response_callbacks:
-                try:
-                    self._response_callbacks[command.command_id](error_response)
-                    del self._response_callbacks[command.command_id]
-                except Exception as e:
-                    self.logger.error(f"错误回调函数执行失败: {e}")
+    def _complete_command(self, command: NCCommand, response: NCResponse) -> None:
+        """完成命令（重写以包含性能统计）"""
+        self._update_performance_stats(response, command.command_type)
+        super()._complete_command(command, response)
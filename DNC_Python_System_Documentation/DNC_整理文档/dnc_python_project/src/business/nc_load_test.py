@@ -0,0 +1,187 @@
+"""
+NC通信负载测试
+用多个NCCommunicator连接同时向设备（或本地模拟器）发送命令，统计吞吐量和延迟百分位数
+
+用法:
+    python -m src.business.nc_load_test --connections 4 --commands 1000 --latency 0.002
+    python -m src.business.nc_load_test --host 192.168.1.100 --port 502 --mix read,query
+"""
+
+import argparse
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Sequence
+
+from ..communication.nc_simulator import NCSimulator, SimulatorConfig
+from .latency_histogram import LatencyHistogram
+from .nc_communicator import NCCommunicator
+
+
+@dataclass
+class LoadTestComConfig:
+    """负载测试使用的网络通信配置"""
+    ip_address: str
+    port: int
+    timeout: float = 5.0
+    com_type: int = 1
+
+
+@dataclass
+class LoadTestDeviceConfig:
+    """负载测试使用的设备配置"""
+    device_name: str = "load-test"
+    device_model: str = "simulator"
+
+
+class LoadTestConfig:
+    """负载测试使用的最小配置管理器"""
+
+    def __init__(self, host: str, port: int, timeout: float = 5.0):
+        self.com_config = LoadTestComConfig(host, port, timeout)
+        self.device_config = LoadTestDeviceConfig()
+
+
+def _run_command(communicator: NCCommunicator, command_type: str, index: int, bulk_size: int):
+    """按命令类型发送一条命令"""
+    address = f"#{500 + index % 100}"
+    if command_type == "read":
+        return communicator.read_data(address)
+    if command_type == "write":
+        return communicator.write_data(address, index)
+    if command_type == "write_bulk":
+        return communicator.write_bulk({f"#{500 + i}": index for i in range(bulk_size)})
+    if command_type == "execute":
+        return communicator.execute_program(1000 + index % 10)
+    if command_type == "query":
+        return communicator.query_status()
+    raise ValueError(f"不支持的命令类型: {command_type}")
+
+
+def _is_error(response) -> bool:
+    return response is None or not response.success or str(response.data).startswith("ERROR")
+
+
+def run_load_test(host: str, port: int, connections: int = 4, commands_per_connection: int = 500,
+                  mix: Sequence[str] = ("write", "read", "query"), bulk_size: int = 70,
+                  timeout: float = 5.0) -> Dict[str, Any]:
+    """
+    运行负载测试
+
+    Args:
+        host: 设备地址
+        port: 设备端口
+        connections: 并发连接数
+        commands_per_connection: 每个连接发送的命令数
+        mix: 命令类型，按顺序轮流发送（read/write/write_bulk/execute/query）
+        bulk_size: write_bulk命令包含的宏变量数
+        timeout: 命令超时时间（秒）
+
+    Returns:
+        Dict[str, Any]: 测试报告（命令数、错误数、每秒命令数和延迟百分位数，延迟单位为毫秒）
+    """
+    communicators = [NCCommunicator(LoadTestConfig(host, port, timeout)) for _ in range(connections)]
+    connected = [communicator for communicator in communicators if communicator.connect()]
+    if len(connected) < connections:
+        for communicator in connected:
+            communicator.disconnect()
+        raise ConnectionError(f"只有 {len(connected)}/{connections} 个连接成功: {host}:{port}")
+
+    histograms: List[Dict[str, LatencyHistogram]] = [{} for _ in communicators]
+    errors = [0] * connections
+    barrier = threading.Barrier(connections + 1)
+
+    def worker(slot: int):
+        communicator = communicators[slot]
+        local = histograms[slot]
+        barrier.wait()
+        for i in range(commands_per_connection):
+            command_type = mix[i % len(mix)]
+            start_time = time.perf_counter()
+            response = _run_command(communicator, command_type, i, bulk_size)
+            elapsed = time.perf_counter() - start_time
+            histogram = local.get(command_type)
+            if histogram is None:
+                histogram = local[command_type] = LatencyHistogram()
+            histogram.record(elapsed)
+            if _is_error(response):
+                errors[slot] += 1
+
+    threads = [threading.Thread(target=worker, args=(slot,), daemon=True) for slot in range(connections)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start_time = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start_time
+
+    for communicator in communicators:
+        communicator.disconnect()
+
+    # 合并各连接的直方图
+    by_type: Dict[str, LatencyHistogram] = {}
+    total = LatencyHistogram()
+    for local in histograms:
+        for command_type, histogram in local.items():
+            by_type.setdefault(command_type, LatencyHistogram()).merge(histogram)
+            total.merge(histogram)
+
+    total_commands = connections * commands_per_connection
+    return {
+        "connections": connections,
+        "commands": total_commands,
+        "errors": sum(errors),
+        "elapsed": round(elapsed, 3),
+        "commands_per_second": round(total_commands / elapsed, 1) if elapsed > 0 else 0.0,
+        "latency_ms": _latency_ms(total),
+        "latency_ms_by_type": {command_type: _latency_ms(h) for command_type, h in by_type.items()}
+    }
+
+
+def _latency_ms(histogram: LatencyHistogram) -> Dict[str, float]:
+    snapshot = histogram.snapshot()
+    return {key: round(snapshot[key] * 1000, 3) for key in ("mean", "p50", "p95", "p99", "max")}
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """命令行入口：未指定--port时启动本地模拟器"""
+    parser = argparse.ArgumentParser(description="NC通信负载测试")
+    parser.add_argument("--host", default="127.0.0.1", help="设备地址")
+    parser.add_argument("--port", type=int, default=0, help="设备端口，0表示启动本地模拟器")
+    parser.add_argument("--connections", type=int, default=4, help="并发连接数")
+    parser.add_argument("--commands", type=int, default=500, help="每个连接发送的命令数")
+    parser.add_argument("--mix", default="write,read,query", help="命令类型，逗号分隔")
+    parser.add_argument("--bulk-size", type=int, default=70, help="write_bulk包含的宏变量数")
+    parser.add_argument("--latency", type=float, default=0.0, help="模拟器处理延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="模拟器延迟抖动（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="模拟器错误率")
+    parser.add_argument("--split-size", type=int, default=0, help="模拟器应答拆包大小（字节）")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    mix = [item.strip() for item in args.mix.split(",") if item.strip()]
+
+    simulator = None
+    host, port = args.host, args.port
+    if not port:
+        simulator = NCSimulator(config=SimulatorConfig(
+            latency=args.latency, jitter=args.jitter,
+            error_rate=args.error_rate, split_size=args.split_size
+        ))
+        host, port = simulator.start()
+
+    try:
+        report = run_load_test(host, port, args.connections, args.commands, mix, args.bulk_size)
+    finally:
+        if simulator is not None:
+            simulator.stop()
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,299 @@
+"""
+NC通信回放
+把抓包文件中的数据重新送入分帧读取器，或按原始节奏（可加速）把命令重新发送到
+回放模拟器、本地模拟器或设备，用于确定性地比较解析和队列改动前后的性能
+
+用法:
+    python -m src.business.nc_replay capture.ncap --mode parser
+    python -m src.business.nc_replay capture.ncap --mode communicator --speed 10
+    python -m src.business.nc_replay capture.ncap --mode communicator --speed 0 --host 127.0.0.1 --port 8193
+"""
+
+import argparse
+import json
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Any, Deque, Iterable, List, Optional, Sequence, Tuple
+
+from ..communication.framing import FrameReader
+from ..communication.nc_simulator import NCSimulator
+from ..communication.traffic_capture import CaptureRecord, DIRECTION_INBOUND, DIRECTION_OUTBOUND, read_capture
+from .latency_histogram import LatencyHistogram
+from .nc_communicator import NCCommunicator, NCCommand, NCResponse
+from .nc_load_test import LoadTestConfig
+
+
+@dataclass
+class Exchange:
+    """一次请求及其后到达的应答数据"""
+    request: bytes
+    sent_at: float
+    responses: List[CaptureRecord] = field(default_factory=list)
+
+    @property
+    def latency(self) -> float:
+        """请求到第一段应答数据的时间（秒）"""
+        return self.responses[0].timestamp - self.sent_at if self.responses else 0.0
+
+
+def group_exchanges(records: Iterable[CaptureRecord]) -> List[Exchange]:
+    """
+    按请求分组抓包记录（第一个请求之前收到的数据被忽略）
+
+    Args:
+        records: 抓包记录
+
+    Returns:
+        List[Exchange]: 请求列表
+    """
+    exchanges: List[Exchange] = []
+    for record in records:
+        if record.direction == DIRECTION_OUTBOUND:
+            exchanges.append(Exchange(record.data, record.timestamp))
+        elif record.direction == DIRECTION_INBOUND and exchanges:
+            exchanges[-1].responses.append(record)
+    return exchanges
+
+
+def command_from_frame(frame: bytes, command_id: str, timeout: float = 5.0) -> NCCommand:
+    """
+    由发送的命令帧还原NC命令（NCCommunicator._build_command_data的逆过程）
+
+    Args:
+        frame: 命令帧
+        command_id: 命令ID
+        timeout: 命令超时时间（秒）
+
+    Returns:
+        NCCommand: NC命令
+
+    Raises:
+        ValueError: 无法识别的命令帧
+    """
+    parts = frame.decode(errors="replace").split()
+    command = parts[0].upper() if parts else ""
+
+    def pairs(tokens: Sequence[str]) -> Dict[str, str]:
+        return dict(token.split("=", 1) for token in tokens if "=" in token)
+
+    if command == "READ" and len(parts) >= 2:
+        length = int(parts[2]) if len(parts) >= 3 and parts[2].isdigit() else 1
+        return NCCommand(command_id, "read", {"address": parts[1], "length": length}, {}, timeout)
+    if command == "WRITE" and len(parts) >= 3:
+        return NCCommand(command_id, "write", {"address": parts[1], "data": parts[2]}, {}, timeout)
+    if command == "WRITEM" and len(parts) >= 2:
+        return NCCommand(command_id, "write_bulk", {"values": pairs(parts[2:])}, {}, timeout)
+    if command == "EXECUTE" and len(parts) >= 2:
+        program_no = int(parts[1]) if parts[1].isdigit() else parts[1]
+        return NCCommand(command_id, "execute", {"program_no": program_no, "parameters": pairs(parts[2:])},
+                         {}, timeout * 2)
+    if command == "QUERY" and len(parts) >= 2:
+        return NCCommand(command_id, "query", {"query_type": parts[1]}, {}, timeout)
+    raise ValueError(f"无法识别的命令帧: {frame!r}")
+
+
+class ReplaySimulator(NCSimulator):
+    """按抓包记录应答的模拟器
+
+    收到与记录中相同的请求时返回记录的应答，并按记录的设备响应时间（除以speed）延迟；
+    同一请求出现多次时按出现顺序使用记录，记录中没有的请求返回"ERROR REPLAY"。
+    """
+
+    def __init__(self, exchanges: Sequence[Exchange], speed: float = 1.0,
+                 host: str = "127.0.0.1", port: int = 0):
+        """
+        初始化回放模拟器
+
+        Args:
+            exchanges: 请求列表
+            speed: 回放速度倍数，0表示不延迟
+            host: 监听地址
+            port: 监听端口，0表示自动分配
+        """
+        super().__init__(host, port)
+        self.speed = speed
+        self._replies: Dict[str, Deque[Tuple[float, str]]] = {}
+        for exchange in exchanges:
+            key = exchange.request.decode(errors="replace").strip()
+            text = b"".join(record.data for record in exchange.responses).decode(errors="replace")
+            self._replies.setdefault(key, deque()).append((exchange.latency, text.rstrip("\r\n")))
+
+    def handle_line(self, line: str) -> Optional[str]:
+        """返回记录中对该请求的应答"""
+        if not line:
+            return None
+        with self._lock:
+            self._stats["commands"] += 1
+            replies = self._replies.get(line)
+            latency, text = replies.popleft() if replies else (0.0, "ERROR REPLAY")
+        if self.speed > 0 and latency > 0:
+            time.sleep(latency / self.speed)
+        return text
+
+
+def replay_parser(records: Iterable[CaptureRecord], speed: float = 0.0, delimiter: bytes = b"\n",
+                  length_prefix: int = 0) -> Dict[str, Any]:
+    """
+    把接收的数据按原始分包边界送入分帧读取器
+
+    Args:
+        records: 抓包记录
+        speed: 回放速度倍数，0表示不等待（测量解析吞吐量）
+        delimiter: 帧分隔符
+        length_prefix: 长度前缀字节数
+
+    Returns:
+        Dict[str, Any]: 数据包数、字节数、帧数和每秒帧数
+    """
+    reader = FrameReader(delimiter=delimiter, length_prefix=length_prefix)
+    packets = 0
+    frames = 0
+    first_timestamp = None
+    start_time = time.perf_counter()
+
+    for record in records:
+        if record.direction != DIRECTION_INBOUND:
+            continue
+        if speed > 0:
+            if first_timestamp is None:
+                first_timestamp = record.timestamp
+            delay = (record.timestamp - first_timestamp) / speed - (time.perf_counter() - start_time)
+            if delay > 0:
+                time.sleep(delay)
+        packets += 1
+        frames += len(reader.feed(record.data))
+
+    elapsed = time.perf_counter() - start_time
+    return {
+        "packets": packets,
+        "bytes": reader.bytes_received,
+        "frames": frames,
+        "elapsed": round(elapsed, 6),
+        "frames_per_second": round(frames / elapsed, 1) if elapsed > 0 else 0.0
+    }
+
+
+def replay_communicator(records: Iterable[CaptureRecord], speed: float = 1.0,
+                        host: Optional[str] = None, port: Optional[int] = None,
+                        timeout: float = 5.0) -> Dict[str, Any]:
+    """
+    按原始节奏通过NCCommunicator重新发送抓包中的命令
+
+    未指定host时启动回放模拟器，用记录中的应答和响应时间回答。
+
+    Args:
+        records: 抓包记录
+        speed: 回放速度倍数（命令间隔和设备响应时间都除以该值），0表示不等待
+        host: 设备或模拟器地址
+        port: 设备或模拟器端口
+        timeout: 命令超时时间（秒）
+
+    Returns:
+        Dict[str, Any]: 命令数、合并数、错误数、每秒命令数和延迟百分位数（毫秒）
+    """
+    exchanges = group_exchanges(records)
+    simulator = None
+    if host is None:
+        simulator = ReplaySimulator(exchanges, speed)
+        host, port = simulator.start()
+
+    communicator = NCCommunicator(LoadTestConfig(host, port, timeout))
+    try:
+        if not communicator.connect():
+            raise ConnectionError(f"连接失败: {host}:{port}")
+
+        histogram = LatencyHistogram()
+        lock = threading.Lock()
+        done = threading.Event()
+        counts = {"pending": 0, "errors": 0, "coalesced": 0, "skipped": 0}
+
+        def on_response(sent_at: float, response: NCResponse):
+            with lock:
+                histogram.record(time.perf_counter() - sent_at)
+                if response.coalesced:
+                    counts["coalesced"] += 1
+                elif not response.success or str(response.data).startswith("ERROR"):
+                    counts["errors"] += 1
+                counts["pending"] -= 1
+                if counts["pending"] == 0:
+                    done.set()
+
+        start_time = time.perf_counter()
+        first_sent = exchanges[0].sent_at if exchanges else 0.0
+        for index, exchange in enumerate(exchanges):
+            try:
+                command = command_from_frame(exchange.request, f"replay_{index}", timeout)
+            except ValueError as e:
+                logging.getLogger(__name__).warning(str(e))
+                counts["skipped"] += 1
+                continue
+            if speed > 0:
+                delay = (exchange.sent_at - first_sent) / speed - (time.perf_counter() - start_time)
+                if delay > 0:
+                    time.sleep(delay)
+            with lock:
+                counts["pending"] += 1
+                done.clear()
+            sent_at = time.perf_counter()
+            if not communicator.send_command(command, lambda r, t=sent_at: on_response(t, r)):
+                with lock:
+                    counts["pending"] -= 1
+                    counts["errors"] += 1
+
+        # 等待剩余的应答，超过timeout没有新应答时结束
+        while True:
+            with lock:
+                if counts["pending"] == 0:
+                    break
+                last_pending = counts["pending"]
+            if not done.wait(timeout):
+                with lock:
+                    if counts["pending"] == last_pending:
+                        break
+        elapsed = time.perf_counter() - start_time
+    finally:
+        communicator.disconnect()
+        if simulator is not None:
+            simulator.stop()
+
+    commands = histogram.count
+    snapshot = histogram.snapshot()
+    return {
+        "commands": commands,
+        "skipped": counts["skipped"],
+        "coalesced": counts["coalesced"],
+        "errors": counts["errors"],
+        "sent": simulator.get_statistics()["commands"] if simulator is not None else None,
+        "elapsed": round(elapsed, 3),
+        "commands_per_second": round(commands / elapsed, 1) if elapsed > 0 else 0.0,
+        "latency_ms": {key: round(snapshot[key] * 1000, 3) for key in ("mean", "p50", "p95", "p99", "max")}
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="NC通信抓包回放")
+    parser.add_argument("capture", help="抓包文件路径（自动包含轮转文件）")
+    parser.add_argument("--mode", choices=("parser", "communicator"), default="communicator",
+                        help="parser: 只回放接收数据到分帧读取器; communicator: 经通信器重新发送命令")
+    parser.add_argument("--speed", type=float, default=1.0, help="回放速度倍数，0表示不等待")
+    parser.add_argument("--host", default=None, help="设备或模拟器地址，未指定时使用回放模拟器")
+    parser.add_argument("--port", type=int, default=None, help="设备或模拟器端口")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    records = list(read_capture(args.capture))
+    if args.mode == "parser":
+        report = replay_parser(records, args.speed)
+    else:
+        report = replay_communicator(records, args.speed, args.host, args.port)
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -59,12 +59,13 @@ class ProgramMatcher:
         except Exception as e:
             self.logger.error(f"程序匹配数据加载失败: {e}")
     
-    def match_program(self, model: str) -> MatchResult:
+    def match_program(self, model: str, station: int = 1) -> MatchResult:
         """
         匹配加工程序
         
         Args:
             model: 型号字符串
+            station: 工位序号（type_prg.csv中的程序列，从1开始）
             
         Returns:
             MatchResult: 匹配结果
@@ -95,7 +96,7 @@ class ProgramMatcher:
                 )
             
             # 根据类型编号查找程序编号
-            program_no = self._find_program_no(type_no)
+            program_no = self._find_program_no(type_no, station)
             if not program_no:
                 return MatchResult(
                     model=model,
@@ -185,12 +186,13 @@ class ProgramMatcher:
             # 如果正则表达式有误，使用精确匹配
             return model.lower() == type_pattern.lower()
     
-    def _find_program_no(self, type_no: int) -> Optional[int]:
+    def _find_program_no(self, type_no: int, station: int = 1) -> Optional[int]:
         """
         查找类型对应的程序编号
         
         Args:
             type_no: 类型编号
+            station: 工位序号（程序列，从1开始）
             
         Returns:
             Optional[int]: 程序编号
@@ -203,9 +205,9 @@ class ProgramMatcher:
             if len(row) > 0:
                 try:
                     current_type_no = int(row[0])
-                    if current_type_no == type_no and len(row) > 1:
-                        # 返回第一个程序编号
-                        return int(row[1])
+                    if current_type_no == type_no and len(row) > station:
+                        # 返回指定工位的程序编号
+                        return int(row[station])
                 except (ValueError, TypeError, IndexError):
                     continue
         
@@ -355,18 +357,19 @@ class AdvancedProgramMatcher(ProgramMatcher):
         self.fuzzy_matcher = FuzzyMatcher()
         self.pattern_matcher = PatternMatcher()
     
-    def match_program(self, model: str) -> MatchResult:
+    def match_program(self, model: str, station: int = 1) -> MatchResult:
         """
         高级程序匹配（支持模糊匹配和模式匹配）
         
         Args:
             model: 型号字符串
+            station: 工位序号（精确匹配时使用）
             
         Returns:
             MatchResult: 匹配结果
         """
         # 首先尝试精确匹配
-        exact_result = super().match_program(model)
+        exact_result = super().match_program(model, station)
         if exact_result.program_no > 0:
             return exact_result
         
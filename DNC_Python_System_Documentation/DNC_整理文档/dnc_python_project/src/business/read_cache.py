@@ -0,0 +1,227 @@
+"""
+读缓存
+缓存设备宏变量和状态的读取结果，按地址设置有效期，并合并同一地址的并发读取
+"""
+
+import threading
+import time
+from typing import Dict, Any, Callable, Iterable, Optional
+
+
+class _InFlight:
+    """正在进行的读取，其他读取同一地址的调用者等待它的结果"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value: Any = None
+
+
+class MacroReadCache:
+    """读穿透缓存
+
+    load()在缓存有效时直接返回缓存值，否则调用读取函数并缓存结果；
+    同一地址同时只有一个读取在进行，并发的调用者共享它的结果。
+    读取期间该地址被失效时，读取结果返回给调用者但不写入缓存，避免缓存写入前的旧值。
+    """
+
+    def __init__(self, default_ttl: float = 0.5, ttls: Optional[Dict[str, float]] = None):
+        """
+        初始化读缓存
+
+        Args:
+            default_ttl: 默认有效期（秒），0表示不缓存
+            ttls: 地址到有效期的映射，覆盖默认有效期
+        """
+        self.default_ttl = default_ttl
+        self._ttls: Dict[str, float] = dict(ttls or {})
+        self._entries: Dict[str, tuple] = {}  # 地址 -> (值, 写入时间, 过期时间)
+        self._in_flight: Dict[str, _InFlight] = {}
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+        # 统计信息
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "invalidations": 0
+        }
+
+    def set_ttl(self, key: str, ttl: Optional[float]) -> None:
+        """
+        设置地址的有效期
+
+        Args:
+            key: 地址
+            ttl: 有效期（秒），为None时恢复默认有效期
+        """
+        with self._lock:
+            if ttl is None:
+                self._ttls.pop(key, None)
+            else:
+                self._ttls[key] = ttl
+
+    def get_ttl(self, key: str) -> float:
+        """获取地址的有效期（秒）"""
+        return self._ttls.get(key, self.default_ttl)
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Any:
+        """
+        获取有效的缓存值
+
+        Args:
+            key: 地址
+            max_age: 调用者能接受的最长缓存时间（秒），为None时只按有效期判断
+
+        Returns:
+            Any: 缓存值，没有有效缓存时为None
+        """
+        with self._lock:
+            return self._lookup(key, max_age, time.time())
+
+    def put(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        写入缓存
+
+        Args:
+            key: 地址
+            value: 值
+            ttl: 有效期（秒），为None时使用该地址的有效期
+        """
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def version(self, keys: Iterable[str]) -> tuple:
+        """
+        获取地址的当前版本，配合put_many()丢弃读取期间已失效的值
+
+        Args:
+            keys: 地址列表
+
+        Returns:
+            tuple: 版本标记
+        """
+        with self._lock:
+            return self._epoch, {key: self._generations.get(key, 0) for key in keys}
+
+    def put_many(self, values: Dict[str, Any], version: Optional[tuple] = None) -> int:
+        """
+        批量写入缓存（块读取的结果）
+
+        Args:
+            values: 地址到值的映射
+            version: 读取前由version()获取的版本标记，读取期间失效的地址不写入
+
+        Returns:
+            int: 写入的条目数
+        """
+        stored = 0
+        with self._lock:
+            for key, value in values.items():
+                if version is not None:
+                    epoch, generations = version
+                    if epoch != self._epoch or generations.get(key, 0) != self._generations.get(key, 0):
+                        continue
+                self._store(key, value, None)
+                stored += 1
+        return stored
+
+    def load(self, key: str, loader: Callable[[], Any], max_age: Optional[float] = None,
+             cacheable: Callable[[Any], bool] = None) -> Any:
+        """
+        读穿透：缓存有效时返回缓存值，否则调用读取函数
+
+        Args:
+            key: 地址
+            loader: 读取函数
+            max_age: 调用者能接受的最长缓存时间（秒）
+            cacheable: 判断读取结果能否缓存的函数，默认结果不为None即可缓存
+
+        Returns:
+            Any: 缓存值或读取结果
+        """
+        owner = False
+        with self._lock:
+            value = self._lookup(key, max_age, time.time())
+            if value is not None:
+                return value
+            in_flight = self._in_flight.get(key)
+            if in_flight is not None:
+                self._stats["coalesced"] += 1
+            else:
+                in_flight = self._in_flight[key] = _InFlight()
+                generation = (self._epoch, self._generations.get(key, 0))
+                owner = True
+        if not owner:
+            in_flight.event.wait()
+            return in_flight.value
+
+        value = None
+        try:
+            value = loader()
+        finally:
+            with self._lock:
+                ok = cacheable(value) if cacheable else value is not None
+                if ok and generation == (self._epoch, self._generations.get(key, 0)):
+                    self._store(key, value, None)
+                if self._in_flight.get(key) is in_flight:
+                    self._in_flight.pop(key)
+            in_flight.value = value
+            in_flight.event.set()
+        return value
+
+    def invalidate(self, keys: Optional[Iterable[str]] = None) -> None:
+        """
+        使缓存失效（写入设备、执行程序、重新连接或报警时调用）
+
+        Args:
+            keys: 地址列表，为None时清空全部
+        """
+        with self._lock:
+            self._stats["invalidations"] += 1
+            # 正在进行的读取可能返回失效前的值，之后的调用者不再等待它
+            if keys is None:
+                self._entries.clear()
+                self._in_flight.clear()
+                self._epoch += 1
+                self._generations.clear()
+            else:
+                for key in keys:
+                    self._entries.pop(key, None)
+                    self._in_flight.pop(key, None)
+                    self._generations[key] = self._generations.get(key, 0) + 1
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        获取统计信息
+
+        Returns:
+            Dict[str, Any]: 命中、未命中、合并的读取数、失效次数和缓存条目数
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["in_flight"] = len(self._in_flight)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
+
+    def _lookup(self, key: str, max_age: Optional[float], now: float) -> Any:
+        """查找有效的缓存值（调用时须持有锁）"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, stored_at, expires_at = entry
+            if now < expires_at and (max_age is None or now - stored_at <= max_age):
+                self._stats["hits"] += 1
+                return value
+        self._stats["misses"] += 1
+        return None
+
+    def _store(self, key: str, value: Any, ttl: Optional[float]) -> None:
+        """写入缓存条目（调用时须持有锁）"""
+        ttl = self._ttls.get(key, self.default_ttl) if ttl is None else ttl
+        if ttl <= 0:
+            return
+        now = time.time()
+        self._entries[key] = (value, now, now + ttl)
@@ -57,31 +57,44 @@ class RelationValidator:
                 return {"valid": False, "errors": ["关系数据加载失败"]}
         
         try:
-            errors = []
-            warnings = []
-            
             # 获取当前程序的关系规则
             program_rules = self.relation_data[
                 self.relation_data['PROGRAM_NO'] == program_no
             ]
             
-            for _, rule in program_rules.iterrows():
-                validation_result = self._validate_single_rule(rule, parameters)
-                if not validation_result["valid"]:
-                    errors.extend(validation_result["errors"])
-                if validation_result["warnings"]:
-                    warnings.extend(validation_result["warnings"])
-            
-            return {
-                "valid": len(errors) == 0,
-                "errors": errors,
-                "warnings": warnings
-            }
+            return self.validate_rules([rule for _, rule in program_rules.iterrows()], parameters)
             
         except Exception as e:
             self.logger.error(f"关系验证失败: {e}")
             return {"valid": False, "errors": [f"关系验证异常: {str(e)}"]}
     
+    def validate_rules(self, rules: List[Dict[str, Any]], parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        按给定的关系规则验证参数（规则可预先取出并缓存）
+        
+        Args:
+            rules: 关系规则列表
+            parameters: 参数字典
+            
+        Returns:
+            Dict[str, Any]: 验证结果，包含验证状态和错误信息
+        """
+        errors = []
+        warnings = []
+        
+        for rule in rules:
+            validation_result = self._validate_single_rule(rule, parameters)
+            if not validation_result["valid"]:
+                errors.extend(validation_result["errors"])
+            if validation_result["warnings"]:
+                warnings.extend(validation_result["warnings"])
+        
+        return {
+            "valid": len(errors) == 0,
+            "errors": errors,
+            "warnings": warnings
+        }
+    
     def _validate_single_rule(self, rule: Dict[str, Any], parameters: Dict[str, Any]) -> Dict[str, Any]:
         """
         验证单个关系规则
@@ -0,0 +1,200 @@
+"""
+扫描包缓存
+按(型号, 工位)预先组装程序匹配结果、计算计划、关系规则和cntrl布局，
+扫码时只需一次字典查找加上计算
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Tuple
+
+from ..core.config import ConfigManager
+from ..data.csv_processor import CSVProcessor
+from .program_matcher import ProgramMatcher, MatchResult
+from .calculation_engine import CalculationEngine, CalculationPlan, CalculationResult
+
+
+@dataclass(frozen=True)
+class ScanBundle:
+    """单个(型号, 工位)的预编译扫描包"""
+    model: str
+    station: int
+    match_result: MatchResult
+    calculation_plan: CalculationPlan
+    relation_rules: Tuple[Dict[str, Any], ...]
+    cntrl_layout: Tuple[Dict[str, str], ...]
+    built_at: float = field(default_factory=time.time)
+
+    @property
+    def program_no(self) -> int:
+        """程序编号"""
+        return self.match_result.program_no
+
+
+class ScanBundleCache:
+    """扫描包LRU缓存，首次扫描某型号时构建扫描包"""
+
+    def __init__(self, config_manager: ConfigManager, csv_processor: CSVProcessor,
+                 program_matcher: ProgramMatcher, calculation_engine: CalculationEngine,
+                 relation_validator: Any, max_size: int = 128):
+        """
+        初始化扫描包缓存
+
+        Args:
+            config_manager: 配置管理器
+            csv_processor: CSV处理器
+            program_matcher: 程序匹配器
+            calculation_engine: 计算引擎
+            relation_validator: 关系验证器
+            max_size: 最多缓存的扫描包数量
+        """
+        self.config_manager = config_manager
+        self.csv_processor = csv_processor
+        self.program_matcher = program_matcher
+        self.calculation_engine = calculation_engine
+        self.relation_validator = relation_validator
+        self.max_size = max(1, max_size)
+        self.logger = logging.getLogger(__name__)
+
+        self._bundles: "OrderedDict[Tuple[str, int], ScanBundle]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._cntrl_data: Optional[List[Dict[str, str]]] = None
+
+        # 统计信息
+        self.hits = 0
+        self.misses = 0
+
+    def get_bundle(self, model: str, station: int = 1) -> Optional[ScanBundle]:
+        """
+        获取扫描包，未缓存时构建
+
+        Args:
+            model: 型号字符串
+            station: 工位序号
+
+        Returns:
+            Optional[ScanBundle]: 扫描包，程序匹配失败时返回None
+        """
+        key = (model, station)
+        with self._lock:
+            bundle = self._bundles.get(key)
+            if bundle is not None:
+                self._bundles.move_to_end(key)
+                self.hits += 1
+                return bundle
+            self.misses += 1
+
+        bundle = self._build_bundle(model, station)
+        if bundle is None:
+            return None
+
+        with self._lock:
+            self._bundles[key] = bundle
+            self._bundles.move_to_end(key)
+            while len(self._bundles) > self.max_size:
+                self._bundles.popitem(last=False)
+        return bundle
+
+    def _build_bundle(self, model: str, station: int) -> Optional[ScanBundle]:
+        """
+        构建扫描包
+
+        Args:
+            model: 型号字符串
+            station: 工位序号
+
+        Returns:
+            Optional[ScanBundle]: 扫描包
+        """
+        match_result = self.program_matcher.match_program(model, station)
+        if match_result.program_no <= 0:
+            self.logger.warning(f"扫描包构建失败，型号: {model}, 原因: {match_result.error_message}")
+            return None
+
+        program_no = match_result.program_no
+        plan = self.calculation_engine.compile_plan(program_no)
+        relation_rules = tuple(self.relation_validator.get_relation_rules(program_no))
+
+        # 只保留计划中涉及的宏变量的控件布局
+        macros = set(plan.macros)
+        cntrl_layout = tuple(row for row in self._get_cntrl_data() if row.get('MACRO') in macros)
+
+        self.logger.info(f"扫描包构建完成: 型号{model} 工位{station} -> 程序{program_no}")
+        return ScanBundle(
+            model=model,
+            station=station,
+            match_result=match_result,
+            calculation_plan=plan,
+            relation_rules=relation_rules,
+            cntrl_layout=cntrl_layout
+        )
+
+    def _get_cntrl_data(self) -> List[Dict[str, str]]:
+        """
+        加载cntrl.csv（只加载一次）
+
+        Returns:
+            List[Dict[str, str]]: 控件定义行
+        """
+        if self._cntrl_data is None:
+            try:
+                cntrl_path = self.config_manager.get_csv_config_path("cntrl.csv")
+                rows = self.csv_processor.read_csv(cntrl_path) or []
+                header = rows[0] if rows else []
+                self._cntrl_data = [dict(zip(header, row)) for row in rows[1:]]
+            except Exception as e:
+                self.logger.error(f"cntrl数据加载失败: {e}")
+                self._cntrl_data = []
+        return self._cntrl_data
+
+    def evaluate(self, bundle: ScanBundle,
+                 input_data: Dict[str, Any] = None) -> Tuple[CalculationResult, Dict[str, Any]]:
+        """
+        使用扫描包计算参数并验证关系
+
+        Args:
+            bundle: 扫描包
+            input_data: 输入数据
+
+        Returns:
+            Tuple[CalculationResult, Dict[str, Any]]: 计算结果和关系验证结果
+        """
+        result = self.calculation_engine.execute_plan(bundle.calculation_plan, input_data)
+        validation_results = self.relation_validator.validate_rules(
+            list(bundle.relation_rules), result.parameters
+        )
+        return result, validation_results
+
+    def invalidate(self, model: Optional[str] = None) -> None:
+        """
+        使缓存失效（master数据重新加载后调用）
+
+        Args:
+            model: 型号字符串，为None时清空全部缓存
+        """
+        with self._lock:
+            if model is None:
+                self._bundles.clear()
+                self._cntrl_data = None
+            else:
+                for key in [key for key in self._bundles if key[0] == model]:
+                    del self._bundles[key]
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        获取缓存统计信息
+
+        Returns:
+            Dict[str, Any]: 统计信息
+        """
+        total = self.hits + self.misses
+        return {
+            "size": len(self._bundles),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total * 100, 2) if total > 0 else 0.0
+        }
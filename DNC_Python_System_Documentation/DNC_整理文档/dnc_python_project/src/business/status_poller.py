@@ -0,0 +1,283 @@
+"""
+状态轮询器
+每台NC设备一个轮询线程，按设备状态自适应调整轮询间隔，只向订阅者发布变化的状态
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Any, List, Optional, Callable
+
+
+class StatusPoller:
+    """共享的设备状态轮询器
+
+    所有界面和业务模块订阅同一个轮询器，设备负载和界面刷新次数取决于状态变化的频率，
+    而不是订阅者的数量。设备运行时按running_interval轮询，空闲时按idle_interval轮询，
+    未连接时按disconnected_interval检查；状态刚变化后保持快速轮询一个周期。
+
+    每次发布的是与上次发布相比发生变化的字段；距上次发布不足min_publish_interval时
+    推迟到下一周期，期间的多次变化合并为一次发布，变回原值的字段不再发布。
+    """
+
+    # 表示设备正在运行的状态关键字
+    RUNNING_STATES = ("RUN", "BUSY", "CYCLE")
+
+    def __init__(self, communicator: Any, event_dispatcher: Any = None, machine_id: str = "default",
+                 addresses: Optional[List[str]] = None, running_interval: float = 0.2,
+                 idle_interval: float = 2.0, disconnected_interval: float = 5.0,
+                 min_publish_interval: float = 0.1):
+        """
+        初始化状态轮询器
+
+        Args:
+            communicator: NC通信器
+            event_dispatcher: 事件分发器，状态变化时调用publish_nc_status_changed
+            machine_id: 设备ID
+            addresses: 一并轮询的宏变量地址
+            running_interval: 设备运行时的轮询间隔（秒）
+            idle_interval: 设备空闲时的轮询间隔（秒）
+            disconnected_interval: 未连接时的检查间隔（秒）
+            min_publish_interval: 两次发布之间的最短间隔（秒）
+        """
+        self.communicator = communicator
+        self.event_dispatcher = event_dispatcher
+        self.machine_id = machine_id
+        self.addresses = list(addresses or [])
+        self.running_interval = running_interval
+        self.idle_interval = idle_interval
+        self.disconnected_interval = disconnected_interval
+        self.min_publish_interval = min_publish_interval
+        self.logger = logging.getLogger(__name__)
+
+        self._subscribers: List[Callable] = []
+        self._status: Dict[str, Any] = {}
+        self._published: Dict[str, Any] = {}
+        self._last_publish = 0.0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.current_interval = idle_interval
+
+        # 统计信息
+        self._stats = {
+            "polls": 0,
+            "publishes": 0,
+            "fields_published": 0,
+            "failed_polls": 0
+        }
+
+    # ---- 订阅 ----
+
+    def subscribe(self, callback: Callable[[str, Dict[str, Any], Dict[str, Any]], None],
+                  send_current: bool = True) -> None:
+        """
+        订阅状态变化
+
+        回调在轮询线程中执行，参数为(设备ID, 变化的字段, 完整状态)；界面组件应通过
+        事件分发器的nc_status_changed信号订阅，由Qt切换到界面线程。
+
+        Args:
+            callback: 回调函数
+            send_current: 是否立即以当前完整状态调用一次回调
+        """
+        with self._lock:
+            if callback in self._subscribers:
+                return
+            self._subscribers.append(callback)
+            current = dict(self._published)
+        if send_current and current:
+            self._call(callback, current, current)
+
+    def unsubscribe(self, callback: Callable) -> None:
+        """
+        取消订阅
+
+        Args:
+            callback: 回调函数
+        """
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    # ---- 运行控制 ----
+
+    def start(self) -> None:
+        """启动轮询线程"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"StatusPoller-{self.machine_id}", daemon=True)
+        self._thread.start()
+        if hasattr(self.communicator, "add_status_callback"):
+            self.communicator.add_status_callback(self._on_connection_changed)
+        self.logger.info(f"状态轮询已启动: {self.machine_id}")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        停止轮询线程
+
+        Args:
+            timeout: 最长等待时间（秒）
+        """
+        if self._thread is None:
+            return
+        if hasattr(self.communicator, "remove_status_callback"):
+            self.communicator.remove_status_callback(self._on_connection_changed)
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+        self.logger.info(f"状态轮询已停止: {self.machine_id}")
+
+    def is_running(self) -> bool:
+        """轮询线程是否在运行"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def refresh(self) -> None:
+        """立即轮询一次（如用户点击刷新或连接状态变化时）"""
+        self._wakeup.set()
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        获取最近一次轮询的完整状态
+
+        Returns:
+            Dict[str, Any]: 状态字段
+        """
+        with self._lock:
+            return dict(self._status)
+
+    def get_published_status(self) -> Dict[str, Any]:
+        """
+        获取已发布给订阅者的状态（订阅者已收到的变化都已合并在内）
+
+        Returns:
+            Dict[str, Any]: 状态字段
+        """
+        with self._lock:
+            return dict(self._published)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        获取统计信息
+
+        Returns:
+            Dict[str, Any]: 轮询次数、发布次数、发布的字段数和当前轮询间隔
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["subscribers"] = len(self._subscribers)
+        stats["current_interval"] = self.current_interval
+        return stats
+
+    # ---- 轮询 ----
+
+    def poll_once(self) -> Dict[str, Any]:
+        """
+        轮询一次并发布变化
+
+        Returns:
+            Dict[str, Any]: 本次发布的变化字段（推迟或没有变化时为空）
+        """
+        status = self._read_status()
+        with self._lock:
+            self._stats["polls"] += 1
+            changed = status != self._status
+            self._status = status
+        self.current_interval = self._next_interval(status, changed)
+        return self._publish()
+
+    def _run(self) -> None:
+        """轮询线程主体"""
+        while not self._stop.is_set():
+            # 先清除唤醒标志再轮询，轮询期间的refresh()会使下一次等待立即返回
+            self._wakeup.clear()
+            try:
+                self.poll_once()
+            except Exception as e:
+                with self._lock:
+                    self._stats["failed_polls"] += 1
+                self.logger.error(f"状态轮询异常: {self.machine_id}, {e}")
+            self._wakeup.wait(self.current_interval)
+
+    def _read_status(self) -> Dict[str, Any]:
+        """读取设备状态"""
+        if not self.communicator.is_connected():
+            return {"connected": False, "state": "", "alarm": ""}
+
+        status: Dict[str, Any] = {"connected": True}
+        # 与其他模块的缓存读取共享同一条查询
+        response = self.communicator.query_status_cached(self.current_interval / 2)
+        if response is not None and response.success:
+            text = str(response.data or "").strip()
+            status["state"] = text.split()[0] if text else ""
+            status["alarm"] = text if "ALARM" in text.upper() else ""
+        else:
+            with self._lock:
+                self._stats["failed_polls"] += 1
+            status["state"] = "UNKNOWN"
+            status["alarm"] = ""
+
+        for address in self.addresses:
+            response = self.communicator.read_cached(address, self.current_interval)
+            if response is not None and response.success:
+                _, _, value = str(response.data).partition("=")
+                status[address] = value
+        return status
+
+    def _next_interval(self, status: Dict[str, Any], changed: bool) -> float:
+        """按设备状态选择下一次轮询的间隔"""
+        if not status.get("connected"):
+            return self.disconnected_interval
+        state = str(status.get("state", "")).upper()
+        if changed or status.get("alarm") or any(keyword in state for keyword in self.RUNNING_STATES):
+            return self.running_interval
+        return self.idle_interval
+
+    def _publish(self) -> Dict[str, Any]:
+        """发布与上次发布相比变化的字段（断开连接时宏变量以None发布并从已发布状态中移除）"""
+        now = time.time()
+        with self._lock:
+            changes = {key: value for key, value in self._status.items()
+                       if key not in self._published or self._published[key] != value}
+            stale = []
+            if self._status.get("connected") is False:
+                stale = [address for address in self._published
+                         if address in self.addresses and address not in self._status]
+                changes.update((address, None) for address in stale)
+            if not changes:
+                return {}
+            if now - self._last_publish < self.min_publish_interval:
+                # 推迟到下一周期，期间的变化合并发布
+                self.current_interval = min(self.current_interval, self.min_publish_interval)
+                return {}
+            self._published.update(changes)
+            for address in stale:
+                del self._published[address]
+            status = dict(self._published)
+            self._last_publish = now
+            self._stats["publishes"] += 1
+            self._stats["fields_published"] += len(changes)
+            subscribers = list(self._subscribers)
+
+        if self.event_dispatcher is not None:
+            try:
+                self.event_dispatcher.publish_nc_status_changed(self.machine_id, changes, status)
+            except Exception as e:
+                self.logger.error(f"发布状态变化失败: {e}")
+        for callback in subscribers:
+            self._call(callback, changes, status)
+        return changes
+
+    def _call(self, callback: Callable, changes: Dict[str, Any], status: Dict[str, Any]) -> None:
+        try:
+            callback(self.machine_id, changes, status)
+        except Exception as e:
+            self.logger.error(f"状态回调执行失败: {e}")
+
+    def _on_connection_changed(self, status: Any) -> None:
+        """通信器连接状态变化时立即轮询"""
+        self.refresh()
@@ -6,6 +6,9 @@
 from src.communication.nc_protocol import NCProtocol, RexrothProtocol, FanucProtocol
 from src.communication.protocol_factory import NCProtocolFactory
 from src.communication.named_pipe import NamedPipeClient, NamedPipeServer
+from src.communication.framing import FrameReader, FrameError
+from src.communication.nc_simulator import NCSimulator, SimulatorConfig
+from src.communication.traffic_capture import TrafficCapture, CaptureRecord, read_capture
 
 __all__ = [
     'NCProtocol',
@@ -13,5 +16,12 @@ __all__ = [
     'FanucProtocol',
     'NCProtocolFactory',
     'NamedPipeClient',
-    'NamedPipeServer'
+    'NamedPipeServer',
+    'FrameReader',
+    'FrameError',
+    'NCSimulator',
+    'SimulatorConfig',
+    'TrafficCapture',
+    'CaptureRecord',
+    'read_capture'
 ]
@@ -0,0 +1,177 @@
+"""
+分帧读取器
+在可复用的接收缓冲区上按分隔符或长度前缀切分应答帧
+"""
+
+from typing import Callable, List, Optional
+
+
+class FrameError(Exception):
+    """帧格式错误（例如帧长度超过上限）"""
+    pass
+
+
+class FrameReader:
+    """分帧读取器
+
+    数据通过recv_into直接读入内部bytearray，不为每次读取分配新缓冲区；
+    一次读取可以包含多个帧或半个帧，多余的数据留在缓冲区供下一帧使用。
+    """
+
+    def __init__(self, recv_into: Optional[Callable[[memoryview], int]] = None,
+                 delimiter: bytes = b"\n", length_prefix: int = 0,
+                 buffer_size: int = 4096, max_frame_size: int = 1024 * 1024):
+        """
+        初始化分帧读取器
+
+        Args:
+            recv_into: 读取函数，把数据写入给定的memoryview并返回字节数
+                （socket.recv_into、serial.Serial.readinto），推送模式下可为None
+            delimiter: 帧分隔符（length_prefix为0时使用）
+            length_prefix: 长度前缀的字节数（大端），0表示按分隔符分帧
+            buffer_size: 初始缓冲区大小
+            max_frame_size: 单帧最大字节数
+        """
+        if length_prefix not in (0, 1, 2, 4):
+            raise ValueError(f"不支持的长度前缀字节数: {length_prefix}")
+        if not length_prefix and not delimiter:
+            raise ValueError("未指定帧分隔符")
+
+        self.recv_into = recv_into
+        self.delimiter = delimiter
+        self.length_prefix = length_prefix
+        self.max_frame_size = max_frame_size
+
+        self._buffer = bytearray(max(buffer_size, 16))
+        self._start = 0  # 未消费数据的起始位置
+        self._end = 0  # 未消费数据的结束位置
+        self._scan = 0  # 已确认不含分隔符的位置，避免重复查找
+
+        # 统计信息
+        self.bytes_received = 0
+        self.frames_read = 0
+        self.reads = 0
+
+    @property
+    def buffered(self) -> int:
+        """缓冲区中未消费的字节数"""
+        return self._end - self._start
+
+    @property
+    def capacity(self) -> int:
+        """缓冲区容量"""
+        return len(self._buffer)
+
+    def read_frame(self) -> bytes:
+        """
+        读取一个完整的帧（不含分隔符或长度前缀），数据不足时继续读取
+
+        Returns:
+            bytes: 帧内容
+
+        Raises:
+            EOFError: 读取函数返回0字节（连接关闭或串口超时）
+            FrameError: 帧长度超过上限
+        """
+        while True:
+            frame = self.next_frame()
+            if frame is not None:
+                return frame
+            if self.recv_into is None:
+                raise EOFError("没有可读取的数据")
+            self._fill()
+
+    def feed(self, data: bytes) -> List[bytes]:
+        """
+        推送数据并取出已完整的帧（用于回放等推送模式）
+
+        Args:
+            data: 接收到的数据
+
+        Returns:
+            List[bytes]: 完整的帧
+        """
+        offset = 0
+        while offset < len(data):
+            self._ensure_space()
+            count = min(len(self._buffer) - self._end, len(data) - offset)
+            self._buffer[self._end:self._end + count] = data[offset:offset + count]
+            self._received(count)
+            offset += count
+        frames = []
+        while True:
+            frame = self.next_frame()
+            if frame is None:
+                return frames
+            frames.append(frame)
+
+    def next_frame(self) -> Optional[bytes]:
+        """
+        从缓冲区中取出一个完整的帧
+
+        Returns:
+            Optional[bytes]: 帧内容，数据不足时返回None
+        """
+        if self.length_prefix:
+            if self.buffered < self.length_prefix:
+                return None
+            header_end = self._start + self.length_prefix
+            length = int.from_bytes(self._buffer[self._start:header_end], "big")
+            if length > self.max_frame_size:
+                raise FrameError(f"帧长度超过上限: {length} > {self.max_frame_size}")
+            if self._end - header_end < length:
+                return None
+            frame = bytes(memoryview(self._buffer)[header_end:header_end + length])
+            self._consume(header_end + length)
+        else:
+            index = self._buffer.find(self.delimiter, max(self._start, self._scan), self._end)
+            if index < 0:
+                # 分隔符可能跨两次读取，下次从末尾之前开始查找
+                self._scan = max(self._start, self._end - len(self.delimiter) + 1)
+                if self.buffered > self.max_frame_size:
+                    raise FrameError(f"帧长度超过上限: {self.buffered} > {self.max_frame_size}")
+                return None
+            frame = bytes(memoryview(self._buffer)[self._start:index])
+            self._consume(index + len(self.delimiter))
+
+        self.frames_read += 1
+        return frame
+
+    def reset(self) -> None:
+        """丢弃缓冲区中的数据（命令失败后避免残留数据影响下一条应答）"""
+        self._start = self._end = self._scan = 0
+
+    def _fill(self) -> None:
+        """调用读取函数填充缓冲区"""
+        self._ensure_space()
+        count = self.recv_into(memoryview(self._buffer)[self._end:])
+        if not count:
+            raise EOFError("未读取到数据")
+        self._received(count)
+
+    def _ensure_space(self) -> None:
+        """保证缓冲区末尾有空闲区域，必要时先整理或扩大缓冲区"""
+        if self._end == len(self._buffer):
+            if self._start > 0:
+                # 把未消费数据移到开头
+                size = self.buffered
+                self._buffer[:size] = self._buffer[self._start:self._end]
+                self._scan = max(0, self._scan - self._start)
+                self._start, self._end = 0, size
+            else:
+                limit = self.max_frame_size + self.length_prefix + len(self.delimiter)
+                if len(self._buffer) >= limit:
+                    raise FrameError(f"帧长度超过上限: {self.max_frame_size}")
+                self._buffer.extend(bytes(min(len(self._buffer), limit - len(self._buffer))))
+
+    def _received(self, count: int) -> None:
+        self._end += count
+        self.bytes_received += count
+        self.reads += 1
+
+    def _consume(self, position: int) -> None:
+        """消费到position为止的数据，缓冲区为空时回到开头"""
+        self._start = position
+        if self._start == self._end:
+            self._start = self._end = 0
+        self._scan = self._start
@@ -5,10 +5,19 @@ NC协议模块
 
 import abc
 import logging
-from typing import Optional, Dict, Any, List
+import os
+from collections import deque
+from typing import Optional, Dict, Any, List, Callable, Iterable, Iterator, Union
 from enum import Enum
 
 
+# 程序来源：文件路径，或按顺序产生程序文本块的可迭代对象
+ProgramSource = Union[str, os.PathLike, Iterable[str]]
+
+# 传输进度回调，参数为(已确认的字节数, 总字节数)，按程序文件编码计算，总数未知时为0
+ProgressCallback = Callable[[int, int], None]
+
+
 class NCProtocolType(Enum):
     """NC协议类型枚举"""
     REXROTH = "rexroth"
@@ -115,34 +124,373 @@ class NCProtocol(abc.ABC):
         Returns:
             Dict[str, Any]: 验证结果
         """
+        validator = ProgramStreamValidator()
+        validator.feed(program_data or "")
+        return validator.finish()
+    
+    # ---- 流式程序传输 ----
+    
+    # 程序文件编码，进度按该编码的字节数计算
+    PROGRAM_ENCODING = "utf-8"
+    # 默认的程序块大小（字符）
+    PROGRAM_BLOCK_SIZE = 4096
+    # 默认的发送窗口（未确认的程序块数量上限）
+    PROGRAM_WINDOW_SIZE = 8
+    # 等待程序块确认的超时时间（秒）
+    PROGRAM_ACK_TIMEOUT = 10.0
+    
+    def send_program_stream(self, source: ProgramSource, program_name: str,
+                            block_size: Optional[int] = None, window_size: Optional[int] = None,
+                            progress_callback: Optional[ProgressCallback] = None,
+                            total_size: Optional[int] = None) -> bool:
+        """
+        分块发送NC程序到机床
+        
+        程序按block_size分块发送，最多window_size个块等待机床确认，边读边校验边发送，
+        内存占用与程序大小无关。
+        
+        Args:
+            source: 程序文件路径，或产生程序文本块的可迭代对象（程序文本本身应以[text]传入）
+            program_name: 程序名称
+            block_size: 程序块大小（字符），默认为PROGRAM_BLOCK_SIZE
+            window_size: 发送窗口大小，默认为PROGRAM_WINDOW_SIZE
+            progress_callback: 进度回调，每个程序块被确认后调用
+            total_size: 程序总字节数，用于计算进度；来源为文件时默认取文件大小
+            
+        Returns:
+            bool: 发送是否成功
+        """
+        if not self.is_connected:
+            self.logger.error("未连接到NC机床")
+            return False
+        
+        block_size = block_size or self.PROGRAM_BLOCK_SIZE
+        window_size = max(1, window_size or self.PROGRAM_WINDOW_SIZE)
+        validator = ProgramStreamValidator(max_warnings=100)
+        blocks = self._iter_program_blocks(source, block_size)
+        started = False
+        try:
+            if total_size is None and isinstance(source, (str, os.PathLike)):
+                total_size = os.path.getsize(source)
+            
+            # 先取第一块，空程序不开始传输
+            first_block = next(blocks, None)
+            if first_block is None:
+                self.logger.error("程序数据验证失败: ['程序数据为空']")
+                return False
+            
+            self.logger.info(f"开始分块发送程序: {program_name}")
+            if not self._begin_program_transfer(program_name):
+                self.logger.error(f"机床拒绝接收程序: {program_name}")
+                return False
+            started = True
+            
+            in_flight = deque()  # 等待确认的程序块大小（字节）
+            acknowledged = 0
+            sequence = 0
+            block = first_block
+            while block is not None:
+                # 窗口已满时等待机床确认
+                while len(in_flight) >= window_size:
+                    acknowledged += self._collect_program_acks(in_flight)
+                    if progress_callback:
+                        progress_callback(acknowledged, total_size or 0)
+                
+                validator.feed(block)
+                if not self._send_program_block(program_name, sequence, block):
+                    raise IOError(f"程序块发送失败: 第{sequence}块")
+                in_flight.append(len(block.encode(self.PROGRAM_ENCODING)))
+                sequence += 1
+                block = next(blocks, None)
+            
+            while in_flight:
+                acknowledged += self._collect_program_acks(in_flight)
+                if progress_callback:
+                    progress_callback(acknowledged, total_size or 0)
+            
+            validation_result = validator.finish()
+            if validation_result["warnings"]:
+                self.logger.warning(f"程序格式警告({validation_result['warning_count']}条): "
+                                    f"{validation_result['warnings'][:10]}")
+            if not self._end_program_transfer(program_name, True):
+                raise IOError("机床未确认程序结束")
+            
+            self.logger.info(f"程序发送成功: {program_name}, {sequence}块, {acknowledged}字节")
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"分块发送程序失败: {program_name}, {e}")
+            if started:
+                try:
+                    self._end_program_transfer(program_name, False)
+                except Exception:
+                    pass
+            return False
+        finally:
+            blocks.close()
+    
+    def receive_program_stream(self, program_name: str, block_size: Optional[int] = None,
+                               progress_callback: Optional[ProgressCallback] = None
+                               ) -> Optional[Iterator[str]]:
+        """
+        分块从机床接收NC程序
+        
+        Args:
+            program_name: 程序名称
+            block_size: 程序块大小（字符），默认为PROGRAM_BLOCK_SIZE
+            progress_callback: 进度回调，每收到一个程序块调用一次
+            
+        Returns:
+            Optional[Iterator[str]]: 按顺序产生程序块的迭代器，未连接时返回None
+        """
+        if not self.is_connected:
+            self.logger.error("未连接到NC机床")
+            return None
+        
+        block_size = block_size or self.PROGRAM_BLOCK_SIZE
+        
+        def receive_blocks() -> Iterator[str]:
+            received = 0
+            for block in self._receive_program_blocks(program_name, block_size):
+                received += len(block.encode(self.PROGRAM_ENCODING))
+                if progress_callback:
+                    progress_callback(received, 0)
+                yield block
+        
+        return receive_blocks()
+    
+    def receive_program_file(self, program_name: str, file_path: Union[str, os.PathLike],
+                             block_size: Optional[int] = None,
+                             progress_callback: Optional[ProgressCallback] = None) -> bool:
+        """
+        分块从机床接收NC程序并写入文件
+        
+        先写入临时文件，接收完成后替换目标文件，接收失败时不会留下不完整的程序。
+        
+        Args:
+            program_name: 程序名称
+            file_path: 目标文件路径
+            block_size: 程序块大小（字符），默认为PROGRAM_BLOCK_SIZE
+            progress_callback: 进度回调，每收到一个程序块调用一次
+            
+        Returns:
+            bool: 接收是否成功
+        """
+        blocks = self.receive_program_stream(program_name, block_size, progress_callback)
+        if blocks is None:
+            return False
+        
+        temp_path = f"{os.fspath(file_path)}.part"
+        try:
+            with open(temp_path, "w", encoding=self.PROGRAM_ENCODING, newline="") as f:
+                for block in blocks:
+                    f.write(block)
+            os.replace(temp_path, file_path)
+            self.logger.info(f"程序接收成功: {program_name} -> {file_path}")
+            return True
+        except Exception as e:
+            self.logger.error(f"分块接收程序失败: {program_name}, {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return False
+    
+    def _iter_program_blocks(self, source: ProgramSource, block_size: int) -> Iterator[str]:
+        """把程序来源重新切分为固定大小的程序块（最后一块可以较小）"""
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, "r", encoding=self.PROGRAM_ENCODING, newline="") as f:
+                while True:
+                    block = f.read(block_size)
+                    if not block:
+                        return
+                    yield block
+        
+        pending: List[str] = []
+        pending_size = 0
+        for chunk in source:
+            pending.append(chunk)
+            pending_size += len(chunk)
+            if pending_size >= block_size:
+                data = "".join(pending)
+                offset = 0
+                while len(data) - offset >= block_size:
+                    yield data[offset:offset + block_size]
+                    offset += block_size
+                pending = [data[offset:]] if offset < len(data) else []
+                pending_size = len(data) - offset
+        if pending_size:
+            yield "".join(pending)
+    
+    def _collect_program_acks(self, in_flight: deque) -> int:
+        """等待机床确认程序块，返回确认的字节数"""
+        count = self._wait_program_ack(self.PROGRAM_ACK_TIMEOUT)
+        if not count:
+            raise TimeoutError("等待程序块确认超时")
+        acknowledged = 0
+        for _ in range(min(count, len(in_flight))):
+            acknowledged += in_flight.popleft()
+        return acknowledged
+    
+    # 以下为分块传输的协议钩子，默认实现为模拟传输，子类按实际协议重写
+    
+    def _begin_program_transfer(self, program_name: str) -> bool:
+        """
+        开始程序传输
+        
+        Args:
+            program_name: 程序名称
+            
+        Returns:
+            bool: 机床是否准备好接收
+        """
+        return True
+    
+    def _send_program_block(self, program_name: str, sequence: int, block: str) -> bool:
+        """
+        发送一个程序块（不等待确认）
+        
+        Args:
+            program_name: 程序名称
+            sequence: 程序块序号，从0开始
+            block: 程序块
+            
+        Returns:
+            bool: 发送是否成功
+        """
+        return True
+    
+    def _wait_program_ack(self, timeout: float) -> int:
+        """
+        等待机床确认已发送的程序块
+        
+        Args:
+            timeout: 超时时间（秒）
+            
+        Returns:
+            int: 本次确认的程序块数量，超时返回0
+        """
+        return 1
+    
+    def _end_program_transfer(self, program_name: str, success: bool) -> bool:
+        """
+        结束程序传输
+        
+        Args:
+            program_name: 程序名称
+            success: 是否全部发送完成，False表示中止传输
+            
+        Returns:
+            bool: 机床是否确认
+        """
+        return True
+    
+    def _receive_program_blocks(self, program_name: str, block_size: int) -> Iterator[str]:
+        """
+        按顺序产生从机床接收的程序块
+        
+        默认通过receive_program接收完整程序后切分，支持分块上传的协议应重写。
+        
+        Args:
+            program_name: 程序名称
+            block_size: 程序块大小（字符）
+            
+        Yields:
+            str: 程序块
+        """
+        program_data = self.receive_program(program_name)
+        if program_data is None:
+            raise IOError(f"接收程序失败: {program_name}")
+        for offset in range(0, len(program_data), block_size):
+            yield program_data[offset:offset + block_size]
+
+
+class ProgramStreamValidator:
+    """增量程序格式校验器
+    
+    逐块输入程序文本，只保留首行、尚未确定是否为最后一行的上一行和未结束的行，
+    校验规则与NCProtocol.validate_program_data相同。
+    """
+    
+    def __init__(self, max_warnings: Optional[int] = None):
+        """
+        初始化校验器
+        
+        Args:
+            max_warnings: 保留的行号警告数量上限，None表示不限制
+        """
+        self.max_warnings = max_warnings
+        self._tail = ""
+        self._line_count = 0
+        self._size = 0
+        self._first_line: Optional[str] = None
+        self._previous_line: Optional[str] = None
+        self._line_warnings: List[str] = []
+        self._warning_count = 0
+    
+    def feed(self, text: str) -> None:
+        """
+        输入一段程序文本
+        
+        Args:
+            text: 程序文本
+        """
+        if not text:
+            return
+        self._size += len(text)
+        lines = (self._tail + text).split('\n')
+        self._tail = lines.pop()
+        for line in lines:
+            self._add_line(line)
+    
+    def finish(self) -> Dict[str, Any]:
+        """
+        结束输入并返回校验结果
+        
+        Returns:
+            Dict[str, Any]: 校验结果（valid、errors、warnings和warning_count）
+        """
         errors = []
         warnings = []
         
-        if not program_data:
+        if self._size == 0:
             errors.append("程序数据为空")
-            return {"valid": False, "errors": errors, "warnings": warnings}
+            return {"valid": False, "errors": errors, "warnings": warnings, "warning_count": 0}
         
-        lines = program_data.split('\n')
+        self._add_line(self._tail)
+        self._tail = ""
+        last_line = self._previous_line if self._previous_line is not None else self._first_line
         
         # 检查程序头
-        if not lines[0].startswith('%'):
+        if not self._first_line.startswith('%'):
             warnings.append("程序缺少标准起始符 '%'")
         
         # 检查程序结束符
-        if not lines[-1].strip().endswith('%'):
+        if not last_line.strip().endswith('%'):
             warnings.append("程序缺少标准结束符 '%'")
         
-        # 检查行号格式
-        for i, line in enumerate(lines[1:-1], 1):  # 跳过第一行和最后一行
-            line = line.strip()
-            if line and not line.startswith('N'):
-                warnings.append(f"第{i+1}行缺少行号标识符 'N'")
-        
+        warnings.extend(self._line_warnings)
         return {
             "valid": len(errors) == 0,
             "errors": errors,
-            "warnings": warnings
+            "warnings": warnings,
+            "warning_count": len(warnings) - len(self._line_warnings) + self._warning_count
         }
+    
+    def _add_line(self, line: str) -> None:
+        """处理一个完整的行（上一行此时确定不是最后一行）"""
+        index = self._line_count
+        self._line_count += 1
+        if index == 0:
+            self._first_line = line
+            return
+        
+        # 检查行号格式（跳过第一行和最后一行）
+        if self._previous_line is not None:
+            previous = self._previous_line.strip()
+            if previous and not previous.startswith('N'):
+                self._warning_count += 1
+                if self.max_warnings is None or len(self._line_warnings) < self.max_warnings:
+                    self._line_warnings.append(f"第{index}行缺少行号标识符 'N'")
+        self._previous_line = line
 
 
 class RexrothProtocol(NCProtocol):
@@ -0,0 +1,226 @@
+"""
+NC设备模拟器
+本地TCP服务器，实现NCCommunicator使用的READ/WRITE/WRITEM/EXECUTE/QUERY行协议，
+可注入延迟、抖动、拆包和错误，用于在上线前测量通信吞吐量
+"""
+
+import logging
+import random
+import socket
+import socketserver
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Tuple
+
+from .framing import FrameReader
+
+
+@dataclass
+class SimulatorConfig:
+    """模拟器配置"""
+    latency: float = 0.0  # 每条命令的处理延迟（秒）
+    jitter: float = 0.0  # 延迟的随机波动范围（秒）
+    error_rate: float = 0.0  # 返回ERROR应答的概率
+    split_size: int = 0  # 应答拆分成的数据包大小（字节），0表示不拆分
+    split_delay: float = 0.001  # 拆分的数据包之间的间隔（秒）
+    tagged: bool = False  # 请求和应答是否带命令ID前缀
+    seed: Optional[int] = None  # 随机数种子
+
+
+class _SimulatorHandler(socketserver.BaseRequestHandler):
+    """单个连接的处理器"""
+
+    def handle(self):
+        simulator: "NCSimulator" = self.server.simulator
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        reader = FrameReader(self.request.recv_into)
+        simulator._connection_opened()
+        try:
+            while True:
+                try:
+                    frame = reader.read_frame()
+                except (EOFError, OSError):
+                    break
+                response = simulator.handle_line(frame.decode(errors="replace").strip())
+                if response is not None:
+                    simulator._send(self.request, (response + "\n").encode())
+        finally:
+            simulator._connection_closed()
+
+
+class _ThreadingServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class NCSimulator:
+    """NC设备模拟器"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, config: Optional[SimulatorConfig] = None):
+        """
+        初始化模拟器
+
+        Args:
+            host: 监听地址
+            port: 监听端口，0表示自动分配
+            config: 模拟器配置
+        """
+        self.host = host
+        self.port = port
+        self.config = config or SimulatorConfig()
+        self.logger = logging.getLogger(__name__)
+
+        # 设备状态
+        self.macros: Dict[str, str] = {}
+        self.state = "IDLE"
+        self.current_program: Optional[int] = None
+
+        self._random = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._server: Optional[_ThreadingServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+        # 统计信息
+        self._stats = {
+            "connections": 0,
+            "active_connections": 0,
+            "commands": 0,
+            "errors_injected": 0,
+            "bytes_sent": 0
+        }
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """实际监听的地址和端口"""
+        return self.host, self.port
+
+    def start(self) -> Tuple[str, int]:
+        """
+        启动模拟器
+
+        Returns:
+            Tuple[str, int]: 监听的地址和端口
+        """
+        self._server = _ThreadingServer((self.host, self.port), _SimulatorHandler)
+        self._server.simulator = self
+        self.host, self.port = self._server.server_address[:2]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="NCSimulator", daemon=True)
+        self._thread.start()
+        self.logger.info(f"NC模拟器已启动: {self.host}:{self.port}")
+        return self.address
+
+    def stop(self) -> None:
+        """停止模拟器"""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        self._thread = None
+        self.logger.info("NC模拟器已停止")
+
+    def __enter__(self) -> "NCSimulator":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        获取统计信息
+
+        Returns:
+            Dict[str, Any]: 连接数、命令数和注入的错误数
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def handle_line(self, line: str) -> Optional[str]:
+        """
+        处理一行命令并返回应答
+
+        Args:
+            line: 命令行（不含换行）
+
+        Returns:
+            Optional[str]: 应答（不含换行），空行返回None
+        """
+        if not line:
+            return None
+
+        tag = ""
+        if self.config.tagged:
+            tag, _, line = line.partition(" ")
+            tag += " "
+
+        with self._lock:
+            self._stats["commands"] += 1
+            delay = max(0.0, self.config.latency + self._random.uniform(-self.config.jitter, self.config.jitter))
+            inject_error = self._random.random() < self.config.error_rate
+        if delay:
+            time.sleep(delay)
+
+        if inject_error:
+            with self._lock:
+                self._stats["errors_injected"] += 1
+            return f"{tag}ERROR SIMULATED"
+        return tag + self._execute(line.split())
+
+    def _execute(self, parts) -> str:
+        """执行命令并更新设备状态"""
+        command = parts[0].upper() if parts else ""
+        with self._lock:
+            if command == "READ" and len(parts) >= 2:
+                count = int(parts[2]) if len(parts) >= 3 and parts[2].isdigit() else 1
+                return " ".join(
+                    f"{address}={self.macros.get(address, '0')}"
+                    for address in self._address_range(parts[1], count)
+                )
+            if command == "WRITE" and len(parts) >= 3:
+                self.macros[parts[1]] = parts[2]
+                return "OK"
+            if command == "WRITEM" and len(parts) >= 2:
+                for pair in parts[2:]:
+                    address, sep, value = pair.partition("=")
+                    if sep:
+                        self.macros[address] = value
+                return "OK"
+            if command == "EXECUTE" and len(parts) >= 2:
+                self.current_program = int(parts[1]) if parts[1].isdigit() else None
+                return "OK"
+            if command == "QUERY":
+                return self.state
+        return "ERROR UNKNOWN"
+
+    @staticmethod
+    def _address_range(start: str, count: int):
+        """块读取的连续地址（如#500开始的count个宏变量）"""
+        prefix = start.rstrip("0123456789")
+        if count <= 1 or prefix == start:
+            return [start]
+        number = int(start[len(prefix):])
+        return [f"{prefix}{number + offset}" for offset in range(count)]
+
+    def _send(self, sock: socket.socket, data: bytes) -> None:
+        """发送应答，配置了拆包时分多个数据包发送"""
+        split_size = self.config.split_size
+        if split_size <= 0 or len(data) <= split_size:
+            sock.sendall(data)
+        else:
+            for start in range(0, len(data), split_size):
+                sock.sendall(data[start:start + split_size])
+                if self.config.split_delay:
+                    time.sleep(self.config.split_delay)
+        with self._lock:
+            self._stats["bytes_sent"] += len(data)
+
+    def _connection_opened(self) -> None:
+        with self._lock:
+            self._stats["connections"] += 1
+            self._stats["active_connections"] += 1
+
+    def _connection_closed(self) -> None:
+        with self._lock:
+            self._stats["active_connections"] -= 1
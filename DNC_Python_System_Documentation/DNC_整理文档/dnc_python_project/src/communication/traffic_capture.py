@@ -0,0 +1,221 @@
+"""
+通信抓包
+把发送和接收的原始字节连同时间戳记录到紧凑的二进制文件，支持按大小轮转，用于复现和回放现场问题
+
+文件格式：文件头MAGIC，之后每条记录为
+    时间戳（float64，time.time()） + 方向（uint8，0发送/1接收） + 长度（uint32） + 数据
+全部为小端字节序。
+"""
+
+import os
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Any, Callable, Iterator, List, Optional, Union
+
+
+MAGIC = b"NCCAP\x01"
+
+DIRECTION_OUTBOUND = 0  # 发送到设备
+DIRECTION_INBOUND = 1  # 从设备接收
+
+_RECORD_HEADER = struct.Struct("<dBI")
+
+
+@dataclass
+class CaptureRecord:
+    """抓包记录"""
+    timestamp: float
+    direction: int
+    data: bytes
+
+
+class TrafficCapture:
+    """通信抓包写入器
+
+    当前文件超过max_bytes时轮转：file -> file.1 -> file.2 ...，最多保留backup_count个旧文件。
+    可以在多个线程中同时记录。
+    """
+
+    def __init__(self, path: Union[str, Path], max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5):
+        """
+        初始化抓包写入器
+
+        Args:
+            path: 抓包文件路径
+            max_bytes: 单个文件的最大字节数，0表示不轮转
+            backup_count: 保留的旧文件数量
+        """
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._lock = threading.Lock()
+        self._file = None
+        self._size = 0
+
+        # 统计信息
+        self._stats = {
+            "records": 0,
+            "bytes_captured": 0,
+            "rotations": 0
+        }
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._open()
+
+    def record(self, direction: int, data: bytes, timestamp: Optional[float] = None) -> None:
+        """
+        记录一段数据
+
+        Args:
+            direction: 方向（DIRECTION_OUTBOUND或DIRECTION_INBOUND）
+            data: 原始字节
+            timestamp: 时间戳，默认为当前时间
+        """
+        header = _RECORD_HEADER.pack(time.time() if timestamp is None else timestamp, direction, len(data))
+        with self._lock:
+            if self._file is None:
+                return
+            if self.max_bytes and self._size > len(MAGIC) and \
+                    self._size + len(header) + len(data) > self.max_bytes:
+                self._rotate()
+            self._file.write(header)
+            self._file.write(data)
+            self._size += len(header) + len(data)
+            self._stats["records"] += 1
+            self._stats["bytes_captured"] += len(data)
+
+    def record_outbound(self, data: bytes) -> None:
+        """记录发送的数据"""
+        self.record(DIRECTION_OUTBOUND, data)
+
+    def record_inbound(self, data: bytes) -> None:
+        """记录接收的数据"""
+        self.record(DIRECTION_INBOUND, data)
+
+    def wrap_recv_into(self, recv_into: Callable[[memoryview], int]) -> Callable[[memoryview], int]:
+        """
+        包装读取函数，记录每次读到的数据（保留原始的分包边界）
+
+        Args:
+            recv_into: 连接的读取函数
+
+        Returns:
+            Callable[[memoryview], int]: 记录接收数据的读取函数
+        """
+        def recv_and_capture(buffer: memoryview) -> int:
+            received = recv_into(buffer)
+            if received:
+                self.record_inbound(bytes(buffer[:received]))
+            return received
+        return recv_and_capture
+
+    def flush(self) -> None:
+        """把缓冲的记录写入磁盘"""
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self) -> None:
+        """关闭抓包文件"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self) -> "TrafficCapture":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        获取统计信息
+
+        Returns:
+            Dict[str, Any]: 记录数、抓取的字节数和轮转次数
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats["path"] = str(self.path)
+        return stats
+
+    def _open(self) -> None:
+        """打开抓包文件（新文件写入文件头）"""
+        self._file = open(self.path, "ab")
+        self._size = self._file.tell()
+        if self._size == 0:
+            self._file.write(MAGIC)
+            self._size = len(MAGIC)
+
+    def _rotate(self) -> None:
+        """轮转抓包文件（调用时须持有锁）"""
+        self._file.close()
+        if self.backup_count > 0:
+            for index in range(self.backup_count - 1, 0, -1):
+                source = self.path.with_name(f"{self.path.name}.{index}")
+                if source.exists():
+                    os.replace(source, self.path.with_name(f"{self.path.name}.{index + 1}"))
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink()
+        self._stats["rotations"] += 1
+        self._open()
+
+
+def capture_files(path: Union[str, Path]) -> List[Path]:
+    """
+    获取抓包文件及其轮转文件（按时间从早到晚）
+
+    Args:
+        path: 抓包文件路径
+
+    Returns:
+        List[Path]: 文件列表
+    """
+    path = Path(path)
+    rotated = []
+    index = 1
+    while True:
+        candidate = path.with_name(f"{path.name}.{index}")
+        if not candidate.exists():
+            break
+        rotated.append(candidate)
+        index += 1
+    files = list(reversed(rotated))
+    if path.exists():
+        files.append(path)
+    return files
+
+
+def read_capture(path: Union[str, Path], include_rotated: bool = True) -> Iterator[CaptureRecord]:
+    """
+    读取抓包记录
+
+    Args:
+        path: 抓包文件路径
+        include_rotated: 是否先读取轮转出去的旧文件
+
+    Yields:
+        CaptureRecord: 抓包记录
+
+    Raises:
+        ValueError: 文件格式不正确
+    """
+    for file_path in (capture_files(path) if include_rotated else [Path(path)]):
+        with open(file_path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"不是抓包文件: {file_path}")
+            while True:
+                header = f.read(_RECORD_HEADER.size)
+                if len(header) < _RECORD_HEADER.size:
+                    break
+                timestamp, direction, length = _RECORD_HEADER.unpack(header)
+                data = f.read(length)
+                if len(data) < length:
+                    # 最后一条记录未写完整（例如进程异常退出）
+                    break
+                yield CaptureRecord(timestamp, direction, data)
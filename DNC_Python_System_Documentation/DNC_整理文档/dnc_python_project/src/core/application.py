@@ -5,6 +5,8 @@ DNC系统主应用程序模块
 
 import sys
 import os
+import threading
+from dataclasses import asdict
 from typing import Optional, Dict, Any, List
 from PyQt5.QtWidgets import QApplication, QMessageBox
 from PyQt5.QtCore import QObject, pyqtSignal, QTimer
@@ -18,6 +20,8 @@ from dnc_python_project.src.business.program_matcher import ProgramMatcher
 from dnc_python_project.src.business.calculation_engine import CalculationEngine
 from dnc_python_project.src.business.relation_validator import RelationValidator
 from dnc_python_project.src.business.nc_communicator import NCCommunicator
+from dnc_python_project.src.business.status_poller import StatusPoller
+from dnc_python_project.src.business.scan_bundle import ScanBundleCache
 from dnc_python_project.src.data.csv_processor import CSVProcessor
 from dnc_python_project.src.data.data_validator import DataValidator
 from dnc_python_project.src.data.file_manager import FileManager
@@ -46,6 +50,7 @@ class DNCApplication(QObject):
     parameters_calculated = pyqtSignal(dict)  # 参数计算完成
     data_sent = pyqtSignal(bool)         # 数据发送完成
     error_occurred = pyqtSignal(str)     # 错误发生
+    program_transferred = pyqtSignal(str, bool)  # 程序传输完成（程序名称, 是否成功）
     
     def __init__(self, config_path: Optional[str] = None):
         """
@@ -73,6 +78,8 @@ class DNCApplication(QObject):
         self.calculation_engine: Optional[CalculationEngine] = None
         self.relation_validator: Optional[RelationValidator] = None
         self.nc_communicator: Optional[NCCommunicator] = None
+        self.status_poller: Optional[StatusPoller] = None
+        self.scan_bundle_cache: Optional[ScanBundleCache] = None
         
         # 数据访问模块
         self.csv_processor: Optional[CSVProcessor] = None
@@ -97,6 +104,9 @@ class DNCApplication(QObject):
         self.initialization_timer = QTimer()
         self.initialization_timer.setSingleShot(True)
         self.initialization_timer.timeout.connect(self._on_initialization_timeout)
+        
+        # 程序传输在后台线程中进行，完成信号由Qt排队到界面线程
+        self.program_transferred.connect(self._on_program_transferred)
     
     def initialize(self) -> bool:
         """
@@ -133,6 +143,20 @@ class DNCApplication(QObject):
             self.calculation_engine = CalculationEngine(self.config_manager, self.csv_processor)
             self.relation_validator = RelationValidator(self.config_manager, self.csv_processor)
             self.nc_communicator = NCCommunicator(self.config_manager)
+            # 所有界面共享同一个设备状态轮询器
+            self.status_poller = StatusPoller(self.nc_communicator, self.event_dispatcher)
+            
+            # 扫描包缓存（可选）：按型号预先组装匹配、计算和验证所需的数据
+            cache_size = self.config_manager.system_config.scan_bundle_cache_size
+            if cache_size > 0:
+                self.scan_bundle_cache = ScanBundleCache(
+                    self.config_manager,
+                    self.csv_processor,
+                    self.program_matcher,
+                    self.calculation_engine,
+                    self.relation_validator,
+                    max_size=cache_size
+                )
             
             # 6. 初始化通信模块
             self.protocol_factory = ProtocolFactory()
@@ -174,6 +198,8 @@ class DNCApplication(QObject):
                 EVENT_TYPES.DATA_SENT,
                 self._on_data_sent
             )
+            # master数据或配置变更后，已缓存的扫描包不再有效
+            self.event_dispatcher.config_changed.connect(self._on_config_changed)
     
     def _on_initialization_timeout(self) -> None:
         """初始化超时处理"""
@@ -235,6 +261,10 @@ class DNCApplication(QObject):
                 self.named_pipe_manager.start_server(pipe_name)
                 self.named_pipe_manager.data_received.connect(self._on_pipe_data_received)
             
+            # 启动设备状态轮询
+            if self.status_poller:
+                self.status_poller.start()
+            
             self.logger.info(f"通信模块启动完成，使用协议: {protocol_type}")
             
         except Exception as e:
@@ -263,6 +293,10 @@ class DNCApplication(QObject):
             self.model_recognized.emit(model_info)
             self.event_dispatcher.dispatch(EVENT_TYPES.MODEL_RECOGNIZED, model_info)
             
+            # 使用扫描包时，匹配、计算和验证只需一次缓存查找
+            if self.scan_bundle_cache:
+                return self._process_with_bundle(model_info)
+            
             # 2. 程序匹配
             program_info = self.program_matcher.match_program(self.current_model)
             if not program_info:
@@ -312,6 +346,48 @@ class DNCApplication(QObject):
             self.error_occurred.emit(error_msg)
             return False
     
+    def _process_with_bundle(self, model_info: Dict[str, Any]) -> bool:
+        """
+        使用扫描包完成程序匹配、参数计算和关系验证
+        
+        Args:
+            model_info: 型号识别结果
+            
+        Returns:
+            bool: 处理是否成功
+        """
+        bundle = self.scan_bundle_cache.get_bundle(self.current_model)
+        if not bundle:
+            self.logger.error("程序匹配失败")
+            return False
+        
+        program_info = asdict(bundle.match_result)
+        self.current_program_no = bundle.program_no
+        self.program_matched.emit(program_info)
+        self.event_dispatcher.dispatch(EVENT_TYPES.PROGRAM_MATCHED, program_info)
+        
+        model_parts = model_info.get('processed_parts', [])
+        result, validation_results = self.scan_bundle_cache.evaluate(bundle, model_parts)
+        if not result.success or not result.parameters:
+            self.logger.error("参数计算失败")
+            return False
+        
+        parameters = result.parameters
+        self.current_parameters = parameters
+        self.parameters_calculated.emit(parameters)
+        self.event_dispatcher.dispatch(EVENT_TYPES.PARAMETERS_CALCULATED, parameters)
+        
+        if self.main_window:
+            self.main_window.update_display(
+                model_info,
+                program_info,
+                parameters,
+                validation_results
+            )
+        
+        self.logger.info("QR码处理完成")
+        return True
+    
     def send_parameters_to_nc(self) -> bool:
         """
         发送参数到NC机床
@@ -349,6 +425,83 @@ class DNCApplication(QObject):
             self.error_occurred.emit(error_msg)
             return False
     
+    def send_program_file(self, file_path: str, program_name: str) -> bool:
+        """
+        在后台线程中把程序文件分块发送到NC机床，进度显示在程序显示页
+        
+        Args:
+            file_path: 程序文件路径
+            program_name: 程序名称
+            
+        Returns:
+            bool: 传输是否已开始
+        """
+        if not self.current_protocol:
+            self.logger.error("NC通信协议未初始化")
+            return False
+        
+        progress_callback = self._begin_program_transfer(program_name, "发送中")
+        return self._start_program_transfer(
+            program_name,
+            lambda: self.current_protocol.send_program_stream(
+                file_path, program_name, progress_callback=progress_callback
+            )
+        )
+    
+    def receive_program_file(self, program_name: str, file_path: str) -> bool:
+        """
+        在后台线程中从NC机床分块接收程序并写入文件，进度显示在程序显示页
+        
+        Args:
+            program_name: 程序名称
+            file_path: 目标文件路径
+            
+        Returns:
+            bool: 传输是否已开始
+        """
+        if not self.current_protocol:
+            self.logger.error("NC通信协议未初始化")
+            return False
+        
+        progress_callback = self._begin_program_transfer(program_name, "接收中")
+        return self._start_program_transfer(
+            program_name,
+            lambda: self.current_protocol.receive_program_file(
+                program_name, file_path, progress_callback=progress_callback
+            )
+        )
+    
+    def _begin_program_transfer(self, program_name: str, status_text: str):
+        """显示程序传输进度，返回进度回调（没有程序显示页时为None）"""
+        program_display = getattr(self.main_window, 'program_display', None)
+        if program_display is not None and hasattr(program_display, 'begin_transfer'):
+            return program_display.begin_transfer(program_name, status_text)
+        return None
+    
+    def _start_program_transfer(self, program_name: str, transfer) -> bool:
+        """启动程序传输线程"""
+        def run():
+            try:
+                success = transfer()
+            except Exception as e:
+                self.logger.error(f"程序传输失败: {program_name}, {e}")
+                success = False
+            self.program_transferred.emit(program_name, bool(success))
+        
+        threading.Thread(target=run, name=f"ProgramTransfer-{program_name}", daemon=True).start()
+        self.logger.info(f"开始程序传输: {program_name}")
+        return True
+    
+    def _on_program_transferred(self, program_name: str, success: bool) -> None:
+        """程序传输完成处理"""
+        program_display = getattr(self.main_window, 'program_display', None)
+        if program_display is not None and hasattr(program_display, 'finish_transfer'):
+            program_display.finish_transfer(success)
+        if success:
+            self.logger.info(f"程序传输完成: {program_name}")
+        else:
+            self.error_occurred.emit(f"程序传输失败: {program_name}")
+    
     def _on_pipe_data_received(self, data: str) -> None:
         """
         命名管道数据接收处理
@@ -384,6 +537,29 @@ class DNCApplication(QObject):
         status = "成功" if success else "失败"
         self.logger.info(f"数据发送{status}")
     
+    def _on_config_changed(self, config_section: str) -> None:
+        """配置或master数据变更处理"""
+        if self.scan_bundle_cache:
+            self.scan_bundle_cache.invalidate()
+            self.logger.info(f"扫描包缓存已清空: {config_section}")
+    
+    def reload_master_data(self) -> bool:
+        """
+        重新加载master数据（程序匹配、参数计算和关系验证数据）
+        
+        Returns:
+            bool: 重新加载是否成功
+        """
+        success = self.program_matcher.reload_matching_data()
+        success = self.calculation_engine.reload_calculation_data() and success
+        self.relation_validator.clear_cache()
+        
+        if self.event_dispatcher:
+            self.event_dispatcher.publish_config_changed("master")
+        elif self.scan_bundle_cache:
+            self.scan_bundle_cache.invalidate()
+        return success
+    
     def _show_error_dialog(self, title: str, message: str) -> None:
         """显示错误对话框"""
         try:
@@ -397,6 +573,9 @@ class DNCApplication(QObject):
         self.logger.info("开始清理系统资源...")
         
         # 停止通信模块
+        if self.status_poller:
+            self.status_poller.stop()
+        
         if self.named_pipe_manager:
             self.named_pipe_manager.stop_server()
         
@@ -51,6 +51,7 @@ class SystemConfig:
     backup_path: str = "backup/"
     auto_save: bool = True
     auto_backup: bool = True
+    scan_bundle_cache_size: int = 0  # 扫描包缓存容量，0表示不使用扫描包（默认关闭）
 
 
 class ConfigManager:
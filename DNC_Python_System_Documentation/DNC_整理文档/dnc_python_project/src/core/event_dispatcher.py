@@ -82,6 +82,23 @@ class NCCommunicationEvent:
         self.device_info = device_info or {}
 
 
+class NCStatusChangedEvent:
+    """NC设备状态变化事件"""
+    
+    def __init__(self, machine_id: str, changes: Dict[str, Any], status: Dict[str, Any]):
+        """
+        初始化NC设备状态变化事件
+        
+        Args:
+            machine_id: 设备ID
+            changes: 变化的状态字段
+            status: 完整状态
+        """
+        self.machine_id = machine_id
+        self.changes = changes
+        self.status = status
+
+
 class ErrorEvent:
     """错误事件"""
     
@@ -107,6 +124,7 @@ class EventDispatcher(QObject):
     program_matched = pyqtSignal(object)   # ProgramMatchedEvent
     parameters_calculated = pyqtSignal(object)  # ParametersCalculatedEvent
     nc_communication_status = pyqtSignal(object)  # NCCommunicationEvent
+    nc_status_changed = pyqtSignal(object)  # NCStatusChangedEvent
     error_occurred = pyqtSignal(object)    # ErrorEvent
     
     # 系统事件
@@ -180,6 +198,19 @@ class EventDispatcher(QObject):
         self.nc_communication_status.emit(event)
         self.logger.info(f"NC通信事件发布: {status} - {message}")
     
+    def publish_nc_status_changed(self, machine_id: str, changes: Dict[str, Any], status: Dict[str, Any]) -> None:
+        """
+        发布NC设备状态变化事件（由状态轮询线程调用，界面通过信号在界面线程中接收）
+        
+        Args:
+            machine_id: 设备ID
+            changes: 变化的状态字段
+            status: 完整状态
+        """
+        event = NCStatusChangedEvent(machine_id, changes, status)
+        self.nc_status_changed.emit(event)
+        self.logger.debug(f"NC状态变化事件发布: {machine_id} {list(changes)}")
+    
     def publish_error(self, error_type: str, message: str, details: Dict[str, Any] = None) -> None:
         """
         发布错误事件
@@ -308,6 +339,11 @@ class EventDispatcher(QObject):
         """NC通信事件处理槽"""
         self._call_handlers('nc_communication_status', event)
     
+    @pyqtSlot(object)
+    def on_nc_status_changed(self, event: NCStatusChangedEvent) -> None:
+        """NC设备状态变化事件处理槽"""
+        self._call_handlers('nc_status_changed', event)
+    
     @pyqtSlot(object)
     def on_error_occurred(self, event: ErrorEvent) -> None:
         """错误事件处理槽"""
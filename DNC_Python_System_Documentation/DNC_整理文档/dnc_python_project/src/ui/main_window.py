@@ -87,6 +87,8 @@ class MainWindow(QMainWindow):
         # 状态监控标签页
         self.status_monitor = StatusMonitorWidget(self.app)
         self.tab_widget.addTab(self.status_monitor, "状态监控")
+        if getattr(self.app, "status_poller", None) and getattr(self.app, "event_dispatcher", None):
+            self.status_monitor.attach_status_poller(self.app.status_poller, self.app.event_dispatcher)
         
         right_layout.addWidget(self.tab_widget)
         splitter.addWidget(right_widget)
@@ -4,7 +4,7 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGroupBox,
                             QSplitter, QFrame, QProgressBar)
 from PyQt5.QtCore import pyqtSignal, Qt
 from PyQt5.QtGui import QFont, QSyntaxHighlighter, QTextCharFormat, QColor
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Callable
 
 
 class NCHighlighter(QSyntaxHighlighter):
@@ -80,12 +80,15 @@ class ProgramDisplayWidget(QWidget):
     program_saved = pyqtSignal(str)
     program_loaded = pyqtSignal(str)
     current_line_changed = pyqtSignal(int)
+    # 程序传输进度（已传输字节数, 总字节数），可以从传输线程发出
+    transfer_progress = pyqtSignal(int, int)
     
     def __init__(self, parent=None):
         super().__init__(parent)
         self.current_program = ""
         self.current_line = 0
         self.total_lines = 0
+        self._transfer_percent = -1
         self._init_ui()
         self._connect_signals()
     
@@ -210,6 +213,9 @@ class ProgramDisplayWidget(QWidget):
         
         # 连接文本变化信号
         self.code_editor.textChanged.connect(self._on_text_changed)
+        
+        # 传输线程发出的进度信号由Qt排队到界面线程处理
+        self.transfer_progress.connect(self._on_transfer_progress)
     
     def _on_load_clicked(self) -> None:
         """加载程序按钮点击处理"""
@@ -302,6 +308,59 @@ class ProgramDisplayWidget(QWidget):
     def set_progress(self, value: int) -> None:
         """设置进度值"""
         self.progress_bar.setValue(value)
+    
+    def begin_transfer(self, program_name: str, status_text: str = "传输中") -> Callable[[int, int], None]:
+        """
+        开始显示程序传输进度
+        
+        Args:
+            program_name: 程序名称
+            status_text: 状态文本
+            
+        Returns:
+            Callable[[int, int], None]: 传给NCProtocol.send_program_stream等方法的进度回调，
+            可以在传输线程中调用，进度百分比变化时才通知界面
+        """
+        self._transfer_percent = -1
+        self.program_name_label.setText(program_name)
+        self.status_label.setText(status_text)
+        self.status_label.setStyleSheet("color: orange;")
+        self.progress_bar.setRange(0, 100)
+        self.set_progress(0)
+        self.show_progress(True)
+        
+        def progress_callback(transferred: int, total: int) -> None:
+            # 总数未知时只需通知一次（显示忙碌状态）
+            percent = min(100, transferred * 100 // total) if total > 0 else -2
+            if percent != self._transfer_percent:
+                self._transfer_percent = percent
+                self.transfer_progress.emit(transferred, total)
+        
+        return progress_callback
+    
+    def finish_transfer(self, success: bool) -> None:
+        """
+        结束显示程序传输进度
+        
+        Args:
+            success: 传输是否成功
+        """
+        self.progress_bar.setRange(0, 100)
+        self.show_progress(False)
+        if success:
+            self.status_label.setText("传输完成")
+            self.status_label.setStyleSheet("color: green;")
+        else:
+            self.status_label.setText("传输失败")
+            self.status_label.setStyleSheet("color: red;")
+    
+    def _on_transfer_progress(self, transferred: int, total: int) -> None:
+        """更新传输进度（总数未知时显示忙碌状态）"""
+        if total > 0:
+            self.progress_bar.setRange(0, 100)
+            self.set_progress(min(100, transferred * 100 // total))
+        else:
+            self.progress_bar.setRange(0, 0)
 
 
 if __name__ == "__main__":
@@ -2,7 +2,7 @@ import sys
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGroupBox,
                             QLabel, QProgressBar, QTableWidget, QTableWidgetItem,
                             QHeaderView, QSplitter, QFrame, QPushButton)
-from PyQt5.QtCore import pyqtSignal, Qt, QTimer
+from PyQt5.QtCore import pyqtSignal, Qt
 from PyQt5.QtGui import QFont, QColor, QBrush
 from typing import Dict, Any, List
 from datetime import datetime
@@ -16,14 +16,17 @@ class StatusMonitorWidget(QWidget):
     error_occurred = pyqtSignal(str)
     connection_changed = pyqtSignal(bool)
     
+    # 状态轮询器的状态字段到表格参数名的映射（宏变量地址直接作为参数名）
+    STATUS_FIELDS = {"state": "运行状态", "alarm": "报警代码"}
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self.current_status = {}
         self.error_log = []
         self.connection_status = False
+        self.status_poller = None
         self._init_ui()
         self._connect_signals()
-        self._start_monitoring()
     
     def _init_ui(self) -> None:
         """初始化用户界面"""
@@ -169,16 +172,76 @@ class StatusMonitorWidget(QWidget):
         self.connect_button.clicked.connect(self._on_connect_clicked)
         self.disconnect_button.clicked.connect(self._on_disconnect_clicked)
     
-    def _start_monitoring(self) -> None:
-        """开始监控"""
-        # 创建定时器用于定期更新状态
-        self.monitor_timer = QTimer()
-        self.monitor_timer.timeout.connect(self._update_status)
-        self.monitor_timer.start(1000)  # 每秒更新一次
+    def attach_status_poller(self, status_poller, event_dispatcher) -> None:
+        """
+        使用共享的状态轮询器更新状态（组件自身不再定时轮询）
+        
+        Args:
+            status_poller: 状态轮询器
+            event_dispatcher: 事件分发器，状态变化经nc_status_changed信号在界面线程中接收
+        """
+        self.status_poller = status_poller
+        event_dispatcher.nc_status_changed.connect(self._on_nc_status_changed)
+        
+        # 显示已发布的当前状态
+        current = status_poller.get_published_status()
+        if current:
+            self._apply_status_changes(current)
+    
+    def _on_nc_status_changed(self, event) -> None:
+        """设备状态变化事件处理"""
+        self._apply_status_changes(event.changes)
+    
+    def _apply_status_changes(self, changes: Dict[str, Any]) -> None:
+        """只更新变化的状态字段"""
+        if "connected" in changes and bool(changes["connected"]) != self.connection_status:
+            self.connection_status = bool(changes["connected"])
+            self._update_connection_status()
+            self.connection_changed.emit(self.connection_status)
+        
+        for field, value in changes.items():
+            param_name = self.STATUS_FIELDS.get(field, field if field.startswith("#") else None)
+            if param_name is None:
+                continue
+            if field == "alarm":
+                self._set_status_value(param_name, value or "无", "错误" if value else "正常")
+            elif field == "state":
+                running = any(keyword in str(value).upper() for keyword in ("RUN", "BUSY", "CYCLE"))
+                self._set_status_value(param_name, value, "正常" if running else "停止")
+            elif value is None:
+                # 断开连接后宏变量的值未知
+                self._set_status_value(param_name, "-", "未知")
+            else:
+                self._set_status_value(param_name, str(value), "正常")
+        
+        self.current_status.update(changes)
+        for field in [field for field, value in changes.items() if value is None]:
+            self.current_status.pop(field, None)
+        self.status_updated.emit(dict(changes))
+    
+    def _set_status_value(self, param_name: str, value: str, status: str) -> None:
+        """设置参数的值和状态，表格中没有该参数时添加一行"""
+        for row in range(self.status_table.rowCount()):
+            param_item = self.status_table.item(row, 0)
+            if param_item and param_item.text() == param_name:
+                break
+        else:
+            row = self.status_table.rowCount()
+            self.status_table.insertRow(row)
+            self.status_table.setItem(row, 0, QTableWidgetItem(param_name))
+            self.status_table.setItem(row, 1, QTableWidgetItem(""))
+            self.status_table.setItem(row, 2, QTableWidgetItem(""))
+        
+        self.status_table.item(row, 1).setText(value)
+        self.status_table.item(row, 2).setText(status)
+        self._set_status_color(row, 2, status)
     
     def _on_refresh_clicked(self) -> None:
         """刷新状态按钮点击处理"""
-        self._update_status()
+        if self.status_poller is not None:
+            self.status_poller.refresh()
+        else:
+            self._update_status()
     
     def _on_clear_log_clicked(self) -> None:
         """清空日志按钮点击处理"""
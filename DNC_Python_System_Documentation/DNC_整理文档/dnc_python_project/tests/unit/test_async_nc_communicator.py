@@ -0,0 +1,186 @@
+"""
+异步NC通信器单元测试
+使用本地asyncio服务器模拟NC设备
+"""
+
+import unittest
+import asyncio
+import sys
+import os
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from src.business.async_nc_communicator import AsyncNCCommunicator
+
+
+class FakeNCServer:
+    """按行应答的模拟NC设备，READ命令按地址延迟应答"""
+
+    def __init__(self, tagged=False, delays=None, replies=None):
+        self.tagged = tagged
+        self.delays = delays or {}
+        self.replies = replies or {}
+        self.received = []
+        self.writers = []
+        self.server = None
+
+    async def start(self) -> int:
+        self.server = await asyncio.start_server(self._handle, '127.0.0.1', 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    def drop(self):
+        """关闭所有客户端连接"""
+        for writer in self.writers:
+            writer.close()
+
+    async def _handle(self, reader, writer):
+        self.writers.append(writer)
+        tasks = []
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            text = line.decode().strip()
+            self.received.append(text)
+            if self.tagged:
+                tasks.append(asyncio.ensure_future(self._reply(writer, text)))
+            else:
+                await self._reply(writer, text)
+        await asyncio.gather(*tasks)
+        writer.close()
+
+    async def _reply(self, writer, text):
+        tag = ''
+        if self.tagged:
+            tag, _, text = text.partition(' ')
+            tag += ' '
+        parts = text.split()
+        if parts[0] == 'READ':
+            await asyncio.sleep(self.delays.get(parts[1], 0))
+            reply = self.replies.get(parts[1], f"{parts[1]}=1")
+        elif parts[0] == 'QUERY':
+            reply = 'IDLE'
+        elif parts[0] == 'SILENT':
+            return
+        else:
+            reply = 'OK'
+        writer.write(f"{tag}{reply}\n".encode())
+        await writer.drain()
+
+
+class TestAsyncNCCommunicator(unittest.IsolatedAsyncioTestCase):
+    """异步NC通信器测试类"""
+
+    async def start(self, **kwargs):
+        self.server = FakeNCServer(**kwargs)
+        port = await self.server.start()
+        communicator = AsyncNCCommunicator(host='127.0.0.1', port=port, timeout=2.0,
+                                           tagged=kwargs.get('tagged', False))
+        self.assertTrue(await communicator.connect())
+        return communicator
+
+    async def asyncTearDown(self):
+        await self.server.stop()
+
+    async def test_command_types(self):
+        """测试读、写、执行和状态查询命令"""
+        communicator = await self.start()
+
+        self.assertEqual((await communicator.read_data('#500')).data, '#500=1')
+        self.assertEqual((await communicator.write_data('#500', 10)).data, 'OK')
+        self.assertEqual((await communicator.execute_program(1, {'A': 1})).data, 'OK')
+        self.assertEqual((await communicator.query_status()).data, 'IDLE')
+        self.assertEqual(self.server.received, ['READ #500 1', 'WRITE #500 10', 'EXECUTE 1 A=1', 'QUERY status'])
+        await communicator.disconnect()
+
+    async def test_concurrent_requests_in_order(self):
+        """测试按顺序应答时并发命令的响应对应"""
+        communicator = await self.start()
+
+        responses = await asyncio.gather(*[communicator.read_data(f"#{500 + i}") for i in range(20)])
+
+        self.assertEqual([r.data for r in responses], [f"#{500 + i}=1" for i in range(20)])
+        self.assertGreater(communicator.get_statistics()['max_in_flight'], 1)
+        await communicator.disconnect()
+
+    async def test_out_of_order_tagged_responses(self):
+        """测试tagged模式下乱序应答按命令ID对应"""
+        communicator = await self.start(tagged=True, delays={'#500': 0.2})
+
+        slow = asyncio.ensure_future(communicator.read_data('#500'))
+        await asyncio.sleep(0.01)
+        fast = await communicator.read_data('#501')
+
+        self.assertFalse(slow.done())
+        self.assertEqual(fast.data, '#501=1')
+        self.assertEqual((await slow).data, '#500=1')
+        await communicator.disconnect()
+
+    async def test_timeout_does_not_shift_responses(self):
+        """测试超时的命令不影响后续命令的响应对应"""
+        communicator = await self.start(delays={'#500': 0.3})
+
+        late = await communicator.read_data('#500', timeout=0.05)
+        self.assertFalse(late.success)
+        self.assertEqual(late.error_message, '命令超时')
+
+        response = await communicator.read_data('#501')
+        self.assertEqual(response.data, '#501=1')
+        self.assertEqual(communicator.get_statistics()['timeouts'], 1)
+        await communicator.disconnect()
+
+    async def test_many_connections_in_one_loop(self):
+        """测试一个事件循环驱动多个设备连接"""
+        first = await self.start()
+        others = [AsyncNCCommunicator(host='127.0.0.1', port=first.port, timeout=2.0) for _ in range(9)]
+        for communicator in others:
+            self.assertTrue(await communicator.connect())
+
+        responses = await asyncio.gather(*[c.query_status() for c in [first] + others])
+
+        self.assertTrue(all(r.success and r.data == 'IDLE' for r in responses))
+        for communicator in [first] + others:
+            await communicator.disconnect()
+
+    async def test_disconnect_fails_pending(self):
+        """测试断开连接时未完成的命令以失败结束"""
+        communicator = await self.start(delays={'#500': 5})
+
+        pending = asyncio.ensure_future(communicator.read_data('#500'))
+        await asyncio.sleep(0.05)
+        await communicator.disconnect()
+
+        response = await pending
+        self.assertFalse(response.success)
+        self.assertFalse(communicator.is_connected())
+
+    async def test_long_response_line(self):
+        """测试超过StreamReader默认行长度上限（64KiB）的应答"""
+        value = "1" * 100000
+        communicator = await self.start(replies={'#500': f"#500={value}"})
+
+        self.assertEqual((await communicator.read_data('#500')).data, f"#500={value}")
+        self.assertEqual((await communicator.read_data('#501')).data, '#501=1')
+        await communicator.disconnect()
+
+    async def test_peer_close_fails_pending(self):
+        """测试设备关闭连接时未完成的命令立即失败且连接状态变为断开"""
+        communicator = await self.start(delays={'#500': 5})
+
+        pending = asyncio.ensure_future(communicator.read_data('#500'))
+        await asyncio.sleep(0.05)
+        self.server.drop()
+
+        response = await asyncio.wait_for(pending, 1.0)
+        self.assertFalse(response.success)
+        self.assertFalse(communicator.is_connected())
+        await communicator.disconnect()
+
+
+if __name__ == '__main__':
+    unittest.main()
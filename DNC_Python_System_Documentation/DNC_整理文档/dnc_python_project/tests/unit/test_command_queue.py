@@ -0,0 +1,250 @@
+"""
+NC命令队列单元测试
+测试命令优先级、截止时间和通信线程的唤醒
+"""
+
+import unittest
+from unittest.mock import Mock
+from types import SimpleNamespace
+import threading
+import time
+import sys
+import os
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from src.business.command_queue import CommandQueue, PRIORITY_HIGH, PRIORITY_LOW
+from src.business.nc_communicator import NCCommunicator, NCCommand
+
+
+def make_command(command_id, command_type="write", priority=None, deadline=None):
+    """创建测试用NC命令"""
+    return NCCommand(
+        command_id=command_id,
+        command_type=command_type,
+        data={"address": "#500", "data": 1},
+        parameters={},
+        timeout=1.0,
+        priority=priority,
+        deadline=deadline
+    )
+
+
+def make_config_manager():
+    """创建带网络通信配置的模拟配置管理器"""
+    config_manager = Mock()
+    config_manager.com_config = SimpleNamespace(com_type=1, ip_address="127.0.0.1", port=0, timeout=1.0)
+    config_manager.device_config = SimpleNamespace(device_name="NC1", device_model="TEST")
+    return config_manager
+
+
+class TestCommandQueue(unittest.TestCase):
+    """命令队列测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.queue = CommandQueue()
+
+    def test_priority_order(self):
+        """测试按优先级出队，同优先级保持入队顺序"""
+        self.queue.put(make_command("status", "query"))
+        self.queue.put(make_command("read", "read"))
+        self.queue.put(make_command("write1", "write"))
+        self.queue.put(make_command("write2", "write"))
+        self.queue.put(make_command("urgent", "query", priority=PRIORITY_HIGH - 1))
+
+        order = [self.queue.get(0)[0].command_id for _ in range(5)]
+        self.assertEqual(order, ["urgent", "write1", "write2", "read", "status"])
+        self.assertEqual(self.queue.get(0), (None, False))
+
+    def test_expired_command(self):
+        """测试过截止时间的命令被标记为过期"""
+        self.queue.put(make_command("old", deadline=time.time() - 1))
+        self.queue.put(make_command("new", deadline=time.time() + 60))
+
+        self.assertEqual(self.queue.get(0)[1], True)
+        self.assertEqual(self.queue.get(0)[1], False)
+        stats = self.queue.get_statistics()
+        self.assertEqual(stats["expired"], 1)
+        self.assertEqual(stats["dequeued"], 1)
+
+    def test_put_wakes_waiting_thread(self):
+        """测试入队立即唤醒阻塞的get"""
+        result = []
+        consumer = threading.Thread(target=lambda: result.append(self.queue.get(5.0)))
+        consumer.start()
+        time.sleep(0.05)
+
+        start = time.time()
+        self.queue.put(make_command("cmd"))
+        consumer.join(1.0)
+
+        self.assertEqual(result[0][0].command_id, "cmd")
+        self.assertLess(time.time() - start, 0.5)
+
+    def test_wakeup_returns_none(self):
+        """测试wakeup让等待中的get返回"""
+        result = []
+        consumer = threading.Thread(target=lambda: result.append(self.queue.get(5.0)))
+        consumer.start()
+        time.sleep(0.05)
+        self.queue.wakeup()
+        consumer.join(1.0)
+        self.assertEqual(result, [(None, False)])
+
+    def test_statistics(self):
+        """测试队列深度统计"""
+        self.queue.put(make_command("a", "query"))
+        self.queue.put(make_command("b", "query"))
+        self.queue.put(make_command("c", "write"))
+
+        stats = self.queue.get_statistics()
+        self.assertEqual(stats["depth"], 3)
+        self.assertEqual(stats["max_depth"], 3)
+        self.assertEqual(stats["depth_by_priority"], {PRIORITY_LOW: 2, PRIORITY_HIGH: 1})
+
+        self.queue.get(0)
+        stats = self.queue.get_statistics()
+        self.assertEqual(stats["depth"], 2)
+        self.assertGreaterEqual(stats["max_wait_time"], 0.0)
+
+
+def make_write(command_id, address, value):
+    """创建写入命令"""
+    return NCCommand(command_id=command_id, command_type="write",
+                     data={"address": address, "data": value}, parameters={}, timeout=1.0)
+
+
+def make_query(command_id, query_type="status"):
+    """创建状态查询命令"""
+    return NCCommand(command_id=command_id, command_type="query",
+                     data={"query_type": query_type}, parameters={}, timeout=1.0)
+
+
+class TestCommandQueueCoalescing(unittest.TestCase):
+    """命令合并测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.queue = CommandQueue(coalesce=True)
+
+    def test_last_write_wins(self):
+        """测试同一地址的写入只保留最后一条"""
+        first = make_write("w1", "#500", 1)
+        self.assertEqual(self.queue.put(first), [])
+        self.assertEqual(self.queue.put(make_write("w2", "#501", 5)), [])
+        self.assertEqual(self.queue.put(make_write("w3", "#500", 3)), [first])
+
+        commands = [self.queue.get(0)[0] for _ in range(2)]
+        self.assertEqual([c.command_id for c in commands], ["w3", "w2"])
+        self.assertEqual(commands[0].data["data"], 3)
+        self.assertEqual(len(self.queue), 0)
+        self.assertEqual(self.queue.get_statistics()["coalesced_writes"], 1)
+
+    def test_identical_queries_merged(self):
+        """测试相同的查询合并为一条"""
+        self.queue.put(make_query("q1"))
+        self.queue.put(make_query("q2"))
+        self.queue.put(make_query("q3", "alarm"))
+
+        command, _ = self.queue.get(0)
+        self.assertEqual(command.command_id, "q1")
+        self.assertEqual([c.command_id for c in self.queue.take_merged(command)], ["q2"])
+        self.assertEqual(self.queue.take_merged(command), [])
+        self.assertEqual(len(self.queue), 1)
+
+    def test_dequeued_command_not_merged(self):
+        """测试已出队的命令不再接受合并"""
+        self.queue.put(make_query("q1"))
+        self.queue.get(0)
+        self.queue.put(make_query("q2"))
+        self.assertEqual(len(self.queue), 1)
+
+    def test_execute_is_barrier(self):
+        """测试程序执行前后的写入不合并"""
+        self.queue.put(make_write("w1", "#500", 1))
+        self.queue.put(make_command("run", "execute"))
+        self.assertEqual(self.queue.put(make_write("w2", "#500", 2)), [])
+
+        order = [self.queue.get(0)[0].command_id for _ in range(3)]
+        self.assertEqual(order, ["w1", "run", "w2"])
+
+    def test_write_releases_pending_read(self):
+        """测试写入某地址后不再合并之前对该地址的读取"""
+        read = NCCommand(command_id="r1", command_type="read",
+                         data={"address": "#500", "length": 1}, parameters={}, timeout=1.0)
+        self.queue.put(read)
+        self.queue.put(make_write("w1", "#500", 1))
+        self.queue.put(NCCommand(command_id="r2", command_type="read",
+                                 data={"address": "#500", "length": 1}, parameters={}, timeout=1.0))
+        self.assertEqual(len(self.queue), 3)
+
+    def test_drain_includes_merged(self):
+        """测试drain返回合并的命令"""
+        self.queue.put(make_query("q1"))
+        self.queue.put(make_query("q2"))
+        self.assertEqual([c.command_id for c in self.queue.drain()], ["q1", "q2"])
+
+
+class TestNCCommunicatorQueue(unittest.TestCase):
+    """NC通信器命令处理测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.communicator = NCCommunicator(make_config_manager())
+        self.communicator._connected = True
+        self.communicator._socket_connection = Mock()
+        self.communicator._send_raw_command = Mock(side_effect=lambda command: f"OK {command.command_id}")
+
+    def tearDown(self):
+        """测试后清理"""
+        self.communicator._stop_communication = True
+        self.communicator._command_queue.wakeup()
+
+    def test_sync_command_without_polling_delay(self):
+        """测试同步命令不再等待轮询间隔"""
+        self.communicator._start_communication_thread()
+        time.sleep(0.05)
+
+        start = time.time()
+        for _ in range(10):
+            response = self.communicator.write_data("#500", 1)
+            self.assertTrue(response.success)
+        # 旧实现每条命令至多等待100ms
+        self.assertLess(time.time() - start, 0.5)
+
+    def test_coalesced_commands_resolved(self):
+        """测试被取代的写入和合并的查询都得到结果，设备只收到合并后的命令"""
+        responses = {}
+        for command in (make_write("w1", "#500", 1), make_write("w2", "#500", 2),
+                        make_query("q1"), make_query("q2")):
+            self.communicator.send_command(command, lambda r: responses.__setitem__(r.command_id, r))
+
+        while self.communicator._process_command_queue():
+            pass
+        self.assertTrue(self.communicator._callback_dispatcher.wait_idle(1.0))
+
+        sent = [call.args[0].command_id for call in self.communicator._send_raw_command.call_args_list]
+        self.assertEqual(sent, ["w2", "q1"])
+        self.assertTrue(responses["w1"].coalesced)
+        self.assertTrue(responses["w1"].success)
+        self.assertEqual(responses["w2"].data, "OK w2")
+        self.assertEqual(responses["q2"].data, "OK q1")
+        self.assertFalse(responses["q2"].coalesced)
+
+    def test_expired_command_not_sent(self):
+        """测试过期命令不发送并以失败响应完成"""
+        responses = []
+        command = make_command("late", deadline=time.time() - 1)
+        self.communicator.send_command(command, responses.append)
+
+        self.assertTrue(self.communicator._process_command_queue())
+        self.communicator._send_raw_command.assert_not_called()
+        self.assertTrue(self.communicator._callback_dispatcher.wait_idle(1.0))
+        self.assertFalse(responses[0].success)
+        self.assertEqual(self.communicator.get_queue_statistics()["expired"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+"""
+NC连接管理器单元测试
+测试多台设备的命令路由、并发下发和统计
+"""
+
+import unittest
+from unittest.mock import Mock
+from types import SimpleNamespace
+import time
+import sys
+import os
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from src.business.connection_manager import NCConnectionManager
+from src.business.nc_communicator import NCCommunicator
+
+
+class FakeDeviceCommunicator(NCCommunicator):
+    """模拟设备的通信器：连接时启动通信线程，每条命令耗时delay秒"""
+
+    delay = 0.1
+
+    def __init__(self, config_manager):
+        super().__init__(config_manager)
+        self.frames = []
+
+    def _connect_socket(self):
+        self._socket_connection = Mock()
+        return True
+
+    def _send_raw_command(self, command):
+        frame = self._build_command_data(command)
+        self.frames.append(frame)
+        time.sleep(self.delay)
+        return "OK"
+
+
+class TestNCConnectionManager(unittest.TestCase):
+    """NC连接管理器测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        config_manager = Mock()
+        config_manager.com_config = SimpleNamespace(com_type=1, ip_address="10.0.0.1", port=502, timeout=2.0)
+        config_manager.device_config = SimpleNamespace(device_name="NC", device_model="TEST")
+        self.manager = NCConnectionManager(config_manager, communicator_factory=FakeDeviceCommunicator)
+        for i in range(1, 5):
+            self.manager.add_machine(
+                f"NC{i}", com_config=SimpleNamespace(com_type=1, ip_address=f"10.0.0.{i}", port=502, timeout=2.0)
+            )
+        self.assertEqual(self.manager.connect_all(), {f"NC{i}": True for i in range(1, 5)})
+
+    def tearDown(self):
+        """测试后清理"""
+        self.manager.disconnect_all()
+
+    def test_route_by_machine(self):
+        """测试命令按设备ID路由"""
+        response = self.manager.write_data("NC3", "#500", 10)
+
+        self.assertTrue(response.success)
+        self.assertEqual(self.manager.get_communicator("NC3").com_config.ip_address, "10.0.0.3")
+        self.assertEqual(self.manager.get_communicator("NC3").frames, ["WRITE #500 10\n"])
+        self.assertEqual(self.manager.get_communicator("NC1").frames, [])
+        with self.assertRaises(KeyError):
+            self.manager.write_data("NC9", "#500", 10)
+
+    def test_concurrent_dispatch(self):
+        """测试参数同时下发到多台设备"""
+        start = time.time()
+        responses = self.manager.send_parameters_to(self.manager.get_machine_ids(), {"#500": 1, "#501": 2})
+        elapsed = time.time() - start
+
+        self.assertTrue(all(response.success for response in responses.values()))
+        # 逐台发送至少需要4 * 0.1秒
+        self.assertLess(elapsed, 0.3)
+        for machine_id in responses:
+            self.assertEqual(self.manager.get_communicator(machine_id).frames, ["WRITEM 2 #500=1 #501=2\n"])
+
+    def test_statistics(self):
+        """测试汇总和单台设备的统计"""
+        self.manager.execute_program_on(["NC1", "NC2"], 100)
+        self.manager.query_status("NC1")
+
+        stats = self.manager.get_statistics()
+        # 连接操作也计入统计
+        self.assertEqual(stats["machines"]["NC1"]["operations"], 3)
+        self.assertEqual(stats["machines"]["NC2"]["operations"], 2)
+        self.assertEqual(stats["total"]["operations"], 7)
+        self.assertEqual(stats["total"]["failed"], 0)
+        self.assertGreaterEqual(self.manager.get_statistics("NC1")["max_time"], 0.1)
+
+    def test_remove_machine(self):
+        """测试移除设备时断开连接"""
+        communicator = self.manager.get_communicator("NC4")
+        self.assertTrue(self.manager.remove_machine("NC4"))
+        self.assertFalse(communicator.is_connected())
+        self.assertNotIn("NC4", self.manager.get_machine_ids())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+"""
+分帧读取器单元测试
+测试分隔符分帧、长度前缀分帧以及半帧和多帧读取
+"""
+
+import unittest
+import sys
+import os
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from src.communication.framing import FrameReader, FrameError
+
+
+class ChunkSource:
+    """按预定分块返回数据的模拟连接"""
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+        self.buffers = set()
+
+    def recv_into(self, view):
+        self.buffers.add(id(view.obj))
+        if not self.chunks:
+            return 0
+        chunk = self.chunks.pop(0)
+        count = min(len(chunk), len(view))
+        view[:count] = chunk[:count]
+        if count < len(chunk):
+            self.chunks.insert(0, chunk[count:])
+        return count
+
+
+class TestFrameReader(unittest.TestCase):
+    """分帧读取器测试类"""
+
+    def test_frame_split_across_reads(self):
+        """测试一帧分多次到达"""
+        source = ChunkSource([b"#500=", b"12.", b"5\n"])
+        reader = FrameReader(source.recv_into)
+        self.assertEqual(reader.read_frame(), b"#500=12.5")
+        self.assertEqual(reader.reads, 3)
+
+    def test_multiple_frames_in_one_read(self):
+        """测试一次读取包含多帧"""
+        source = ChunkSource([b"OK\nNG\nIDLE\n"])
+        reader = FrameReader(source.recv_into)
+        self.assertEqual([reader.read_frame() for _ in range(3)], [b"OK", b"NG", b"IDLE"])
+        self.assertEqual(reader.reads, 1)
+        self.assertEqual(reader.buffered, 0)
+
+    def test_large_frame_and_buffer_reuse(self):
+        """测试超过缓冲区的帧和缓冲区复用"""
+        payload = b"x" * 5000
+        source = ChunkSource([payload[:3000], payload[3000:] + b"\nOK\n", b"END\n"])
+        reader = FrameReader(source.recv_into, buffer_size=1024)
+
+        self.assertEqual(reader.read_frame(), payload)
+        self.assertEqual(reader.read_frame(), b"OK")
+        self.assertEqual(reader.read_frame(), b"END")
+        self.assertEqual(len(source.buffers), 1)
+
+    def test_multibyte_delimiter_across_reads(self):
+        """测试多字节分隔符跨两次读取"""
+        source = ChunkSource([b"OK\r", b"\nNG\r\n"])
+        reader = FrameReader(source.recv_into, delimiter=b"\r\n")
+        self.assertEqual(reader.read_frame(), b"OK")
+        self.assertEqual(reader.read_frame(), b"NG")
+
+    def test_length_prefixed_frames(self):
+        """测试长度前缀分帧"""
+        data = (3).to_bytes(2, "big") + b"a\nb" + (0).to_bytes(2, "big") + (2).to_bytes(2, "big") + b"ok"
+        source = ChunkSource([data[:1], data[1:4], data[4:]])
+        reader = FrameReader(source.recv_into, length_prefix=2)
+        self.assertEqual([reader.read_frame() for _ in range(3)], [b"a\nb", b"", b"ok"])
+
+    def test_feed_mode(self):
+        """测试推送模式"""
+        reader = FrameReader()
+        self.assertEqual(reader.feed(b"OK\nNG"), [b"OK"])
+        self.assertEqual(reader.feed(b"\n"), [b"NG"])
+
+    def test_eof_and_oversized_frame(self):
+        """测试连接关闭和帧长度超限"""
+        reader = FrameReader(ChunkSource([b"partial"]).recv_into)
+        with self.assertRaises(EOFError):
+            reader.read_frame()
+
+        reader = FrameReader(ChunkSource([b"x" * 100]).recv_into, buffer_size=16, max_frame_size=32)
+        with self.assertRaises(FrameError):
+            reader.read_frame()
+
+        reader = FrameReader(ChunkSource([(1000).to_bytes(2, "big")]).recv_into, length_prefix=2, max_frame_size=32)
+        with self.assertRaises(FrameError):
+            reader.read_frame()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+延迟直方图单元测试
+"""
+
+import unittest
+import sys
+import os
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from src.business.latency_histogram import LatencyHistogram
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    """延迟直方图测试类"""
+
+    def test_percentiles_within_bucket_error(self):
+        """测试百分位数在分桶误差范围内"""
+        histogram = LatencyHistogram()
+        for i in range(1, 1001):
+            histogram.record(i / 1000.0)
+
+        self.assertEqual(histogram.count, 1000)
+        self.assertAlmostEqual(histogram.snapshot()["mean"], 0.5005)
+        for percent, expected in ((50, 0.5), (95, 0.95), (99, 0.99)):
+            value = histogram.percentile(percent)
+            self.assertGreaterEqual(value, expected)
+            self.assertLessEqual(value, expected * 1.1)
+        self.assertEqual(histogram.percentile(100), 1.0)
+
+    def test_out_of_range_values(self):
+        """测试超出范围的值"""
+        histogram = LatencyHistogram(min_value=0.001, max_value=1.0)
+        histogram.record(0.0)
+        histogram.record(50.0)
+
+        self.assertEqual(histogram.min, 0.0)
+        self.assertEqual(histogram.max, 50.0)
+        self.assertEqual(histogram.percentile(50), 0.001)
+        self.assertEqual(len(histogram.snapshot()["buckets"]), 2)
+
+    def test_merge(self):
+        """测试合并直方图"""
+        first = LatencyHistogram()
+        second = LatencyHistogram()
+        first.record(0.01)
+        second.record(0.2)
+        second.record(0.3)
+
+        first.merge(second)
+        self.assertEqual(first.count, 3)
+        self.assertEqual(first.min, 0.01)
+        self.assertEqual(first.max, 0.3)
+        with self.assertRaises(ValueError):
+            first.merge(LatencyHistogram(sub_buckets=4))
+
+    def test_empty(self):
+        """测试没有记录时的快照"""
+        snapshot = LatencyHistogram().snapshot()
+        self.assertEqual(snapshot["count"], 0)
+        self.assertEqual(snapshot["p99"], 0.0)
+        self.assertEqual(snapshot["buckets"], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
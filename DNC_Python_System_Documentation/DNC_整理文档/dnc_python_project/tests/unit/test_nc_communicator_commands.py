@@ -0,0 +1,432 @@
+"""
+NC通信器命令单元测试
+使用模拟设备应答测试通信器的命令发送功能
+"""
+
+import unittest
+from unittest.mock import Mock, patch
+from types import SimpleNamespace
+from collections import deque
+import json
+import socket
+import tempfile
+import threading
+import time
+import sys
+import os
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from src.business.nc_communicator import NCCommunicator, AdvancedNCCommunicator, NCCommand
+from src.business.callback_dispatcher import CallbackDispatcher
+
+
+def make_connected_communicator(responder):
+    """创建已连接的NC通信器，由responder(命令数据字符串)模拟设备应答"""
+    config_manager = Mock()
+    config_manager.com_config = SimpleNamespace(com_type=1, ip_address="127.0.0.1", port=0, timeout=1.0)
+    config_manager.device_config = SimpleNamespace(device_name="NC1", device_model="TEST")
+    communicator = NCCommunicator(config_manager)
+    communicator._connected = True
+    communicator._socket_connection = Mock()
+    communicator._send_raw_command = Mock(
+        side_effect=lambda command: responder(communicator._build_command_data(command))
+    )
+    communicator._start_communication_thread()
+    return communicator
+
+
+def stop_communicator(communicator):
+    """停止通信线程"""
+    communicator._stop_communication = True
+    communicator._command_queue.wakeup()
+    communicator._communication_thread.join(1.0)
+
+
+class TestNCCommunicatorBulkWrite(unittest.TestCase):
+    """NC通信器批量写入测试类"""
+
+    def test_bulk_write_single_round_trip(self):
+        """测试整组参数在一个帧中发送"""
+        frames = []
+        communicator = make_connected_communicator(lambda frame: frames.append(frame) or "OK")
+        values = {f"#{500 + i}": i for i in range(70)}
+
+        response = communicator.write_bulk(values)
+        stop_communicator(communicator)
+
+        self.assertTrue(response.success)
+        self.assertEqual(response.data["written"], list(values))
+        self.assertEqual(len(frames), 1)
+        self.assertTrue(frames[0].startswith("WRITEM 70 #500=0 #501=1 "))
+        self.assertTrue(frames[0].endswith("#569=69\n"))
+
+    def test_bulk_write_per_macro_errors(self):
+        """测试逐个宏变量的错误报告"""
+        communicator = make_connected_communicator(lambda frame: "#500=OK #501=RANGE")
+
+        response = communicator.write_bulk({"#500": 1, "#501": 99999, "#502": 3})
+        stop_communicator(communicator)
+
+        self.assertFalse(response.success)
+        self.assertEqual(response.data["written"], ["#500"])
+        self.assertEqual(response.data["errors"], {"#501": "RANGE", "#502": "无确认"})
+
+    def test_bulk_write_split_into_frames(self):
+        """测试超过单帧上限时分帧发送"""
+        frames = []
+        communicator = make_connected_communicator(lambda frame: frames.append(frame) or "OK")
+        communicator.BULK_WRITE_MAX = 2
+
+        response = communicator.write_bulk({"#500": 1, "#501": 2, "#502": 3})
+        stop_communicator(communicator)
+
+        self.assertTrue(response.success)
+        self.assertEqual(frames, ["WRITEM 2 #500=1 #501=2\n", "WRITEM 1 #502=3\n"])
+
+
+
+class TestNCCommunicatorDeltaSend(unittest.TestCase):
+    """NC通信器差量发送测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.frames = []
+        self.reply = "OK"
+        self.communicator = make_connected_communicator(lambda frame: self.frames.append(frame) or self.reply)
+
+    def tearDown(self):
+        """测试后清理"""
+        stop_communicator(self.communicator)
+
+    def test_only_changed_values_are_sent(self):
+        """测试只发送变化的宏变量"""
+        self.communicator.send_parameters({"#500": 10, "#501": 2.5, "#502": 30})
+        response = self.communicator.send_parameters({"#500": 10, "#501": 3.5, "#502": 30})
+
+        self.assertEqual(self.frames[-1], "WRITEM 1 #501=3.5\n")
+        self.assertEqual(response.data["written"], ["#501"])
+        self.assertEqual(response.data["skipped"], ["#500", "#502"])
+
+    def test_unchanged_set_sends_nothing(self):
+        """测试参数完全相同时不发送"""
+        self.communicator.send_parameters({"#500": 10})
+        response = self.communicator.send_parameters({"#500": 10})
+
+        self.assertTrue(response.success)
+        self.assertEqual(len(self.frames), 1)
+        self.assertEqual(response.data["skipped"], ["#500"])
+
+    def test_force_full_send(self):
+        """测试强制全量发送"""
+        self.communicator.send_parameters({"#500": 10, "#501": 20})
+        self.communicator.send_parameters({"#500": 10, "#501": 20}, force_full=True)
+        self.assertEqual(self.frames[-1], "WRITEM 2 #500=10 #501=20\n")
+
+    def test_failed_macros_are_resent(self):
+        """测试写入失败的宏变量下次重新发送"""
+        self.reply = "#500=OK #501=NG"
+        self.communicator.send_parameters({"#500": 10, "#501": 20})
+        self.assertEqual(self.communicator.get_shadow(), {"#500": "10"})
+
+        self.reply = "OK"
+        self.communicator.send_parameters({"#500": 10, "#501": 20})
+        self.assertEqual(self.frames[-1], "WRITEM 1 #501=20\n")
+
+    def test_alarm_invalidates_shadow(self):
+        """测试报警状态使影子副本失效"""
+        self.communicator.send_parameters({"#500": 10})
+        self.reply = "ALARM 1001"
+        self.communicator.query_status()
+        self.assertEqual(self.communicator.get_shadow(), {})
+
+        self.reply = "OK"
+        self.communicator.send_parameters({"#500": 10})
+        self.assertEqual(self.frames[-1], "WRITEM 1 #500=10\n")
+
+    def test_write_error_reply_is_not_acknowledged(self):
+        """测试单个写入收到ERROR应答时不记录影子副本，差量发送仍会发送"""
+        self.communicator.send_parameters({"#500": 5})
+        self.reply = "ERROR 17 WRITE PROTECTED"
+        self.communicator.write_data("#500", 5)
+        self.assertEqual(self.communicator.get_shadow(), {})
+
+        self.reply = "OK"
+        response = self.communicator.send_parameters({"#500": 5})
+        self.assertEqual(self.frames[-1], "WRITEM 1 #500=5\n")
+        self.assertEqual(response.data["written"], ["#500"])
+        self.assertEqual(response.data["skipped"], [])
+
+    def test_execute_invalidates_shadow(self):
+        """测试执行程序后影子副本失效"""
+        self.communicator.send_parameters({"#500": 10})
+        self.communicator.execute_program(1000)
+        self.assertEqual(self.communicator.get_shadow(), {})
+
+        self.communicator.send_parameters({"#500": 10})
+        self.assertEqual(self.frames[-1], "WRITEM 1 #500=10\n")
+
+
+
+class TestNCCommunicatorSocketFraming(unittest.TestCase):
+    """NC通信器网络应答分帧测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        config_manager = Mock()
+        config_manager.com_config = SimpleNamespace(com_type=1, ip_address="127.0.0.1", port=0, timeout=1.0)
+        config_manager.device_config = SimpleNamespace(device_name="NC1", device_model="TEST")
+        self.communicator = NCCommunicator(config_manager)
+        self.client, self.device = socket.socketpair()
+        self.client.settimeout(1.0)
+        self.communicator._socket_connection = self.client
+
+    def tearDown(self):
+        """测试后清理"""
+        self.client.close()
+        self.device.close()
+
+    def reply_later(self, *chunks):
+        """读取命令后分块发送应答"""
+        def run():
+            self.device.recv(4096)
+            for chunk in chunks:
+                self.device.sendall(chunk)
+                time.sleep(0.02)
+        thread = threading.Thread(target=run)
+        thread.start()
+        return thread
+
+    def test_split_response(self):
+        """测试分多个数据包到达的应答"""
+        thread = self.reply_later(b"#500=", b"12.5\n")
+        command = NCCommand("read_1", "read", {"address": "#500", "length": 1}, {}, 1.0)
+        self.assertEqual(self.communicator._send_socket_command(command), "#500=12.5")
+        thread.join()
+
+    def test_large_response(self):
+        """测试超过1KB的应答"""
+        payload = "#500=" + "9" * 3000
+        thread = self.reply_later(payload[:1500].encode(), payload[1500:].encode() + b"\n")
+        command = NCCommand("read_1", "read", {"address": "#500", "length": 600}, {}, 1.0)
+        self.assertEqual(self.communicator._send_socket_command(command), payload)
+        thread.join()
+
+    def test_closed_connection(self):
+        """测试对端关闭连接"""
+        self.device.close()
+        command = NCCommand("query_1", "query", {"query_type": "status"}, {}, 1.0)
+        with self.assertRaises(ConnectionError):
+            self.communicator._send_socket_command(command)
+
+
+
+class TestAdvancedNCCommunicatorStatistics(unittest.TestCase):
+    """高级NC通信器统计测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        config_manager = Mock()
+        config_manager.com_config = SimpleNamespace(com_type=1, ip_address="127.0.0.1", port=0, timeout=1.0)
+        config_manager.device_config = SimpleNamespace(device_name="NC1", device_model="TEST")
+        self.communicator = AdvancedNCCommunicator(config_manager)
+        self.communicator._connected = True
+        self.communicator._socket_connection = Mock()
+        self.communicator._send_raw_command = Mock(side_effect=lambda command: time.sleep(0.002) or "OK")
+
+    def run_commands(self, commands):
+        """入队并逐条处理命令"""
+        for command in commands:
+            self.communicator.send_command(command)
+        while self.communicator._process_command_queue():
+            pass
+
+    def test_history_is_bounded_and_updated(self):
+        """测试命令历史有界且按响应更新状态"""
+        self.communicator._command_history = deque(maxlen=5)
+        self.run_commands([
+            NCCommand(f"cmd_{i}", "write", {"address": f"#{500 + i}", "data": i}, {}, 1.0) for i in range(8)
+        ])
+
+        history = self.communicator.get_command_history()
+        self.assertEqual([record["command_id"] for record in history], [f"cmd_{i}" for i in range(3, 8)])
+        self.assertTrue(all(record["status"] == "success" for record in history))
+        self.assertEqual(self.communicator._history_index, {})
+        self.assertEqual([r["command_id"] for r in self.communicator.get_command_history(2)], ["cmd_6", "cmd_7"])
+
+    def test_latency_snapshot_by_command_type(self):
+        """测试按命令类型的延迟统计快照"""
+        self.run_commands(
+            [NCCommand(f"w_{i}", "write", {"address": f"#{500 + i}", "data": i}, {}, 1.0) for i in range(10)]
+            + [NCCommand("q_1", "query", {"query_type": "status"}, {}, 1.0)]
+        )
+
+        snapshot = self.communicator.get_latency_snapshot()
+        self.assertEqual(snapshot["latency"]["write"]["count"], 10)
+        self.assertEqual(snapshot["latency"]["query"]["count"], 1)
+        self.assertEqual(snapshot["latency_total"]["count"], 11)
+        write = snapshot["latency"]["write"]
+        self.assertGreaterEqual(write["p50"], 0.002)
+        self.assertLessEqual(write["p50"], write["p99"])
+        self.assertLessEqual(write["p99"], write["max"])
+        self.assertEqual(snapshot["performance"]["total_commands"], 11)
+
+    def test_dump_snapshot(self):
+        """测试保存延迟统计快照"""
+        self.run_commands([NCCommand("q_1", "query", {"query_type": "status"}, {}, 1.0)])
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "stats", "latency.json")
+            self.assertTrue(self.communicator.dump_latency_snapshot(path))
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        self.assertEqual(data["latency"]["query"]["count"], 1)
+
+
+
+class TestNCCommunicatorCallbacks(unittest.TestCase):
+    """NC通信器回调分发测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.communicator = make_connected_communicator(lambda frame: "OK")
+
+    def tearDown(self):
+        """测试后清理"""
+        stop_communicator(self.communicator)
+
+    def test_slow_callback_does_not_block_io(self):
+        """测试慢回调不阻塞后续命令"""
+        release = threading.Event()
+        self.communicator.send_command(
+            NCCommand("slow", "write", {"address": "#500", "data": 1}, {}, 1.0),
+            lambda response: release.wait(2.0)
+        )
+
+        start = time.time()
+        for i in range(5):
+            self.assertTrue(self.communicator.write_data("#501", i).success)
+        self.assertLess(time.time() - start, 0.5)
+
+        release.set()
+        self.assertTrue(self.communicator._callback_dispatcher.wait_idle(2.0))
+
+    def test_status_callbacks_dispatched(self):
+        """测试状态回调在分发器线程中执行"""
+        threads = []
+        done = threading.Event()
+        self.communicator.add_status_callback(lambda status: threads.append(threading.current_thread().name) or done.set())
+        self.communicator._notify_status_change("连接成功")
+
+        self.assertTrue(done.wait(1.0))
+        self.assertEqual(threads, ["NCCallback"])
+
+
+class TestNCCommunicatorCommandIds(unittest.TestCase):
+    """NC通信器命令ID测试类"""
+
+    def test_identical_queries_in_same_millisecond(self):
+        """测试同一毫秒内的两个相同查询合并后都收到应答"""
+        busy = threading.Event()
+        release = threading.Event()
+
+        def responder(frame):
+            if frame.startswith("READ"):
+                busy.set()
+                release.wait(2.0)
+                return "#500=1"
+            return "IDLE"
+
+        communicator = make_connected_communicator(responder)
+        self.addCleanup(stop_communicator, communicator)
+        results = []
+
+        with patch("src.business.nc_communicator.time.time", return_value=1700000000.0):
+            # 先用一个读取占住通信线程，两个查询同时在队列中等待
+            reader = threading.Thread(target=communicator.read_data, args=("#500",))
+            reader.start()
+            self.assertTrue(busy.wait(1.0))
+            queries = [threading.Thread(target=lambda: results.append(communicator.query_status()))
+                       for _ in range(2)]
+            for thread in queries:
+                thread.start()
+            deadline = time.monotonic() + 1.0
+            while communicator._command_queue.get_statistics()["merged_queries"] < 1 and \
+                    time.monotonic() < deadline:
+                time.sleep(0.005)
+            release.set()
+            for thread in queries + [reader]:
+                thread.join(2.0)
+
+        self.assertEqual(communicator._command_queue.get_statistics()["merged_queries"], 1)
+        self.assertEqual(len(results), 2)
+        self.assertTrue(all(response.success and response.data == "IDLE" for response in results))
+        self.assertNotEqual(results[0].command_id, results[1].command_id)
+
+
+class TestCallbackDispatcher(unittest.TestCase):
+    """回调分发器测试类"""
+
+    def test_drop_oldest_when_full(self):
+        """测试队列满时丢弃最早的回调"""
+        release = threading.Event()
+        started = threading.Event()
+        executed = []
+        dispatcher = CallbackDispatcher(max_queue_size=2)
+        dispatcher.submit(lambda: started.set() or release.wait(2.0))
+        started.wait(1.0)
+        for i in range(4):
+            dispatcher.submit(executed.append, i)
+        release.set()
+        dispatcher.wait_idle(1.0)
+
+        self.assertEqual(executed, [2, 3])
+        self.assertEqual(dispatcher.get_statistics()["dropped"], 2)
+        dispatcher.shutdown()
+
+    def test_drop_newest_when_full(self):
+        """测试队列满时丢弃新回调"""
+        release = threading.Event()
+        started = threading.Event()
+        executed = []
+        dispatcher = CallbackDispatcher(max_queue_size=2, overflow_policy="drop_newest")
+        dispatcher.submit(lambda: started.set() or release.wait(2.0))
+        started.wait(1.0)
+        results = [dispatcher.submit(executed.append, i) for i in range(4)]
+        release.set()
+        dispatcher.wait_idle(1.0)
+
+        self.assertEqual(results, [True, True, False, False])
+        self.assertEqual(executed, [0, 1])
+        dispatcher.shutdown()
+
+    def test_restart_after_shutdown_keeps_order(self):
+        """测试停止后立即提交时，新工作线程在旧线程执行完剩余回调后才启动"""
+        executed = []
+        dispatcher = CallbackDispatcher()
+        dispatcher.submit(lambda: time.sleep(0.1) or executed.append(0))
+        dispatcher.submit(executed.append, 1)
+        dispatcher.shutdown(wait=False)
+        dispatcher.submit(executed.append, 2)
+        dispatcher.wait_idle(1.0)
+
+        self.assertEqual(executed, [0, 1, 2])
+        dispatcher.shutdown()
+
+    def test_slow_callback_statistics(self):
+        """测试慢回调的耗时统计"""
+        dispatcher = CallbackDispatcher(slow_threshold=0.02)
+        dispatcher.submit(time.sleep, 0.05)
+        dispatcher.submit(time.sleep, 0)
+        dispatcher.wait_idle(1.0)
+
+        stats = dispatcher.get_statistics()
+        self.assertEqual(stats["executed"], 2)
+        self.assertEqual(stats["slow_callbacks"], 1)
+        self.assertGreaterEqual(stats["max_callback_time"], 0.05)
+        self.assertGreaterEqual(stats["slowest_callback"]["time"], 0.05)
+        dispatcher.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
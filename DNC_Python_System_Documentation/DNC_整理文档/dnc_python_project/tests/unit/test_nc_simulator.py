@@ -0,0 +1,100 @@
+"""
+NC设备模拟器单元测试
+测试真实NCCommunicator与本地模拟器之间的读写、拆包、错误注入以及负载测试报告
+"""
+
+import unittest
+import sys
+import os
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from src.communication.nc_simulator import NCSimulator, SimulatorConfig
+from src.business.nc_communicator import NCCommunicator
+from src.business.nc_load_test import LoadTestConfig, run_load_test
+
+
+class TestNCSimulator(unittest.TestCase):
+    """NC设备模拟器测试"""
+
+    def start_simulator(self, **kwargs) -> NCSimulator:
+        simulator = NCSimulator(config=SimulatorConfig(seed=1, **kwargs))
+        simulator.start()
+        self.addCleanup(simulator.stop)
+        return simulator
+
+    def connect(self, simulator: NCSimulator) -> NCCommunicator:
+        communicator = NCCommunicator(LoadTestConfig(simulator.host, simulator.port, timeout=2.0))
+        self.assertTrue(communicator.connect())
+        self.addCleanup(communicator.disconnect)
+        return communicator
+
+    def test_write_then_read(self):
+        """测试写入后读取"""
+        simulator = self.start_simulator()
+        communicator = self.connect(simulator)
+
+        self.assertTrue(communicator.write_data("#500", 12).success)
+        response = communicator.read_data("#500")
+
+        self.assertTrue(response.success)
+        self.assertEqual(response.data, "#500=12")
+        self.assertEqual(simulator.macros["#500"], "12")
+
+    def test_bulk_write_and_query(self):
+        """测试批量写入和状态查询"""
+        simulator = self.start_simulator()
+        communicator = self.connect(simulator)
+
+        response = communicator.write_bulk({"#500": 1, "#501": 2})
+        self.assertEqual(sorted(response.data["written"]), ["#500", "#501"])
+        self.assertEqual(simulator.macros, {"#500": "1", "#501": "2"})
+        self.assertEqual(communicator.query_status().data, "IDLE")
+
+    def test_split_responses(self):
+        """测试应答被拆成多个数据包时仍能正确解析"""
+        simulator = self.start_simulator(split_size=3, split_delay=0.0)
+        communicator = self.connect(simulator)
+
+        communicator.write_data("#510", 123456)
+        self.assertEqual(communicator.read_data("#510").data, "#510=123456")
+
+    def test_error_injection(self):
+        """测试错误注入"""
+        simulator = self.start_simulator(error_rate=1.0)
+        communicator = self.connect(simulator)
+
+        response = communicator.read_data("#500")
+
+        self.assertEqual(response.data, "ERROR SIMULATED")
+        self.assertEqual(simulator.get_statistics()["errors_injected"], 1)
+
+    def test_tagged_lines(self):
+        """测试带命令ID前缀的请求原样返回前缀"""
+        simulator = NCSimulator(config=SimulatorConfig(tagged=True))
+
+        self.assertEqual(simulator.handle_line("c1 WRITE #500 7"), "c1 OK")
+        self.assertEqual(simulator.handle_line("c2 READ #500"), "c2 #500=7")
+        self.assertEqual(simulator.handle_line("c3 FOO"), "c3 ERROR UNKNOWN")
+        self.assertIsNone(simulator.handle_line(""))
+
+    def test_load_test_report(self):
+        """测试负载测试报告"""
+        simulator = self.start_simulator()
+
+        report = run_load_test(simulator.host, simulator.port, connections=2,
+                               commands_per_connection=20, bulk_size=5,
+                               mix=("write", "read", "write_bulk", "query"))
+
+        self.assertEqual(report["commands"], 40)
+        self.assertEqual(report["errors"], 0)
+        self.assertGreater(report["commands_per_second"], 0)
+        self.assertEqual(set(report["latency_ms_by_type"]), {"write", "read", "write_bulk", "query"})
+        for key in ("mean", "p50", "p95", "p99", "max"):
+            self.assertIn(key, report["latency_ms"])
+        self.assertEqual(simulator.get_statistics()["connections"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,191 @@
+"""
+程序分块传输单元测试
+测试增量程序校验、分块发送的窗口流控和进度回调，以及分块接收到迭代器和文件
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from src.communication.nc_protocol import FanucProtocol, RexrothProtocol, ProgramStreamValidator
+
+
+class WindowedProtocol(RexrothProtocol):
+    """记录程序块并由测试控制确认的协议"""
+
+    def __init__(self, ack_count=1, fail_at=None):
+        super().__init__()
+        self.ack_count = ack_count
+        self.fail_at = fail_at
+        self.blocks = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.ended = []
+
+    def _send_program_block(self, program_name, sequence, block):
+        if sequence == self.fail_at:
+            return False
+        self.blocks.append((sequence, block))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        return True
+
+    def _wait_program_ack(self, timeout):
+        count = min(self.ack_count, self.in_flight)
+        self.in_flight -= count
+        return count
+
+    def _end_program_transfer(self, program_name, success):
+        self.ended.append(success)
+        return True
+
+
+def sample_program(lines):
+    """生成指定行数的测试程序"""
+    return "%\n" + "".join(f"N{i * 10} G01 X{i}.0 Y{i}.0\n" for i in range(1, lines + 1)) + "%"
+
+
+class TestProgramStreamValidator(unittest.TestCase):
+    """增量程序校验测试"""
+
+    def test_matches_validate_program_data(self):
+        """测试任意分块方式的校验结果与整体校验相同"""
+        protocol = FanucProtocol()
+        programs = ["%\nN10 G00\nG01 X1\n\nN30 M30\n%", "O1\nG00\nN20\nM30", "%", "%\n%\n", "X"]
+        for program in programs:
+            expected = protocol.validate_program_data(program)
+            for size in (1, 2, 5, 100):
+                validator = ProgramStreamValidator()
+                for offset in range(0, len(program), size):
+                    validator.feed(program[offset:offset + size])
+                result = validator.finish()
+                self.assertEqual(result["warnings"], expected["warnings"], (program, size))
+                self.assertEqual(result["valid"], expected["valid"])
+
+    def test_empty_and_warning_limit(self):
+        """测试空程序和警告数量上限"""
+        self.assertFalse(ProgramStreamValidator().finish()["valid"])
+
+        validator = ProgramStreamValidator(max_warnings=3)
+        validator.feed("%\n" + "G01\n" * 10 + "%")
+        result = validator.finish()
+        self.assertEqual(len(result["warnings"]), 3)
+        self.assertEqual(result["warning_count"], 10)
+
+
+class TestSendProgramStream(unittest.TestCase):
+    """分块发送测试"""
+
+    def setUp(self):
+        self.protocol = WindowedProtocol()
+        self.protocol.connect({"ip_address": "127.0.0.1"})
+        self.program = sample_program(500)
+
+    def test_rechunks_iterable_source(self):
+        """测试任意大小的输入块被切分为固定大小的程序块"""
+        chunks = (self.program[i:i + 37] for i in range(0, len(self.program), 37))
+        self.assertTrue(self.protocol.send_program_stream(chunks, "O1", block_size=256))
+
+        blocks = [block for _, block in self.protocol.blocks]
+        self.assertEqual("".join(blocks), self.program)
+        self.assertTrue(all(len(block) == 256 for block in blocks[:-1]))
+        self.assertEqual([sequence for sequence, _ in self.protocol.blocks], list(range(len(blocks))))
+        self.assertEqual(self.protocol.ended, [True])
+
+    def test_window_flow_control_and_progress(self):
+        """测试未确认的程序块不超过窗口大小，进度在确认后上报"""
+        progress = []
+        self.assertTrue(self.protocol.send_program_stream(
+            [self.program], "O1", block_size=100, window_size=4,
+            progress_callback=lambda done, total: progress.append((done, total)),
+            total_size=len(self.program)))
+
+        self.assertEqual(self.protocol.max_in_flight, 4)
+        self.assertEqual(progress[-1], (len(self.program), len(self.program)))
+        self.assertEqual([done for done, _ in progress], sorted(done for done, _ in progress))
+
+    def test_file_source(self):
+        """测试从文件分块发送"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "O1.nc")
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                f.write(self.program)
+            progress = []
+            self.assertTrue(self.protocol.send_program_stream(
+                path, "O1", block_size=1024, progress_callback=lambda done, total: progress.append(total)))
+
+        self.assertEqual("".join(block for _, block in self.protocol.blocks), self.program)
+        self.assertEqual(set(progress), {len(self.program)})
+
+    def test_progress_counts_encoded_bytes(self):
+        """测试含中文注释的程序进度按字节计算，结束时达到文件大小"""
+        program = "%\n" + "".join(f"N{i * 10} G01 X{i}.0 (加工注释)\n" for i in range(1, 1001)) + "%"
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "O2.nc")
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                f.write(program)
+            size = os.path.getsize(path)
+            progress = []
+            self.assertTrue(self.protocol.send_program_stream(
+                path, "O2", block_size=512, progress_callback=lambda done, total: progress.append((done, total))))
+
+        self.assertGreater(size, len(program))
+        self.assertEqual(progress[-1], (size, size))
+
+    def test_failures(self):
+        """测试空程序、发送失败、确认超时和未连接"""
+        self.assertFalse(self.protocol.send_program_stream(iter([]), "O1"))
+        self.assertEqual(self.protocol.ended, [])
+
+        failing = WindowedProtocol(fail_at=2)
+        failing.connect({})
+        self.assertFalse(failing.send_program_stream([self.program], "O1", block_size=100))
+        self.assertEqual(failing.ended, [False])
+
+        silent = WindowedProtocol(ack_count=0)
+        silent.connect({})
+        self.assertFalse(silent.send_program_stream([self.program], "O1", block_size=100, window_size=2))
+        self.assertEqual(silent.ended, [False])
+
+        self.protocol.disconnect()
+        self.assertFalse(self.protocol.send_program_stream([self.program], "O1"))
+
+
+class TestReceiveProgramStream(unittest.TestCase):
+    """分块接收测试"""
+
+    def setUp(self):
+        self.protocol = FanucProtocol()
+        self.protocol.connect({"ip_address": "127.0.0.1"})
+        self.expected = self.protocol.receive_program("O0001")
+
+    def test_receive_blocks(self):
+        """测试按块产生接收的程序"""
+        progress = []
+        blocks = list(self.protocol.receive_program_stream(
+            "O0001", block_size=8, progress_callback=lambda done, total: progress.append(done)))
+        self.assertEqual("".join(blocks), self.expected)
+        self.assertTrue(all(len(block) <= 8 for block in blocks))
+        self.assertEqual(progress[-1], len(self.expected))
+
+    def test_receive_file(self):
+        """测试接收到文件，未连接时不留下文件"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "O0001.nc")
+            self.assertTrue(self.protocol.receive_program_file("O0001", path, block_size=8))
+            with open(path, encoding="utf-8", newline="") as f:
+                self.assertEqual(f.read(), self.expected)
+
+            self.protocol.disconnect()
+            other = os.path.join(temp_dir, "O0002.nc")
+            self.assertIsNone(self.protocol.receive_program_stream("O0002"))
+            self.assertFalse(self.protocol.receive_program_file("O0002", other))
+            self.assertEqual(os.listdir(temp_dir), ["O0001.nc"])
+
+
+if __name__ == '__main__':
+    unittest.main()
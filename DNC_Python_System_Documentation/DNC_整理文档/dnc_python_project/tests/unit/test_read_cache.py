@@ -0,0 +1,168 @@
+"""
+读缓存单元测试
+测试有效期、并发读取合并、失效以及通信器的缓存读取和块读取
+"""
+
+import unittest
+import sys
+import os
+import threading
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from src.business.read_cache import MacroReadCache
+from src.business.nc_communicator import NCCommunicator, NCCommand
+from src.business.nc_load_test import LoadTestConfig
+from src.communication.nc_simulator import NCSimulator
+
+
+class TestMacroReadCache(unittest.TestCase):
+    """读缓存测试"""
+
+    def test_load_uses_cache_until_expired(self):
+        """测试有效期内复用缓存值"""
+        cache = MacroReadCache(default_ttl=0.05)
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return len(calls)
+
+        self.assertEqual(cache.load("#500", loader), 1)
+        self.assertEqual(cache.load("#500", loader), 1)
+        time.sleep(0.06)
+        self.assertEqual(cache.load("#500", loader), 2)
+        self.assertEqual(cache.get_statistics()["hits"], 1)
+
+    def test_per_address_ttl_and_max_age(self):
+        """测试按地址设置有效期和调用者的最长缓存时间"""
+        cache = MacroReadCache(default_ttl=10.0, ttls={"#501": 0})
+        cache.put("#500", "a")
+        cache.put("#501", "b")
+
+        self.assertEqual(cache.get("#500"), "a")
+        self.assertIsNone(cache.get("#501"))
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("#500", max_age=0.01))
+
+    def test_failed_results_not_cached(self):
+        """测试不缓存读取失败的结果"""
+        cache = MacroReadCache()
+        self.assertIsNone(cache.load("#500", lambda: None))
+        self.assertEqual(cache.load("#500", lambda: "ERROR", cacheable=lambda v: v != "ERROR"), "ERROR")
+        self.assertEqual(cache.get_statistics()["entries"], 0)
+
+    def test_concurrent_loads_coalesced(self):
+        """测试同一地址的并发读取只调用一次读取函数"""
+        cache = MacroReadCache()
+        release = threading.Event()
+        calls = []
+
+        def loader():
+            calls.append(1)
+            release.wait(1.0)
+            return "#500=1"
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.load("#500", loader)))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join(1.0)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ["#500=1"] * 5)
+        self.assertEqual(cache.get_statistics()["coalesced"], 4)
+
+    def test_invalidate_during_load_discards_result(self):
+        """测试读取期间失效的地址不写入缓存"""
+        cache = MacroReadCache()
+
+        def loader():
+            cache.invalidate(["#500"])
+            return "old"
+
+        self.assertEqual(cache.load("#500", loader), "old")
+        self.assertIsNone(cache.get("#500"))
+
+    def test_put_many_respects_version(self):
+        """测试块读取期间失效的地址不写入缓存"""
+        cache = MacroReadCache()
+        version = cache.version(["#500", "#501"])
+        cache.invalidate(["#501"])
+
+        self.assertEqual(cache.put_many({"#500": 1, "#501": 2}, version), 1)
+        self.assertEqual(cache.get("#500"), 1)
+        self.assertIsNone(cache.get("#501"))
+
+
+class TestCommunicatorReadCache(unittest.TestCase):
+    """通信器读缓存测试（连接本地模拟器）"""
+
+    def setUp(self):
+        self.simulator = NCSimulator()
+        self.simulator.start()
+        self.addCleanup(self.simulator.stop)
+        self.communicator = NCCommunicator(LoadTestConfig(self.simulator.host, self.simulator.port, timeout=2.0))
+        self.assertTrue(self.communicator.connect())
+        self.addCleanup(self.communicator.disconnect)
+
+    def commands(self) -> int:
+        return self.simulator.get_statistics()["commands"]
+
+    def test_read_cached_and_write_invalidation(self):
+        """测试缓存读取和写入后失效"""
+        self.communicator.write_data("#500", 5)
+        before = self.commands()
+
+        self.assertEqual(self.communicator.read_cached("#500").data, "#500=5")
+        self.assertEqual(self.communicator.read_cached("#500").data, "#500=5")
+        self.assertEqual(self.commands() - before, 1)
+
+        self.communicator.write_data("#500", 6)
+        self.assertEqual(self.communicator.read_cached("#500").data, "#500=6")
+
+    def test_send_command_write_invalidation(self):
+        """测试经send_command发送的写入命令完成后缓存失效"""
+        self.communicator.write_bulk({"#500": 1, "#501": 2})
+        self.assertEqual(self.communicator.read_cached("#500").data, "#500=1")
+        self.assertEqual(self.communicator.read_cached("#501").data, "#501=2")
+
+        done = threading.Event()
+        command = NCCommand(command_id="bulk", command_type="write_bulk",
+                            data={"values": {"#500": 3, "#501": 4}}, parameters={}, timeout=2.0)
+        self.communicator.send_command(command, lambda response: done.set())
+        self.assertTrue(done.wait(2.0))
+
+        self.assertEqual(self.communicator.read_cached("#500").data, "#500=3")
+        self.assertEqual(self.communicator.read_cached("#501").data, "#501=4")
+
+    def test_read_block_populates_cache(self):
+        """测试块读取一次读取连续宏变量并写入缓存"""
+        self.communicator.write_bulk({"#500": 1, "#501": 2, "#502": 3})
+        before = self.commands()
+
+        response = self.communicator.read_block("#500", 3)
+        self.assertEqual(response.data, {"#500": "1", "#501": "2", "#502": "3"})
+        self.assertEqual(self.communicator.read_cached("#501").data, "#501=2")
+        self.assertEqual(self.communicator.read_block("#500", 3).data, response.data)
+        self.assertEqual(self.commands() - before, 1)
+
+    def test_execute_invalidates_status(self):
+        """测试执行程序后状态缓存失效"""
+        self.communicator.query_status_cached()
+        self.communicator.query_status_cached()
+        before = self.commands()
+
+        self.communicator.execute_program(1000)
+        self.communicator.query_status_cached()
+        self.assertEqual(self.commands() - before, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+扫描包缓存单元测试
+测试扫描包的构建、LRU淘汰和计算结果
+"""
+
+import unittest
+from unittest.mock import Mock
+import sys
+import os
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from src.business.calculation_engine import CalculationEngine
+from src.business.program_matcher import ProgramMatcher
+from src.business.scan_bundle import ScanBundleCache
+from src.core.config import ConfigManager
+from src.data.csv_processor import CSVProcessor
+
+
+CSV_DATA = {
+    "type_define.csv": [["NO", "TYPE"], ["1", "GPA18"], ["2", "GPB*"]],
+    "type_prg.csv": [["NO", "prg1", "prg2"], ["1", "1", "2"], ["2", "2", "3"]],
+    "load.csv": [["NO", "MACRO", "VALUE"], ["1", "#500", "10"], ["1", "#501", "2.5"], ["2", "#502", "30"]],
+    "define.csv": [["DEFINE", "STR", "BEFORE", "AFTER", "CHNGVL", "CALC"]],
+    "chngValue.csv": [["NAME", "BEFORE", "AFTER"]],
+    "calc.csv": [["#503", "#500", "*", "2"]],
+    "cntrl.csv": [["MACRO", "KIND"], ["#500", "load"], ["#503", "calc"], ["#900", "input"]],
+}
+
+
+class TestScanBundleCache(unittest.TestCase):
+    """扫描包缓存测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.mock_config_manager = Mock(spec=ConfigManager)
+        self.mock_config_manager.get_csv_config_path.side_effect = lambda name: name
+        self.mock_csv_processor = Mock(spec=CSVProcessor)
+        self.mock_csv_processor.read_csv.side_effect = lambda path: CSV_DATA[path]
+
+        self.program_matcher = ProgramMatcher(self.mock_config_manager, self.mock_csv_processor)
+        self.calculation_engine = CalculationEngine(self.mock_config_manager, self.mock_csv_processor)
+        self.relation_validator = Mock()
+        self.relation_validator.get_relation_rules.return_value = [
+            {"PARAM1": "#503", "PARAM2": "#500", "OPERATOR": ">"}
+        ]
+        self.relation_validator.validate_rules.return_value = {"valid": True, "errors": [], "warnings": []}
+
+        self.cache = ScanBundleCache(
+            self.mock_config_manager, self.mock_csv_processor, self.program_matcher,
+            self.calculation_engine, self.relation_validator, max_size=2
+        )
+
+    def test_bundle_built_once(self):
+        """测试扫描包只构建一次"""
+        bundle = self.cache.get_bundle("GPA18")
+
+        self.assertEqual(bundle.program_no, 1)
+        self.assertEqual([step[0] for step in bundle.calculation_plan.load_steps], ["#500", "#501"])
+        self.assertEqual([row["MACRO"] for row in bundle.cntrl_layout], ["#500", "#503"])
+        self.assertIs(self.cache.get_bundle("GPA18"), bundle)
+        self.relation_validator.get_relation_rules.assert_called_once_with(1)
+        self.assertEqual(self.cache.get_statistics()["hits"], 1)
+
+    def test_station_selects_program_column(self):
+        """测试工位选择type_prg.csv中的程序列"""
+        self.assertEqual(self.cache.get_bundle("GPB30", station=2).program_no, 3)
+        self.assertIsNone(self.cache.get_bundle("UNKNOWN"))
+
+    def test_lru_eviction_and_invalidate(self):
+        """测试LRU淘汰及缓存失效"""
+        first = self.cache.get_bundle("GPA18")
+        self.cache.get_bundle("GPB30")
+        self.cache.get_bundle("GPA18")
+        self.cache.get_bundle("GPB40")
+
+        self.assertEqual(self.cache.get_statistics()["size"], 2)
+        self.assertIs(self.cache.get_bundle("GPA18"), first)
+
+        self.cache.invalidate("GPA18")
+        self.assertIsNot(self.cache.get_bundle("GPA18"), first)
+
+    def test_evaluate_matches_calculate_parameters(self):
+        """测试扫描包计算结果与逐表计算一致"""
+        bundle = self.cache.get_bundle("GPA18")
+        result, validation = self.cache.evaluate(bundle)
+        expected = self.calculation_engine.calculate_parameters(1)
+
+        self.assertTrue(result.success)
+        self.assertEqual(result.parameters, expected.parameters)
+        self.assertEqual(result.parameters["#503"], 20)
+        self.assertTrue(validation["valid"])
+        self.relation_validator.validate_rules.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
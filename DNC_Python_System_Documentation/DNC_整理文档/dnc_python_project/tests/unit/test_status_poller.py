@@ -0,0 +1,157 @@
+"""
+状态轮询器单元测试
+测试变化发布、发布合并、自适应轮询间隔以及与本地模拟器的集成
+"""
+
+import unittest
+import sys
+import os
+import time
+from unittest.mock import Mock
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from src.business.status_poller import StatusPoller
+from src.business.nc_communicator import NCCommunicator, NCResponse
+from src.business.nc_load_test import LoadTestConfig
+from src.communication.nc_simulator import NCSimulator
+
+
+class FakeCommunicator:
+    """返回可修改状态的通信器"""
+
+    def __init__(self):
+        self.connected = True
+        self.state = "IDLE"
+        self.queries = 0
+
+    def is_connected(self):
+        return self.connected
+
+    def query_status_cached(self, max_age=None):
+        self.queries += 1
+        return NCResponse(command_id="q", success=True, data=self.state)
+
+
+class TestStatusPoller(unittest.TestCase):
+    """状态轮询器测试"""
+
+    def setUp(self):
+        self.communicator = FakeCommunicator()
+        self.dispatcher = Mock()
+        self.poller = StatusPoller(self.communicator, self.dispatcher, "m1",
+                                   running_interval=0.2, idle_interval=2.0,
+                                   disconnected_interval=5.0, min_publish_interval=0.0)
+        self.received = []
+        self.poller.subscribe(lambda machine_id, changes, status: self.received.append(changes))
+
+    def test_publishes_only_changes(self):
+        """测试只发布变化的字段"""
+        self.assertEqual(self.poller.poll_once(), {"connected": True, "state": "IDLE", "alarm": ""})
+        self.assertEqual(self.poller.poll_once(), {})
+
+        self.communicator.state = "RUNNING"
+        self.assertEqual(self.poller.poll_once(), {"state": "RUNNING"})
+
+        self.assertEqual(len(self.received), 2)
+        self.dispatcher.publish_nc_status_changed.assert_called_with(
+            "m1", {"state": "RUNNING"}, {"connected": True, "state": "RUNNING", "alarm": ""}
+        )
+
+    def test_adaptive_interval(self):
+        """测试按设备状态调整轮询间隔"""
+        self.poller.poll_once()
+        self.poller.poll_once()
+        self.assertEqual(self.poller.current_interval, 2.0)
+
+        self.communicator.state = "RUNNING"
+        self.poller.poll_once()
+        self.assertEqual(self.poller.current_interval, 0.2)
+
+        self.communicator.connected = False
+        self.poller.poll_once()
+        self.assertEqual(self.poller.current_interval, 5.0)
+        self.assertEqual(self.received[-1]["connected"], False)
+
+    def test_coalesces_within_publish_interval(self):
+        """测试发布间隔内的多次变化合并为一次发布"""
+        self.poller.min_publish_interval = 10.0
+        self.poller.poll_once()
+
+        self.communicator.state = "RUNNING"
+        self.assertEqual(self.poller.poll_once(), {})
+        self.communicator.state = "IDLE"
+        self.assertEqual(self.poller.poll_once(), {})
+
+        # 变回已发布的值，不需要再发布
+        self.poller._last_publish = 0.0
+        self.assertEqual(self.poller.poll_once(), {})
+        self.assertEqual(len(self.received), 1)
+
+    def test_late_subscriber_gets_current_status(self):
+        """测试后订阅的回调立即收到当前状态"""
+        self.poller.poll_once()
+        late = []
+        self.poller.subscribe(lambda machine_id, changes, status: late.append(changes))
+        self.assertEqual(late, [{"connected": True, "state": "IDLE", "alarm": ""}])
+
+    def test_published_status_lags_coalesced_changes(self):
+        """测试合并窗口内的变化不出现在已发布状态中"""
+        self.poller.min_publish_interval = 10.0
+        self.poller.poll_once()
+        self.communicator.state = "RUN"
+        self.assertEqual(self.poller.poll_once(), {})
+        self.assertEqual(self.poller.get_status()["state"], "RUN")
+        self.assertEqual(self.poller.get_published_status()["state"], "IDLE")
+
+    def test_disconnect_clears_macro_values(self):
+        """测试断开连接时宏变量从已发布状态中移除，订阅者收到None"""
+        self.communicator.read_cached = lambda address, max_age=None: NCResponse(
+            command_id="r", success=True, data=f"{address}=7")
+        self.poller.addresses = ["#500"]
+        self.poller.poll_once()
+        self.assertEqual(self.poller.get_published_status()["#500"], "7")
+
+        self.communicator.connected = False
+        self.assertEqual(self.poller.poll_once(), {"connected": False, "state": "", "#500": None})
+        self.assertNotIn("#500", self.poller.get_published_status())
+
+        late = []
+        self.poller.subscribe(lambda machine_id, changes, status: late.append(changes))
+        self.assertNotIn("#500", late[0])
+
+
+class TestStatusPollerWithSimulator(unittest.TestCase):
+    """状态轮询器与本地模拟器的集成测试"""
+
+    def test_polling_thread(self):
+        """测试轮询线程发布设备状态和宏变量"""
+        simulator = NCSimulator()
+        simulator.start()
+        self.addCleanup(simulator.stop)
+        simulator.macros["#500"] = "3"
+        communicator = NCCommunicator(LoadTestConfig(simulator.host, simulator.port, timeout=2.0))
+        self.assertTrue(communicator.connect())
+        self.addCleanup(communicator.disconnect)
+
+        received = []
+        poller = StatusPoller(communicator, addresses=["#500"], running_interval=0.02,
+                              idle_interval=0.05, min_publish_interval=0.0)
+        poller.subscribe(lambda machine_id, changes, status: received.append(changes))
+        poller.start()
+        self.addCleanup(poller.stop)
+
+        simulator.state = "RUNNING"
+        deadline = time.time() + 2.0
+        while time.time() < deadline and poller.get_status().get("state") != "RUNNING":
+            time.sleep(0.01)
+
+        self.assertEqual(poller.get_status()["#500"], "3")
+        self.assertEqual(poller.get_status()["state"], "RUNNING")
+        self.assertEqual(poller.current_interval, 0.02)
+        self.assertTrue(all(changes for changes in received))
+
+
+if __name__ == '__main__':
+    unittest.main()
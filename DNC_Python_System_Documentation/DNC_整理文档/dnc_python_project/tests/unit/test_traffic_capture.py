@@ -0,0 +1,125 @@
+"""
+通信抓包和回放单元测试
+测试抓包文件的写入、轮转和读取，通信器抓包，以及分帧读取器和通信器回放
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from src.communication.traffic_capture import (
+    TrafficCapture, CaptureRecord, DIRECTION_INBOUND, DIRECTION_OUTBOUND, capture_files, read_capture
+)
+from src.communication.nc_simulator import NCSimulator, SimulatorConfig
+from src.business.nc_communicator import NCCommunicator
+from src.business.nc_load_test import LoadTestConfig
+from src.business.nc_replay import (
+    command_from_frame, group_exchanges, replay_communicator, replay_parser
+)
+
+
+class TestTrafficCapture(unittest.TestCase):
+    """抓包文件测试"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.path = os.path.join(self.temp_dir.name, "capture", "nc.ncap")
+
+    def test_write_and_read(self):
+        """测试记录的数据原样读回"""
+        with TrafficCapture(self.path) as capture:
+            capture.record(DIRECTION_OUTBOUND, b"READ #500 1\n", timestamp=10.0)
+            capture.record(DIRECTION_INBOUND, b"#500=", timestamp=10.5)
+            capture.record(DIRECTION_INBOUND, b"1\n", timestamp=10.6)
+
+        self.assertEqual(list(read_capture(self.path)), [
+            CaptureRecord(10.0, DIRECTION_OUTBOUND, b"READ #500 1\n"),
+            CaptureRecord(10.5, DIRECTION_INBOUND, b"#500="),
+            CaptureRecord(10.6, DIRECTION_INBOUND, b"1\n"),
+        ])
+
+    def test_rotation(self):
+        """测试按大小轮转并按时间顺序读取"""
+        with TrafficCapture(self.path, max_bytes=60, backup_count=2) as capture:
+            for index in range(8):
+                capture.record_outbound(f"WRITE #{500 + index} 1\n".encode())
+            self.assertGreater(capture.get_statistics()["rotations"], 0)
+
+        self.assertEqual(len(capture_files(self.path)), 3)
+        records = list(read_capture(self.path))
+        self.assertEqual(records[-1].data, b"WRITE #507 1\n")
+        self.assertEqual([r.data for r in records], sorted(r.data for r in records))
+        self.assertEqual(len(records), 6)
+
+    def test_truncated_record_ignored(self):
+        """测试忽略未写完整的最后一条记录"""
+        with TrafficCapture(self.path) as capture:
+            capture.record_outbound(b"QUERY status\n")
+        with open(self.path, "ab") as f:
+            f.write(b"\x00\x01")
+        self.assertEqual(len(list(read_capture(self.path))), 1)
+
+
+class TestCaptureAndReplay(unittest.TestCase):
+    """通信器抓包和回放测试"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.path = os.path.join(self.temp_dir.name, "nc.ncap")
+
+        simulator = NCSimulator(config=SimulatorConfig(split_size=4, split_delay=0.005))
+        simulator.start()
+        self.addCleanup(simulator.stop)
+        communicator = NCCommunicator(LoadTestConfig(simulator.host, simulator.port, timeout=2.0))
+        self.assertTrue(communicator.connect())
+        communicator.enable_capture(self.path)
+        communicator.write_data("#500", 12)
+        communicator.read_data("#500")
+        communicator.write_bulk({"#501": 1, "#502": 2})
+        communicator.query_status()
+        communicator.disable_capture()
+        communicator.disconnect()
+        self.records = list(read_capture(self.path))
+
+    def test_communicator_capture(self):
+        """测试抓包记录发送的帧和原始分包"""
+        outbound = [r.data for r in self.records if r.direction == DIRECTION_OUTBOUND]
+        self.assertEqual(outbound, [b"WRITE #500 12\n", b"READ #500 1\n",
+                                    b"WRITEM 2 #501=1 #502=2\n", b"QUERY status\n"])
+        inbound = [r for r in self.records if r.direction == DIRECTION_INBOUND]
+        self.assertTrue(all(len(r.data) <= 4 for r in inbound))
+
+        exchanges = group_exchanges(self.records)
+        self.assertEqual(b"".join(r.data for r in exchanges[1].responses), b"#500=12\n")
+
+    def test_command_from_frame(self):
+        """测试由命令帧还原命令"""
+        command = command_from_frame(b"WRITEM 2 #501=1 #502=2\n", "c1")
+        self.assertEqual(command.command_type, "write_bulk")
+        self.assertEqual(command.data, {"values": {"#501": "1", "#502": "2"}})
+        self.assertEqual(command_from_frame(b"READ #500 3\n", "c2").data, {"address": "#500", "length": 3})
+        with self.assertRaises(ValueError):
+            command_from_frame(b"HELLO\n", "c3")
+
+    def test_replay_parser(self):
+        """测试接收数据按原始分包回放到分帧读取器"""
+        report = replay_parser(self.records)
+        self.assertEqual(report["frames"], 4)
+        self.assertGreater(report["packets"], 4)
+
+    def test_replay_communicator(self):
+        """测试通过通信器和回放模拟器回放命令"""
+        report = replay_communicator(self.records, speed=0)
+        self.assertEqual(report["commands"], 4)
+        self.assertEqual(report["errors"], 0)
+        self.assertEqual(report["sent"], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
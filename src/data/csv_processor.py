@@ -1,8 +1,10 @@
 import csv
+import os
 import pandas as pd
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple
 import logging
+from .master_table import MasterTable
 
 class CSVProcessor:
     """CSV文件处理器，负责读取、写入和验证CSV数据"""
@@ -32,6 +34,27 @@ class CSVProcessor:
             self.logger.error(f"读取CSV文件失败 {path}: {e}")
             return []
             
+    def read_master_table(self, file_path: str = None, encoding: str = 'utf-8') -> MasterTable:
+        """读取CSV文件为紧凑存储的MasterTable"""
+        try:
+            path = Path(file_path) if file_path else self.file_path
+            if not path or not path.exists():
+                self.logger.warning(f"CSV文件不存在: {path}")
+                return MasterTable()
+                
+            with open(path, 'r', encoding=encoding, newline='') as f:
+                reader = csv.reader(f)
+                header = next(reader, [])
+                # 与DictReader一致，跳过空行
+                table = MasterTable(header, (row for row in reader if row))
+                
+            self.logger.info(f"CSV文件读取成功: {path}, 共 {len(table)} 条记录")
+            return table
+            
+        except Exception as e:
+            self.logger.error(f"读取CSV文件失败 {path}: {e}")
+            return MasterTable()
+            
     def write_csv(self, data: List[Dict[str, Any]], file_path: str = None, 
                   fieldnames: List[str] = None, encoding: str = 'utf-8') -> bool:
         """将数据写入CSV文件"""
@@ -58,6 +81,75 @@ class CSVProcessor:
             self.logger.error(f"写入CSV文件失败 {path}: {e}")
             return False
             
+    def detect_line_terminator(self, file_path: str, default: str = '\r\n') -> str:
+        """检测已有CSV文件的换行符，文件不存在或没有换行时返回default"""
+        try:
+            with open(file_path, 'rb') as f:
+                head = f.read(65536)
+        except OSError:
+            return default
+        position = head.find(b'\n')
+        if position > 0 and head[position - 1:position] == b'\r':
+            return '\r\n'
+        if position >= 0:
+            return '\n'
+        return '\r' if b'\r' in head else default
+        
+    def write_master_table(self, table: MasterTable, file_path: str, encoding: str = 'utf-8',
+                           width: Optional[int] = None) -> bool:
+        """将MasterTable整体写入CSV文件（先写临时文件再替换，避免读到半个文件）
+        
+        沿用原文件的换行符；width指定时只写入前width列，保持原文件的列宽。
+        """
+        try:
+            path = Path(file_path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = path.with_name(path.name + '.tmp')
+            line_terminator = self.detect_line_terminator(str(path))
+            width = len(table.header) if width is None else width
+            
+            with open(temp_path, 'w', encoding=encoding, newline='') as f:
+                writer = csv.writer(f, lineterminator=line_terminator)
+                writer.writerow(table.header[:width])
+                for i in range(len(table)):
+                    writer.writerow(table.row_values(i)[:width])
+            os.replace(temp_path, path)
+                    
+            self.logger.info(f"CSV文件写入成功: {path}, 共 {len(table)} 条记录")
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"写入CSV文件失败 {file_path}: {e}")
+            return False
+            
+    def append_master_rows(self, table: MasterTable, row_indices: List[int],
+                           file_path: str, encoding: str = 'utf-8', width: Optional[int] = None) -> bool:
+        """将MasterTable中的指定行追加到已有CSV文件末尾（沿用原文件的换行符）"""
+        try:
+            path = Path(file_path)
+            line_terminator = self.detect_line_terminator(str(path))
+            width = len(table.header) if width is None else width
+            # 原文件末尾没有换行时先补一个，避免与最后一行粘连
+            needs_newline = False
+            if path.exists() and path.stat().st_size > 0:
+                with open(path, 'rb') as f:
+                    f.seek(-1, os.SEEK_END)
+                    needs_newline = f.read(1) not in (b'\n', b'\r')
+                    
+            with open(path, 'a', encoding=encoding, newline='') as f:
+                if needs_newline:
+                    f.write(line_terminator)
+                writer = csv.writer(f, lineterminator=line_terminator)
+                for i in row_indices:
+                    writer.writerow(table.row_values(i)[:width])
+                    
+            self.logger.info(f"CSV文件追加成功: {path}, 共 {len(row_indices)} 条记录")
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"追加CSV文件失败 {file_path}: {e}")
+            return False
+            
     def process_input_csv(self, input_file_path: str, 
                          product_master_data: Dict[str, Any]) -> Tuple[List[Dict], List[str]]:
         """处理输入CSV文件，验证产品型号并返回处理结果"""
@@ -1,24 +1,119 @@
+import csv
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Tuple
+from types import MappingProxyType
+from typing import Callable, Dict, Iterable, List, Any, Mapping, Optional, Tuple
 from .csv_processor import CSVProcessor
-from .models import Product
+from .lazy_table import LazyTable
+from .master_table import MasterTable, TableDiff
+from .master_watcher import MasterWatcher
+from .models import MasterSnapshot, Product
+from .search_index import ProductSearchIndex
+from .sqlite_store import SQLiteMasterStore, SQLiteProductIndex
 from ..utils.calculation import CalculationEngine
 
 class DataManager:
     """数据管理器，负责加载、管理和处理所有数据"""
     
+    # master表声明的二级索引字段，首次按字段查询时构建
+    INDEX_FIELDS = ('NO', 'TYPE', 'DEFINE', 'MACRO')
+    
+    # master根目录文件及prg子目录文件
+    MASTER_FILES = (
+        'header.csv', 'ini.csv', 'math.csv', 'prg.csv',
+        'type_chngvl.csv', 'type_define.csv', 'type_prg.csv', 'type_relation.csv'
+    )
+    PRG_DIRS = ('prg1', 'prg2', 'prg3')
+    PRG_FILES = (
+        'add.csv', 'calc.csv', 'chngValue.csv', 'cntrl_rex.csv',
+        'cntrl.csv', 'correct.csv', 'define.csv', 'failed_matches.csv',
+        'input.csv', 'load.csv', 'measure.csv', 'preset.csv',
+        'relation.csv', 'select.csv', 'switch.csv', 'type_define.csv', 'type_prg.csv'
+    )
+    
     def __init__(self, config_manager):
         self.config_manager = config_manager
         self.logger = logging.getLogger(__name__)
         self.csv_processor = CSVProcessor()
         self.calculation_engine = CalculationEngine()
         
-        # 数据存储
+        # 数据存储：loaded_files/product_data位于不可变快照中，更新时整体替换
         self.master_data = {}
-        self.product_data = {}
-        self.loaded_files = {}
+        self._snapshot = MasterSnapshot()
+        self._update_lock = threading.Lock()
+        self._watcher: Optional[MasterWatcher] = None
+        self._self_written: Dict[str, Tuple[int, int]] = {}
+        
+        # prg子目录表默认延迟加载，首次访问时才解析
+        self.lazy_load_prg = self._get_bool_setting('lazy_load_prg', True)
+        self._warmup_thread = None
+        self._warmup_stop = threading.Event()
+        
+        # 是否监视master目录并自动增量重新加载
+        self.watch_master = self._get_bool_setting('watch_master', True)
+        
+        # 并行加载线程数及每个文件的解析耗时（秒）
+        self.load_workers = self._get_int_setting('load_workers', 4)
+        self.load_timings: Dict[str, float] = {}
+        
+        # 存储后端：memory（默认，内存中的MasterTable）或 sqlite（导入本地SQLite文件后按索引查询）
+        self.storage_backend = self._get_str_setting('storage_backend', 'memory').lower()
+        self._store: Optional[SQLiteMasterStore] = None
+        
+        # 产品型号搜索索引，产品索引替换后首次搜索时重建
+        self._search_index: Optional[ProductSearchIndex] = None
+        self._search_index_source = None
+        
+    @property
+    def snapshot(self) -> MasterSnapshot:
+        """当前master数据快照，一次扫描内应始终使用同一个快照"""
+        return self._snapshot
+        
+    @property
+    def loaded_files(self) -> Mapping[str, Any]:
+        """已加载的master文件（只读）"""
+        return self._snapshot.loaded_files
+        
+    @property
+    def product_data(self) -> Mapping[str, Any]:
+        """产品型号索引（只读）"""
+        return self._snapshot.product_data
+        
+    def _publish_snapshot(self, loaded_files: Dict[str, Any], product_data: Mapping[str, Any]):
+        """发布新快照，引用替换是原子操作，读取方不需要加锁"""
+        if not isinstance(product_data, MappingProxyType):
+            product_data = MappingProxyType(product_data)
+        self._snapshot = MasterSnapshot(
+            loaded_files=MappingProxyType(loaded_files),
+            product_data=product_data,
+            version=self._snapshot.version + 1
+        )
+        
+    def _get_bool_setting(self, key: str, default: bool) -> bool:
+        """读取ADVANCED段的布尔配置项"""
+        value = self.config_manager.get_setting('ADVANCED', key, None)
+        if value is None or not isinstance(value, (str, bool)):
+            return default
+        if isinstance(value, bool):
+            return value
+        return value.strip().lower() in ('true', '1', 'yes', 'on')
         
+    def _get_str_setting(self, key: str, default: str) -> str:
+        """读取ADVANCED段的字符串配置项"""
+        value = self.config_manager.get_setting('ADVANCED', key, None)
+        return value.strip() if isinstance(value, str) and value.strip() else default
+        
+    def _get_int_setting(self, key: str, default: int) -> int:
+        """读取ADVANCED段的整数配置项"""
+        value = self.config_manager.get_setting('ADVANCED', key, None)
+        try:
+            return int(value) if isinstance(value, (str, int)) else default
+        except ValueError:
+            return default
+            
     def load_csv_files(self) -> bool:
         """加载所有CSV文件"""
         try:
@@ -27,30 +122,40 @@ class DataManager:
                 self.logger.error(f"Master目录不存在: {master_path}")
                 return False
                 
-            # 加载主要CSV文件
-            csv_files = [
-                'header.csv', 'ini.csv', 'math.csv', 'prg.csv',
-                'type_chngvl.csv', 'type_define.csv', 'type_prg.csv', 'type_relation.csv'
-            ]
+            # 重新加载前停止旧的预热线程
+            self.stop_warmup()
             
-            for csv_file in csv_files:
-                file_path = master_path / csv_file
-                if file_path.exists():
-                    data = self.csv_processor.read_csv(str(file_path))
-                    self.loaded_files[csv_file] = data
-                    self.logger.info(f"加载CSV文件: {csv_file}, {len(data)} 条记录")
-                else:
-                    self.logger.warning(f"CSV文件不存在: {file_path}")
+            with self._update_lock:
+                loaded_files = {}
+                
+                # 加载主要CSV文件
+                load_tasks = []
+                for csv_file in self.MASTER_FILES:
+                    file_path = master_path / csv_file
+                    if file_path.exists():
+                        load_tasks.append((csv_file, file_path))
+                    else:
+                        self.logger.warning(f"CSV文件不存在: {file_path}")
+                        
+                if self.storage_backend == 'sqlite':
+                    self._load_into_store(master_path, load_tasks, loaded_files)
+                    self.logger.info("所有CSV文件已导入SQLite存储")
+                    return True
                     
-            # 加载prg子目录
-            prg_dirs = ['prg1', 'prg2', 'prg3']
-            for prg_dir in prg_dirs:
-                prg_path = master_path / prg_dir
-                if prg_path.exists():
-                    self._load_prg_directory(prg_dir, prg_path)
+                # 加载prg子目录
+                for prg_dir in self.PRG_DIRS:
+                    prg_path = master_path / prg_dir
+                    if prg_path.exists():
+                        load_tasks.extend(self._load_prg_directory(prg_dir, prg_path, loaded_files))
+                        
+                # 并行解析互不依赖的文件，再按原顺序汇总
+                for key, data in self._parse_files_parallel(load_tasks):
+                    loaded_files[key] = data
+                    self.logger.info(f"加载CSV文件: {key}, {len(data)} 条记录")
                     
-            # 构建产品数据索引
-            self._build_product_index()
+                # 构建产品数据索引并发布新快照
+                product_data = self._build_product_index(loaded_files)
+                self._publish_snapshot(loaded_files, product_data)
             
             self.logger.info("所有CSV文件加载完成")
             return True
@@ -59,41 +164,198 @@ class DataManager:
             self.logger.error(f"加载CSV文件失败: {e}")
             return False
             
-    def _load_prg_directory(self, prg_name: str, prg_path: Path):
-        """加载prg子目录中的CSV文件"""
+    def _load_prg_directory(self, prg_name: str, prg_path: Path,
+                            loaded_files: Dict[str, Any]) -> List[Tuple[str, Path]]:
+        """加载prg子目录中的CSV文件，返回需要立即解析的文件列表"""
+        load_tasks = []
         try:
-            prg_files = [
-                'add.csv', 'calc.csv', 'chngValue.csv', 'cntrl_rex.csv',
-                'cntrl.csv', 'correct.csv', 'define.csv', 'failed_matches.csv',
-                'input.csv', 'load.csv', 'measure.csv', 'preset.csv',
-                'relation.csv', 'select.csv', 'switch.csv', 'type_define.csv', 'type_prg.csv'
-            ]
-            
-            for prg_file in prg_files:
+            for prg_file in self.PRG_FILES:
                 file_path = prg_path / prg_file
                 if file_path.exists():
                     key = f"{prg_name}/{prg_file}"
-                    data = self.csv_processor.read_csv(str(file_path))
-                    self.loaded_files[key] = data
-                    self.logger.info(f"加载PRG文件: {key}, {len(data)} 条记录")
+                    if self.lazy_load_prg:
+                        # 只登记代理，首次访问时才解析
+                        loaded_files[key] = LazyTable(file_path, self._timed_reader(key))
+                        self.logger.debug(f"登记延迟加载PRG文件: {key}")
+                    else:
+                        load_tasks.append((key, file_path))
                     
         except Exception as e:
             self.logger.error(f"加载PRG目录失败 {prg_name}: {e}")
+        return load_tasks
+            
+    def _get_store(self, master_path: Path) -> SQLiteMasterStore:
+        """打开SQLite存储（默认位于master目录旁的master.db）"""
+        if self._store is None:
+            db_path = self._get_str_setting('sqlite_path', str(master_path.parent / 'master.db'))
+            self._store = SQLiteMasterStore(db_path)
+        return self._store
+        
+    def _load_into_store(self, master_path: Path, load_tasks: List[Tuple[str, Path]],
+                         loaded_files: Dict[str, Any]):
+        """将master文件导入SQLite存储（未变化的文件跳过），表数据按需从数据库读取"""
+        store = self._get_store(master_path)
+        for prg_dir in self.PRG_DIRS:
+            prg_path = master_path / prg_dir
+            for prg_file in self.PRG_FILES:
+                if (prg_path / prg_file).exists():
+                    load_tasks.append((f"{prg_dir}/{prg_file}", prg_path / prg_file))
+                    
+        for key, file_path in load_tasks:
+            try:
+                self._import_into_store(key, file_path)
+            except (OSError, UnicodeDecodeError, csv.Error) as e:
+                self.logger.error(f"导入SQLite存储失败 {key}: {e}")
+                continue
+            loaded_files[key] = LazyTable(file_path, self._store_reader(key))
+            
+        # 删除已不存在的文件对应的表
+        for key in store.file_names():
+            if key not in loaded_files:
+                store.remove_file(key)
+                
+        self._publish_snapshot(loaded_files, SQLiteProductIndex(store))
+        
+    def _import_into_store(self, key: str, file_path: Path):
+        """导入单个文件并记录耗时"""
+        start_time = time.perf_counter()
+        if self._store.import_file(key, file_path):
+            self.load_timings[key] = time.perf_counter() - start_time
+            
+    def _store_reader(self, key: str):
+        """创建从SQLite存储读取整表的函数"""
+        def read(file_path: str) -> MasterTable:
+            data = self._store.load_table(key)
+            data.declare_index(*self.INDEX_FIELDS)
+            return data
+        return read
+        
+    def _is_master_file(self, file_name: str) -> bool:
+        """判断相对路径是否为已知的master文件"""
+        if '/' not in file_name:
+            return file_name in self.MASTER_FILES
+        prg_dir, prg_file = file_name.split('/', 1)
+        return prg_dir in self.PRG_DIRS and prg_file in self.PRG_FILES
+        
+    def reload_changed_files(self, file_names: Iterable[str]) -> List[str]:
+        """只重新解析发生变更的master文件，然后原子替换快照"""
+        master_path = self.config_manager.get_master_path()
+        try:
+            with self._update_lock:
+                # 在写回时持有的锁内判断，正在写回的文件等写完后再比较，不会被当作外部修改重新加载
+                changed = [
+                    name for name in dict.fromkeys(file_names)
+                    if self._is_master_file(name) and not self._is_self_written(master_path / name, name)
+                ]
+                if not changed:
+                    return []
+                    
+                snapshot = self._snapshot
+                loaded_files = dict(snapshot.loaded_files)
+                
+                load_tasks = []
+                for key in changed:
+                    file_path = master_path / key
+                    current = loaded_files.get(key)
+                    if not file_path.exists():
+                        loaded_files.pop(key, None)
+                        if self._store:
+                            self._store.remove_file(key)
+                    elif self._store:
+                        self._import_into_store(key, file_path)
+                        loaded_files[key] = LazyTable(file_path, self._store_reader(key))
+                    elif '/' in key and self.lazy_load_prg and (
+                            current is None or (isinstance(current, LazyTable) and not current.is_loaded)):
+                        # 尚未使用过的prg文件继续保持延迟加载
+                        loaded_files[key] = LazyTable(file_path, self._timed_reader(key))
+                    else:
+                        load_tasks.append((key, file_path))
+                        
+                for key, data in self._parse_files_parallel(load_tasks):
+                    loaded_files[key] = data
+                    
+                # 只有type_define.csv变更时才需要重建产品索引
+                product_data = snapshot.product_data
+                if 'type_define.csv' in changed and not self._store:
+                    product_data = self._build_product_index(loaded_files)
+                    
+                self._publish_snapshot(loaded_files, product_data)
+                
+            self.logger.info(f"Master文件增量重新加载完成: {', '.join(changed)}")
+            return changed
+            
+        except Exception as e:
+            self.logger.error(f"增量重新加载master文件失败: {e}")
+            return []
+            
+    def _is_self_written(self, file_path: Path, file_name: str) -> bool:
+        """文件是否为update_master_data自身写入且之后未被修改（调用时须持有_update_lock）"""
+        written_state = self._self_written.pop(file_name, None)
+        if written_state is None or not file_path.exists():
+            return False
+        stat = file_path.stat()
+        return written_state == (stat.st_mtime_ns, stat.st_size)
+        
+    def start_watching(self) -> bool:
+        """启动master目录监视，文件变更时自动增量重新加载"""
+        if self._watcher and self._watcher.is_running:
+            return False
+            
+        self._watcher = MasterWatcher(
+            self.config_manager.get_master_path(),
+            self.reload_changed_files,
+            poll_interval=self._get_int_setting('watch_interval', 2)
+        )
+        return self._watcher.start()
+        
+    def stop_watching(self):
+        """停止master目录监视"""
+        if self._watcher:
+            self._watcher.stop()
+            self._watcher = None
+            
+    def _timed_reader(self, key: str):
+        """创建记录解析耗时的读取函数"""
+        def read(file_path: str) -> MasterTable:
+            start_time = time.perf_counter()
+            data = self.csv_processor.read_master_table(file_path)
+            data.declare_index(*self.INDEX_FIELDS)
+            self.load_timings[key] = time.perf_counter() - start_time
+            return data
+        return read
+        
+    def _parse_files_parallel(self, load_tasks: List[Tuple[str, Path]]) -> List[Tuple[str, MasterTable]]:
+        """使用线程池并行解析文件，结果顺序与任务顺序一致"""
+        if not load_tasks:
+            return []
+            
+        workers = min(self.load_workers, len(load_tasks))
+        if workers <= 1:
+            return [(key, self._timed_reader(key)(str(path))) for key, path in load_tasks]
             
-    def _build_product_index(self):
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="MasterLoader") as executor:
+            futures = [
+                executor.submit(self._timed_reader(key), str(path))
+                for key, path in load_tasks
+            ]
+            return [(key, future.result()) for (key, _), future in zip(load_tasks, futures)]
+            
+    def _build_product_index(self, loaded_files: Mapping[str, Any]) -> Dict[str, Any]:
         """构建产品数据索引"""
+        product_data = {}
         try:
             # 从type_define.csv构建产品型号索引
-            type_define_data = self.loaded_files.get('type_define.csv', [])
+            type_define_data = loaded_files.get('type_define.csv', [])
             for record in type_define_data:
                 product_type = record.get('TYPE')
                 if product_type:
-                    self.product_data[product_type] = record
+                    product_data[product_type] = record
                     
-            self.logger.info(f"产品数据索引构建完成: {len(self.product_data)} 种产品型号")
+            self.logger.info(f"产品数据索引构建完成: {len(product_data)} 种产品型号")
             
         except Exception as e:
             self.logger.error(f"构建产品数据索引失败: {e}")
+        return product_data
             
     def get_product_data(self, product_type: str) -> Optional[Dict[str, Any]]:
         """获取指定产品型号的数据"""
@@ -103,6 +365,24 @@ class DataManager:
         """获取所有产品型号列表"""
         return list(self.product_data.keys())
         
+    def get_product_catalog(self, product_types: Optional[List[str]] = None) -> List[Tuple[str, Any]]:
+        """获取产品目录 (型号, 描述) 列表，product_types为None时返回全部型号"""
+        if self._store:
+            # SQLite后端一次查询取得全部描述，避免逐个型号查询
+            descriptions = self._store.latest_values('type_define.csv', 'TYPE', 'DESCRIPTION')
+            if product_types is None:
+                product_types = list(descriptions)
+            return [(product_type, descriptions.get(product_type) or '') for product_type in product_types]
+            
+        product_data = self.product_data
+        if product_types is None:
+            product_types = list(product_data.keys())
+        rows = []
+        for product_type in product_types:
+            data = product_data.get(product_type)
+            rows.append((product_type, data.get('DESCRIPTION', '') if data else ''))
+        return rows
+        
     def calculate_parameters(self, product_type: str, input_params: Dict[str, Any] = None) -> Dict[str, Any]:
         """计算产品参数"""
         try:
@@ -111,11 +391,11 @@ class DataManager:
                 self.logger.warning(f"产品型号不存在: {product_type}")
                 return {}
                 
-            # 创建产品对象
+            # 创建产品对象（master行为只读视图，复制为字典供计算修改）
             product = Product(
                 product_id=product_data.get('NO', ''),
                 product_type=product_type,
-                parameters=product_data,
+                parameters=dict(product_data),
                 drawing_path=product_data.get('DRAWING', '')
             )
             
@@ -129,8 +409,17 @@ class DataManager:
             self.logger.error(f"计算参数失败 {product_type}: {e}")
             return {}
             
-    def process_input_file(self, input_file_path: str = None) -> Tuple[List[Dict], List[str]]:
-        """处理输入CSV文件"""
+    def process_input_file(self, input_file_path: str = None,
+                           progress_callback: Optional[Callable[[int, int], Any]] = None,
+                           chunk_callback: Optional[Callable[[List[Dict]], Any]] = None,
+                           cancel_event: Optional[threading.Event] = None,
+                           chunk_size: int = 200) -> Tuple[List[Dict], List[str]]:
+        """处理输入CSV文件
+        
+        参数计算按chunk_size条分块进行：每完成一块调用chunk_callback(该块记录)
+        和progress_callback(已完成数, 总数)；cancel_event被设置时在块之间停止，
+        返回已完成的记录。
+        """
         try:
             if not input_file_path:
                 input_file_path = str(self.config_manager.get_input_file_path())
@@ -143,11 +432,27 @@ class DataManager:
                 input_file_path, self.product_data
             )
             
-            # 为有效记录计算参数
-            for record in valid_records:
-                model = record['model']
-                calculated_params = self.calculate_parameters(model)
-                record['calculated_params'] = calculated_params
+            # 为有效记录分块计算参数
+            total = len(valid_records)
+            chunk_size = max(1, chunk_size)
+            processed = 0
+            for start in range(0, total, chunk_size):
+                if cancel_event is not None and cancel_event.is_set():
+                    error_messages.append(f"处理已取消: 完成 {processed}/{total} 条记录")
+                    self.logger.info(f"输入文件处理已取消: {processed}/{total}")
+                    return valid_records[:processed], error_messages
+                    
+                chunk = valid_records[start:start + chunk_size]
+                for record in chunk:
+                    model = record['model']
+                    calculated_params = self.calculate_parameters(model)
+                    record['calculated_params'] = calculated_params
+                processed += len(chunk)
+                
+                if chunk_callback:
+                    chunk_callback(chunk)
+                if progress_callback:
+                    progress_callback(processed, total)
                 
             self.logger.info(f"输入文件处理完成: {len(valid_records)} 条有效记录")
             return valid_records, error_messages
@@ -173,33 +478,203 @@ class DataManager:
             self.logger.error(f"保存数据失败: {e}")
             return False
             
-    def get_master_file_data(self, file_name: str) -> List[Dict[str, Any]]:
+    def get_master_file_data(self, file_name: str) -> MasterTable:
         """获取指定master文件的数据"""
-        return self.loaded_files.get(file_name, [])
+        data = self.loaded_files.get(file_name)
+        if data is None:
+            return MasterTable()
+        if isinstance(data, LazyTable):
+            return data.load()
+        return data
+        
+    def find_master_records(self, file_name: str, field: str, value: Any) -> List[Dict[str, Any]]:
+        """按字段值查找master记录（NO/TYPE/DEFINE/MACRO走二级索引）"""
+        if self._store and not self._is_table_loaded(file_name):
+            return self._store.find_all(file_name, field, value)
+        return self.get_master_file_data(file_name).find_all(field, value)
+        
+    def find_master_record(self, file_name: str, field: str, value: Any) -> Optional[Dict[str, Any]]:
+        """按字段值查找第一条master记录"""
+        if self._store and not self._is_table_loaded(file_name):
+            return self._store.find(file_name, field, value)
+        return self.get_master_file_data(file_name).find(field, value)
+        
+    def _is_table_loaded(self, file_name: str) -> bool:
+        """表数据是否已读入内存"""
+        data = self.loaded_files.get(file_name)
+        return data is not None and (not isinstance(data, LazyTable) or data.is_loaded)
+        
+    def get_pending_files(self) -> List[str]:
+        """获取尚未解析的延迟加载文件列表"""
+        return [
+            file_name for file_name, data in self.loaded_files.items()
+            if isinstance(data, LazyTable) and not data.is_loaded
+        ]
+        
+    def start_warmup(self) -> bool:
+        """启动后台预热线程，预先解析剩余的延迟加载文件"""
+        if self._warmup_thread and self._warmup_thread.is_alive():
+            return False
+        # SQLite后端按需查询数据库，不需要预热
+        if self._store or not self.get_pending_files():
+            return False
+            
+        self._warmup_stop.clear()
+        self._warmup_thread = threading.Thread(
+            target=self._warmup_worker, name="MasterWarmup", daemon=True
+        )
+        self._warmup_thread.start()
+        return True
         
-    def update_master_data(self, file_name: str, new_data: List[Dict[str, Any]]) -> bool:
-        """更新master数据"""
+    def stop_warmup(self, timeout: float = 5.0):
+        """停止后台预热线程"""
+        self._warmup_stop.set()
+        if self._warmup_thread and self._warmup_thread.is_alive():
+            self._warmup_thread.join(timeout)
+        self._warmup_thread = None
+        
+    def _warmup_worker(self):
+        """预热线程主体"""
+        def load_table(file_name: str):
+            if self._warmup_stop.is_set():
+                return
+            table = self.loaded_files.get(file_name)
+            if isinstance(table, LazyTable):
+                table.load()
+                
         try:
-            if file_name not in self.loaded_files:
-                self.logger.warning(f"文件不存在于已加载数据中: {file_name}")
-                return False
+            pending_files = self.get_pending_files()
+            workers = max(1, min(self.load_workers, len(pending_files)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="MasterWarmup") as executor:
+                list(executor.map(load_table, pending_files))
+            self.logger.info("延迟加载文件预热完成")
+        except Exception as e:
+            self.logger.error(f"延迟加载文件预热失败: {e}")
+        
+    def update_master_data(self, file_name: str, new_data: List[Dict[str, Any]],
+                           key_field: str = 'NO', persist: bool = False) -> bool:
+        """更新master数据：比较行差异，只应用新增和内容变化的行
+        
+        persist为True时同时把差异写回master文件（沿用原文件的表头、列宽和换行符）。
+        """
+        try:
+            with self._update_lock:
+                snapshot = self._snapshot
+                if file_name not in snapshot.loaded_files:
+                    self.logger.warning(f"文件不存在于已加载数据中: {file_name}")
+                    return False
+                    
+                current_data = self.get_master_file_data(file_name)
+                table_diff = current_data.diff(new_data, key_field, detect_removed=False)
+                if table_diff.is_empty():
+                    self.logger.info(f"Master数据无变化: {file_name}")
+                    return True
+                    
+                # 在副本上打补丁，不修改当前快照中的表
+                updated_table = current_data.copy()
+                updated_table.apply_diff(table_diff)
+                loaded_files = dict(snapshot.loaded_files)
+                loaded_files[file_name] = updated_table
                 
-            # 合并数据
-            current_data = self.loaded_files[file_name]
-            merged_data = self.csv_processor.merge_csv_data(current_data, new_data)
-            self.loaded_files[file_name] = merged_data
-            
-            # 如果是type_define.csv，需要重新构建索引
-            if file_name == 'type_define.csv':
-                self._build_product_index()
+                # SQLite后端同步写入数据库，产品索引直接查询数据库
+                if self._store:
+                    self._store.apply_diff(file_name, updated_table, table_diff, len(current_data))
+                    
+                # 如果是type_define.csv，只修补变化行对应的产品索引
+                product_data = snapshot.product_data
+                if file_name == 'type_define.csv' and not self._store:
+                    product_data = self._patch_product_index(
+                        product_data, current_data, updated_table, table_diff
+                    )
+                    
+                self._publish_snapshot(loaded_files, product_data)
+                
+                # 在锁内写盘，保证并发更新按发布快照的顺序写入文件
+                if persist:
+                    self._persist_table_diff(file_name, current_data, updated_table, table_diff)
                 
-            self.logger.info(f"Master数据更新完成: {file_name}")
+            self.logger.info(f"Master数据更新完成: {file_name}, {table_diff.summary()}")
             return True
             
         except Exception as e:
             self.logger.error(f"更新master数据失败 {file_name}: {e}")
             return False
             
+    def _patch_product_index(self, product_data: Mapping[str, Any], old_table: MasterTable,
+                             new_table: MasterTable, table_diff: TableDiff) -> Dict[str, Any]:
+        """根据差异修补产品型号索引
+        
+        受影响的型号（变化行的旧型号和新型号、新增行的型号）按更新后的表重新定位，
+        与_build_product_index一致以最后一行为准，没有剩余行时才移除。
+        """
+        patched = dict(product_data)
+        changed_rows = [row_index for row_index, _ in table_diff.changed]
+        affected_types = set()
+        for row_index in changed_rows:
+            affected_types.add(old_table.get_value(row_index, 'TYPE'))
+        for row_index in changed_rows + list(range(len(old_table), len(new_table))):
+            affected_types.add(new_table.get_value(row_index, 'TYPE'))
+            
+        for product_type in affected_types:
+            if not product_type:
+                continue
+            positions = new_table.find_indices('TYPE', product_type)
+            if positions:
+                patched[product_type] = new_table[positions[-1]]
+            else:
+                patched.pop(product_type, None)
+        return patched
+        
+    def _persist_table_diff(self, file_name: str, old_table: MasterTable,
+                            new_table: MasterTable, table_diff: TableDiff):
+        """将差异写回磁盘：只有新增行时追加，否则整体重写（调用时须持有_update_lock）"""
+        file_path = self.config_manager.get_master_path() / file_name
+        # 保持原文件的列宽，更新中新增的列只保留在内存中
+        width = len(old_table.header) or len(new_table.header)
+        if len(new_table.header) > width:
+            self.logger.warning(
+                f"新增的列不会写入文件 {file_name}: {new_table.header[width:]}"
+            )
+        if not table_diff.changed and file_path.exists():
+            written = self.csv_processor.append_master_rows(
+                new_table, list(range(len(old_table), len(new_table))), str(file_path), width=width
+            )
+        else:
+            written = self.csv_processor.write_master_table(new_table, str(file_path), width=width)
+            
+        if written:
+            # 记录自身写入后的文件状态，监视线程据此忽略这次变更
+            stat = file_path.stat()
+            self._self_written[file_name] = (stat.st_mtime_ns, stat.st_size)
+            if self._store:
+                self._store.mark_current(file_name, file_path)
+            
+    def get_memory_report(self) -> Dict[str, Any]:
+        """获取已加载master表的内存占用报告（紧凑存储与字典列表存储对比）"""
+        files = {}
+        for file_name, data in self.loaded_files.items():
+            if isinstance(data, LazyTable):
+                if not data.is_loaded:
+                    continue
+                data = data.load()
+            if not isinstance(data, MasterTable):
+                continue
+            files[file_name] = {
+                'rows': len(data),
+                'columns': len(data.header),
+                'compact_bytes': data.memory_usage(),
+                'dict_bytes': data.dict_memory_usage()
+            }
+            
+        compact_total = sum(info['compact_bytes'] for info in files.values())
+        dict_total = sum(info['dict_bytes'] for info in files.values())
+        return {
+            'files': files,
+            'compact_bytes': compact_total,
+            'dict_bytes': dict_total,
+            'saved_bytes': dict_total - compact_total
+        }
+        
     def validate_product_model(self, model: str) -> Tuple[bool, str]:
         """验证产品型号"""
         if model in self.product_data:
@@ -207,23 +682,53 @@ class DataManager:
         else:
             return False, f"产品型号 '{model}' 不存在"
             
-    def search_products(self, keyword: str) -> List[str]:
-        """搜索产品型号"""
+    def get_search_index(self) -> ProductSearchIndex:
+        """获取与当前产品索引对应的搜索索引"""
+        product_data = self.product_data
+        index = self._search_index
+        if index is None or self._search_index_source is not product_data:
+            index = ProductSearchIndex(product_data.keys())
+            self._search_index, self._search_index_source = index, product_data
+        return index
+        
+    def search_products(self, keyword: str, limit: Optional[int] = None) -> List[str]:
+        """搜索产品型号（不区分大小写的子串匹配），limit限制返回数量"""
         try:
-            keyword_lower = keyword.lower()
-            matching_products = [
-                product_type for product_type in self.product_data.keys()
-                if keyword_lower in product_type.lower()
-            ]
-            return matching_products
+            if self._store:
+                return self._store.search('type_define.csv', 'TYPE', keyword, -1 if limit is None else limit)
+            return self.get_search_index().search(keyword, limit)
+        except Exception as e:
+            self.logger.error(f"搜索产品失败: {e}")
+            return []
+            
+    def suggest_products(self, keyword: str, limit: int = 100) -> List[str]:
+        """输入时的实时搜索：前缀匹配优先，最多返回limit个型号"""
+        try:
+            if self._store:
+                return self._store.search('type_define.csv', 'TYPE', keyword, limit)
+            return self.get_search_index().top(keyword, limit)
         except Exception as e:
             self.logger.error(f"搜索产品失败: {e}")
             return []
             
     def get_statistics(self) -> Dict[str, Any]:
         """获取数据统计信息"""
+        # 统计时不触发延迟加载
+        loaded_tables = [
+            data for data in self.loaded_files.values()
+            if not isinstance(data, LazyTable) or data.is_loaded
+        ]
+        total_records = sum(len(data) for data in loaded_tables)
+        if self._store:
+            # SQLite后端的数据全部在数据库中
+            loaded_tables = list(self.loaded_files.values())
+            total_records = sum(self._store.count(file_name) for file_name in self.loaded_files)
+        slowest_files = sorted(self.load_timings.items(), key=lambda item: item[1], reverse=True)[:5]
         return {
             'total_product_types': len(self.product_data),
             'loaded_files': len(self.loaded_files),
-            'total_records': sum(len(data) for data in self.loaded_files.values())
+            'pending_files': len(self.loaded_files) - len(loaded_tables),
+            'total_records': total_records,
+            'total_load_time': sum(self.load_timings.values()),
+            'slowest_files': [(file_name, round(seconds * 1000, 1)) for file_name, seconds in slowest_files]
         }
@@ -0,0 +1,49 @@
+import logging
+import threading
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Callable, Optional
+from .master_table import MasterTable
+
+class LazyTable(Sequence):
+    """延迟加载的master表代理，首次访问时才解析CSV文件"""
+
+    def __init__(self, file_path: Path, loader: Callable[[str], MasterTable]):
+        self.file_path = Path(file_path)
+        self.logger = logging.getLogger(__name__)
+        self._loader = loader
+        self._data: Optional[MasterTable] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        """是否已经解析过文件"""
+        return self._data is not None
+
+    def load(self) -> MasterTable:
+        """解析文件（只执行一次）并返回数据"""
+        if self._data is None:
+            with self._lock:
+                # 双重检查，避免预热线程与UI线程重复解析
+                if self._data is None:
+                    self._data = self._loader(str(self.file_path))
+                    self.logger.info(f"延迟加载文件: {self.file_path}, {len(self._data)} 条记录")
+        return self._data
+
+    def __getitem__(self, index):
+        return self.load()[index]
+
+    def __len__(self) -> int:
+        return len(self.load())
+
+    def __iter__(self):
+        return iter(self.load())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, LazyTable):
+            return self.load() == other.load()
+        return self.load() == other
+
+    def __repr__(self) -> str:
+        state = 'loaded' if self.is_loaded else 'pending'
+        return f"LazyTable({self.file_path}, {state})"
@@ -0,0 +1,360 @@
+import sys
+from bisect import insort
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# 行中缺失字段的占位符（区别于值为None的字段）
+_MISSING = object()
+
+def _intern(value: Any) -> Any:
+    """字符串驻留，相同的单元格值在内存中只保留一份"""
+    return sys.intern(value) if type(value) is str else value
+
+class RowView(Mapping):
+    """master表行的只读字典视图，按需从共享表头和元组行构造"""
+
+    __slots__ = ('_columns', '_values')
+
+    def __init__(self, columns: Dict[str, int], values: tuple):
+        self._columns = columns
+        self._values = values
+
+    def __getitem__(self, key: str) -> Any:
+        index = self._columns[key]
+        value = self._values[index] if index < len(self._values) else _MISSING
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        values = self._values
+        for key, index in self._columns.items():
+            if index < len(values) and values[index] is not _MISSING:
+                yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"RowView({dict(self)!r})"
+
+@dataclass
+class TableDiff:
+    """两个表之间的行级差异"""
+    added: List[Mapping] = field(default_factory=list)
+    removed: List[int] = field(default_factory=list)
+    changed: List[Tuple[int, Mapping]] = field(default_factory=list)
+    
+    def is_empty(self) -> bool:
+        """是否没有任何差异"""
+        return not (self.added or self.removed or self.changed)
+        
+    def summary(self) -> Dict[str, int]:
+        """差异统计"""
+        return {'added': len(self.added), 'removed': len(self.removed), 'changed': len(self.changed)}
+
+class MasterTable(Sequence):
+    """紧凑存储的master表：共享表头索引 + 驻留字符串元组行"""
+
+    def __init__(self, header: Iterable[str] = (), rows: Iterable[Sequence[Any]] = (),
+                 index_fields: Iterable[str] = ()):
+        # 表头按位置完整保留（宽度与文件一致）；与csv.DictReader一致，重复列名以最后一列为准
+        self.header: List[str] = [_intern(name) for name in header]
+        self._columns: Dict[str, int] = {name: i for i, name in enumerate(self.header)}
+        self._rows: List[tuple] = [self._pack(values) for values in rows]
+        
+        # 声明的二级索引字段，索引在首次按该字段查询时构建
+        self.index_fields = set(index_fields)
+        self._indexes: Dict[str, Dict[Any, List[int]]] = {}
+
+    @classmethod
+    def from_records(cls, records: Iterable[Mapping], header: Iterable[str] = ()) -> 'MasterTable':
+        """由字典记录列表创建表，表头为所有记录字段的并集"""
+        index_fields = ()
+        if isinstance(records, MasterTable):
+            index_fields = records.index_fields
+            if not header:
+                # 按位置复制，保留被同名列遮盖的列
+                return cls(records.header, records.rows, index_fields)
+        table = cls(header, index_fields=index_fields)
+        for record in records:
+            table.append(record)
+        return table
+
+    def _add_column(self, name: str) -> int:
+        """追加新列并返回列索引"""
+        if name not in self._columns:
+            self._columns[name] = len(self.header)
+            self.header.append(_intern(name))
+        return self._columns[name]
+
+    def _pack(self, values: Sequence[Any]) -> tuple:
+        """将一行值转换为驻留字符串元组，长度与表头对齐"""
+        width = len(self.header)
+        row = tuple(_intern(value) for value in values[:width])
+        if len(row) < width:
+            row += (None,) * (width - len(row))
+        return row
+
+    def _pack_record(self, record: Mapping) -> tuple:
+        """将字典记录转换为元组行，未出现的字段及被同名列遮盖的列记为缺失"""
+        for key in record:
+            self._add_column(key)
+        columns = self._columns
+        return tuple(
+            _intern(record.get(key, _MISSING)) if columns[key] == i else _MISSING
+            for i, key in enumerate(self.header)
+        )
+
+    @property
+    def columns(self) -> Dict[str, int]:
+        """表头到列索引的映射"""
+        return self._columns
+
+    @property
+    def rows(self) -> List[tuple]:
+        """原始元组行"""
+        return self._rows
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [RowView(self._columns, values) for values in self._rows[index]]
+        return RowView(self._columns, self._rows[index])
+
+    def __iter__(self) -> Iterator[RowView]:
+        columns = self._columns
+        for values in self._rows:
+            yield RowView(columns, values)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, MasterTable):
+            return self.to_records() == other.to_records()
+        if isinstance(other, (list, tuple)):
+            return len(self) == len(other) and all(row == record for row, record in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"MasterTable({len(self.header)} 列, {len(self._rows)} 行)"
+
+    def get_value(self, row_index: int, field: str, default: Any = None) -> Any:
+        """直接读取单元格值，不构造行视图"""
+        column = self._columns.get(field)
+        if column is None:
+            return default
+        values = self._rows[row_index]
+        value = values[column] if column < len(values) else _MISSING
+        return default if value is _MISSING else value
+
+    def column_values(self, field: str) -> List[Any]:
+        """获取整列的值"""
+        return [self.get_value(i, field) for i in range(len(self._rows))]
+
+    def declare_index(self, *fields: str):
+        """声明二级索引字段"""
+        self.index_fields.update(fields)
+
+    def has_index(self, field: str) -> bool:
+        """字段的索引是否已经构建"""
+        return field in self._indexes
+
+    def _get_index(self, field: str) -> Optional[Dict[Any, List[int]]]:
+        """获取字段索引，声明过但未构建时在此构建"""
+        index = self._indexes.get(field)
+        if index is None and field in self.index_fields:
+            index = {}
+            column = self._columns.get(field)
+            if column is not None:
+                for i, values in enumerate(self._rows):
+                    if column < len(values) and values[column] is not _MISSING:
+                        index.setdefault(values[column], []).append(i)
+            self._indexes[field] = index
+        return index
+
+    # 索引维护时总是替换行号列表而不原地修改，copy()产生的副本可以共享未变更的列表
+
+    def _index_add(self, row_index: int, values: tuple):
+        """将一行加入已构建的索引"""
+        for field_name, index in self._indexes.items():
+            column = self._columns.get(field_name)
+            if column is not None and column < len(values) and values[column] is not _MISSING:
+                positions = list(index.get(values[column], ()))
+                insort(positions, row_index)
+                index[values[column]] = positions
+
+    def _index_remove(self, row_index: int, values: tuple):
+        """将一行从已构建的索引中移除"""
+        for field_name, index in self._indexes.items():
+            column = self._columns.get(field_name)
+            if column is None or column >= len(values) or values[column] is _MISSING:
+                continue
+            positions = index.get(values[column])
+            if positions and row_index in positions:
+                remaining = [position for position in positions if position != row_index]
+                if remaining:
+                    index[values[column]] = remaining
+                else:
+                    del index[values[column]]
+
+    def find(self, field: str, value: Any) -> Optional[RowView]:
+        """查找字段等于指定值的第一行"""
+        index = self._get_index(field)
+        if index is not None:
+            positions = index.get(value)
+            return RowView(self._columns, self._rows[positions[0]]) if positions else None
+            
+        column = self._columns.get(field)
+        if column is None:
+            return None
+        for values in self._rows:
+            if column < len(values) and values[column] == value:
+                return RowView(self._columns, values)
+        return None
+
+    def find_all(self, field: str, value: Any) -> List[RowView]:
+        """查找字段等于指定值的所有行"""
+        return [self[i] for i in self.find_indices(field, value)]
+
+    def find_indices(self, field: str, value: Any) -> List[int]:
+        """查找字段等于指定值的所有行号"""
+        index = self._get_index(field)
+        if index is not None:
+            return list(index.get(value, ()))
+            
+        column = self._columns.get(field)
+        if column is None:
+            return []
+        return [
+            i for i, values in enumerate(self._rows)
+            if column < len(values) and values[column] == value
+        ]
+
+    def filter(self, predicate: Callable[[RowView], bool]) -> List[RowView]:
+        """按条件函数筛选行"""
+        return [row for row in self if predicate(row)]
+
+    def append(self, record: Mapping):
+        """追加一条字典记录"""
+        values = self._pack_record(record)
+        self._rows.append(values)
+        if self._indexes:
+            self._index_add(len(self._rows) - 1, values)
+
+    def update_row(self, row_index: int, updates: Mapping):
+        """更新指定行的字段值"""
+        for key in updates:
+            self._add_column(key)
+        old_values = self._rows[row_index]
+        values = list(old_values)
+        values.extend([_MISSING] * (len(self.header) - len(values)))
+        for key, value in updates.items():
+            values[self._columns[key]] = _intern(value)
+        new_values = tuple(values)
+        
+        # 增量维护受影响字段的索引
+        if self._indexes:
+            self._index_remove(row_index, old_values)
+            self._index_add(row_index, new_values)
+        self._rows[row_index] = new_values
+
+    def replace_row(self, row_index: int, record: Mapping):
+        """用字典记录整体替换指定行"""
+        old_values = self._rows[row_index]
+        new_values = self._pack_record(record)
+        if self._indexes:
+            self._index_remove(row_index, old_values)
+            self._index_add(row_index, new_values)
+        self._rows[row_index] = new_values
+
+    def row_values(self, row_index: int, fill: Any = '') -> tuple:
+        """获取与表头对齐的行值，缺失字段用fill填充"""
+        values = self._rows[row_index]
+        width = len(self.header)
+        return tuple(
+            fill if i >= len(values) or values[i] is _MISSING else values[i]
+            for i in range(width)
+        )
+
+    def row_hash(self, row_index: int) -> int:
+        """行内容哈希（字符串哈希值有缓存，计算代价与列数成正比）"""
+        return hash(self.row_values(row_index, None))
+
+    def copy(self) -> 'MasterTable':
+        """浅复制：共享行元组和索引行号列表，之后的修改互不影响"""
+        table = MasterTable(self.header, index_fields=self.index_fields)
+        table._rows = list(self._rows)
+        table._indexes = {name: dict(index) for name, index in self._indexes.items()}
+        return table
+
+    def diff(self, records: Iterable[Mapping], key_field: str = 'NO',
+             detect_removed: bool = True) -> TableDiff:
+        """按关键字段比较新数据与当前表，返回新增、删除和内容变化的行"""
+        self.declare_index(key_field)
+        key_index = self._get_index(key_field)
+        result = TableDiff()
+        seen_keys = set()
+        
+        for record in records:
+            key = record.get(key_field)
+            # 与merge_csv_data一致：忽略无关键字段的记录，重复关键字段以第一条为准
+            if not key or key in seen_keys:
+                continue
+            seen_keys.add(key)
+            
+            positions = key_index.get(key)
+            if not positions:
+                result.added.append(record)
+                continue
+                
+            # 与update_row一致：只比较记录中出现的字段，未出现的字段保持原值
+            row_index = positions[0]
+            if any(self.get_value(row_index, name, _MISSING) != value for name, value in record.items()):
+                result.changed.append((row_index, record))
+                
+        if detect_removed:
+            result.removed = sorted(
+                positions[0] for key, positions in key_index.items() if key not in seen_keys
+            )
+        return result
+
+    def apply_diff(self, table_diff: TableDiff):
+        """将差异应用到当前表（变化行按字段合并；删除行会使行号变化，需重建索引）"""
+        for row_index, record in table_diff.changed:
+            self.update_row(row_index, record)
+        for record in table_diff.added:
+            self.append(record)
+        if table_diff.removed:
+            removed = set(table_diff.removed)
+            self._rows = [values for i, values in enumerate(self._rows) if i not in removed]
+            self._indexes = {}
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """转换为普通字典列表"""
+        return [dict(row) for row in self]
+
+    def memory_usage(self) -> int:
+        """估算紧凑存储占用的字节数（共享的字符串只计一次）"""
+        total = sys.getsizeof(self._rows) + sys.getsizeof(self._columns) + sys.getsizeof(self.header)
+        seen = set()
+        for name in self.header:
+            seen.add(id(name))
+            total += sys.getsizeof(name)
+        for values in self._rows:
+            total += sys.getsizeof(values)
+            for value in values:
+                if value is not _MISSING and id(value) not in seen:
+                    seen.add(id(value))
+                    total += sys.getsizeof(value)
+        return total
+
+    def dict_memory_usage(self) -> int:
+        """估算同样数据以字典列表存储（每个单元格一个字符串对象）时占用的字节数"""
+        total = sys.getsizeof([None] * len(self._rows))
+        for row in self:
+            record = dict(row)
+            total += sys.getsizeof(record)
+            total += sum(sys.getsizeof(value) for value in record.values())
+        return total
@@ -0,0 +1,197 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+# inotify事件掩码
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_ISDIR = 0x40000000
+
+_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+_EVENT_HEADER = struct.Struct('iIII')
+
+class MasterWatcher:
+    """master目录文件监视器，Linux下使用inotify，其他平台轮询文件修改时间"""
+
+    def __init__(self, master_path: Path, on_change: Callable[[List[str]], Any],
+                 poll_interval: float = 2.0, debounce: float = 0.5, use_inotify: bool = True):
+        self.master_path = Path(master_path)
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.use_inotify = use_inotify and sys.platform.startswith('linux')
+        self.logger = logging.getLogger(__name__)
+
+        self.backend = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    @property
+    def is_running(self) -> bool:
+        """监视线程是否在运行"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> bool:
+        """启动监视线程"""
+        if self.is_running:
+            return False
+        if not self.master_path.exists():
+            self.logger.warning(f"监视目录不存在: {self.master_path}")
+            return False
+
+        self._stop_event.clear()
+        inotify_fd = self._init_inotify() if self.use_inotify else None
+        if inotify_fd is not None:
+            self.backend = 'inotify'
+            target, args = self._run_inotify, (inotify_fd,)
+        else:
+            self.backend = 'polling'
+            target, args = self._run_polling, ()
+
+        self._thread = threading.Thread(target=target, args=args, name="MasterWatcher", daemon=True)
+        self._thread.start()
+        self.logger.info(f"开始监视master目录: {self.master_path} ({self.backend})")
+        return True
+
+    def stop(self, timeout: float = 5.0):
+        """停止监视线程"""
+        self._stop_event.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _emit(self, changed_files: Set[str]):
+        """通知文件变更"""
+        if not changed_files:
+            return
+        try:
+            self.on_change(sorted(changed_files))
+        except Exception as e:
+            self.logger.error(f"处理master文件变更失败: {e}")
+
+    @staticmethod
+    def _is_master_file(relative_path: str) -> bool:
+        """只关注CSV文件，忽略Excel临时文件等"""
+        name = relative_path.rsplit('/', 1)[-1]
+        return name.lower().endswith('.csv') and not name.startswith('~$')
+
+    # ---- mtime轮询 ----
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        """扫描master目录及一级子目录中CSV文件的修改时间和大小"""
+        result = {}
+        for pattern in ('*.csv', '*/*.csv'):
+            for path in self.master_path.glob(pattern):
+                relative_path = path.relative_to(self.master_path).as_posix()
+                if not self._is_master_file(relative_path):
+                    continue
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                result[relative_path] = (stat.st_mtime_ns, stat.st_size)
+        return result
+
+    def _run_polling(self):
+        """轮询模式主循环"""
+        previous = self._scan()
+        while not self._stop_event.wait(self.poll_interval):
+            current = self._scan()
+            changed = {
+                name for name in previous.keys() | current.keys()
+                if previous.get(name) != current.get(name)
+            }
+            previous = current
+            self._emit(changed)
+
+    # ---- inotify ----
+
+    def _init_inotify(self) -> Optional[int]:
+        """初始化inotify，失败时返回None以退回轮询模式"""
+        fd = -1
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd < 0:
+                raise OSError(ctypes.get_errno(), "inotify_init1失败")
+            self._libc = libc
+            self._watch_dirs: Dict[int, str] = {}
+            self._add_watch(fd, self.master_path, '')
+            for sub_dir in self.master_path.iterdir():
+                if sub_dir.is_dir():
+                    self._add_watch(fd, sub_dir, sub_dir.name)
+            return fd
+        except (OSError, AttributeError) as e:
+            if fd >= 0:
+                os.close(fd)
+            self.logger.info(f"inotify不可用，使用轮询模式: {e}")
+            return None
+
+    def _add_watch(self, fd: int, path: Path, prefix: str):
+        """为目录添加inotify监视"""
+        wd = self._libc.inotify_add_watch(fd, os.fsencode(str(path)), _WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch失败: {path}")
+        self._watch_dirs[wd] = prefix
+
+    def _read_events(self, fd: int) -> Set[str]:
+        """读取并解析inotify事件，返回变更的相对路径"""
+        changed = set()
+        try:
+            buffer = os.read(fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buffer):
+            wd, mask, _, name_length = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(buffer[offset:offset + name_length].rstrip(b'\0'))
+            offset += name_length
+
+            prefix = self._watch_dirs.get(wd)
+            if prefix is None or not name:
+                continue
+            relative_path = f"{prefix}/{name}" if prefix else name
+            if mask & IN_ISDIR:
+                # 新建的prg子目录也纳入监视
+                if not prefix and mask & (IN_CREATE | IN_MOVED_TO):
+                    try:
+                        self._add_watch(fd, self.master_path / name, name)
+                    except OSError as e:
+                        self.logger.warning(f"无法监视新目录 {name}: {e}")
+                continue
+            if self._is_master_file(relative_path):
+                changed.add(relative_path)
+        return changed
+
+    def _run_inotify(self, fd: int):
+        """inotify模式主循环，合并防抖时间内的连续事件"""
+        pending: Set[str] = set()
+        last_event = 0.0
+        try:
+            while not self._stop_event.is_set():
+                readable, _, _ = select.select([fd], [], [], min(self.debounce, 0.5))
+                if readable:
+                    events = self._read_events(fd)
+                    if events:
+                        pending |= events
+                        last_event = time.monotonic()
+                if pending and time.monotonic() - last_event >= self.debounce:
+                    changed, pending = pending, set()
+                    self._emit(changed)
+        except Exception as e:
+            self.logger.error(f"master目录监视失败: {e}")
+        finally:
+            os.close(fd)
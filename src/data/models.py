@@ -1,6 +1,9 @@
-from dataclasses import dataclass
-from typing import Dict, List, Any, Optional
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Dict, List, Any, Mapping, Optional, Tuple, Union
 from pathlib import Path
+from .master_table import MasterTable, RowView
 
 @dataclass
 class Product:
@@ -68,24 +71,39 @@ class MasterFile:
     """Master文件模型"""
     file_name: str
     file_path: Path
-    data: List[Dict[str, Any]]
+    data: Union[MasterTable, List[Dict[str, Any]]]
     description: Optional[str] = None
+    index_fields: Tuple[str, ...] = field(default=('NO', 'TYPE', 'DEFINE', 'MACRO'))
+    
+    def __post_init__(self):
+        # 统一转换为紧凑存储，并声明二级索引字段（首次查询时构建）
+        if not isinstance(self.data, MasterTable):
+            self.data = MasterTable.from_records(self.data)
+        self.data.declare_index(*self.index_fields)
     
     def get_record_count(self) -> int:
         """获取记录数量"""
         return len(self.data)
         
-    def find_records(self, field: str, value: Any) -> List[Dict[str, Any]]:
+    def find_records(self, field: str, value: Any) -> List[RowView]:
         """根据字段值查找记录"""
-        return [record for record in self.data if record.get(field) == value]
+        return self.data.find_all(field, value)
         
     def update_record(self, key_field: str, key_value: Any, updates: Dict[str, Any]) -> bool:
         """更新记录"""
-        for record in self.data:
-            if record.get(key_field) == key_value:
-                record.update(updates)
-                return True
-        return False
+        indices = self.data.find_indices(key_field, key_value)
+        if not indices:
+            return False
+        self.data.update_row(indices[0], updates)
+        return True
+
+@dataclass(frozen=True)
+class MasterSnapshot:
+    """Master数据快照模型，发布后不再修改，读取方无需加锁"""
+    loaded_files: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType({}))
+    product_data: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType({}))
+    version: int = 0
+    created_at: float = field(default_factory=time.time)
 
 @dataclass
 class ProgramData:
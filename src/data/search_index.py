@@ -0,0 +1,73 @@
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional
+
+class ProductSearchIndex:
+    """产品型号搜索索引：排序表支持前缀查询，三元组倒排表支持子串查询（不区分大小写）"""
+
+    GRAM_SIZE = 3
+
+    def __init__(self, product_types: Iterable[str]):
+        self._types: List[str] = [product_type for product_type in product_types if product_type]
+        self._lowered: List[str] = [product_type.lower() for product_type in self._types]
+
+        # 前缀查询：按小写型号排序的 (型号, 原始位置)
+        self._sorted = sorted((lowered, i) for i, lowered in enumerate(self._lowered))
+        self._sorted_keys = [lowered for lowered, _ in self._sorted]
+
+        # 子串查询：三元组 -> 出现该三元组的型号位置（升序）
+        self._grams: Dict[str, array] = {}
+        for i, lowered in enumerate(self._lowered):
+            for gram in {lowered[j:j + self.GRAM_SIZE] for j in range(len(lowered) - self.GRAM_SIZE + 1)}:
+                positions = self._grams.get(gram)
+                if positions is None:
+                    positions = self._grams[gram] = array('i')
+                positions.append(i)
+
+    def __len__(self) -> int:
+        return len(self._types)
+
+    def prefix(self, keyword: str, limit: Optional[int] = None) -> List[str]:
+        """前缀查询，结果按型号排序"""
+        keyword = keyword.lower()
+        result = []
+        start = bisect_left(self._sorted_keys, keyword)
+        for lowered, i in self._sorted[start:]:
+            if not lowered.startswith(keyword) or (limit is not None and len(result) >= limit):
+                break
+            result.append(self._types[i])
+        return result
+
+    def search(self, keyword: str, limit: Optional[int] = None) -> List[str]:
+        """子串查询，结果保持型号的原始顺序"""
+        keyword = keyword.lower()
+        if len(keyword) < self.GRAM_SIZE:
+            # 短关键词匹配面很广，顺序扫描并在达到上限时提前结束
+            candidates = range(len(self._lowered))
+        else:
+            # 只需校验最稀有的三元组对应的候选型号
+            grams = {keyword[j:j + self.GRAM_SIZE] for j in range(len(keyword) - self.GRAM_SIZE + 1)}
+            postings = [self._grams.get(gram) for gram in grams]
+            if not all(postings):
+                return []
+            candidates = min(postings, key=len)
+
+        result = []
+        for i in candidates:
+            if keyword in self._lowered[i]:
+                result.append(self._types[i])
+                if limit is not None and len(result) >= limit:
+                    break
+        return result
+
+    def top(self, keyword: str, limit: int) -> List[str]:
+        """取前N个匹配：前缀匹配优先，其余子串匹配按原始顺序补足"""
+        result = self.prefix(keyword, limit)
+        if len(result) < limit:
+            seen = set(result)
+            for product_type in self.search(keyword, limit):
+                if product_type not in seen:
+                    result.append(product_type)
+                    if len(result) >= limit:
+                        break
+        return result
@@ -0,0 +1,348 @@
+import csv
+import json
+import logging
+import sqlite3
+import threading
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from .master_table import MasterTable, RowView, TableDiff
+
+class SQLiteMasterStore:
+    """嵌入式SQLite master存储，按文件建表并对常用查询字段建索引"""
+
+    INDEX_FIELDS = ('NO', 'TYPE', 'DEFINE', 'MACRO')
+
+    def __init__(self, db_path: str, encoding: str = 'utf-8'):
+        self.db_path = Path(db_path)
+        self.encoding = encoding
+        self.logger = logging.getLogger(__name__)
+
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        # 文件名 -> (表名, 表头, 表头到列索引的映射)
+        self._schemas: Dict[str, Tuple[str, List[str], Dict[str, int]]] = {}
+        # 文件名 -> 数据版本号，表内容每次变化时递增（供查询结果缓存判断是否过期）
+        self._generations: Dict[str, int] = {}
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS master_files ("
+            "file_name TEXT PRIMARY KEY, table_name TEXT, header TEXT, mtime_ns INTEGER, size INTEGER)"
+        )
+        conn.commit()
+        self._load_schemas()
+
+    def _connection(self) -> sqlite3.Connection:
+        """每个线程使用独立连接（WAL模式下读操作互不阻塞）"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), cached_statements=256)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """关闭当前线程的连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _load_schemas(self):
+        """读取已导入文件的表结构"""
+        for file_name, table_name, header in self._connection().execute(
+                "SELECT file_name, table_name, header FROM master_files"):
+            self._set_schema(file_name, table_name, json.loads(header))
+
+    def _set_schema(self, file_name: str, table_name: str, header: List[str]):
+        # 重复列名以最后一列为准，与csv.DictReader和MasterTable一致
+        columns = {name: i for i, name in enumerate(header)}
+        self._schemas[file_name] = (table_name, header, columns)
+
+    def _bump_generation(self, file_name: str):
+        self._generations[file_name] = self._generations.get(file_name, 0) + 1
+
+    def generation(self, file_name: str) -> int:
+        """文件数据的版本号，导入、更新或删除后改变"""
+        return self._generations.get(file_name, 0)
+
+    @staticmethod
+    def _table_name(file_name: str) -> str:
+        """由文件名生成表名，例如 prg1/relation.csv -> m_prg1__relation"""
+        stem = file_name[:-4] if file_name.lower().endswith('.csv') else file_name
+        safe = ''.join(ch if ch.isalnum() else '_' for ch in stem.replace('/', '__'))
+        return f"m_{safe}"
+
+    # ---- 导入 ----
+
+    def is_current(self, file_name: str, file_path: Path) -> bool:
+        """数据库中的数据是否与磁盘文件一致（按修改时间和大小判断）"""
+        row = self._connection().execute(
+            "SELECT mtime_ns, size FROM master_files WHERE file_name = ?", (file_name,)
+        ).fetchone()
+        if row is None or not file_path.exists():
+            return False
+        stat = file_path.stat()
+        return tuple(row) == (stat.st_mtime_ns, stat.st_size)
+
+    def import_file(self, file_name: str, file_path: Path, force: bool = False) -> bool:
+        """导入单个CSV文件，文件未变化时跳过"""
+        file_path = Path(file_path)
+        if not force and self.is_current(file_name, file_path):
+            return False
+
+        with open(file_path, 'r', encoding=self.encoding, newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            rows = [row for row in reader if row]
+
+        stat = file_path.stat()
+        self._replace_table(file_name, header, rows, (stat.st_mtime_ns, stat.st_size))
+        self.logger.info(f"导入SQLite master表: {file_name}, {len(rows)} 条记录")
+        return True
+
+    def import_table(self, file_name: str, table: MasterTable, file_state: Tuple[int, int] = (0, 0)):
+        """导入内存中的MasterTable"""
+        rows = [table.row_values(i, None) for i in range(len(table))]
+        self._replace_table(file_name, table.header, rows, file_state)
+
+    def _replace_table(self, file_name: str, header: List[str], rows: List[Iterable[Any]],
+                       file_state: Tuple[int, int]):
+        """在一个事务内重建文件对应的表及索引"""
+        table_name = self._table_name(file_name)
+        width = len(header)
+        column_defs = ', '.join(f"c{i} TEXT" for i in range(width))
+        placeholders = ', '.join('?' * (width + 1))
+
+        def padded(index: int, values) -> tuple:
+            values = tuple(values)[:width]
+            return (index,) + values + (None,) * (width - len(values))
+
+        with self._write_lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+                conn.execute(
+                    f'CREATE TABLE "{table_name}" (_row INTEGER PRIMARY KEY'
+                    + (f', {column_defs}' if column_defs else '') + ')'
+                )
+                conn.executemany(
+                    f'INSERT INTO "{table_name}" VALUES ({placeholders})',
+                    (padded(i, values) for i, values in enumerate(rows))
+                )
+                columns = {name: i for i, name in enumerate(header)}
+                for field in self.INDEX_FIELDS:
+                    if field in columns:
+                        column = columns[field]
+                        conn.execute(
+                            f'CREATE INDEX "{table_name}_c{column}" ON "{table_name}" (c{column})'
+                        )
+                conn.execute(
+                    "INSERT OR REPLACE INTO master_files VALUES (?, ?, ?, ?, ?)",
+                    (file_name, table_name, json.dumps(header, ensure_ascii=False), *file_state)
+                )
+            self._set_schema(file_name, table_name, list(header))
+            self._bump_generation(file_name)
+
+    def remove_file(self, file_name: str):
+        """删除文件对应的表"""
+        schema = self._schemas.pop(file_name, None)
+        with self._write_lock:
+            conn = self._connection()
+            with conn:
+                if schema:
+                    conn.execute(f'DROP TABLE IF EXISTS "{schema[0]}"')
+                conn.execute("DELETE FROM master_files WHERE file_name = ?", (file_name,))
+            self._bump_generation(file_name)
+
+    def mark_current(self, file_name: str, file_path: Path):
+        """记录磁盘文件当前状态，表示数据库内容已与文件一致"""
+        stat = Path(file_path).stat()
+        with self._write_lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "UPDATE master_files SET mtime_ns = ?, size = ? WHERE file_name = ?",
+                    (stat.st_mtime_ns, stat.st_size, file_name)
+                )
+
+    def apply_diff(self, file_name: str, table: MasterTable, table_diff: TableDiff, old_length: int):
+        """将差异写入数据库：变化行按行号更新，新增行插入"""
+        schema = self._schemas.get(file_name)
+        if schema is None or table_diff.removed or len(table.header) != len(schema[1]):
+            # 表结构变化或有删除时整体重建
+            self.import_table(file_name, table)
+            return
+
+        table_name, header, _ = schema
+        width = len(header)
+        assignments = ', '.join(f"c{i} = ?" for i in range(width))
+        placeholders = ', '.join('?' * (width + 1))
+        with self._write_lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany(
+                    f'UPDATE "{table_name}" SET {assignments} WHERE _row = ?',
+                    (table.row_values(i, None) + (i,) for i, _ in table_diff.changed)
+                )
+                conn.executemany(
+                    f'INSERT INTO "{table_name}" VALUES ({placeholders})',
+                    ((i,) + table.row_values(i, None) for i in range(old_length, len(table)))
+                )
+                # 写回磁盘前数据库与文件不一致，下次加载时应重新导入
+                conn.execute(
+                    "UPDATE master_files SET mtime_ns = 0, size = 0 WHERE file_name = ?", (file_name,)
+                )
+            self._bump_generation(file_name)
+
+    # ---- 查询 ----
+
+    def has_file(self, file_name: str) -> bool:
+        """文件是否已导入"""
+        return file_name in self._schemas
+
+    def file_names(self) -> List[str]:
+        """已导入的文件列表"""
+        return list(self._schemas)
+
+    def load_table(self, file_name: str) -> MasterTable:
+        """读取整个文件为MasterTable"""
+        schema = self._schemas.get(file_name)
+        if schema is None:
+            return MasterTable()
+        table_name, header, _ = schema
+        cursor = self._connection().execute(f'SELECT * FROM "{table_name}" ORDER BY _row')
+        return MasterTable(header, (values[1:] for values in cursor))
+
+    def count(self, file_name: str) -> int:
+        """文件记录数"""
+        schema = self._schemas.get(file_name)
+        if schema is None:
+            return 0
+        return self._connection().execute(f'SELECT COUNT(*) FROM "{schema[0]}"').fetchone()[0]
+
+    def find_all(self, file_name: str, field: str, value: Any, limit: int = -1) -> List[RowView]:
+        """按字段值查询（索引字段走SQLite索引）"""
+        schema = self._schemas.get(file_name)
+        if schema is None or field not in schema[2]:
+            return []
+        table_name, _, columns = schema
+        cursor = self._connection().execute(
+            f'SELECT * FROM "{table_name}" WHERE c{columns[field]} = ? ORDER BY _row LIMIT ?',
+            (value, limit)
+        )
+        return [RowView(columns, values[1:]) for values in cursor]
+
+    def find(self, file_name: str, field: str, value: Any) -> Optional[RowView]:
+        """按字段值查询第一条记录"""
+        rows = self.find_all(file_name, field, value, limit=1)
+        return rows[0] if rows else None
+
+    def find_last(self, file_name: str, field: str, value: Any) -> Optional[RowView]:
+        """按字段值查询最后一条记录（与内存索引“后出现者覆盖”的规则一致）"""
+        schema = self._schemas.get(file_name)
+        if schema is None or field not in schema[2]:
+            return None
+        table_name, _, columns = schema
+        values = self._connection().execute(
+            f'SELECT * FROM "{table_name}" WHERE c{columns[field]} = ? ORDER BY _row DESC LIMIT 1',
+            (value,)
+        ).fetchone()
+        return RowView(columns, values[1:]) if values else None
+
+    def distinct_values(self, file_name: str, field: str) -> List[Any]:
+        """按首次出现顺序返回字段的不同取值"""
+        schema = self._schemas.get(file_name)
+        if schema is None or field not in schema[2]:
+            return []
+        table_name, _, columns = schema
+        column = f"c{columns[field]}"
+        cursor = self._connection().execute(
+            f'SELECT {column} FROM "{table_name}" WHERE {column} IS NOT NULL AND {column} != \'\' '
+            f'GROUP BY {column} ORDER BY MIN(_row)'
+        )
+        return [values[0] for values in cursor]
+
+    def latest_values(self, file_name: str, key_field: str, value_field: str) -> Dict[Any, Any]:
+        """一次查询取得每个键值最后一条记录的字段值，键按首次出现顺序排列"""
+        schema = self._schemas.get(file_name)
+        if schema is None or key_field not in schema[2]:
+            return {}
+        table_name, _, columns = schema
+        key_column = f"c{columns[key_field]}"
+        value_column = f"c{columns[value_field]}" if value_field in columns else "NULL"
+        cursor = self._connection().execute(
+            f'SELECT {key_column}, {value_column} FROM "{table_name}" '
+            f'WHERE {key_column} IS NOT NULL AND {key_column} != \'\' ORDER BY _row'
+        )
+        values = {}
+        for key, value in cursor:
+            values[key] = value
+        return values
+
+    def count_distinct(self, file_name: str, field: str) -> int:
+        """字段不同取值的个数（不含空值）"""
+        schema = self._schemas.get(file_name)
+        if schema is None or field not in schema[2]:
+            return 0
+        table_name, _, columns = schema
+        column = f"c{columns[field]}"
+        return self._connection().execute(
+            f'SELECT COUNT(DISTINCT {column}) FROM "{table_name}" WHERE {column} != \'\''
+        ).fetchone()[0]
+
+    def search(self, file_name: str, field: str, keyword: str, limit: int = -1) -> List[Any]:
+        """按子串（不区分大小写）搜索字段取值"""
+        schema = self._schemas.get(file_name)
+        if schema is None or field not in schema[2]:
+            return []
+        table_name, _, columns = schema
+        column = f"c{columns[field]}"
+        escaped = keyword.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        cursor = self._connection().execute(
+            f'SELECT {column} FROM "{table_name}" WHERE {column} LIKE ? ESCAPE \'\\\' '
+            f'GROUP BY {column} ORDER BY MIN(_row) LIMIT ?',
+            (f"%{escaped}%", limit)
+        )
+        return [values[0] for values in cursor]
+
+class SQLiteProductIndex(Mapping):
+    """以SQLite查询实现的产品型号索引，接口与内存中的product_data字典一致"""
+
+    def __init__(self, store: SQLiteMasterStore, file_name: str = 'type_define.csv', key_field: str = 'TYPE'):
+        self.store = store
+        self.file_name = file_name
+        self.key_field = key_field
+        # 型号列表和个数按数据版本缓存，避免每次迭代或取长度都全表分组扫描
+        self._keys: Tuple[int, List[str]] = (-1, [])
+        self._length: Tuple[int, int] = (-1, 0)
+
+    def __getitem__(self, product_type: str) -> RowView:
+        if not product_type:
+            raise KeyError(product_type)
+        row = self.store.find_last(self.file_name, self.key_field, product_type)
+        if row is None:
+            raise KeyError(product_type)
+        return row
+
+    def __contains__(self, product_type) -> bool:
+        return bool(product_type) and self.store.find(self.file_name, self.key_field, product_type) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        generation, keys = self._keys
+        current = self.store.generation(self.file_name)
+        if generation != current:
+            keys = self.store.distinct_values(self.file_name, self.key_field)
+            self._keys = (current, keys)
+        return iter(keys)
+
+    def __len__(self) -> int:
+        generation, length = self._length
+        current = self.store.generation(self.file_name)
+        if generation != current:
+            length = self.store.count_distinct(self.file_name, self.key_field)
+            self._length = (current, length)
+        return length
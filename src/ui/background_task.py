@@ -0,0 +1,117 @@
+import logging
+import queue
+import threading
+from typing import Any, Callable, Optional
+
+class BackgroundTask:
+    """在工作线程中执行的任务，通过消息队列把进度和结果交给UI线程"""
+
+    def __init__(self, name: str, func: Callable[['BackgroundTask'], Any]):
+        self.name = name
+        self.func = func
+        self.cancel_event = threading.Event()
+        self.messages: queue.Queue = queue.Queue()
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def cancelled(self) -> bool:
+        """是否已请求取消"""
+        return self.cancel_event.is_set()
+
+    def cancel(self):
+        """请求取消（由任务函数在适当位置检查）"""
+        self.cancel_event.set()
+
+    def report_progress(self, done: int, total: int):
+        """报告进度（工作线程调用）"""
+        self.messages.put(('progress', (done, total)))
+
+    def emit_chunk(self, chunk: Any):
+        """提交部分结果（工作线程调用）"""
+        self.messages.put(('chunk', chunk))
+
+    def run(self):
+        """工作线程主体"""
+        try:
+            self.messages.put(('done', self.func(self)))
+        except Exception as e:
+            self.messages.put(('error', e))
+
+class BackgroundTaskRunner:
+    """后台任务服务：任务在工作线程执行，UI线程用after()轮询消息并调用回调
+
+    同一时间只运行一个任务，所有回调都在UI线程中执行，可以直接操作控件。
+    """
+
+    POLL_INTERVAL_MS = 50
+
+    def __init__(self, root):
+        self.root = root
+        self.logger = logging.getLogger(__name__)
+        self.current: Optional[BackgroundTask] = None
+        self._callbacks = {}
+        self._poll_id = None
+
+    @property
+    def is_busy(self) -> bool:
+        """是否有任务正在运行"""
+        return self.current is not None
+
+    def submit(self, name: str, func: Callable[[BackgroundTask], Any],
+               on_done: Optional[Callable[[Any], Any]] = None,
+               on_error: Optional[Callable[[Exception], Any]] = None,
+               on_progress: Optional[Callable[[int, int], Any]] = None,
+               on_chunk: Optional[Callable[[Any], Any]] = None) -> Optional[BackgroundTask]:
+        """提交任务，已有任务运行时返回None"""
+        if self.is_busy:
+            self.logger.warning(f"后台任务 {self.current.name} 正在运行，忽略新任务: {name}")
+            return None
+
+        task = BackgroundTask(name, func)
+        self.current = task
+        self._callbacks = {
+            'done': on_done, 'error': on_error, 'progress': on_progress, 'chunk': on_chunk
+        }
+        task.thread = threading.Thread(target=task.run, name=f"Task-{name}", daemon=True)
+        task.thread.start()
+        self._poll_id = self.root.after(self.POLL_INTERVAL_MS, self.poll)
+        return task
+
+    def cancel(self):
+        """取消当前任务"""
+        if self.current:
+            self.current.cancel()
+
+    def poll(self):
+        """在UI线程中处理任务消息"""
+        self._poll_id = None
+        task = self.current
+        if task is None:
+            return
+
+        while True:
+            try:
+                kind, payload = task.messages.get_nowait()
+            except queue.Empty:
+                break
+
+            callbacks = self._callbacks
+            if kind in ('done', 'error'):
+                # 先结束当前任务，回调中可以立即提交新任务
+                self.current = None
+                self._callbacks = {}
+            callback = callbacks.get(kind)
+            try:
+                if kind == 'progress':
+                    if callback:
+                        callback(*payload)
+                elif callback:
+                    callback(payload)
+                elif kind == 'error':
+                    self.logger.error(f"后台任务 {task.name} 失败: {payload}")
+            except Exception as e:
+                self.logger.error(f"处理后台任务 {task.name} 消息失败: {e}")
+            if self.current is not task:
+                return
+
+        self._poll_id = self.root.after(self.POLL_INTERVAL_MS, self.poll)
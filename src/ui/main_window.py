@@ -6,10 +6,16 @@ from typing import List, Dict, Any, Optional
 from ..data.data_manager import DataManager
 from ..config.config_manager import ConfigManager
 from ..data.models import InputRecord, CalculationResult
+from .background_task import BackgroundTaskRunner
+from .virtual_table import VirtualTable
 
 class MainWindow:
     """主窗口类，负责管理应用程序的主要界面"""
     
+    # 实时搜索的防抖延迟（毫秒）及最多显示的结果数
+    SEARCH_DEBOUNCE_MS = 250
+    LIVE_SEARCH_LIMIT = 200
+    
     def __init__(self, config_manager: ConfigManager, data_manager: DataManager):
         self.config_manager = config_manager
         self.data_manager = data_manager
@@ -23,6 +29,13 @@ class MainWindow:
         # 状态变量
         self.current_data = []
         self.error_messages = []
+        self._snapshot_version = 0
+        self._snapshot_polling = False
+        self._search_after_id = None
+        self._last_live_keyword = ''
+        
+        # 后台任务服务：处理、导出和重新加载在工作线程执行
+        self.task_runner = BackgroundTaskRunner(self.root)
         
         # 创建界面
         self._create_widgets()
@@ -64,6 +77,7 @@ class MainWindow:
         menubar.add_cascade(label="数据", menu=data_menu)
         data_menu.add_command(label="重新加载数据", command=self._reload_data)
         data_menu.add_command(label="查看数据统计", command=self._show_statistics)
+        data_menu.add_command(label="内存占用报告", command=self._show_memory_report)
         
         # 工具菜单
         tools_menu = tk.Menu(menubar, tearoff=0)
@@ -133,60 +147,28 @@ class MainWindow:
         
     def _create_input_data_tab(self):
         """创建输入数据标签页"""
-        # 创建树形视图显示输入数据
-        columns = ('product_id', 'model', 'quantity')
-        self.input_tree = ttk.Treeview(self.input_tab, columns=columns, show='headings')
-        
-        # 设置列标题
-        self.input_tree.heading('product_id', text='产品编号')
-        self.input_tree.heading('model', text='产品型号')
-        self.input_tree.heading('quantity', text='数量')
-        
-        # 设置列宽
-        self.input_tree.column('product_id', width=150)
-        self.input_tree.column('model', width=200)
-        self.input_tree.column('quantity', width=100)
-        
-        # 添加滚动条
-        scrollbar = ttk.Scrollbar(self.input_tab, orient=tk.VERTICAL, command=self.input_tree.yview)
-        self.input_tree.configure(yscrollcommand=scrollbar.set)
-        
-        # 布局
-        self.input_tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-        scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        # 虚拟化表格只渲染可见行，排序和过滤（表格上方的过滤框）在后备数据上进行
+        self.input_table = VirtualTable(self.input_tab, [
+            ('product_id', '产品编号', 150),
+            ('model', '产品型号', 200),
+            ('quantity', '数量', 100)
+        ], filterable=True)
+        self.input_table.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         
         self.input_tab.columnconfigure(0, weight=1)
         self.input_tab.rowconfigure(0, weight=1)
         
     def _create_result_tab(self):
         """创建计算结果标签页"""
-        # 创建树形视图显示计算结果
-        columns = ('product_id', 'model', 'quantity', 'volume', 'surface_area', 'weight')
-        self.result_tree = ttk.Treeview(self.result_tab, columns=columns, show='headings')
-        
-        # 设置列标题
-        self.result_tree.heading('product_id', text='产品编号')
-        self.result_tree.heading('model', text='产品型号')
-        self.result_tree.heading('quantity', text='数量')
-        self.result_tree.heading('volume', text='体积')
-        self.result_tree.heading('surface_area', text='表面积')
-        self.result_tree.heading('weight', text='重量')
-        
-        # 设置列宽
-        self.result_tree.column('product_id', width=120)
-        self.result_tree.column('model', width=150)
-        self.result_tree.column('quantity', width=80)
-        self.result_tree.column('volume', width=100)
-        self.result_tree.column('surface_area', width=100)
-        self.result_tree.column('weight', width=100)
-        
-        # 添加滚动条
-        scrollbar = ttk.Scrollbar(self.result_tab, orient=tk.VERTICAL, command=self.result_tree.yview)
-        self.result_tree.configure(yscrollcommand=scrollbar.set)
-        
-        # 布局
-        self.result_tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-        scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.result_table = VirtualTable(self.result_tab, [
+            ('product_id', '产品编号', 120),
+            ('model', '产品型号', 150),
+            ('quantity', '数量', 80),
+            ('volume', '体积', 100),
+            ('surface_area', '表面积', 100),
+            ('weight', '重量', 100)
+        ], filterable=True)
+        self.result_table.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         
         self.result_tab.columnconfigure(0, weight=1)
         self.result_tab.rowconfigure(0, weight=1)
@@ -209,25 +191,11 @@ class MainWindow:
         
     def _create_catalog_tab(self):
         """创建产品目录标签页"""
-        # 创建树形视图显示产品目录
-        columns = ('product_type', 'description')
-        self.catalog_tree = ttk.Treeview(self.catalog_tab, columns=columns, show='headings')
-        
-        # 设置列标题
-        self.catalog_tree.heading('product_type', text='产品型号')
-        self.catalog_tree.heading('description', text='描述')
-        
-        # 设置列宽
-        self.catalog_tree.column('product_type', width=200)
-        self.catalog_tree.column('description', width=400)
-        
-        # 添加滚动条
-        scrollbar = ttk.Scrollbar(self.catalog_tab, orient=tk.VERTICAL, command=self.catalog_tree.yview)
-        self.catalog_tree.configure(yscrollcommand=scrollbar.set)
-        
-        # 布局
-        self.catalog_tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-        scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.catalog_table = VirtualTable(self.catalog_tab, [
+            ('product_type', '产品型号', 200),
+            ('description', '描述', 400)
+        ])
+        self.catalog_table.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         
         self.catalog_tab.columnconfigure(0, weight=1)
         self.catalog_tab.rowconfigure(0, weight=1)
@@ -237,8 +205,18 @@ class MainWindow:
         self.status_var = tk.StringVar()
         self.status_var.set("就绪")
         
-        status_bar = ttk.Label(self.main_frame, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
-        status_bar.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E))
+        status_frame = ttk.Frame(self.main_frame)
+        status_frame.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E))
+        status_frame.columnconfigure(0, weight=1)
+        
+        status_bar = ttk.Label(status_frame, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
+        status_bar.grid(row=0, column=0, sticky=(tk.W, tk.E))
+        
+        # 后台任务的进度条和取消按钮
+        self.progress_bar = ttk.Progressbar(status_frame, length=200, mode='determinate')
+        self.progress_bar.grid(row=0, column=1, padx=(5, 0))
+        self.cancel_button = ttk.Button(status_frame, text="取消", command=self._cancel_task, state=tk.DISABLED)
+        self.cancel_button.grid(row=0, column=2, padx=(5, 0))
         
     def _setup_layout(self):
         """设置布局"""
@@ -264,41 +242,109 @@ class MainWindow:
         self._open_input_file()
         
     def _process_input_file(self):
-        """处理输入文件"""
+        """处理输入文件（后台执行，计算完成的记录分块显示在结果标签页）"""
         input_file_path = self.input_file_var.get()
         if not input_file_path:
             messagebox.showwarning("警告", "请先选择输入文件")
             return
+        if self.task_runner.is_busy:
+            messagebox.showwarning("警告", "有任务正在执行，请稍候")
+            return
             
-        try:
-            self.status_var.set("正在处理输入文件...")
-            
-            # 处理输入文件
-            valid_records, error_messages = self.data_manager.process_input_file(input_file_path)
+        self.current_data = []
+        self.error_messages = []
+        self.input_table.clear()
+        self.result_table.clear()
+        
+        def process(task):
+            return self.data_manager.process_input_file(
+                input_file_path,
+                progress_callback=task.report_progress,
+                chunk_callback=task.emit_chunk,
+                cancel_event=task.cancel_event
+            )
             
-            # 更新界面
+        self._start_task("处理输入文件", process, self._on_process_done, on_chunk=self._on_process_chunk)
+        
+    def _on_process_chunk(self, chunk: List[Dict[str, Any]]):
+        """显示刚完成计算的一块记录"""
+        self.current_data.extend(chunk)
+        self.input_table.append_rows([
+            (record['product_id'], record['model'], record['quantity']) for record in chunk
+        ])
+        self.result_table.append_rows([self._result_row(record) for record in chunk])
+        
+    def _on_process_done(self, result):
+        """输入文件处理完成"""
+        valid_records, error_messages = result
+        
+        # 分块显示的记录与最终结果不一致时（例如处理失败）整体刷新
+        if len(self.current_data) != len(valid_records):
             self.current_data = valid_records
-            self.error_messages = error_messages
-            
             self._update_input_data_tab()
             self._update_result_tab()
-            self._update_error_tab()
+        self.error_messages = error_messages
+        self._update_error_tab()
+        
+        # 更新状态
+        total_records = len(valid_records)
+        error_count = len(error_messages)
+        self.status_var.set(f"处理完成: {total_records} 条有效记录, {error_count} 条错误")
+        
+        if error_count > 0:
+            self.notebook.select(self.error_tab)
+            messagebox.showwarning("处理完成", f"处理完成，但有 {error_count} 条错误，请查看错误信息标签页")
+        else:
+            messagebox.showinfo("处理完成", f"成功处理 {total_records} 条记录")
             
-            # 更新状态
-            total_records = len(valid_records)
-            error_count = len(error_messages)
-            self.status_var.set(f"处理完成: {total_records} 条有效记录, {error_count} 条错误")
+    def _start_task(self, name: str, func, on_done, on_chunk=None, cancellable: bool = True) -> bool:
+        """启动后台任务并显示进度条和取消按钮"""
+        def on_error(error: Exception):
+            self._finish_task()
+            self.logger.error(f"{name}失败: {error}")
+            messagebox.showerror("错误", f"{name}失败: {error}")
+            self.status_var.set(f"{name}失败")
             
-            if error_count > 0:
-                self.notebook.select(self.error_tab)
-                messagebox.showwarning("处理完成", f"处理完成，但有 {error_count} 条错误，请查看错误信息标签页")
-            else:
-                messagebox.showinfo("处理完成", f"成功处理 {total_records} 条记录")
-                
-        except Exception as e:
-            self.logger.error(f"处理输入文件失败: {e}")
-            messagebox.showerror("错误", f"处理输入文件失败: {e}")
-            self.status_var.set("处理失败")
+        def on_success(result):
+            self._finish_task()
+            on_done(result)
+            
+        task = self.task_runner.submit(
+            name, func,
+            on_done=on_success,
+            on_error=on_error,
+            on_progress=self._on_task_progress,
+            on_chunk=on_chunk
+        )
+        if task is None:
+            return False
+            
+        self.status_var.set(f"正在{name}...")
+        self.progress_bar.configure(mode='indeterminate', value=0)
+        self.progress_bar.start(20)
+        self.cancel_button.configure(state=tk.NORMAL if cancellable else tk.DISABLED)
+        return True
+        
+    def _on_task_progress(self, done: int, total: int):
+        """更新进度条"""
+        if self.progress_bar.cget('mode') != 'determinate':
+            self.progress_bar.stop()
+            self.progress_bar.configure(mode='determinate')
+        self.progress_bar.configure(maximum=max(total, 1), value=done)
+        self.status_var.set(f"正在处理: {done}/{total}")
+        
+    def _finish_task(self):
+        """任务结束后复位进度条和取消按钮"""
+        self.progress_bar.stop()
+        self.progress_bar.configure(mode='determinate', value=0)
+        self.cancel_button.configure(state=tk.DISABLED)
+        
+    def _cancel_task(self):
+        """取消当前后台任务"""
+        if self.task_runner.is_busy:
+            self.task_runner.cancel()
+            self.cancel_button.configure(state=tk.DISABLED)
+            self.status_var.set("正在取消...")
             
     def _clear_results(self):
         """清空结果"""
@@ -306,9 +352,8 @@ class MainWindow:
         self.error_messages = []
         
         # 清空所有显示
-        for tree in [self.input_tree, self.result_tree, self.catalog_tree]:
-            for item in tree.get_children():
-                tree.delete(item)
+        for table in [self.input_table, self.result_table, self.catalog_table]:
+            table.clear()
                 
         self.error_text.delete(1.0, tk.END)
         self.status_var.set("已清空结果")
@@ -323,15 +368,8 @@ class MainWindow:
         try:
             matching_products = self.data_manager.search_products(keyword)
             
-            # 清空当前显示
-            for item in self.catalog_tree.get_children():
-                self.catalog_tree.delete(item)
-                
             # 显示搜索结果
-            for product_type in matching_products:
-                product_data = self.data_manager.get_product_data(product_type)
-                description = product_data.get('DESCRIPTION', '') if product_data else ''
-                self.catalog_tree.insert('', tk.END, values=(product_type, description))
+            self.catalog_table.set_rows(self.data_manager.get_product_catalog(matching_products))
                 
             self.notebook.select(self.catalog_tab)
             self.status_var.set(f"找到 {len(matching_products)} 个匹配的产品")
@@ -341,41 +379,60 @@ class MainWindow:
             messagebox.showerror("错误", f"搜索失败: {e}")
             
     def _on_search_changed(self, event):
-        """搜索框内容改变时的处理"""
-        # 可以在这里实现实时搜索
-        pass
+        """搜索框内容改变时的处理：防抖后执行实时搜索"""
+        if self._search_after_id is not None:
+            self.root.after_cancel(self._search_after_id)
+        self._search_after_id = self.root.after(self.SEARCH_DEBOUNCE_MS, self._run_live_search)
+        
+    def _run_live_search(self):
+        """执行实时搜索，只显示前LIVE_SEARCH_LIMIT个匹配的产品"""
+        self._search_after_id = None
+        keyword = self.search_var.get().strip()
+        if keyword == self._last_live_keyword:
+            # 方向键等不改变内容的按键不重复搜索
+            return
+        self._last_live_keyword = keyword
+        
+        if not keyword:
+            self._update_catalog_tab()
+            self.status_var.set("就绪")
+            return
+            
+        # 多取一个用于判断结果是否被截断
+        matching_products = self.data_manager.suggest_products(keyword, self.LIVE_SEARCH_LIMIT + 1)
+        truncated = len(matching_products) > self.LIVE_SEARCH_LIMIT
+        matching_products = matching_products[:self.LIVE_SEARCH_LIMIT]
+        
+        self.catalog_table.set_rows(self.data_manager.get_product_catalog(matching_products))
+            
+        if truncated:
+            self.status_var.set(f"显示前 {self.LIVE_SEARCH_LIMIT} 个匹配的产品，请输入更多字符缩小范围")
+        else:
+            self.status_var.set(f"找到 {len(matching_products)} 个匹配的产品")
         
     def _update_input_data_tab(self):
         """更新输入数据标签页"""
-        # 清空当前显示
-        for item in self.input_tree.get_children():
-            self.input_tree.delete(item)
-            
-        # 添加新数据
-        for record in self.current_data:
-            self.input_tree.insert('', tk.END, values=(
-                record['product_id'],
-                record['model'],
-                record['quantity']
-            ))
+        self.input_table.set_rows([
+            (record['product_id'], record['model'], record['quantity'])
+            for record in self.current_data
+        ])
             
     def _update_result_tab(self):
         """更新计算结果标签页"""
-        # 清空当前显示
-        for item in self.result_tree.get_children():
-            self.result_tree.delete(item)
-            
-        # 添加新数据
-        for record in self.current_data:
-            calculated_params = record.get('calculated_params', {})
-            self.result_tree.insert('', tk.END, values=(
-                record['product_id'],
-                record['model'],
-                record['quantity'],
-                calculated_params.get('volume', ''),
-                calculated_params.get('surface_area', ''),
-                calculated_params.get('weight', '')
-            ))
+        self.result_table.set_rows([self._result_row(record) for record in self.current_data])
+        
+    @staticmethod
+    def _result_row(record: Dict[str, Any]) -> tuple:
+        """计算结果表的一行"""
+        calculated_params = record.get('calculated_params', {})
+        return (
+            record['product_id'],
+            record['model'],
+            record['quantity'],
+            calculated_params.get('volume', ''),
+            calculated_params.get('surface_area', ''),
+            calculated_params.get('weight', '')
+        )
             
     def _update_error_tab(self):
         """更新错误信息标签页"""
@@ -389,6 +446,9 @@ class MainWindow:
         if not self.current_data:
             messagebox.showwarning("警告", "没有数据可导出")
             return
+        if self.task_runner.is_busy:
+            messagebox.showwarning("警告", "有任务正在执行，请稍候")
+            return
             
         file_path = filedialog.asksaveasfilename(
             title="导出结果",
@@ -398,8 +458,6 @@ class MainWindow:
         
         if file_path:
             try:
-                self.status_var.set("正在导出结果...")
-                
                 # 准备导出数据
                 export_data = []
                 for record in self.current_data:
@@ -421,12 +479,21 @@ class MainWindow:
                 if file_path.lower().endswith('.xlsx'):
                     file_type = 'excel'
                     
-                # 保存文件
-                if self.data_manager.save_data(export_data, file_path, file_type):
-                    self.status_var.set(f"结果已导出到: {file_path}")
-                    messagebox.showinfo("导出成功", f"结果已成功导出到: {file_path}")
-                else:
-                    messagebox.showerror("导出失败", "导出结果失败")
+                # 在后台保存文件
+                def on_done(saved: bool):
+                    if saved:
+                        self.status_var.set(f"结果已导出到: {file_path}")
+                        messagebox.showinfo("导出成功", f"结果已成功导出到: {file_path}")
+                    else:
+                        self.status_var.set("导出失败")
+                        messagebox.showerror("导出失败", "导出结果失败")
+                        
+                self._start_task(
+                    "导出结果",
+                    lambda task: self.data_manager.save_data(export_data, file_path, file_type),
+                    on_done,
+                    cancellable=False
+                )
                     
             except Exception as e:
                 self.logger.error(f"导出结果失败: {e}")
@@ -434,23 +501,55 @@ class MainWindow:
                 self.status_var.set("导出失败")
                 
     def _reload_data(self):
-        """重新加载数据"""
-        try:
-            self.status_var.set("正在重新加载数据...")
+        """重新加载数据（后台执行）"""
+        if self.task_runner.is_busy:
+            messagebox.showwarning("警告", "有任务正在执行，请稍候")
+            return
             
-            if self.data_manager.load_csv_files():
-                # 更新产品目录
-                self._update_catalog_tab()
+        def on_done(loaded: bool):
+            if loaded:
+                # 与首次加载相同：更新产品目录并重新启动预热和监视
+                self._on_data_loaded()
                 self.status_var.set("数据重新加载成功")
                 messagebox.showinfo("成功", "数据重新加载成功")
             else:
                 self.status_var.set("数据重新加载失败")
                 messagebox.showerror("错误", "数据重新加载失败")
                 
+        self._start_task(
+            "重新加载数据",
+            lambda task: self.data_manager.load_csv_files(),
+            on_done,
+            cancellable=False
+        )
+            
+    def _on_data_loaded(self):
+        """数据加载成功后的处理（首次加载和重新加载共用）"""
+        self._update_catalog_tab()
+        self._snapshot_version = self.data_manager.snapshot.version
+        
+        # 界面显示后再在后台预热延迟加载的prg文件（重新加载会停止旧的预热线程）
+        self.root.after(1000, self.data_manager.start_warmup)
+        
+        # 监视master目录，文件变更时后台增量重新加载
+        if self.data_manager.watch_master:
+            self.data_manager.start_watching()
+        if not self._snapshot_polling:
+            self._snapshot_polling = True
+            self.root.after(1000, self._poll_master_snapshot)
+            
+    def _poll_master_snapshot(self):
+        """在主线程中检查master快照是否已被后台监视线程替换"""
+        try:
+            version = self.data_manager.snapshot.version
+            if version != self._snapshot_version:
+                self._snapshot_version = version
+                self._update_catalog_tab()
+                self.status_var.set("检测到master文件变更，数据已自动更新")
         except Exception as e:
-            self.logger.error(f"重新加载数据失败: {e}")
-            messagebox.showerror("错误", f"重新加载数据失败: {e}")
-            self.status_var.set("重新加载失败")
+            self.logger.error(f"检查master数据更新失败: {e}")
+        finally:
+            self.root.after(1000, self._poll_master_snapshot)
             
     def _show_statistics(self):
         """显示数据统计"""
@@ -460,7 +559,14 @@ class MainWindow:
             stats_text = f"数据统计信息:\n"
             stats_text += f"产品型号总数: {stats['total_product_types']}\n"
             stats_text += f"已加载文件数: {stats['loaded_files']}\n"
+            stats_text += f"待加载文件数: {stats.get('pending_files', 0)}\n"
             stats_text += f"总记录数: {stats['total_records']}\n"
+            stats_text += f"加载总耗时: {stats.get('total_load_time', 0):.3f} 秒\n"
+            slowest_files = stats.get('slowest_files', [])
+            if slowest_files:
+                stats_text += "最慢的文件:\n"
+                for file_name, elapsed_ms in slowest_files:
+                    stats_text += f"  {file_name}: {elapsed_ms} ms\n"
             
             messagebox.showinfo("数据统计", stats_text)
             
@@ -468,6 +574,27 @@ class MainWindow:
             self.logger.error(f"获取统计信息失败: {e}")
             messagebox.showerror("错误", f"获取统计信息失败: {e}")
             
+    def _show_memory_report(self):
+        """显示master表内存占用报告"""
+        try:
+            report = self.data_manager.get_memory_report()
+            
+            report_text = "Master表内存占用（紧凑存储 / 字典存储）:\n"
+            largest_files = sorted(
+                report['files'].items(), key=lambda item: item[1]['dict_bytes'], reverse=True
+            )[:10]
+            for file_name, info in largest_files:
+                report_text += (f"{file_name}: {info['compact_bytes'] / 1024:.0f} KB / "
+                                f"{info['dict_bytes'] / 1024:.0f} KB ({info['rows']} 行)\n")
+            report_text += f"\n合计: {report['compact_bytes'] / 1048576:.1f} MB / {report['dict_bytes'] / 1048576:.1f} MB\n"
+            report_text += f"节省: {report['saved_bytes'] / 1048576:.1f} MB\n"
+            
+            messagebox.showinfo("内存占用报告", report_text)
+            
+        except Exception as e:
+            self.logger.error(f"获取内存占用报告失败: {e}")
+            messagebox.showerror("错误", f"获取内存占用报告失败: {e}")
+            
     def _show_settings(self):
         """显示设置对话框"""
         messagebox.showinfo("设置", "设置功能正在开发中...")
@@ -497,20 +624,15 @@ DNC 参数计算系统
     def _exit_application(self):
         """退出应用程序"""
         if messagebox.askokcancel("退出", "确定要退出应用程序吗？"):
+            self.task_runner.cancel()
+            self.data_manager.stop_warmup(timeout=1.0)
+            self.data_manager.stop_watching()
             self.root.quit()
             
     def _update_catalog_tab(self):
         """更新产品目录标签页"""
-        # 清空当前显示
-        for item in self.catalog_tree.get_children():
-            self.catalog_tree.delete(item)
-            
-        # 添加所有产品
-        product_types = self.data_manager.get_all_product_types()
-        for product_type in product_types:
-            product_data = self.data_manager.get_product_data(product_type)
-            description = product_data.get('DESCRIPTION', '') if product_data else ''
-            self.catalog_tree.insert('', tk.END, values=(product_type, description))
+        self._last_live_keyword = ''
+        self.catalog_table.set_rows(self.data_manager.get_product_catalog())
             
     def run(self):
         """运行应用程序"""
@@ -522,7 +644,7 @@ DNC 参数计算系统
             # 加载数据
             self.status_var.set("正在加载数据...")
             if self.data_manager.load_csv_files():
-                self._update_catalog_tab()
+                self._on_data_loaded()
                 self.status_var.set("数据加载完成")
             else:
                 self.status_var.set("数据加载失败")
@@ -0,0 +1,358 @@
+import heapq
+import tkinter as tk
+from tkinter import ttk
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple
+
+class TableModel:
+    """表格的后备数据：排序和过滤都在数据上进行，与控件无关"""
+
+    def __init__(self, columns: Sequence[str]):
+        self.columns = tuple(columns)
+        self._rows: List[tuple] = []
+        self._view: List[int] = []
+        self.sort_column: Optional[str] = None
+        self.sort_descending = False
+        self.filter_text = ''
+
+    def __len__(self) -> int:
+        return len(self._view)
+
+    @property
+    def total_rows(self) -> int:
+        """过滤前的总行数"""
+        return len(self._rows)
+
+    def set_rows(self, rows: Sequence[Sequence[Any]]):
+        """替换全部数据，保留当前的排序和过滤条件"""
+        self._rows = [tuple(row) for row in rows]
+        self._refresh()
+
+    def append_rows(self, rows: Sequence[Sequence[Any]]):
+        """追加数据：只过滤新行，并按排序位置插入已有视图（不重新排序全部数据）"""
+        start = len(self._rows)
+        self._rows.extend(tuple(row) for row in rows)
+        new_view = self._filtered(range(start, len(self._rows)))
+        key = self._view_key()
+        if key is None:
+            self._view.extend(new_view)
+            return
+        new_view.sort(key=key, reverse=self.sort_descending)
+        if len(new_view) * 8 >= len(self._view):
+            # 新行较多时整体归并比逐行插入快
+            self._view = list(heapq.merge(self._view, new_view, key=key, reverse=self.sort_descending))
+            return
+        for index in new_view:
+            self._view.insert(self._insert_position(key, key(index)), index)
+
+    def clear(self):
+        """清空数据"""
+        self._rows = []
+        self._view = []
+
+    def sort(self, column: str, descending: bool = False):
+        """按列排序（数值列按数值比较）"""
+        self.sort_column = column
+        self.sort_descending = descending
+        self._refresh()
+
+    def set_filter(self, text: str):
+        """按文本过滤（任一列包含该文本，不区分大小写）"""
+        self.filter_text = text.strip().lower()
+        self._refresh()
+
+    def row(self, index: int) -> tuple:
+        """获取当前视图中的第index行"""
+        return self._rows[self._view[index]]
+
+    def row_index(self, position: int) -> int:
+        """当前视图中第position行对应的数据行号（不随排序和过滤变化）"""
+        return self._view[position]
+
+    def position(self, row_index: int) -> Optional[int]:
+        """数据行在当前视图中的位置，被过滤掉时返回None"""
+        try:
+            return self._view.index(row_index)
+        except ValueError:
+            return None
+
+    def indices(self, offset: int, count: int) -> List[int]:
+        """当前视图中从offset开始的count行对应的数据行号"""
+        return self._view[offset:offset + count]
+
+    def rows_in_view(self, row_indices: Iterable[int]) -> List[tuple]:
+        """按当前视图顺序获取指定数据行（被过滤掉的行不返回）"""
+        wanted = set(row_indices)
+        return [self._rows[i] for i in self._view if i in wanted]
+
+    def window(self, offset: int, count: int) -> List[tuple]:
+        """获取当前视图中从offset开始的count行"""
+        return [self._rows[i] for i in self._view[offset:offset + count]]
+
+    @staticmethod
+    def _sort_key(value: Any) -> Tuple[int, Any]:
+        """数值排在文本之前，数值按大小、文本按字典序比较"""
+        if isinstance(value, (int, float)):
+            return (0, value)
+        try:
+            return (0, float(value))
+        except (TypeError, ValueError):
+            return (1, '' if value is None else str(value))
+
+    def _filtered(self, indices: Iterable[int]) -> List[int]:
+        """按过滤条件筛选行号"""
+        if not self.filter_text:
+            return list(indices)
+        text = self.filter_text
+        return [
+            i for i in indices
+            if any(text in str(value).lower() for value in self._rows[i] if value is not None)
+        ]
+
+    def _view_key(self) -> Optional[Callable[[int], Tuple[int, Any]]]:
+        """当前排序列的行号排序函数，未排序时为None"""
+        if self.sort_column not in self.columns:
+            return None
+        column = self.columns.index(self.sort_column)
+        rows = self._rows
+        return lambda i: self._sort_key(rows[i][column] if column < len(rows[i]) else None)
+
+    def _insert_position(self, key: Callable[[int], Tuple[int, Any]], row_key: Tuple[int, Any]) -> int:
+        """二分查找新行在已排序视图中的位置（相等时排在已有行之后，与稳定排序一致）"""
+        low, high = 0, len(self._view)
+        while low < high:
+            middle = (low + high) // 2
+            middle_key = key(self._view[middle])
+            before = row_key > middle_key if self.sort_descending else row_key < middle_key
+            if before:
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    def _refresh(self):
+        """重新计算过滤和排序后的行号列表"""
+        view = self._filtered(range(len(self._rows)))
+        key = self._view_key()
+        if key is not None:
+            view.sort(key=key, reverse=self.sort_descending)
+        self._view = view
+
+class VirtualTable(ttk.Frame):
+    """虚拟化表格：Treeview只保留可见窗口的行，滚动时复用行项目重新填值"""
+
+    BUFFER_ROWS = 2
+    FILTER_DEBOUNCE_MS = 200
+
+    def __init__(self, master, columns: Sequence[Tuple[str, str, int]], height: int = 20,
+                 filterable: bool = False):
+        """columns为 (列名, 标题, 列宽) 列表，filterable为True时在表格上方显示过滤输入框"""
+        super().__init__(master)
+        self.model = TableModel([name for name, _, _ in columns])
+        self.offset = 0
+        self._headings = {name: heading for name, heading, _ in columns}
+        # 选中状态按数据行号保存，行项目在滚动时被复用
+        self._selected = set()
+        self._cursor: Optional[int] = None
+        self._replace_selection = False
+        self._filter_after_id = None
+
+        self.tree = ttk.Treeview(self, columns=self.model.columns, show='headings', height=height)
+        for name, heading, width in columns:
+            self.tree.heading(name, text=heading, command=lambda name=name: self._on_heading_click(name))
+            self.tree.column(name, width=width)
+
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+
+        table_row = 0
+        if filterable:
+            filter_frame = ttk.Frame(self)
+            ttk.Label(filter_frame, text="过滤:").pack(side=tk.LEFT)
+            self.filter_var = tk.StringVar()
+            ttk.Entry(filter_frame, textvariable=self.filter_var, width=30).pack(side=tk.LEFT, padx=(5, 0))
+            self.filter_var.trace_add('write', self._on_filter_changed)
+            filter_frame.grid(row=0, column=0, columnspan=2, sticky=tk.W, pady=(0, 5))
+            table_row = 1
+
+        self.tree.grid(row=table_row, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.scrollbar.grid(row=table_row, column=1, sticky=(tk.N, tk.S))
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(table_row, weight=1)
+
+        # 窗口行数随控件高度变化
+        self._page_size = height
+        self.tree.bind('<Configure>', self._on_configure)
+        self.tree.bind('<MouseWheel>', self._on_mouse_wheel)
+        self.tree.bind('<Button-4>', lambda event: self.scroll(-3))
+        self.tree.bind('<Button-5>', lambda event: self.scroll(3))
+        # 方向键和翻页键移动选中行，超出可见窗口时滚动窗口
+        self.tree.bind('<Up>', lambda event: self.move_cursor(-1))
+        self.tree.bind('<Down>', lambda event: self.move_cursor(1))
+        self.tree.bind('<Prior>', lambda event: self.move_cursor(-self._page_size))
+        self.tree.bind('<Next>', lambda event: self.move_cursor(self._page_size))
+        self.tree.bind('<ButtonPress-1>', self._on_click)
+        self.tree.bind('<<TreeviewSelect>>', self._on_select)
+
+    # ---- 数据操作 ----
+
+    def set_rows(self, rows: Sequence[Sequence[Any]]):
+        """替换表格数据并回到顶部"""
+        self.model.set_rows(rows)
+        self.offset = 0
+        self._selected.clear()
+        self._cursor = None
+        self.render()
+
+    def append_rows(self, rows: Sequence[Sequence[Any]]):
+        """追加数据，保持当前滚动位置"""
+        self.model.append_rows(rows)
+        self.render()
+
+    def clear(self):
+        """清空表格"""
+        self.model.clear()
+        self.offset = 0
+        self._selected.clear()
+        self._cursor = None
+        self.render()
+
+    def set_filter(self, text: str):
+        """按文本过滤后备数据"""
+        self.model.set_filter(text)
+        self.offset = 0
+        self.render()
+
+    def sort_by(self, column: str, descending: bool = False):
+        """按列排序后备数据"""
+        self.model.sort(column, descending)
+        for name, heading in self._headings.items():
+            marker = (' ▼' if descending else ' ▲') if name == column else ''
+            self.tree.heading(name, text=heading + marker)
+        self.render()
+
+    def get_selected_rows(self) -> List[tuple]:
+        """获取选中行对应的后备数据（包括滚出可见窗口的行）"""
+        return self.model.rows_in_view(self._selected)
+
+    def __len__(self) -> int:
+        return len(self.model)
+
+    # ---- 渲染 ----
+
+    def render(self):
+        """只渲染可见窗口内的行，复用已有的行项目"""
+        count = self._page_size + self.BUFFER_ROWS
+        self.offset = max(0, min(self.offset, len(self.model) - self._page_size))
+        rows = self.model.window(self.offset, count)
+
+        items = self.tree.get_children()
+        for item, values in zip(items, rows):
+            self.tree.item(item, values=values)
+        if len(items) > len(rows):
+            self.tree.delete(*items[len(rows):])
+        for values in rows[len(items):]:
+            self.tree.insert('', tk.END, values=values)
+
+        # 按数据行号重新设置选中和焦点，而不是沿用上一窗口中同一位置的行项目
+        items = self.tree.get_children()
+        indices = self.model.indices(self.offset, len(items))
+        self.tree.selection_set([item for item, index in zip(items, indices) if index in self._selected])
+        focus = ''
+        for item, index in zip(items, indices):
+            if index == self._cursor:
+                focus = item
+                break
+        self.tree.focus(focus)
+        self._update_scrollbar()
+
+    def scroll(self, rows: int):
+        """滚动指定行数"""
+        self.offset += rows
+        self.render()
+
+    def move_cursor(self, rows: int):
+        """选中行移动指定行数，移出可见窗口时滚动窗口"""
+        total = len(self.model)
+        if total:
+            position = None if self._cursor is None else self.model.position(self._cursor)
+            if position is None:
+                position = self.offset
+            else:
+                position = max(0, min(total - 1, position + rows))
+            if position < self.offset:
+                self.offset = position
+            elif position >= self.offset + self._page_size:
+                self.offset = position - self._page_size + 1
+            self._cursor = self.model.row_index(position)
+            self._selected = {self._cursor}
+            self.render()
+        return 'break'
+
+    def _update_scrollbar(self):
+        total = len(self.model)
+        if total <= self._page_size:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.offset / total, (self.offset + self._page_size) / total)
+
+    def _on_scrollbar(self, action: str, *args):
+        """滚动条回调：moveto按比例定位，scroll按行或页滚动"""
+        if action == 'moveto':
+            self.offset = int(float(args[0]) * len(self.model))
+            self.render()
+        elif action == 'scroll':
+            amount = int(args[0])
+            self.scroll(amount * self._page_size if args[1] == 'pages' else amount)
+
+    def _on_mouse_wheel(self, event):
+        self.scroll(-3 if event.delta > 0 else 3)
+        return 'break'
+
+    def _on_click(self, event):
+        """不带Shift/Ctrl的单击重新选择，随后的选中事件清除滚出窗口的选中行"""
+        self._replace_selection = not event.state & 0x0005
+
+    def _on_select(self, event):
+        """把可见窗口中的选中状态同步到数据行号"""
+        if self._replace_selection:
+            self._replace_selection = False
+            self._selected.clear()
+        items = self.tree.get_children()
+        indices = self.model.indices(self.offset, len(items))
+        selection = set(self.tree.selection())
+        for item, index in zip(items, indices):
+            if item in selection:
+                self._selected.add(index)
+            else:
+                self._selected.discard(index)
+        focus = self.tree.focus()
+        if focus in items:
+            position = items.index(focus)
+            if position < len(indices):
+                self._cursor = indices[position]
+
+    def _on_filter_changed(self, *args):
+        """过滤输入框内容改变时防抖后过滤"""
+        if self._filter_after_id is not None:
+            self.after_cancel(self._filter_after_id)
+        self._filter_after_id = self.after(self.FILTER_DEBOUNCE_MS, self._apply_filter)
+
+    def _apply_filter(self):
+        self._filter_after_id = None
+        self.set_filter(self.filter_var.get())
+
+    def _on_configure(self, event):
+        """控件高度变化时重新计算可见行数"""
+        style = ttk.Style()
+        row_height = style.lookup('Treeview', 'rowheight') or 20
+        try:
+            page_size = max(1, (event.height - 25) // int(row_height))
+        except (TypeError, ValueError):
+            return
+        if page_size != self._page_size:
+            self._page_size = page_size
+            self.render()
+
+    def _on_heading_click(self, column: str):
+        """点击列标题切换排序方向"""
+        descending = self.model.sort_column == column and not self.model.sort_descending
+        self.sort_by(column, descending)
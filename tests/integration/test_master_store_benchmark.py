@@ -0,0 +1,76 @@
+"""
+DNC参数计算系统 - master存储后端性能对比测试
+"""
+
+import time
+import pytest
+from unittest.mock import Mock
+from src.config.config_manager import ConfigManager
+from src.data.data_manager import DataManager
+
+
+PRODUCT_COUNT = 50000
+LOOKUP_COUNT = 2000
+
+
+def make_data_manager(master_dir, backend):
+    """创建使用指定存储后端的数据管理器"""
+    settings = {'storage_backend': backend, 'sqlite_path': str(master_dir.parent / "master.db")}
+    config_manager = Mock(spec=ConfigManager)
+    config_manager.get_master_path.return_value = master_dir
+    config_manager.get_setting.side_effect = lambda section, key, default=None: (
+        settings.get(key, default)
+    )
+    return DataManager(config_manager)
+
+
+def measure(func, repeat: int) -> float:
+    """返回单次调用的平均耗时（毫秒）"""
+    start_time = time.perf_counter()
+    for i in range(repeat):
+        func(i)
+    return (time.perf_counter() - start_time) * 1000 / repeat
+
+
+@pytest.mark.slow
+class TestMasterStoreBenchmark:
+    """内存后端与SQLite后端查询性能对比"""
+
+    @pytest.fixture
+    def large_master_dir(self, temp_data_dir):
+        """生成包含大量产品型号的master目录"""
+        master = temp_data_dir / "master"
+        (master / "prg1").mkdir(parents=True)
+        lines = ["NO,TYPE,DEFINE1,DEFINE2"]
+        lines += [f"{i},GP{i:06d},D{i % 97},{i % 13}" for i in range(PRODUCT_COUNT)]
+        (master / "type_define.csv").write_text("\n".join(lines) + "\n", encoding='utf-8')
+        lines = ["DEFINE,MACRO"] + [f"D{i},#{500 + i % 400}" for i in range(PRODUCT_COUNT)]
+        (master / "prg1" / "relation.csv").write_text("\n".join(lines) + "\n", encoding='utf-8')
+        return master
+
+    def test_backend_query_latency(self, large_master_dir):
+        """测试两种后端查询结果一致并输出耗时对比"""
+        results = {}
+        for backend in ('memory', 'sqlite'):
+            manager = make_data_manager(large_master_dir, backend)
+            start_time = time.perf_counter()
+            assert manager.load_csv_files() is True
+            load_ms = (time.perf_counter() - start_time) * 1000
+
+            step = PRODUCT_COUNT // LOOKUP_COUNT
+            product_ms = measure(lambda i: manager.get_product_data(f"GP{i * step:06d}"), LOOKUP_COUNT)
+            relation_ms = measure(
+                lambda i: manager.find_master_record('prg1/relation.csv', 'DEFINE', f"D{i * step}"),
+                LOOKUP_COUNT
+            )
+            search_ms = measure(lambda i: manager.search_products(f"{i:03d}99"), 20)
+            results[backend] = (manager, load_ms, product_ms, relation_ms, search_ms)
+            print(f"\n{backend}: 加载 {load_ms:.1f} ms, 型号查询 {product_ms:.4f} ms, "
+                  f"relation查询 {relation_ms:.4f} ms, 型号搜索 {search_ms:.2f} ms")
+
+        memory, sqlite = results['memory'][0], results['sqlite'][0]
+        assert dict(sqlite.get_product_data('GP012345')) == dict(memory.get_product_data('GP012345'))
+        assert sqlite.search_products('01234') == memory.search_products('01234')
+        # 有索引的单条查询应保持在亚毫秒级
+        assert results['sqlite'][2] < 1.0
+        assert results['sqlite'][3] < 1.0
@@ -0,0 +1,99 @@
+"""
+DNC参数计算系统 - 后台任务服务单元测试
+"""
+
+import threading
+from src.ui.background_task import BackgroundTaskRunner
+
+
+class FakeRoot:
+    """记录after()调度的假根窗口，由测试手动触发轮询"""
+
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, delay, callback):
+        self.scheduled.append(callback)
+        return len(self.scheduled)
+
+
+def run_to_end(runner, task):
+    """等待工作线程结束并处理全部消息"""
+    task.thread.join(timeout=5)
+    runner.poll()
+
+
+class TestBackgroundTaskRunner:
+    """后台任务服务测试"""
+
+    def test_messages_are_delivered_in_order(self):
+        """测试进度、部分结果和完成消息按顺序在轮询时回调"""
+        root = FakeRoot()
+        runner = BackgroundTaskRunner(root)
+        events = []
+
+        def work(task):
+            task.emit_chunk([1, 2])
+            task.report_progress(2, 3)
+            task.emit_chunk([3])
+            task.report_progress(3, 3)
+            return 'ok'
+
+        task = runner.submit(
+            "test", work,
+            on_done=lambda result: events.append(('done', result)),
+            on_progress=lambda done, total: events.append(('progress', done, total)),
+            on_chunk=lambda chunk: events.append(('chunk', chunk))
+        )
+        assert runner.is_busy
+        assert root.scheduled == [runner.poll]
+
+        run_to_end(runner, task)
+        assert events == [
+            ('chunk', [1, 2]), ('progress', 2, 3), ('chunk', [3]), ('progress', 3, 3), ('done', 'ok')
+        ]
+        assert not runner.is_busy
+        # 任务结束后不再继续轮询
+        assert len(root.scheduled) == 1
+
+    def test_error_callback(self):
+        """测试任务异常交给错误回调"""
+        runner = BackgroundTaskRunner(FakeRoot())
+        errors = []
+
+        def work(task):
+            raise ValueError("boom")
+
+        task = runner.submit("test", work, on_error=errors.append)
+        run_to_end(runner, task)
+        assert len(errors) == 1 and str(errors[0]) == "boom"
+        assert not runner.is_busy
+
+    def test_only_one_task_at_a_time(self):
+        """测试运行中拒绝新任务，结束后可以再提交"""
+        runner = BackgroundTaskRunner(FakeRoot())
+        release = threading.Event()
+        task = runner.submit("first", lambda task: release.wait(5))
+
+        assert runner.submit("second", lambda task: None) is None
+
+        release.set()
+        run_to_end(runner, task)
+        assert runner.submit("third", lambda task: None) is not None
+
+    def test_cancel_sets_event(self):
+        """测试取消请求对任务函数可见"""
+        runner = BackgroundTaskRunner(FakeRoot())
+        started = threading.Event()
+        results = []
+
+        def work(task):
+            started.set()
+            task.cancel_event.wait(5)
+            return task.cancelled
+
+        task = runner.submit("test", work, on_done=results.append)
+        started.wait(5)
+        runner.cancel()
+        run_to_end(runner, task)
+        assert results == [True]
@@ -0,0 +1,492 @@
+"""
+DNC参数计算系统 - 数据管理器单元测试
+"""
+
+import threading
+import pytest
+from unittest.mock import Mock
+from src.config.config_manager import ConfigManager
+from src.data.data_manager import DataManager
+from src.data.lazy_table import LazyTable
+
+
+@pytest.fixture
+def master_dir(temp_data_dir):
+    """创建包含prg子目录的master目录"""
+    master = temp_data_dir / "master"
+    (master / "prg1").mkdir(parents=True)
+    (master / "prg2").mkdir(parents=True)
+
+    (master / "type_define.csv").write_text(
+        "NO,TYPE,DEFINE1\n1,GPA18,\n2,GPA20,\n3,GPB30,\n", encoding='utf-8'
+    )
+    (master / "prg.csv").write_text("PRGNO,PRGNAME\n1,prg1\n2,prg2\n", encoding='utf-8')
+    (master / "prg1" / "relation.csv").write_text(
+        "DEFINE,MACRO\nD1,#500\nD2,#501\n", encoding='utf-8'
+    )
+    (master / "prg2" / "relation.csv").write_text(
+        "DEFINE,MACRO\nD9,#600\n", encoding='utf-8'
+    )
+    (master / "prg2" / "define.csv").write_text(
+        "DEFINE,VALUE\nA,1\n", encoding='utf-8'
+    )
+    return master
+
+
+def make_data_manager(master_dir, settings=None):
+    """创建指向临时master目录的数据管理器"""
+    settings = settings or {}
+    config_manager = Mock(spec=ConfigManager)
+    config_manager.get_master_path.return_value = master_dir
+    config_manager.get_setting.side_effect = lambda section, key, default=None: (
+        settings.get(key, default)
+    )
+    return DataManager(config_manager)
+
+
+class TestDataManagerLazyLoading:
+    """prg子目录延迟加载测试"""
+
+    def test_prg_files_not_parsed_at_startup(self, master_dir):
+        """测试启动时prg文件只登记不解析"""
+        manager = make_data_manager(master_dir)
+        assert manager.load_csv_files() is True
+
+        assert isinstance(manager.loaded_files['prg2/relation.csv'], LazyTable)
+        assert set(manager.get_pending_files()) == {
+            'prg1/relation.csv', 'prg2/relation.csv', 'prg2/define.csv'
+        }
+        assert manager.get_product_data('GPA18')['NO'] == '1'
+
+    def test_parse_on_first_access(self, master_dir):
+        """测试首次访问时解析文件"""
+        manager = make_data_manager(master_dir)
+        manager.load_csv_files()
+
+        data = manager.get_master_file_data('prg2/relation.csv')
+        assert data == [{'DEFINE': 'D9', 'MACRO': '#600'}]
+        assert 'prg2/relation.csv' not in manager.get_pending_files()
+        assert 'prg1/relation.csv' in manager.get_pending_files()
+
+    def test_statistics_do_not_trigger_loading(self, master_dir):
+        """测试统计信息不会触发延迟加载"""
+        manager = make_data_manager(master_dir)
+        manager.load_csv_files()
+
+        stats = manager.get_statistics()
+        assert stats['pending_files'] == 3
+        assert stats['total_records'] == 5
+        assert len(manager.get_pending_files()) == 3
+
+    def test_warmup_loads_remaining_files(self, master_dir):
+        """测试后台预热线程加载剩余文件"""
+        manager = make_data_manager(master_dir)
+        manager.load_csv_files()
+
+        assert manager.start_warmup() is True
+        manager._warmup_thread.join(5)
+
+        assert manager.get_pending_files() == []
+        assert manager.start_warmup() is False
+
+    def test_eager_loading_setting(self, master_dir):
+        """测试关闭延迟加载时立即解析"""
+        manager = make_data_manager(master_dir, {'lazy_load_prg': 'false'})
+        manager.load_csv_files()
+
+        assert manager.get_pending_files() == []
+        assert manager.loaded_files['prg1/relation.csv'][0]['MACRO'] == '#500'
+
+
+class TestDataManagerParallelLoading:
+    """线程池并行加载测试"""
+
+    @pytest.mark.parametrize("workers", ['1', '4'])
+    def test_parallel_load_matches_sequential(self, master_dir, workers):
+        """测试并行加载结果与文件结构一致"""
+        manager = make_data_manager(
+            master_dir, {'lazy_load_prg': 'false', 'load_workers': workers}
+        )
+        assert manager.load_csv_files() is True
+
+        assert list(manager.loaded_files) == [
+            'prg.csv', 'type_define.csv',
+            'prg1/relation.csv', 'prg2/define.csv', 'prg2/relation.csv'
+        ]
+        assert len(manager.get_master_file_data('type_define.csv')) == 3
+        assert manager.get_master_file_data('prg2/define.csv') == [{'DEFINE': 'A', 'VALUE': '1'}]
+
+    def test_statistics_report_slowest_files(self, master_dir):
+        """测试统计信息包含最慢的文件"""
+        manager = make_data_manager(master_dir, {'lazy_load_prg': 'false'})
+        manager.load_csv_files()
+
+        stats = manager.get_statistics()
+        assert set(manager.load_timings) == set(manager.loaded_files)
+        assert len(stats['slowest_files']) == 5
+        times = [elapsed for _, elapsed in stats['slowest_files']]
+        assert times == sorted(times, reverse=True)
+
+    def test_lazy_load_records_parse_time(self, master_dir):
+        """测试延迟加载同样记录解析耗时"""
+        manager = make_data_manager(master_dir)
+        manager.load_csv_files()
+        assert 'prg1/relation.csv' not in manager.load_timings
+
+        manager.get_master_file_data('prg1/relation.csv')
+        assert 'prg1/relation.csv' in manager.load_timings
+
+
+class TestDataManagerMemoryReport:
+    """内存占用报告测试"""
+
+    def test_memory_report_compares_storage(self, master_dir):
+        """测试内存报告包含紧凑存储与字典存储的对比"""
+        manager = make_data_manager(master_dir)
+        manager.load_csv_files()
+
+        report = manager.get_memory_report()
+        assert set(report['files']) == {'prg.csv', 'type_define.csv'}
+        assert report['files']['type_define.csv']['rows'] == 3
+        assert report['saved_bytes'] == report['dict_bytes'] - report['compact_bytes']
+
+
+class TestDataManagerIndexes:
+    """master表二级索引测试"""
+
+    def test_find_master_records_by_define(self, master_dir):
+        """测试按DEFINE键查找relation记录"""
+        manager = make_data_manager(master_dir)
+        manager.load_csv_files()
+
+        record = manager.find_master_record('prg1/relation.csv', 'DEFINE', 'D2')
+        assert record['MACRO'] == '#501'
+        assert manager.get_master_file_data('prg1/relation.csv').has_index('DEFINE')
+        assert manager.find_master_records('prg1/relation.csv', 'MACRO', '#999') == []
+        assert manager.find_master_record('missing.csv', 'DEFINE', 'D2') is None
+
+
+class TestDataManagerIncrementalReload:
+    """增量重新加载与快照替换测试"""
+
+    def test_reload_only_changed_files(self, master_dir):
+        """测试只重新解析变更的文件"""
+        manager = make_data_manager(master_dir, {'lazy_load_prg': 'false'})
+        manager.load_csv_files()
+        old_snapshot = manager.snapshot
+        old_prg = manager.get_master_file_data('prg.csv')
+
+        (master_dir / "prg1" / "relation.csv").write_text(
+            "DEFINE,MACRO\nD1,#700\n", encoding='utf-8'
+        )
+        assert manager.reload_changed_files(['prg1/relation.csv', 'prg1/unknown.csv']) == ['prg1/relation.csv']
+
+        assert manager.snapshot.version == old_snapshot.version + 1
+        assert manager.find_master_record('prg1/relation.csv', 'DEFINE', 'D1')['MACRO'] == '#700'
+        assert manager.get_master_file_data('prg.csv') is old_prg
+        assert manager.snapshot.product_data is old_snapshot.product_data
+
+        # 旧快照保持不变，进行中的扫描看到一致的数据
+        assert old_snapshot.loaded_files['prg1/relation.csv'].find('DEFINE', 'D1')['MACRO'] == '#500'
+
+    def test_reload_type_define_rebuilds_products(self, master_dir):
+        """测试type_define.csv变更时重建产品索引"""
+        manager = make_data_manager(master_dir)
+        manager.load_csv_files()
+
+        (master_dir / "type_define.csv").write_text("NO,TYPE\n1,GPZ99\n", encoding='utf-8')
+        manager.reload_changed_files(['type_define.csv'])
+
+        assert manager.get_all_product_types() == ['GPZ99']
+
+    def test_reload_deleted_and_unused_lazy_files(self, master_dir):
+        """测试删除的文件被移除，未使用的prg文件保持延迟加载"""
+        manager = make_data_manager(master_dir)
+        manager.load_csv_files()
+
+        (master_dir / "prg2" / "define.csv").unlink()
+        manager.reload_changed_files(['prg2/define.csv', 'prg1/relation.csv'])
+
+        assert 'prg2/define.csv' not in manager.loaded_files
+        assert 'prg1/relation.csv' in manager.get_pending_files()
+
+    def test_snapshot_is_read_only(self, master_dir):
+        """测试快照不可直接修改"""
+        manager = make_data_manager(master_dir)
+        manager.load_csv_files()
+
+        with pytest.raises(TypeError):
+            manager.loaded_files['prg.csv'] = []
+        with pytest.raises(TypeError):
+            manager.product_data['NEW'] = {}
+
+
+class TestDataManagerUpdateMasterData:
+    """基于行差异的master数据更新测试"""
+
+    def test_update_applies_only_changed_rows(self, master_dir):
+        """测试只应用新增和变化的行并修补产品索引"""
+        manager = make_data_manager(master_dir)
+        manager.load_csv_files()
+        old_product = manager.get_product_data('GPA20')
+
+        assert manager.update_master_data('type_define.csv', [
+            {'NO': '1', 'TYPE': 'GPA18', 'DEFINE1': ''},
+            {'NO': '2', 'TYPE': 'GPA21', 'DEFINE1': 'X'},
+            {'NO': '4', 'TYPE': 'GPD40', 'DEFINE1': ''},
+        ], persist=False) is True
+
+        assert manager.get_product_data('GPA20') is None
+        assert manager.get_product_data('GPA21')['DEFINE1'] == 'X'
+        assert manager.get_product_data('GPD40')['NO'] == '4'
+        assert manager.get_product_data('GPB30')['NO'] == '3'
+        assert old_product['TYPE'] == 'GPA20'
+        assert len(manager.get_master_file_data('type_define.csv')) == 4
+
+    def test_update_keeps_products_shared_by_other_rows(self, master_dir):
+        """测试修改型号时，其他行仍使用的旧型号保留在产品索引中"""
+        (master_dir / "type_define.csv").write_text(
+            "NO,TYPE,DEFINE1\n1,GPA18,a\n2,GPA18,b\n3,GPB30,\n", encoding='utf-8'
+        )
+        manager = make_data_manager(master_dir)
+        manager.load_csv_files()
+        assert manager.get_product_data('GPA18')['NO'] == '2'
+
+        manager.update_master_data('type_define.csv', [{'NO': '2', 'TYPE': 'GPC50'}])
+        assert manager.get_product_data('GPA18')['NO'] == '1'
+        assert manager.get_product_data('GPC50')['DEFINE1'] == 'b'
+        assert manager.search_products('gpa18') == ['GPA18']
+
+        rebuilt = manager._build_product_index(manager.loaded_files)
+        assert {key: dict(value) for key, value in manager.product_data.items()} == \
+            {key: dict(value) for key, value in rebuilt.items()}
+
+    def test_update_appends_added_rows_to_disk(self, master_dir):
+        """测试只有新增行时追加写入磁盘"""
+        manager = make_data_manager(master_dir)
+        manager.load_csv_files()
+
+        manager.update_master_data('prg.csv', [{'PRGNO': '3', 'PRGNAME': 'prg3'}], key_field='PRGNO',
+                                   persist=True)
+
+        content = (master_dir / "prg.csv").read_text(encoding='utf-8')
+        assert content.startswith("PRGNO,PRGNAME\n1,prg1\n2,prg2\n")
+        assert content.rstrip().endswith("3,prg3")
+        assert manager.reload_changed_files(['prg.csv']) == []
+
+    def test_reload_during_write_back_skips_own_write(self, master_dir):
+        """测试写回过程中触发的重新加载等写回完成后判断，不重新加载自身写入的文件"""
+        manager = make_data_manager(master_dir)
+        manager.load_csv_files()
+        writing = threading.Event()
+        release = threading.Event()
+        append_master_rows = manager.csv_processor.append_master_rows
+
+        def slow_append(*args, **kwargs):
+            written = append_master_rows(*args, **kwargs)
+            writing.set()
+            release.wait(2.0)
+            return written
+
+        manager.csv_processor.append_master_rows = slow_append
+        updater = threading.Thread(target=manager.update_master_data, args=(
+            'prg.csv', [{'PRGNO': '3', 'PRGNAME': 'prg3'}]), kwargs={'key_field': 'PRGNO', 'persist': True})
+        updater.start()
+        assert writing.wait(2.0)
+
+        results = []
+        reloader = threading.Thread(target=lambda: results.append(manager.reload_changed_files(['prg.csv'])))
+        reloader.start()
+        reloader.join(0.1)
+        assert reloader.is_alive()
+
+        release.set()
+        updater.join(2.0)
+        reloader.join(2.0)
+        assert results == [[]]
+
+    def test_update_rewrites_changed_rows_on_disk(self, master_dir):
+        """测试有变化行时整体重写磁盘文件"""
+        manager = make_data_manager(master_dir)
+        manager.load_csv_files()
+
+        manager.update_master_data('prg.csv', [{'PRGNO': '2', 'PRGNAME': 'prgX'}], key_field='PRGNO',
+                                   persist=True)
+
+        reloaded = manager.csv_processor.read_csv(str(master_dir / "prg.csv"))
+        assert reloaded == [
+            {'PRGNO': '1', 'PRGNAME': 'prg1'},
+            {'PRGNO': '2', 'PRGNAME': 'prgX'}
+        ]
+
+    def test_update_keeps_file_layout(self, master_dir):
+        """测试默认不写盘，写盘时保留重复列名、列宽和换行符"""
+        relation = master_dir / "prg1" / "relation.csv"
+        relation.write_bytes(b"DEFINE,MACRO,1,,\nD1,#500,and,,y\nD2,#501,,x,z\n")
+        manager = make_data_manager(master_dir)
+        manager.load_csv_files()
+
+        assert manager.update_master_data('prg1/relation.csv', [{'DEFINE': 'D2', 'MACRO': '#509'}],
+                                          key_field='DEFINE') is True
+        assert relation.read_bytes().endswith(b"D2,#501,,x,z\n")
+
+        manager = make_data_manager(master_dir)
+        manager.load_csv_files()
+        assert manager.update_master_data(
+            'prg1/relation.csv', [{'DEFINE': 'D2', 'MACRO': '#508'}],
+            key_field='DEFINE', persist=True) is True
+        assert relation.read_bytes() == b"DEFINE,MACRO,1,,\nD1,#500,and,,y\nD2,#508,,x,z\n"
+
+    def test_update_without_changes(self, master_dir):
+        """测试无变化时不发布新快照"""
+        manager = make_data_manager(master_dir)
+        manager.load_csv_files()
+        version = manager.snapshot.version
+
+        assert manager.update_master_data('type_define.csv', [{'NO': '1', 'TYPE': 'GPA18', 'DEFINE1': ''}]) is True
+        assert manager.snapshot.version == version
+
+
+class TestDataManagerSQLiteBackend:
+    """SQLite存储后端测试"""
+
+    def make_sqlite_manager(self, master_dir):
+        return make_data_manager(master_dir, {
+            'storage_backend': 'sqlite',
+            'sqlite_path': str(master_dir.parent / "master.db")
+        })
+
+    def test_queries_match_memory_backend(self, master_dir):
+        """测试SQLite后端与内存后端的查询结果一致"""
+        memory = make_data_manager(master_dir)
+        memory.load_csv_files()
+        sqlite = self.make_sqlite_manager(master_dir)
+        assert sqlite.load_csv_files() is True
+
+        assert sqlite.get_all_product_types() == memory.get_all_product_types()
+        assert dict(sqlite.get_product_data('GPA20')) == dict(memory.get_product_data('GPA20'))
+        assert sqlite.get_product_data('UNKNOWN') is None
+        assert sqlite.search_products('gpa') == memory.search_products('gpa') == ['GPA18', 'GPA20']
+        assert sqlite.search_products('%') == []
+        assert sqlite.find_master_record('prg1/relation.csv', 'DEFINE', 'D2')['MACRO'] == '#501'
+        assert sqlite.get_master_file_data('prg2/define.csv') == [{'DEFINE': 'A', 'VALUE': '1'}]
+        assert sqlite.get_statistics()['total_records'] == 9
+
+    def test_product_count_follows_updates(self, master_dir):
+        """测试型号个数在数据更新后重新计算，重复列以最后一列为准"""
+        (master_dir / "type_define.csv").write_text(
+            "NO,TYPE,TYPE\n1,X,GPA18\n2,Y,GPA18\n3,Z,\n", encoding='utf-8'
+        )
+        memory = make_data_manager(master_dir)
+        memory.load_csv_files()
+        manager = self.make_sqlite_manager(master_dir)
+        manager.load_csv_files()
+
+        assert manager.get_all_product_types() == memory.get_all_product_types() == ['GPA18']
+        assert len(manager.product_data) == len(memory.product_data) == 1
+        assert dict(manager.get_product_data('GPA18')) == dict(memory.get_product_data('GPA18'))
+
+        manager.update_master_data('type_define.csv', [{'NO': '4', 'TYPE': 'GPA40'}], key_field='NO')
+        assert len(manager.product_data) == 2
+        assert manager.get_all_product_types() == ['GPA18', 'GPA40']
+
+    def test_product_catalog_matches_memory_backend(self, master_dir):
+        """测试产品目录一次查询取得描述，结果与内存后端一致"""
+        (master_dir / "type_define.csv").write_text(
+            "NO,TYPE,DESCRIPTION\n1,GPA18,old\n2,GPA20,\n3,GPA18,new\n", encoding='utf-8'
+        )
+        memory = make_data_manager(master_dir)
+        memory.load_csv_files()
+        manager = self.make_sqlite_manager(master_dir)
+        manager.load_csv_files()
+
+        assert manager.get_product_catalog() == memory.get_product_catalog() == [('GPA18', 'new'), ('GPA20', '')]
+        assert manager.get_product_catalog(['GPA20', 'UNKNOWN']) == [('GPA20', ''), ('UNKNOWN', '')]
+        assert memory.get_product_catalog(['GPA20', 'UNKNOWN']) == [('GPA20', ''), ('UNKNOWN', '')]
+
+    def test_unchanged_files_are_not_reimported(self, master_dir):
+        """测试重新启动时跳过未变化的文件"""
+        self.make_sqlite_manager(master_dir).load_csv_files()
+
+        manager = self.make_sqlite_manager(master_dir)
+        manager.load_csv_files()
+        assert manager.load_timings == {}
+        assert manager.validate_product_model('GPB30')[0] is True
+
+    def test_reload_and_update_write_through(self, master_dir):
+        """测试增量重新加载和数据更新同步到数据库"""
+        manager = self.make_sqlite_manager(master_dir)
+        manager.load_csv_files()
+
+        (master_dir / "type_define.csv").write_text("NO,TYPE\n1,GPZ99\n", encoding='utf-8')
+        manager.reload_changed_files(['type_define.csv'])
+        assert manager.get_all_product_types() == ['GPZ99']
+
+        manager.update_master_data('type_define.csv', [{'NO': '2', 'TYPE': 'GPY88'}], persist=True)
+        assert manager.get_product_data('GPY88')['NO'] == '2'
+        assert manager.reload_changed_files(['type_define.csv']) == []
+
+        restarted = self.make_sqlite_manager(master_dir)
+        restarted.load_csv_files()
+        assert restarted.load_timings == {}
+        assert restarted.get_all_product_types() == ['GPZ99', 'GPY88']
+
+
+class TestDataManagerSearch:
+    """产品型号搜索测试"""
+
+    def test_search_index_follows_snapshot(self, master_dir):
+        """测试产品索引变更后搜索索引随之重建"""
+        manager = make_data_manager(master_dir)
+        manager.load_csv_files()
+
+        assert manager.search_products('gpa') == ['GPA18', 'GPA20']
+        assert manager.search_products('gp', limit=1) == ['GPA18']
+        assert manager.suggest_products('b3') == ['GPB30']
+        index = manager.get_search_index()
+        assert manager.get_search_index() is index
+
+        manager.update_master_data('type_define.csv', [{'NO': '4', 'TYPE': 'GPA40'}], persist=False)
+        assert manager.search_products('gpa') == ['GPA18', 'GPA20', 'GPA40']
+
+
+class TestDataManagerProcessInput:
+    """输入文件分块处理测试"""
+
+    @pytest.fixture
+    def input_file(self, temp_data_dir):
+        path = temp_data_dir / "input.csv"
+        rows = [f"P{i:03d},{'GPA18' if i % 2 else 'GPB30'},{i + 1}" for i in range(7)]
+        path.write_text("product_id,model,quantity\n" + "\n".join(rows) + "\n", encoding='utf-8')
+        return path
+
+    def test_chunks_and_progress(self, master_dir, input_file):
+        """测试按块回调部分结果和进度"""
+        manager = make_data_manager(master_dir)
+        manager.load_csv_files()
+        chunks, progress = [], []
+
+        records, errors = manager.process_input_file(
+            str(input_file), progress_callback=lambda done, total: progress.append((done, total)),
+            chunk_callback=lambda chunk: chunks.append([r['product_id'] for r in chunk]), chunk_size=3
+        )
+
+        assert errors == []
+        assert [r['product_id'] for r in records] == [f"P{i:03d}" for i in range(7)]
+        assert all('calculated_params' in r for r in records)
+        assert [len(chunk) for chunk in chunks] == [3, 3, 1]
+        assert progress == [(3, 7), (6, 7), (7, 7)]
+
+    def test_cancel_returns_processed_prefix(self, master_dir, input_file):
+        """测试取消后返回已完成的记录"""
+        manager = make_data_manager(master_dir)
+        manager.load_csv_files()
+        cancel_event = threading.Event()
+
+        records, errors = manager.process_input_file(
+            str(input_file), progress_callback=lambda done, total: cancel_event.set(),
+            cancel_event=cancel_event, chunk_size=2
+        )
+
+        assert [r['product_id'] for r in records] == ['P000', 'P001']
+        assert errors == ["处理已取消: 完成 2/7 条记录"]
@@ -0,0 +1,201 @@
+"""
+DNC参数计算系统 - 紧凑master表单元测试
+"""
+
+import pytest
+from src.data.csv_processor import CSVProcessor
+from src.data.master_table import MasterTable, RowView
+
+
+@pytest.fixture
+def table():
+    """提供示例master表"""
+    return MasterTable(
+        ['NO', 'TYPE', 'DEFINE'],
+        [('1', 'GPA18', 'D1'), ('2', 'GPA20', 'D2'), ('3', 'GPA18', 'D3')]
+    )
+
+
+class TestMasterTable:
+    """MasterTable测试"""
+
+    def test_row_view_behaves_like_dict(self, table):
+        """测试行视图的字典行为"""
+        row = table[0]
+        assert isinstance(row, RowView)
+        assert row['TYPE'] == 'GPA18'
+        assert row.get('MISSING', 'x') == 'x'
+        assert list(row.keys()) == ['NO', 'TYPE', 'DEFINE']
+        assert row == {'NO': '1', 'TYPE': 'GPA18', 'DEFINE': 'D1'}
+        assert dict(row) == {'NO': '1', 'TYPE': 'GPA18', 'DEFINE': 'D1'}
+
+    def test_strings_are_interned(self):
+        """测试相同单元格值共享同一字符串对象"""
+        value_a = ''.join(['GPA', '18'])
+        value_b = ''.join(['GP', 'A18'])
+        assert value_a is not value_b
+
+        table = MasterTable(['TYPE'], [(value_a,), (value_b,)])
+        assert table.rows[0][0] is table.rows[1][0]
+
+    def test_find_and_filter(self, table):
+        """测试查找和筛选"""
+        assert table.find('TYPE', 'GPA20')['NO'] == '2'
+        assert table.find('TYPE', 'NONE') is None
+        assert [row['NO'] for row in table.find_all('TYPE', 'GPA18')] == ['1', '3']
+        assert len(table.filter(lambda row: row['DEFINE'] > 'D1')) == 2
+
+    def test_from_records_with_heterogeneous_keys(self):
+        """测试字段不一致的记录"""
+        table = MasterTable.from_records([{'a': 1}, {'a': 2, 'b': 3}])
+        assert table.header == ['a', 'b']
+        assert dict(table[0]) == {'a': 1}
+        assert table[1]['b'] == 3
+        assert table.to_records() == [{'a': 1}, {'a': 2, 'b': 3}]
+
+    def test_update_row(self, table):
+        """测试更新行"""
+        table.update_row(1, {'DEFINE': 'X', 'NEW': 'y'})
+        assert table[1] == {'NO': '2', 'TYPE': 'GPA20', 'DEFINE': 'X', 'NEW': 'y'}
+        assert 'NEW' not in table[0]
+
+    def test_read_master_table(self, temp_data_dir):
+        """测试读取CSV为MasterTable"""
+        csv_file = temp_data_dir / "load.csv"
+        csv_file.write_text("NO,TYPE,#500\n1,GPA18,10\n\n2,GPA20\n", encoding='utf-8')
+
+        table = CSVProcessor().read_master_table(str(csv_file))
+        assert len(table) == 2
+        assert table[0]['#500'] == '10'
+        assert table[1]['#500'] is None
+        assert table.to_records() == CSVProcessor().read_csv(str(csv_file))
+
+    def test_read_master_table_with_duplicate_columns(self, temp_data_dir):
+        """测试重复列名按位置保留，按列名读取与DictReader一致（最后一列为准）"""
+        csv_file = temp_data_dir / "relation.csv"
+        csv_file.write_text(
+            "DEFINE,VALUE,1,2,,,\nrelationL,#1,and,#1,>,0,\nrelationL,#2,and,,,,x\n",
+            encoding='utf-8'
+        )
+
+        table = CSVProcessor().read_master_table(str(csv_file))
+        assert table.header == ['DEFINE', 'VALUE', '1', '2', '', '', '']
+        assert table.row_values(0) == ('relationL', '#1', 'and', '#1', '>', '0', '')
+        assert table[1][''] == 'x'
+        assert table.to_records() == CSVProcessor().read_csv(str(csv_file))
+
+        copied = MasterTable.from_records(table)
+        assert copied.row_values(0) == table.row_values(0)
+        assert table.diff([{'DEFINE': 'relationL', 'VALUE': '#1', '1': 'and', '2': '#1', '': ''}],
+                          key_field='VALUE', detect_removed=False).is_empty()
+
+    def test_memory_usage_smaller_than_dict_rows(self):
+        """测试紧凑存储占用小于字典存储"""
+        header = [f'#{500 + i}' for i in range(70)]
+        rows = [[str(j % 5) for j in range(70)] for _ in range(200)]
+        table = MasterTable(header, rows)
+
+        assert table.memory_usage() < table.dict_memory_usage()
+
+
+class TestMasterTableIndexes:
+    """二级索引测试"""
+
+    def test_index_built_lazily_on_first_query(self, table):
+        """测试索引在首次查询时构建"""
+        table.declare_index('TYPE', 'DEFINE')
+        assert not table.has_index('TYPE')
+
+        assert table.find_indices('TYPE', 'GPA18') == [0, 2]
+        assert table.has_index('TYPE')
+        assert not table.has_index('DEFINE')
+
+    def test_undeclared_field_falls_back_to_scan(self, table):
+        """测试未声明字段使用顺序扫描"""
+        assert table.find('NO', '3')['TYPE'] == 'GPA18'
+        assert not table.has_index('NO')
+
+    def test_update_row_maintains_index(self, table):
+        """测试更新行时增量维护索引"""
+        table.declare_index('TYPE')
+        table.find('TYPE', 'GPA18')
+
+        table.update_row(0, {'TYPE': 'GPA20'})
+        assert table.find_indices('TYPE', 'GPA18') == [2]
+        assert table.find_indices('TYPE', 'GPA20') == [0, 1]
+
+        table.update_row(2, {'TYPE': 'GPB30'})
+        assert table.find_indices('TYPE', 'GPA18') == []
+        assert table.find('TYPE', 'GPB30')['NO'] == '3'
+
+    def test_append_maintains_index(self, table):
+        """测试追加记录时增量维护索引"""
+        table.declare_index('DEFINE')
+        table.find('DEFINE', 'D1')
+
+        table.append({'NO': '4', 'TYPE': 'GPC', 'DEFINE': 'D1'})
+        assert table.find_indices('DEFINE', 'D1') == [0, 3]
+
+    def test_from_records_keeps_declared_fields(self, table):
+        """测试复制表时保留索引声明"""
+        table.declare_index('TYPE')
+        copied = MasterTable.from_records(table)
+        assert copied.index_fields == {'TYPE'}
+
+
+class TestMasterTableDiff:
+    """行级差异测试"""
+
+    def test_diff_detects_added_changed_removed(self, table):
+        """测试识别新增、变化和删除的行"""
+        table_diff = table.diff([
+            {'NO': '1', 'TYPE': 'GPA18', 'DEFINE': 'D1'},
+            {'NO': '2', 'TYPE': 'GPA20', 'DEFINE': 'X'},
+            {'NO': '4', 'TYPE': 'GPC', 'DEFINE': 'D4'},
+        ])
+
+        assert table_diff.summary() == {'added': 1, 'removed': 1, 'changed': 1}
+        assert table_diff.added[0]['NO'] == '4'
+        assert table_diff.changed[0][0] == 1
+        assert table_diff.removed == [2]
+
+    def test_diff_ignores_unchanged_and_keyless_records(self, table):
+        """测试内容相同及缺少关键字段的记录不计入差异"""
+        table_diff = table.diff(
+            [{'NO': '1', 'TYPE': 'GPA18', 'DEFINE': 'D1'}, {'TYPE': 'X'}],
+            detect_removed=False
+        )
+        assert table_diff.is_empty()
+
+    def test_apply_diff_on_copy(self, table):
+        """测试在副本上应用差异不影响原表"""
+        table.declare_index('TYPE')
+        table.find('TYPE', 'GPA20')
+        table_diff = table.diff([
+            {'NO': '2', 'TYPE': 'GPB', 'DEFINE': 'D2'},
+            {'NO': '5', 'TYPE': 'GPA20', 'DEFINE': 'D5'},
+        ], detect_removed=False)
+
+        updated = table.copy()
+        updated.apply_diff(table_diff)
+
+        assert updated.find_indices('TYPE', 'GPA20') == [3]
+        assert updated.find('TYPE', 'GPB')['NO'] == '2'
+        assert table.find_indices('TYPE', 'GPA20') == [1]
+        assert table.find('TYPE', 'GPB') is None
+        assert len(table) == 3
+
+    def test_partial_records_merge_fields(self, table):
+        """测试部分字段的记录只比较和更新出现的字段"""
+        assert table.diff([{'NO': '1', 'TYPE': 'GPA18'}], detect_removed=False).is_empty()
+
+        table_diff = table.diff([{'NO': '2', 'DEFINE': 'X'}], detect_removed=False)
+        assert table_diff.changed == [(1, {'NO': '2', 'DEFINE': 'X'})]
+        table.apply_diff(table_diff)
+        assert table[1] == {'NO': '2', 'TYPE': 'GPA20', 'DEFINE': 'X'}
+
+    def test_row_hash_follows_content(self, table):
+        """测试行哈希随内容变化"""
+        other = MasterTable(table.header, [('1', 'GPA18', 'D1')])
+        assert table.row_hash(0) == other.row_hash(0)
+        assert table.row_hash(0) != table.row_hash(1)
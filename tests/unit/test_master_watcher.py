@@ -0,0 +1,85 @@
+"""
+DNC参数计算系统 - master目录监视器单元测试
+"""
+
+import sys
+import threading
+import time
+import pytest
+from src.data.master_watcher import MasterWatcher
+
+
+class ChangeCollector:
+    """收集监视器通知的变更文件"""
+
+    def __init__(self):
+        self.changes = []
+        self.event = threading.Event()
+
+    def __call__(self, changed_files):
+        self.changes.extend(changed_files)
+        self.event.set()
+
+
+@pytest.fixture
+def watched_dir(temp_data_dir):
+    """创建被监视的master目录"""
+    master = temp_data_dir / "master"
+    (master / "prg1").mkdir(parents=True)
+    (master / "prg.csv").write_text("PRGNO\n1\n", encoding='utf-8')
+    (master / "prg1" / "relation.csv").write_text("DEFINE\nD1\n", encoding='utf-8')
+    return master
+
+
+def wait_for_change(watcher, collector, action, timeout=5.0):
+    """启动监视器、执行文件操作并等待通知"""
+    assert watcher.start() is True
+    try:
+        time.sleep(0.1)
+        action()
+        assert collector.event.wait(timeout)
+    finally:
+        watcher.stop()
+
+
+class TestMasterWatcher:
+    """master目录监视器测试"""
+
+    def test_polling_detects_modified_file(self, watched_dir):
+        """测试轮询模式检测文件修改"""
+        collector = ChangeCollector()
+        watcher = MasterWatcher(watched_dir, collector, poll_interval=0.05, use_inotify=False)
+
+        def modify():
+            (watched_dir / "prg1" / "relation.csv").write_text("DEFINE\nD1\nD2\n", encoding='utf-8')
+
+        wait_for_change(watcher, collector, modify)
+        assert watcher.backend == 'polling'
+        assert collector.changes == ['prg1/relation.csv']
+
+    def test_polling_ignores_non_csv_files(self, watched_dir):
+        """测试忽略非CSV文件和Excel临时文件"""
+        collector = ChangeCollector()
+        watcher = MasterWatcher(watched_dir, collector, poll_interval=0.05, use_inotify=False)
+
+        def modify():
+            (watched_dir / "prg1" / "~$load.csv").write_text("x", encoding='utf-8')
+            (watched_dir / "notes.txt").write_text("x", encoding='utf-8')
+            (watched_dir / "prg.csv").unlink()
+
+        wait_for_change(watcher, collector, modify)
+        assert collector.changes == ['prg.csv']
+
+    @pytest.mark.skipif(not sys.platform.startswith('linux'), reason="inotify仅在Linux可用")
+    def test_inotify_detects_modified_file(self, watched_dir):
+        """测试inotify模式检测文件修改"""
+        collector = ChangeCollector()
+        watcher = MasterWatcher(watched_dir, collector, debounce=0.2)
+
+        def modify():
+            (watched_dir / "prg1" / "relation.csv").write_text("DEFINE\nD3\n", encoding='utf-8')
+            (watched_dir / "prg.csv").write_text("PRGNO\n2\n", encoding='utf-8')
+
+        wait_for_change(watcher, collector, modify)
+        assert watcher.backend == 'inotify'
+        assert sorted(collector.changes) == ['prg.csv', 'prg1/relation.csv']
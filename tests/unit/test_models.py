@@ -215,6 +215,26 @@ class TestMasterFile:
         # 测试更新不存在的记录
         failed = master_file.update_record("id", "003", {"length": 200.0})
         assert failed is False
+    
+    def test_indexed_find_and_update(self):
+        """测试索引字段的查找与更新"""
+        data = [
+            {"DEFINE": "D1", "MACRO": "#500"},
+            {"DEFINE": "D2", "MACRO": "#501"}
+        ]
+        
+        master_file = MasterFile(
+            file_name="relation.csv",
+            file_path=Path("data/master/prg1/relation.csv"),
+            data=data
+        )
+        
+        assert master_file.find_records("DEFINE", "D2")[0]["MACRO"] == "#501"
+        assert master_file.data.has_index("DEFINE")
+        
+        assert master_file.update_record("DEFINE", "D2", {"DEFINE": "D3"}) is True
+        assert master_file.find_records("DEFINE", "D2") == []
+        assert master_file.find_records("DEFINE", "D3")[0]["MACRO"] == "#501"
 
 
 class TestGeometryParameters:
@@ -0,0 +1,44 @@
+"""
+DNC参数计算系统 - 产品型号搜索索引单元测试
+"""
+
+import pytest
+from src.data.search_index import ProductSearchIndex
+
+
+@pytest.fixture
+def search_index():
+    """创建测试用搜索索引"""
+    return ProductSearchIndex(['GPA18GT', 'gpb20', 'XGPA20', 'GPA24', '', 'ABC'])
+
+
+class TestProductSearchIndex:
+    """产品型号搜索索引测试"""
+
+    def test_substring_search_keeps_original_order(self, search_index):
+        """测试子串查询不区分大小写且保持原始顺序"""
+        assert search_index.search('gpa') == ['GPA18GT', 'XGPA20', 'GPA24']
+        assert search_index.search('A2') == ['XGPA20', 'GPA24']
+        assert search_index.search('18gt') == ['GPA18GT']
+        assert search_index.search('zzz') == []
+        assert len(search_index) == 5
+
+    def test_substring_search_matches_linear_scan(self):
+        """测试三元组索引结果与顺序扫描一致"""
+        product_types = [f"GP{chr(65 + i % 26)}{i:05d}_{i % 7}" for i in range(3000)]
+        index = ProductSearchIndex(product_types)
+        for keyword in ['gpc', '0012', '_3', '9_', 'P', 'GPZ02', '1234_']:
+            expected = [t for t in product_types if keyword.lower() in t.lower()]
+            assert index.search(keyword) == expected
+
+    def test_prefix_search(self, search_index):
+        """测试前缀查询按型号排序"""
+        assert search_index.prefix('gp') == ['GPA18GT', 'GPA24', 'gpb20']
+        assert search_index.prefix('GPA2') == ['GPA24']
+        assert search_index.prefix('gp', limit=1) == ['GPA18GT']
+
+    def test_limit_and_top(self, search_index):
+        """测试结果数量限制及前缀优先的前N个匹配"""
+        assert search_index.search('gp', limit=2) == ['GPA18GT', 'gpb20']
+        assert search_index.top('gpa', 3) == ['GPA18GT', 'GPA24', 'XGPA20']
+        assert search_index.top('a', 2) == ['ABC', 'GPA18GT']
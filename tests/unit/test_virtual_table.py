@@ -0,0 +1,125 @@
+"""
+DNC参数计算系统 - 虚拟化表格单元测试
+"""
+
+import pytest
+from src.ui.virtual_table import TableModel, VirtualTable
+
+
+@pytest.fixture
+def model():
+    """创建测试用表格数据"""
+    table_model = TableModel(['product_id', 'model', 'quantity'])
+    table_model.set_rows([
+        ('P003', 'GPB30', '10'),
+        ('P001', 'GPA18', '2'),
+        ('P002', 'gpa20', '100'),
+    ])
+    return table_model
+
+
+class TestTableModel:
+    """表格后备数据测试"""
+
+    def test_window(self, model):
+        """测试按窗口取行"""
+        assert len(model) == 3
+        assert model.window(1, 5) == [('P001', 'GPA18', '2'), ('P002', 'gpa20', '100')]
+
+    def test_sort_numeric_and_text(self, model):
+        """测试数值列按数值排序，文本列按字典序排序"""
+        model.sort('quantity')
+        assert [row[2] for row in model.window(0, 3)] == ['2', '10', '100']
+
+        model.sort('product_id', descending=True)
+        assert [row[0] for row in model.window(0, 3)] == ['P003', 'P002', 'P001']
+
+    def test_filter_keeps_sort(self, model):
+        """测试过滤不区分大小写且保持排序"""
+        model.sort('quantity', descending=True)
+        model.set_filter('GPA')
+        assert model.window(0, 10) == [('P002', 'gpa20', '100'), ('P001', 'GPA18', '2')]
+        assert model.total_rows == 3
+
+        model.append_rows([('P004', 'GPA24', '50')])
+        assert [row[0] for row in model.window(0, 10)] == ['P002', 'P004', 'P001']
+
+        model.set_filter('')
+        assert len(model) == 4
+
+    def test_append_merges_into_sorted_view(self):
+        """测试分块追加只处理新行，结果与整体排序过滤相同"""
+        rows = [(f"P{i:03d}", f"GP{(i * 7) % 13}", str((i * 37) % 11)) for i in range(200)]
+        for descending in (False, True):
+            streamed = TableModel(['product_id', 'model', 'quantity'])
+            streamed.sort('quantity', descending)
+            streamed.set_filter('gp1')
+            for start in range(0, len(rows), 7):
+                streamed.append_rows(rows[start:start + 7])
+
+            expected = TableModel(['product_id', 'model', 'quantity'])
+            expected.sort('quantity', descending)
+            expected.set_filter('gp1')
+            expected.set_rows(rows)
+            assert streamed.window(0, 200) == expected.window(0, 200)
+
+    def test_row_index_follows_sort(self, model):
+        """测试数据行号不随排序变化"""
+        model.sort('quantity')
+        assert model.indices(0, 3) == [1, 0, 2]
+        assert model.position(2) == 2
+        assert model.rows_in_view({0, 1}) == [('P001', 'GPA18', '2'), ('P003', 'GPB30', '10')]
+
+    def test_large_data_window(self):
+        """测试大数据量时只取窗口内的行"""
+        table_model = TableModel(['product_type', 'description'])
+        table_model.set_rows((f"GP{i:05d}", '') for i in range(50000))
+        table_model.sort('product_type', descending=True)
+        assert table_model.window(0, 2) == [('GP49999', ''), ('GP49998', '')]
+        assert table_model.row(49999) == ('GP00000', '')
+
+
+class TestVirtualTable:
+    """虚拟化表格控件测试"""
+
+    @pytest.fixture
+    def tk_root(self):
+        """创建Tk根窗口，无显示环境时跳过"""
+        tk = pytest.importorskip('tkinter')
+        try:
+            root = tk.Tk()
+        except tk.TclError:
+            pytest.skip("没有可用的显示环境")
+        yield root
+        root.destroy()
+
+    def test_renders_only_visible_window(self, tk_root):
+        """测试只为可见窗口创建行项目"""
+        table = VirtualTable(tk_root, [('product_type', '产品型号', 200)], height=10)
+        table.set_rows([(f"GP{i:05d}",) for i in range(50000)])
+
+        assert len(table.tree.get_children()) == 10 + VirtualTable.BUFFER_ROWS
+        table.scroll(100)
+        first_item = table.tree.get_children()[0]
+        assert table.tree.item(first_item, 'values') == ('GP00100',)
+
+        table.clear()
+        assert table.tree.get_children() == ()
+
+    def test_selection_follows_data_row(self, tk_root):
+        """测试选中状态跟随数据行，方向键移出窗口时滚动"""
+        table = VirtualTable(tk_root, [('product_type', '产品型号', 200)], height=10)
+        table.set_rows([(f"GP{i:05d}",) for i in range(1000)])
+
+        table.move_cursor(1)
+        table.move_cursor(1)
+        assert table.get_selected_rows() == [('GP00001',)]
+        table.scroll(100)
+        assert table.tree.selection() == ()
+        table.scroll(-100)
+        assert table.tree.item(table.tree.selection()[0], 'values') == ('GP00001',)
+
+        for _ in range(12):
+            table.move_cursor(1)
+        assert table.offset == 4
+        assert table.get_selected_rows() == [('GP00013',)]